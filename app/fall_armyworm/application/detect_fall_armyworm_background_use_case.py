@@ -1,184 +1,133 @@
 from sqlalchemy.orm import Session
-from app.fall_armyworm.infrastructure.orm_models import EstadoMonitoreoEnum
+from app.fall_armyworm.infrastructure.orm_models import EstadoMonitoreoEnum, MonitoreoFitosanitario
 from app.cultural_practices.infrastructure.sql_repository import CulturalPracticesRepository
 from app.cultural_practices.application.services.task_service import TaskService
 from app.plot.infrastructure.sql_repository import PlotRepository
 from app.farm.application.services.farm_service import FarmService
-from app.user.domain.schemas import UserInDB
 from app.infrastructure.common.common_exceptions import DomainException
 from fastapi import status, UploadFile
 from app.infrastructure.common.datetime_utils import datetime_utc_time
 from app.infrastructure.services.cloudinary_service import CloudinaryService
+from app.infrastructure.image_inference.pipeline import (
+    ImageAnalysisType,
+    ImageInferenceJobHandler,
+    ImageInferencePipeline
+)
 from dotenv import load_dotenv
 import os
-import httpx
 import logging
 from app.fall_armyworm.infrastructure.sql_repository import FallArmywormRepository
 from app.fall_armyworm.domain.schemas import (
-    FallArmywormDetectionResult,
+    DetectionResponse,
     FileContent,
     MonitoreoFitosanitarioCreate,
     FallArmywormDetectionCreate,
     PredictionServiceResponse
 )
-from typing import List, Dict
-import math
-import asyncio
+from typing import Callable, List, Optional, Tuple
 from app.infrastructure.db.connection import SessionLocal
-from fastapi import BackgroundTasks
+from app.infrastructure.jobs.file_store import JobFileStore
+from app.infrastructure.jobs.job_queue import JobQueue
 
 load_dotenv(override=True)
 
 logger = logging.getLogger(__name__)
 ARMYWORM_SERVICE_URL = os.getenv('ARMYWORM_SERVICE_URL', 'http://localhost:8080')
-
-class DetectFallArmywormBackgroundUseCase:
+# Tipo de los trabajos de la cola persistente para este análisis
+FALL_ARMYWORM_JOB_TYPE = 'deteccion_gusano_cogollero'
+# Versión del modelo de detección; al cambiarla no se reutilizan predicciones anteriores
+ARMYWORM_MODEL_VERSION = os.getenv('ARMYWORM_MODEL_VERSION', '1')
+
+class FallArmywormAnalysisType(ImageAnalysisType):
+    """Detección de gusano cogollero en el pipeline de inferencia de imágenes"""
+
+    job_type = FALL_ARMYWORM_JOB_TYPE
+    record_id_key = "monitoreo_id"
+    storage_folder = "fall_armyworm"
+    model_version = ARMYWORM_MODEL_VERSION
+    status_enum = EstadoMonitoreoEnum
+    file_content_class = FileContent
+    response_class = DetectionResponse
+    service_response_class = PredictionServiceResponse
+
+    def prediction_url(self) -> str:
+        return f"{ARMYWORM_SERVICE_URL}/fall-armyworm/predict"
+
+    def get_record(self, db: Session, monitoreo_id: int) -> Optional[MonitoreoFitosanitario]:
+        return FallArmywormRepository(db).get_monitoreo_by_id(monitoreo_id)
+
+    def write_results(
+        self,
+        db: Session,
+        monitoreo_id: int,
+        results: List[Tuple[FileContent, DetectionResponse, dict]]
+    ) -> int:
+        FallArmywormRepository(db).bulk_create_detections([
+            FallArmywormDetectionCreate(
+                monitoreo_fitosanitario_id=monitoreo_id,
+                imagen_url=stored["url"],
+                imagen_public_id=stored["public_id"],
+                resultado_deteccion=result.predicted_class,
+                confianza_deteccion=result.confidence,
+                prob_leaf_with_larva=result.probabilities.leaf_with_larva,
+                prob_healthy_leaf=result.probabilities.healthy_leaf,
+                prob_damaged_leaf=result.probabilities.damaged_leaf
+            )
+            for _, result, stored in results
+        ])
+        return len(results)
+
+    def add_batch_progress(self, db: Session, monitoreo_id: int, processed: int, failed: int, cached: int) -> None:
+        FallArmywormRepository(db).add_batch_progress(monitoreo_id, processed, failed, cached)
+
+    def delete_results(self, db: Session, monitoreo_id: int) -> None:
+        FallArmywormRepository(db).delete_detections_by_monitoreo_id(monitoreo_id)
+
+    def save_changes(self, db: Session) -> None:
+        FallArmywormRepository(db).save_changes()
+
+
+fall_armyworm_analysis_type = FallArmywormAnalysisType()
+
+class DetectFallArmywormBackgroundUseCase(ImageInferencePipeline):
     """Caso de uso para procesar detecciones de gusano cogollero"""
 
-    def __init__(self, db: Session):
-        self.db = db
+    def __init__(
+        self,
+        db: Session,
+        session_factory: Callable[[], Session] = SessionLocal,
+        job_queue: Optional[JobQueue] = None,
+        file_store: Optional[JobFileStore] = None
+    ):
+        super().__init__(fall_armyworm_analysis_type, db, session_factory=session_factory)
+        self.job_queue = job_queue or JobQueue()
+        self.file_store = file_store or JobFileStore()
         self.cultural_practices_repository = CulturalPracticesRepository(db)
         self.farm_service = FarmService(db)
         self.plot_repository = PlotRepository(db)
-        self.cloudinary_service = CloudinaryService()
         self.task_service = TaskService(db)
-        self._environment = os.getenv('RAILWAY_ENVIRONMENT_NAME', 'development')
         self.fall_armyworm_repository = FallArmywormRepository(db)
 
-    async def _process_image_batch(
+    def enqueue_images(
         self,
-        batch_files: List[FileContent],
+        files: List[UploadFile],
         task_id: int,
-        monitoreo_id: int,
-        batch_num: int,
-        total_batches: int
+        observations: str,
+        user_id: int
     ):
         """
-        Procesa un lote de imágenes y crea las detecciones correspondientes
-        """
-        try:
-            # Preparar archivos para el servicio de predicción
-            files_to_upload = [
-                ("files", (file.filename, file.content, file.content_type))
-                for file in batch_files
-            ]
-
-            # Obtener predicciones para el lote actual
-            async with httpx.AsyncClient(
-                timeout=httpx.Timeout(60.0),
-                verify=False,
-                follow_redirects=True,
-                transport=httpx.AsyncHTTPTransport(retries=3)
-            ) as client:
-                response = await client.post(
-                    f"{ARMYWORM_SERVICE_URL}/fall-armyworm/predict",
-                    files=files_to_upload
-                )
+        Crea el monitoreo y encola el procesamiento de las imágenes para un worker
 
-            if response.status_code not in [200, 207]:
-                logger.error(f"Error en lote {batch_num + 1}: Status code {response.status_code}")
-                return
-
-            detection_results = PredictionServiceResponse(**response.json())
-
-            # Procesar cada detección del lote
-            for index, result in enumerate(detection_results.results):
-                if result.status == "success":
-                    image_folder = f"{self._environment}/fall_armyworm/task_{task_id}"
-                    
-                    # Subir imagen a Cloudinary
-                    cloudinary_result = await self.cloudinary_service.upload_bytes(
-                        batch_files[index].content,
-                        batch_files[index].filename,
-                        image_folder
-                    )
-                    
-                    # Crear detección individual
-                    self.fall_armyworm_repository.create_detection(
-                        FallArmywormDetectionCreate(
-                            monitoreo_fitosanitario_id=monitoreo_id,
-                            imagen_url=cloudinary_result["url"],
-                            imagen_public_id=cloudinary_result["public_id"],
-                            resultado_deteccion=result.predicted_class,
-                            confianza_deteccion=result.confidence,
-                            prob_leaf_with_larva=result.probabilities.leaf_with_larva,
-                            prob_healthy_leaf=result.probabilities.healthy_leaf,
-                            prob_damaged_leaf=result.probabilities.damaged_leaf
-                        )
-                    )
-
-            # Guardar cambios después de cada lote
-            self.fall_armyworm_repository.save_changes()
-
-        except Exception as e:
-            logger.error(f"Error procesando lote {batch_num + 1}/{total_batches}: {str(e)}")
-            
-    async def _process_batches(
-        self,
-        files_content: List[FileContent],
-        task_id: int,
-        monitoreo_id: int
-    ):
-        """
-        Procesa todos los lotes de imágenes
+        Las imágenes se copian al almacén de archivos de trabajos y el
+        procesamiento lo realiza `python -m app.infrastructure.jobs.worker`, de
+        modo que los procesos de la API no procesan imágenes.
         """
-        try:
-            batch_size = 15
-            total_batches = math.ceil(len(files_content) / batch_size)
-
-            for batch_num in range(total_batches):
-                start_idx = batch_num * batch_size
-                end_idx = min((batch_num + 1) * batch_size, len(files_content))
-                batch_files = files_content[start_idx:end_idx]
-
-                await self._process_image_batch(
-                    batch_files,
-                    task_id,
-                    monitoreo_id,
-                    batch_num,
-                    total_batches
-                )
-
-                await asyncio.sleep(1)
+        # Sin el volumen compartido con los workers no se crea el registro
+        self.file_store.ensure_configured()
 
-            # Actualizar estado del monitoreo al finalizar todos los lotes
-            with SessionLocal() as db:
-                fall_armyworm_repository = FallArmywormRepository(db)
-                monitoreo = fall_armyworm_repository.get_monitoreo_by_id(monitoreo_id)
-                if monitoreo:
-                    total_detections = len(fall_armyworm_repository.get_detections_by_monitoreo_id(monitoreo_id))
-                    if total_detections == 0:
-                        monitoreo.estado = EstadoMonitoreoEnum.failed
-                    elif total_detections < monitoreo.cantidad_imagenes:
-                        monitoreo.estado = EstadoMonitoreoEnum.partial
-                    else:
-                        monitoreo.estado = EstadoMonitoreoEnum.completed
-                    fall_armyworm_repository.save_changes()
-
-        except Exception as e:
-            logger.error(f"Error procesando lotes: {str(e)}")
-            # Actualizar estado a fallido en caso de error
-            with SessionLocal() as db:
-                fall_armyworm_repository = FallArmywormRepository(db)
-                monitoreo = fall_armyworm_repository.get_monitoreo_by_id(monitoreo_id)
-                if monitoreo:
-                    monitoreo.estado = EstadoMonitoreoEnum.failed
-                    fall_armyworm_repository.save_changes()
-
-    async def process_images_in_background(
-        self,
-        files_content: List[FileContent],
-        task_id: int,
-        observations: str,
-        user_id: int,
-        background_tasks: BackgroundTasks
-    ):
-        """
-        Procesa imágenes en lotes de 15 en segundo plano
-        """
         try:
             # Crear una nueva sesión de base de datos
-            db = SessionLocal()
+            db = self.session_factory()
             try:
                 # Inicializar los repositorios y servicios con la nueva sesión
                 self.db = db
@@ -210,28 +159,30 @@ class DetectFallArmywormBackgroundUseCase:
                         fecha_monitoreo=datetime_utc_time(),
                         observaciones=observations,
                         estado=EstadoMonitoreoEnum.processing,
-                        cantidad_imagenes=len(files_content)
+                        cantidad_imagenes=len(files)
                     )
                 )
                 
-                # Importante: Hacer commit de la transacción antes de iniciar el proceso en segundo plano
+                # Importante: Hacer commit de la transacción antes de encolar el procesamiento
                 self.fall_armyworm_repository.save_changes()
                 
                 monitoring_id = monitoreo.id
 
-                # Agregar el procesamiento de lotes como tarea en segundo plano
-                background_tasks.add_task(
-                    self._process_batches,
-                    files_content,
-                    task_id,
-                    monitoring_id  # Usar el ID del monitoreo creado
+                # Guardar las imágenes y encolar el procesamiento
+                stored_files = self.file_store.save([
+                    (file.filename, file.content_type, file.file) for file in files
+                ])
+                self.job_queue.enqueue(
+                    FALL_ARMYWORM_JOB_TYPE,
+                    {"task_id": task_id, "monitoreo_id": monitoring_id, "files": stored_files},
+                    reference_id=monitoring_id
                 )
 
                 return {
                     "monitoring_id": monitoring_id,
                     "status": "processing",
-                    "message": f"Procesando {len(files_content)} imágenes en segundo plano",
-                    "total_images": len(files_content)
+                    "message": f"Procesando {len(files)} imágenes en segundo plano",
+                    "total_images": len(files)
                 }
 
             finally:
@@ -240,11 +191,34 @@ class DetectFallArmywormBackgroundUseCase:
         except Exception as e:
             logger.error(f"Error en proceso background: {str(e)}")
             try:
-                with SessionLocal() as db:
+                with self.session_factory() as db:
                     fall_armyworm_repository = FallArmywormRepository(db)
                     monitoreo = fall_armyworm_repository.get_monitoreo_by_task_id(task_id)
                     if monitoreo:
                         monitoreo.estado = EstadoMonitoreoEnum.failed
                         fall_armyworm_repository.save_changes()
             except Exception as e:
-                logger.error(f"Error actualizando estado a failed: {str(e)}")
\ No newline at end of file
+                logger.error(f"Error actualizando estado a failed: {str(e)}")
+            raise
+
+
+class FallArmywormDetectionJobHandler(ImageInferenceJobHandler):
+    """Procesa en un worker los monitoreos encolados por `DetectFallArmywormBackgroundUseCase`"""
+
+    job_type = FALL_ARMYWORM_JOB_TYPE
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        file_store: Optional[JobFileStore] = None,
+        cloudinary_service: Optional[CloudinaryService] = None
+    ):
+        super().__init__(
+            fall_armyworm_analysis_type,
+            session_factory=session_factory,
+            file_store=file_store,
+            cloudinary_service=cloudinary_service
+        )
+
+    def create_pipeline(self, db: Session) -> DetectFallArmywormBackgroundUseCase:
+        return DetectFallArmywormBackgroundUseCase(db, session_factory=self.session_factory)
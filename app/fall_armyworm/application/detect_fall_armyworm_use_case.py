@@ -9,22 +9,19 @@ from app.infrastructure.common.common_exceptions import DomainException
 from fastapi import status, UploadFile
 from app.infrastructure.common.datetime_utils import datetime_utc_time
 from app.infrastructure.services.cloudinary_service import CloudinaryService
+from app.infrastructure.image_inference.http_client import get_shared_http_client
+from app.infrastructure.services.prediction_client import global_prediction_slots
 from dotenv import load_dotenv
 import os
 import httpx
 import logging
 from app.fall_armyworm.infrastructure.sql_repository import FallArmywormRepository
+from app.fall_armyworm.application.detect_fall_armyworm_background_use_case import fall_armyworm_analysis_type
 from app.fall_armyworm.domain.schemas import (
     FallArmywormDetectionResult,
-    FileContent,
     MonitoreoFitosanitarioCreate,
-    FallArmywormDetectionCreate,
     PredictionServiceResponse
 )
-from typing import List, Dict
-import math
-import asyncio
-from app.infrastructure.db.connection import SessionLocal
 
 load_dotenv(override=True)
 
@@ -120,38 +117,36 @@ class DetectFallArmywormUseCase:
         service_url = f"{ARMYWORM_SERVICE_URL}/fall-armyworm/predict"
         logger.info(f"Making request to: {service_url}")
         
-        async with httpx.AsyncClient(
-            timeout=httpx.Timeout(60.0),
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
-            verify=False,
-            follow_redirects=True,
-            transport=httpx.AsyncHTTPTransport(retries=3)
-        ) as client:
-            try:
-                files_to_upload = [
-                    ("files", (file.filename, await file.read(), file.content_type))
-                    for file in files
-                ]
-                
-                logger.info("Sending files to prediction service...")
+        # Se reutiliza el grupo de conexiones compartido con el procesamiento en segundo plano
+        client = get_shared_http_client()
+        try:
+            # Los archivos subidos ya están en archivos temporales; se envían por partes sin leerlos completos
+            files_to_upload = [
+                ("files", (file.filename, file.file, file.content_type))
+                for file in files
+            ]
+            
+            logger.info("Sending files to prediction service...")
+            # Cuenta para el límite de peticiones simultáneas de todos los análisis
+            async with global_prediction_slots():
                 response = await client.post(
                     service_url,
                     files=files_to_upload
                 )
-                logger.info(f"Response status code: {response.status_code}")
-                
-            except httpx.ConnectError as e:
-                logger.error(f"Connection error: {str(e)}")
-                raise DomainException(
-                    message=f"No se pudo conectar al servicio de análisis: {str(e)}",
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-                )
-            except httpx.TimeoutException as e:
-                logger.error(f"Timeout error: {str(e)}")
-                raise DomainException(
-                    message="El servicio de análisis tardó demasiado en responder",
-                    status_code=status.HTTP_504_GATEWAY_TIMEOUT
-                )
+            logger.info(f"Response status code: {response.status_code}")
+            
+        except httpx.ConnectError as e:
+            logger.error(f"Connection error: {str(e)}")
+            raise DomainException(
+                message=f"No se pudo conectar al servicio de análisis: {str(e)}",
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except httpx.TimeoutException as e:
+            logger.error(f"Timeout error: {str(e)}")
+            raise DomainException(
+                message="El servicio de análisis tardó demasiado en responder",
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT
+            )
 
         if response.status_code not in [200, 207]:
             raise DomainException(
@@ -190,36 +185,33 @@ class DetectFallArmywormUseCase:
             )
         )
 
-        # Procesar cada detección individual
-        for index, result in enumerate(detection_results.results):
-            if result.status == "success":
-                # Generar ruta incluyendo el entorno
-                image_folder = f"{self._environment}/fall_armyworm/task_{task_id}"
-                
-                # Subir imagen a Cloudinary
-                cloudinary_result = await self.cloudinary_service.upload_image(
-                    files[index],
-                    image_folder
-                )
+        # Generar ruta incluyendo el entorno
+        image_folder = f"{self._environment}/fall_armyworm/task_{task_id}"
 
-                self.fall_armyworm_repository.create_detection(
-                    FallArmywormDetectionCreate(
-                        monitoreo_fitosanitario_id=monitoreo.id,
-                        imagen_url=cloudinary_result["url"],
-                        imagen_public_id=cloudinary_result["public_id"],
-                        resultado_deteccion=result.predicted_class,
-                        confianza_deteccion=result.confidence,
-                        prob_leaf_with_larva=result.probabilities.leaf_with_larva,
-                        prob_healthy_leaf=result.probabilities.healthy_leaf,
-                        prob_damaged_leaf=result.probabilities.damaged_leaf
-                    )
-                )
+        # Subir a Cloudinary, varias a la vez, las imágenes detectadas con éxito
+        successful = [
+            (index, result) for index, result in enumerate(detection_results.results)
+            if result.status == "success"
+        ]
+        cloudinary_results = await self.cloudinary_service.upload_many(
+            [(files[index].file, files[index].filename) for index, _ in successful],
+            image_folder
+        )
+
+        # Guardar todas las detecciones con una sola inserción, igual que en el procesamiento en segundo plano
+        total_detections = fall_armyworm_analysis_type.write_results(self.db, monitoreo.id, [
+            (files[index], result, cloudinary_result)
+            for (index, result), cloudinary_result in zip(successful, cloudinary_results)
+            # Las imágenes que no se pudieron subir se cuentan como fallidas
+            if not isinstance(cloudinary_result, Exception)
+        ])
 
         self.fall_armyworm_repository.save_changes()
         
         # Actualizar estado del monitoreo
         try:
-            total_detections = len(self.fall_armyworm_repository.get_detections_by_monitoreo_id(monitoreo.id))
+            monitoreo.imagenes_procesadas = total_detections
+            monitoreo.imagenes_fallidas = monitoreo.cantidad_imagenes - total_detections
             if total_detections == 0:
                 monitoreo.estado = EstadoMonitoreoEnum.failed
             elif total_detections < monitoreo.cantidad_imagenes:
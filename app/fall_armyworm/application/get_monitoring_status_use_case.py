@@ -1,5 +1,6 @@
 from fastapi import status
 from sqlalchemy.orm import Session
+from app.fall_armyworm.infrastructure.orm_models import EstadoMonitoreoEnum
 from app.fall_armyworm.infrastructure.sql_repository import FallArmywormRepository
 from app.infrastructure.common.common_exceptions import DomainException     
         
@@ -18,10 +19,21 @@ class GetMonitoringStatusUseCase:
                 status_code=status.HTTP_404_NOT_FOUND
             )
             
-        detections = self.fall_armyworm_repository.get_detections_by_monitoreo_id(monitoreo.id)
+        cached_images = monitoreo.imagenes_desde_cache or 0
+        total_processed = monitoreo.imagenes_procesadas or 0
+        total_failed = monitoreo.imagenes_fallidas or 0
+
+        # Los monitoreos terminados antes de existir los contadores los tienen en 0: se cuentan sus detecciones
+        if monitoreo.estado != EstadoMonitoreoEnum.processing and total_processed == total_failed == cached_images == 0:
+            total_processed = self.fall_armyworm_repository.count_detections_by_monitoreo_id(monitoreo.id)
+            total_failed = max(monitoreo.cantidad_imagenes - total_processed, 0)
         
         return {
             "status": monitoreo.estado.value,
-            "total_processed": len(detections),
+            "total_processed": total_processed,
+            "total_failed": total_failed,
+            "total_images": monitoreo.cantidad_imagenes,
+            "cached_images": cached_images,
+            "cache_hit_rate": round(cached_images / monitoreo.cantidad_imagenes, 4) if monitoreo.cantidad_imagenes else 0.0,
             "monitoring_id": monitoreo.id
         }
\ No newline at end of file
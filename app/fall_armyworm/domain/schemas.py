@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+import io
+from typing import BinaryIO, Optional, List, Union
 from datetime import datetime
 from typing_extensions import Annotated
 from dataclasses import dataclass
@@ -50,8 +51,27 @@ class FallArmywormDetectionCreate(BaseModel):
 @dataclass
 class FileContent:
     filename: str
-    content: bytes
+    content: Optional[bytes]
     content_type: str
+    # Ruta en disco cuando la imagen no se carga en memoria
+    path: Optional[str] = None
+    # Versión reducida a la resolución del modelo, si la imagen se normalizó
+    model_content: Optional[bytes] = None
+    # SHA-256 del contenido, para reutilizar predicciones de imágenes repetidas
+    content_hash: Optional[str] = None
+
+    def open(self) -> BinaryIO:
+        """Abre la imagen para enviarla por partes, sin leerla completa."""
+        return io.BytesIO(self.content) if self.content is not None else open(self.path, 'rb')
+
+    def open_for_model(self) -> BinaryIO:
+        """Abre la versión de la imagen que se envía al servicio de predicción."""
+        return io.BytesIO(self.model_content) if self.model_content is not None else self.open()
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """Contenido en memoria o ruta de la imagen, como lo acepta `CloudinaryService`."""
+        return self.content if self.content is not None else self.path
 
 class DetectionResult(BaseModel):
     id: int
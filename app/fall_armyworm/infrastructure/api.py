@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status, Form
+from fastapi.concurrency import run_in_threadpool
 from typing import List
 from fastapi.responses import JSONResponse
 import httpx
@@ -7,12 +8,13 @@ from sqlalchemy.orm import Session
 from app.fall_armyworm.application.detect_fall_armyworm_background_use_case import DetectFallArmywormBackgroundUseCase
 from app.fall_armyworm.application.get_monitoring_status_use_case import GetMonitoringStatusUseCase
 from app.fall_armyworm.application.get_monitoring_use_case import GetMonitoringUseCase
-from app.fall_armyworm.domain.schemas import FileContent, MonitoreoFitosanitarioResult
+from app.fall_armyworm.domain.schemas import MonitoreoFitosanitarioResult
 from app.infrastructure.db.connection import getDb, SessionLocal
 from app.infrastructure.security.jwt_middleware import get_current_user
 from app.user.domain.schemas import UserInDB
 from app.fall_armyworm.application.detect_fall_armyworm_use_case import DetectFallArmywormUseCase
 from app.infrastructure.common.common_exceptions import DomainException
+from app.infrastructure.utils.progress_events import progress_event_response
 import os
 from dotenv import load_dotenv
 from app.logs.application.decorators.log_decorator import log_activity
@@ -46,7 +48,6 @@ router = APIRouter(prefix="/fall-armyworm", tags=["fall armyworm analysis"])
 )
 async def predict_images(
     request: Request,
-    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
     task_id: int = Form(...),
     observations: str = Form(None),
@@ -63,17 +64,6 @@ async def predict_images(
     """
 
     try:
-        # Leer el contenido de los archivos antes de que termine la solicitud
-        files_content = []
-        for file in files:
-            content = await file.read()
-            files_content.append(FileContent(
-                filename=file.filename,
-                content=content,
-                content_type=file.content_type
-            ))
-            await file.seek(0)
-
         # Obtener user_id en lugar de current_user completo
         user_id = current_user.id
 
@@ -87,15 +77,16 @@ async def predict_images(
                 current_user=current_user
             )
         else:
-            # Procesar en segundo plano
+            # Encolar el procesamiento en segundo plano
             detect_fall_armyworm_background_use_case = DetectFallArmywormBackgroundUseCase(None)
             
-            return await detect_fall_armyworm_background_use_case.process_images_in_background(
-                files_content=files_content,
+            # Las imágenes se guardan y las procesa el worker de la cola de trabajos
+            return await run_in_threadpool(
+                detect_fall_armyworm_background_use_case.enqueue_images,
+                files=files,
                 task_id=task_id,
                 observations=observations,
-                user_id=user_id,
-                background_tasks=background_tasks
+                user_id=user_id
             )
             
     except DomainException as e:
@@ -159,6 +150,36 @@ async def get_monitoring_status(
             detail=f"Error consultando estado: {str(e)}"
         ) from e
 
+@router.get("/monitoring/{monitoring_id}/events")
+@log_activity(
+    action_type=LogActionType.VIEW,
+    table_name="monitoreo_fitosanitario",
+    severity=LogSeverity.INFO,
+    description="Suscripción al progreso del análisis de gusano cogollero",
+    get_record_id=lambda *args, **kwargs: kwargs.get('monitoring_id')
+)
+async def stream_monitoring_status(
+    request: Request,
+    monitoring_id: int,
+    db: Session = Depends(getDb),
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """
+    Envía el progreso del procesamiento de imágenes como Server-Sent Events a medida que se guardan los lotes
+    """
+    # Valida que el monitoreo exista antes de abrir el stream
+    GetMonitoringStatusUseCase(db).get_monitoring_status(monitoring_id)
+
+    def read_progress():
+        # La sesión de la petición se cierra antes de que termine el stream
+        with SessionLocal() as session:
+            try:
+                return GetMonitoringStatusUseCase(session).get_monitoring_status(monitoring_id)
+            except DomainException:
+                return None
+
+    return progress_event_response(request, read_progress)
+
 @router.get("/monitoring/{monitoring_id}", response_model=MonitoreoFitosanitarioResult)
 @log_activity(
     action_type=LogActionType.VIEW,
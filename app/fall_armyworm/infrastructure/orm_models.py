@@ -32,6 +32,11 @@ class MonitoreoFitosanitario(Base):
         default=EstadoMonitoreoEnum.processing
     )
     cantidad_imagenes = Column(Integer, nullable=False, default=0)
+    # Imágenes cuya predicción se reutilizó de la caché de predicciones
+    imagenes_desde_cache = Column(Integer, nullable=False, default=0)
+    # Progreso del procesamiento, actualizado al guardar cada lote
+    imagenes_procesadas = Column(Integer, nullable=False, default=0)
+    imagenes_fallidas = Column(Integer, nullable=False, default=0)
 
 class FallArmywormDetection(Base):
     """Modelo para detecciones individuales de gusano cogollero"""
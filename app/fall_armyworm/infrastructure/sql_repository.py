@@ -1,4 +1,5 @@
 from typing import List, Optional
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.fall_armyworm.infrastructure.orm_models import MonitoreoFitosanitario, FallArmywormDetection
 from app.infrastructure.common.common_exceptions import DomainException
@@ -20,6 +21,11 @@ class FallArmywormRepository:
         self.db.add(detection)
         return detection
 
+    def bulk_create_detections(self, detections: List[FallArmywormDetectionCreate]) -> None:
+        """Crea varias detecciones con una sola sentencia INSERT de varias filas."""
+        if detections:
+            self.db.execute(insert(FallArmywormDetection), [detection.model_dump() for detection in detections])
+
     def save_changes(self):
         try:
             self.db.commit()
@@ -45,6 +51,28 @@ class FallArmywormRepository:
             .filter(FallArmywormDetection.monitoreo_fitosanitario_id == monitoreo_id)\
             .all()
 
+    def count_detections_by_monitoreo_id(self, monitoreo_id: int) -> int:
+        return self.db.query(FallArmywormDetection)\
+            .filter(FallArmywormDetection.monitoreo_fitosanitario_id == monitoreo_id)\
+            .count()
+
+    def add_batch_progress(self, monitoreo_id: int, processed: int, failed: int = 0, cached: int = 0) -> None:
+        self.db.query(MonitoreoFitosanitario)\
+            .filter(MonitoreoFitosanitario.id == monitoreo_id)\
+            .update(
+                {
+                    MonitoreoFitosanitario.imagenes_procesadas: MonitoreoFitosanitario.imagenes_procesadas + processed,
+                    MonitoreoFitosanitario.imagenes_fallidas: MonitoreoFitosanitario.imagenes_fallidas + failed,
+                    MonitoreoFitosanitario.imagenes_desde_cache: MonitoreoFitosanitario.imagenes_desde_cache + cached
+                },
+                synchronize_session=False
+            )
+
+    def delete_detections_by_monitoreo_id(self, monitoreo_id: int) -> int:
+        return self.db.query(FallArmywormDetection)\
+            .filter(FallArmywormDetection.monitoreo_fitosanitario_id == monitoreo_id)\
+            .delete(synchronize_session=False)
+
     def get_monitoreo_with_detections(self, monitoreo_id: int) -> tuple[Optional[MonitoreoFitosanitario], List[FallArmywormDetection]]:
         monitoreo = self.db.query(MonitoreoFitosanitario)\
             .filter(MonitoreoFitosanitario.id == monitoreo_id)\
@@ -43,3 +43,11 @@ def db_utc_time() -> datetime:
     utc_time = func.timezone('UTC', func.current_timestamp())
     return utc_time
 
+def current_utc_hour() -> datetime:
+    """
+    Obtiene el inicio de la hora actual en UTC.
+
+    Returns:
+        datetime: Hora actual en UTC con minutos, segundos y microsegundos en cero.
+    """
+    return datetime_utc_time().replace(minute=0, second=0, microsecond=0)
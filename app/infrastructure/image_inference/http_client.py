@@ -0,0 +1,55 @@
+import asyncio
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+import httpx
+
+load_dotenv(override=True)
+
+# Conexiones simultáneas del cliente compartido por todos los análisis de imágenes del proceso
+IMAGE_INFERENCE_MAX_CONNECTIONS = int(os.getenv('IMAGE_INFERENCE_MAX_CONNECTIONS', 20))
+IMAGE_INFERENCE_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('IMAGE_INFERENCE_MAX_KEEPALIVE_CONNECTIONS', 10))
+IMAGE_INFERENCE_TIMEOUT_SECONDS = float(os.getenv('IMAGE_INFERENCE_TIMEOUT_SECONDS', 60))
+# Verificación de los certificados TLS de los servicios de predicción; solo se desactiva explícitamente
+IMAGE_INFERENCE_VERIFY_TLS = os.getenv('IMAGE_INFERENCE_VERIFY_TLS', 'true').lower() != 'false'
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_shared_http_client() -> httpx.AsyncClient:
+    """Cliente HTTP de los servicios de predicción, compartido por todos los análisis.
+
+    Reutilizar un único grupo de conexiones evita abrir una conexión nueva por
+    análisis o por petición síncrona y limita las conexiones del proceso a
+    `IMAGE_INFERENCE_MAX_CONNECTIONS`. Un cliente pertenece a un bucle de
+    eventos, por lo que se crea uno nuevo si cambia el bucle.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        # Con un transporte propio, httpx toma los límites y la verificación del transporte
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(IMAGE_INFERENCE_TIMEOUT_SECONDS),
+            follow_redirects=True,
+            transport=httpx.AsyncHTTPTransport(
+                retries=3,
+                verify=IMAGE_INFERENCE_VERIFY_TLS,
+                limits=httpx.Limits(
+                    max_keepalive_connections=IMAGE_INFERENCE_MAX_KEEPALIVE_CONNECTIONS,
+                    max_connections=IMAGE_INFERENCE_MAX_CONNECTIONS
+                )
+            )
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_shared_http_client() -> None:
+    """Cierra el cliente compartido, al detener el proceso."""
+    global _client, _client_loop
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+    _client_loop = None
@@ -0,0 +1,456 @@
+from abc import ABC, abstractmethod
+from dataclasses import replace
+from typing import Any, Callable, List, Optional, Tuple, Type
+import asyncio
+import json
+import logging
+import math
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.infrastructure.db.connection import SessionLocal
+from app.infrastructure.image_inference.http_client import get_shared_http_client
+from app.infrastructure.jobs.file_store import JobFileStore
+from app.infrastructure.jobs.job_queue import ClaimedJob
+from app.infrastructure.jobs.worker import JobHandler
+from app.infrastructure.prediction_cache.orm_models import PredictionCacheEntry
+from app.infrastructure.prediction_cache.sql_repository import PredictionCacheRepository
+from app.infrastructure.services.cloudinary_service import CloudinaryService
+from app.infrastructure.services.image_normalization_service import ImageNormalizationService, content_sha256
+from app.infrastructure.services.prediction_client import AdaptivePredictionClient
+from app.infrastructure.utils.staged_pipeline import PipelineStage, run_staged_pipeline
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+# Lotes que pueden esperar entre la predicción, la subida y el guardado
+IMAGE_PIPELINE_QUEUE_SIZE = int(os.getenv('IMAGE_PIPELINE_QUEUE_SIZE', 2))
+
+
+class ImageAnalysisType(ABC):
+    """Configuración de un tipo de análisis de imágenes para el pipeline de inferencia.
+
+    Cada tipo de análisis define su servicio de predicción, cómo interpretar sus
+    respuestas y cómo guardar sus resultados; el pipeline, el cliente HTTP, los
+    grupos de procesos e hilos y la política de lotes son comunes a todos. Las
+    subclases definen las propiedades abstractas como atributos de clase.
+
+    El registro del análisis debe tener las columnas `estado`, `cantidad_imagenes`,
+    `imagenes_procesadas`, `imagenes_fallidas` e `imagenes_desde_cache`.
+    """
+
+    @property
+    @abstractmethod
+    def job_type(self) -> str:
+        """Tipo de trabajo en la cola y de análisis en la caché de predicciones."""
+
+    @property
+    @abstractmethod
+    def record_id_key(self) -> str:
+        """Clave del ID del registro del análisis en el payload del trabajo."""
+
+    @property
+    @abstractmethod
+    def storage_folder(self) -> str:
+        """Carpeta de Cloudinary de las imágenes, dentro del entorno."""
+
+    @property
+    @abstractmethod
+    def model_version(self) -> str:
+        """Versión del modelo; al cambiarla no se reutilizan predicciones anteriores."""
+
+    @property
+    @abstractmethod
+    def status_enum(self) -> Type:
+        """Enum de estados del registro, con `processing`, `completed`, `partial` y `failed`."""
+
+    @property
+    @abstractmethod
+    def file_content_class(self) -> Type:
+        """Clase de las imágenes del dominio (`FileContent`)."""
+
+    @property
+    @abstractmethod
+    def response_class(self) -> Type:
+        """Modelo del resultado de una imagen."""
+
+    @property
+    @abstractmethod
+    def service_response_class(self) -> Type:
+        """Modelo de la respuesta del servicio, con `results`."""
+
+    @abstractmethod
+    def prediction_url(self) -> str:
+        """URL del endpoint de predicción."""
+
+    def parse_results(self, body: dict) -> List[Any]:
+        """Resultados de una respuesta del servicio, en el orden de las imágenes."""
+        return self.service_response_class(**body).results
+
+    def result_from_cache(self, filename: str, entry: PredictionCacheEntry) -> Any:
+        """Resultado de una imagen a partir de su entrada en la caché de predicciones."""
+        return self.response_class(
+            filename=filename,
+            status="success",
+            predicted_class=entry.clase_predicha,
+            confidence=entry.confianza,
+            probabilities=json.loads(entry.probabilidades)
+        )
+
+    def cached_class(self, result: Any) -> str:
+        """Clase predicha tal como se guarda en la caché de predicciones."""
+        return getattr(result.predicted_class, 'value', result.predicted_class)
+
+    @abstractmethod
+    def get_record(self, db: Session, record_id: int):
+        """Registro del análisis."""
+
+    @abstractmethod
+    def write_results(self, db: Session, record_id: int, results: List[Tuple[Any, Any, dict]]) -> int:
+        """Agrega a la sesión los resultados de un lote, con una sola inserción.
+
+        Args:
+            results: Imagen (con `filename`), resultado e imagen almacenada de cada imagen
+
+        Returns:
+            int: Resultados guardados; las imágenes omitidas se cuentan como fallidas
+        """
+
+    @abstractmethod
+    def add_batch_progress(self, db: Session, record_id: int, processed: int, failed: int, cached: int) -> None:
+        """Suma el progreso de un lote a los contadores del registro."""
+
+    @abstractmethod
+    def delete_results(self, db: Session, record_id: int) -> None:
+        """Elimina los resultados guardados por un intento anterior."""
+
+    @abstractmethod
+    def save_changes(self, db: Session) -> None:
+        """Confirma la transacción."""
+
+
+class ImageInferencePipeline:
+    """Procesa en segundo plano las imágenes de un análisis por lotes.
+
+    La normalización, la predicción, la subida a Cloudinary y el guardado de cada
+    lote son etapas separadas que se ejecutan en paralelo. Todos los tipos de
+    análisis comparten el cliente HTTP, el grupo de procesos de normalización, el
+    grupo de hilos de subida y los límites de peticiones al servicio de predicción.
+
+    Attributes:
+        analysis_type (ImageAnalysisType): Tipo de análisis que se procesa.
+        db (Session): Sesión de base de datos usada para guardar los lotes.
+        session_factory (Callable[[], Session]): Crea sesiones para actualizar el estado final.
+        prediction_url (str): URL del endpoint de predicción.
+    """
+
+    def __init__(
+        self,
+        analysis_type: ImageAnalysisType,
+        db: Session,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.analysis_type = analysis_type
+        self.db = db
+        self.session_factory = session_factory
+        self.cloudinary_service = CloudinaryService()
+        self.image_normalization_service = ImageNormalizationService()
+        self.prediction_cache_repository = PredictionCacheRepository(db)
+        self.prediction_client = AdaptivePredictionClient()
+        self.prediction_url = analysis_type.prediction_url()
+        self._environment = os.getenv('RAILWAY_ENVIRONMENT_NAME', 'development')
+
+    async def _normalize_batch(self, batch_files: List[Any]) -> List[Any]:
+        """
+        Reduce las imágenes de un lote a la resolución del modelo y a la de almacenamiento
+
+        Las imágenes que no se pueden normalizar se envían tal como se subieron.
+        Cada imagen queda identificada por el SHA-256 de su contenido.
+        """
+        normalized = await self.image_normalization_service.normalize_many([file.source for file in batch_files])
+        files = []
+        for file, image in zip(batch_files, normalized):
+            if image:
+                files.append(replace(
+                    file,
+                    content=image.storage_content,
+                    content_type="image/jpeg",
+                    path=None,
+                    model_content=image.model_content,
+                    content_hash=image.content_hash
+                ))
+            else:
+                files.append(replace(file, content_hash=await asyncio.to_thread(content_sha256, file.source)))
+        return files
+
+    async def _predict_batch(
+        self,
+        client,
+        batch_files: List[Any],
+        batch_num: int,
+        total_batches: int
+    ) -> List[Tuple[Any, Any, Optional[dict]]]:
+        """
+        Obtiene las predicciones de un lote de imágenes
+
+        Las imágenes que ya están en la caché de predicciones no se envían al
+        servicio: se reutilizan su resultado y la imagen ya almacenada.
+
+        Returns:
+            List[Tuple[Any, Any, Optional[dict]]]: Imágenes predichas con éxito, su
+            resultado y, si vienen de la caché, la imagen almacenada
+        """
+        cached = self.prediction_cache_repository.get_entries(
+            self.analysis_type.job_type,
+            self.analysis_type.model_version,
+            [file.content_hash for file in batch_files]
+        )
+        predictions = [
+            (
+                file,
+                self.analysis_type.result_from_cache(file.filename, cached[file.content_hash]),
+                {"url": cached[file.content_hash].imagen_url, "public_id": cached[file.content_hash].imagen_public_id}
+            )
+            for file in batch_files if file.content_hash in cached
+        ]
+        pending_files = [file for file in batch_files if file.content_hash not in cached]
+        if not pending_files:
+            return predictions
+
+        # El cliente divide las imágenes en lotes según la carga del servicio y reintenta las que fallan
+        predicted = await self.prediction_client.predict(
+            client,
+            self.prediction_url,
+            pending_files,
+            self.analysis_type.parse_results
+        )
+        if len(predicted) < len(pending_files):
+            logger.error(
+                f"Lote {batch_num + 1}/{total_batches}: {len(pending_files) - len(predicted)} imágenes sin predicción"
+            )
+        predictions.extend((file, result, None) for file, result in predicted)
+        return predictions
+
+    async def _upload_batch(
+        self,
+        predictions: List[Tuple[Any, Any, Optional[dict]]],
+        task_id: int
+    ) -> List[Tuple[Any, Any, dict, bool]]:
+        """
+        Sube a Cloudinary, varias a la vez, las imágenes predichas de un lote que no estaban en la caché
+
+        Las imágenes que no se pudieron subir se omiten del resultado, sin descartar
+        el resto del lote.
+
+        Returns:
+            List[Tuple[Any, Any, dict, bool]]: Imagen, resultado, imagen almacenada y
+            si la predicción vino de la caché
+        """
+        image_folder = f"{self._environment}/{self.analysis_type.storage_folder}/task_{task_id}"
+        cloudinary_results = iter(await self.cloudinary_service.upload_many(
+            [(file.source, file.filename) for file, _, stored in predictions if stored is None],
+            image_folder
+        ))
+        uploaded = []
+        for file, result, stored in predictions:
+            if stored is None:
+                stored = next(cloudinary_results)
+                if isinstance(stored, Exception):
+                    logger.error(f"Error subiendo {file.filename}: {str(stored)}")
+                    continue
+                uploaded.append((file, result, stored, False))
+            else:
+                uploaded.append((file, result, stored, True))
+        return uploaded
+
+    def _persist_batch(self, uploaded: List[Tuple[Any, Any, dict, bool]], record_id: int, failed_images: int = 0):
+        """
+        Guarda los resultados de un lote, actualiza el progreso, confirma los cambios y agrega a la caché las imágenes nuevas
+
+        Args:
+            failed_images: Imágenes del lote que no se pudieron predecir
+        """
+        written = self.analysis_type.write_results(
+            self.db,
+            record_id,
+            [(file, result, cloudinary_result) for file, result, cloudinary_result, _ in uploaded]
+        )
+        cached_images = sum(1 for *_, from_cache in uploaded if from_cache)
+        self.analysis_type.add_batch_progress(
+            self.db,
+            record_id,
+            written,
+            failed_images + len(uploaded) - written,
+            cached_images
+        )
+
+        # Guardar cambios después de cada lote
+        self.analysis_type.save_changes(self.db)
+
+        self.prediction_cache_repository.add_entries(self.analysis_type.job_type, self.analysis_type.model_version, [
+            {
+                "hash_imagen": file.content_hash,
+                "clase_predicha": self.analysis_type.cached_class(result),
+                "confianza": result.confidence,
+                "probabilidades": result.probabilities.model_dump(),
+                "imagen_url": cloudinary_result["url"],
+                "imagen_public_id": cloudinary_result["public_id"]
+            }
+            for file, result, cloudinary_result, from_cache in uploaded if not from_cache
+        ])
+
+    def _set_failed(self, record_id: int) -> None:
+        with self.session_factory() as db:
+            record = self.analysis_type.get_record(db, record_id)
+            if record:
+                record.estado = self.analysis_type.status_enum.failed
+                self.analysis_type.save_changes(db)
+
+    async def process_batches(self, files_content: List[Any], task_id: int, record_id: int):
+        """
+        Procesa todos los lotes de imágenes y devuelve el estado final del registro
+
+        Mientras un lote se sube, el siguiente ya se está prediciendo. Cada lote
+        tiene el tamaño máximo de petición; el cliente de predicción lo divide
+        según la carga del servicio.
+
+        Args:
+            files_content: Imágenes del análisis
+            task_id: ID de la tarea, usado en la carpeta de Cloudinary
+            record_id: ID del registro del análisis
+
+        Returns:
+            Estado final del registro, del enum `status_enum` del tipo de análisis
+        """
+        status_enum = self.analysis_type.status_enum
+        try:
+            controller = self.prediction_client.controller_for(self.prediction_url)
+            batch_size = controller.max_batch_size
+            total_batches = math.ceil(len(files_content) / batch_size)
+            batches = [
+                (batch_num, files_content[batch_num * batch_size:(batch_num + 1) * batch_size])
+                for batch_num in range(total_batches)
+            ]
+            client = get_shared_http_client()
+
+            async def normalize(batch):
+                batch_num, batch_files = batch
+                return batch_num, await self._normalize_batch(batch_files)
+
+            async def predict(batch):
+                batch_num, batch_files = batch
+                predictions = await self._predict_batch(client, batch_files, batch_num, total_batches)
+                return predictions, len(batch_files) - len(predictions)
+
+            async def upload(batch):
+                predictions, failed_images = batch
+                uploaded = await self._upload_batch(predictions, task_id)
+                return uploaded, failed_images + len(predictions) - len(uploaded)
+
+            async def persist(batch):
+                uploaded, failed_images = batch
+                self._persist_batch(uploaded, record_id, failed_images)
+
+            await run_staged_pipeline(
+                batches,
+                [
+                    PipelineStage("normalización", normalize),
+                    PipelineStage("predicción", predict, workers=controller.max_concurrency),
+                    PipelineStage("subida", upload),
+                    PipelineStage("guardado", persist)
+                ],
+                queue_size=IMAGE_PIPELINE_QUEUE_SIZE
+            )
+
+            # Actualizar el estado del registro al finalizar todos los lotes
+            with self.session_factory() as db:
+                record = self.analysis_type.get_record(db, record_id)
+                if record:
+                    processed = record.imagenes_procesadas
+                    # Las imágenes de lotes que fallaron al subirse o guardarse no se contaron como fallidas
+                    record.imagenes_fallidas = record.cantidad_imagenes - processed
+                    if processed == 0:
+                        record.estado = status_enum.failed
+                    elif processed < record.cantidad_imagenes:
+                        record.estado = status_enum.partial
+                    else:
+                        record.estado = status_enum.completed
+                    self.analysis_type.save_changes(db)
+                    return record.estado
+            return status_enum.failed
+
+        except Exception as e:
+            logger.error(f"Error procesando lotes: {str(e)}")
+            # Actualizar estado a fallido en caso de error
+            self._set_failed(record_id)
+            return status_enum.failed
+
+
+class ImageInferenceJobHandler(JobHandler):
+    """Procesa en un worker los análisis de imágenes encolados de un tipo.
+
+    Attributes:
+        analysis_type (ImageAnalysisType): Tipo de análisis de los trabajos.
+        session_factory (Callable[[], Session]): Crea las sesiones de base de datos.
+        file_store (JobFileStore): Almacén de las imágenes de los trabajos.
+        cloudinary_service (Optional[CloudinaryService]): Reemplaza el servicio de almacenamiento.
+    """
+
+    def __init__(
+        self,
+        analysis_type: ImageAnalysisType,
+        session_factory: Callable[[], Session] = SessionLocal,
+        file_store: Optional[JobFileStore] = None,
+        cloudinary_service: Optional[CloudinaryService] = None
+    ):
+        self.analysis_type = analysis_type
+        self.job_type = analysis_type.job_type
+        self.session_factory = session_factory
+        self.file_store = file_store or JobFileStore()
+        self.cloudinary_service = cloudinary_service
+
+    def create_pipeline(self, db: Session) -> ImageInferencePipeline:
+        return ImageInferencePipeline(self.analysis_type, db, session_factory=self.session_factory)
+
+    async def run(self, job: ClaimedJob) -> None:
+        payload = job.payload
+        record_id = payload[self.analysis_type.record_id_key]
+        files_content = [
+            self.analysis_type.file_content_class(
+                entry["filename"], None, entry["content_type"], path=self.file_store.path(entry)
+            )
+            for entry in payload["files"]
+        ]
+
+        with self.session_factory() as db:
+            pipeline = self.create_pipeline(db)
+            if self.cloudinary_service is not None:
+                pipeline.cloudinary_service = self.cloudinary_service
+
+            if job.intentos > 1:
+                # Un intento anterior pudo guardar parte de los lotes antes de fallar
+                self.analysis_type.delete_results(db, record_id)
+                record = self.analysis_type.get_record(db, record_id)
+                if record:
+                    record.estado = self.analysis_type.status_enum.processing
+                    record.imagenes_desde_cache = 0
+                    record.imagenes_procesadas = 0
+                    record.imagenes_fallidas = 0
+                self.analysis_type.save_changes(db)
+
+            estado = await pipeline.process_batches(files_content, payload["task_id"], record_id)
+
+        if estado == self.analysis_type.status_enum.failed and job.intentos < job.max_intentos:
+            raise RuntimeError("No se pudo procesar ninguna imagen del análisis")
+        self.file_store.delete(payload["files"])
+
+    def on_failed(self, job: ClaimedJob) -> None:
+        with self.session_factory() as db:
+            record = self.analysis_type.get_record(db, job.payload[self.analysis_type.record_id_key])
+            if record:
+                record.estado = self.analysis_type.status_enum.failed
+                self.analysis_type.save_changes(db)
+        self.file_store.delete(job.payload["files"])
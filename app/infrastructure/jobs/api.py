@@ -0,0 +1,66 @@
+"""
+Este módulo define las rutas de la API para consultar la cola de trabajos en segundo plano.
+"""
+
+import os
+from dotenv import load_dotenv
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from typing import Dict
+from app.infrastructure.jobs.job_queue import JobQueue
+from app.infrastructure.security.jwt_middleware import get_current_user
+from app.user.domain.schemas import UserInDB
+
+load_dotenv(override=True)
+
+# Correos, separados por comas, de los administradores del sistema que pueden consultar la cola
+JOB_ADMIN_EMAILS = {
+    email.strip().lower()
+    for email in os.getenv('JOB_ADMIN_EMAILS', '').split(',')
+    if email.strip()
+}
+
+router = APIRouter(prefix="/jobs", tags=["background jobs"])
+
+def get_job_admin_user(current_user: UserInDB = Depends(get_current_user)) -> UserInDB:
+    """
+    Obtiene el usuario actual si es administrador de la cola de trabajos.
+
+    Las métricas de la cola incluyen los trabajos de todas las fincas, por lo que
+    solo las consultan los usuarios listados en `JOB_ADMIN_EMAILS`.
+
+    Raises:
+        HTTPException: Si el usuario no es administrador de la cola.
+    """
+    if current_user.email.lower() not in JOB_ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores del sistema pueden consultar la cola de trabajos"
+        )
+    return current_user
+
+@router.get("/metrics", response_model=Dict[str, dict])
+async def get_job_metrics(
+    request: Request,
+    current_user: UserInDB = Depends(get_job_admin_user)
+) -> Dict[str, dict]:
+    """
+    Obtiene las métricas de la cola de trabajos en segundo plano.
+
+    Args:
+        request (Request): Objeto de solicitud HTTP.
+        current_user (UserInDB): Usuario autenticado actual, administrador del sistema.
+
+    Returns:
+        Dict[str, dict]: Por tipo de trabajo, el número de trabajos en cada estado,
+        los reintentos realizados y la antigüedad del trabajo pendiente más antiguo.
+
+    Raises:
+        HTTPException: Si el usuario no es administrador o si ocurre un error al consultar la cola.
+    """
+    try:
+        return JobQueue().get_metrics()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener las métricas de la cola de trabajos: {str(e)}"
+        )
@@ -0,0 +1,84 @@
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import BinaryIO, List, Optional
+
+from dotenv import load_dotenv
+from fastapi import status
+
+from app.infrastructure.common.common_exceptions import DomainException
+
+load_dotenv(override=True)
+
+# Directorio de las imágenes de los trabajos; debe ser un volumen compartido entre la API y los workers.
+# No tiene valor por defecto: un directorio local de cada contenedor dejaría a los workers sin las imágenes
+JOB_FILES_DIR = os.getenv('JOB_FILES_DIR')
+
+
+class JobFileStore:
+    """Guarda en disco los archivos de un trabajo hasta que un worker lo procesa.
+
+    Los archivos se copian por partes desde el archivo subido, sin cargarlos
+    completos en memoria, y se describen en el payload del trabajo por su ruta
+    relativa al directorio.
+
+    Attributes:
+        directory (Optional[Path]): Directorio raíz de los archivos, o None si no está configurado.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        directory = directory or JOB_FILES_DIR
+        self.directory = Path(directory) if directory else None
+
+    def ensure_configured(self) -> None:
+        """Verifica que el directorio compartido esté configurado antes de encolar un trabajo.
+
+        Raises:
+            DomainException: Si no se configuró `JOB_FILES_DIR`.
+        """
+        if self.directory is None:
+            raise DomainException(
+                message="El procesamiento en segundo plano no está disponible: no se configuró JOB_FILES_DIR",
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+    def save(self, files: List[tuple]) -> List[dict]:
+        """Guarda los archivos de un trabajo en un subdirectorio nuevo.
+
+        Args:
+            files (List[tuple]): Tuplas (filename, content_type, archivo binario abierto).
+
+        Returns:
+            List[dict]: Por archivo, `filename`, `content_type` y `path` relativo.
+        """
+        self.ensure_configured()
+        group = uuid.uuid4().hex
+        target = self.directory / group
+        target.mkdir(parents=True, exist_ok=True)
+        saved = []
+        for index, (filename, content_type, source) in enumerate(files):
+            relative_path = f"{group}/{index}"
+            with open(self.directory / relative_path, 'wb') as destination:
+                shutil.copyfileobj(source, destination)
+            saved.append({'filename': filename, 'content_type': content_type, 'path': relative_path})
+        return saved
+
+    def path(self, entry: dict) -> str:
+        """Ruta absoluta de un archivo guardado."""
+        return str((self.directory / entry['path']).resolve())
+
+    def open(self, entry: dict) -> BinaryIO:
+        """Abre para lectura un archivo guardado."""
+        return open(self.path(entry), 'rb')
+
+    def read(self, entry: dict) -> bytes:
+        """Lee el contenido de un archivo guardado."""
+        with self.open(entry) as file:
+            return file.read()
+
+    def delete(self, entries: List[dict]) -> None:
+        """Elimina los archivos de un trabajo y su subdirectorio."""
+        groups = {entry['path'].split('/')[0] for entry in entries}
+        for group in groups:
+            shutil.rmtree(self.directory / group, ignore_errors=True)
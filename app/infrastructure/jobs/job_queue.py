@@ -0,0 +1,286 @@
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, case, create_engine, func, or_, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.infrastructure.common.datetime_utils import datetime_utc_time, ensure_utc
+from app.infrastructure.db.connection import SessionLocal
+from app.infrastructure.jobs.orm_models import BackgroundJob, JobStatus
+
+load_dotenv(override=True)
+
+# Base de datos de la cola; si no se indica se usa la de la aplicación (p. ej. sqlite:///jobs.db en desarrollo)
+JOB_QUEUE_DATABASE_URL = os.getenv('JOB_QUEUE_DATABASE_URL')
+# Segundos del arriendo de un trabajo; el worker lo renueva mientras lo procesa
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 300))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+# Espera antes del primer reintento; se duplica en cada intento
+JOB_RETRY_DELAY_SECONDS = int(os.getenv('JOB_RETRY_DELAY_SECONDS', 60))
+
+
+@dataclass
+class ClaimedJob:
+    """Trabajo reclamado por un worker.
+
+    Attributes:
+        id (int): ID del trabajo.
+        tipo (str): Tipo de trabajo.
+        referencia_id (Optional[int]): ID del registro asociado.
+        payload (dict): Datos del trabajo.
+        intentos (int): Número de este intento, empezando en 1.
+        max_intentos (int): Intentos permitidos.
+    """
+    id: int
+    tipo: str
+    referencia_id: Optional[int]
+    payload: dict
+    intentos: int
+    max_intentos: int
+
+
+def _to_claimed(job: BackgroundJob) -> ClaimedJob:
+    return ClaimedJob(
+        id=job.id,
+        tipo=job.tipo,
+        referencia_id=job.referencia_id,
+        payload=json.loads(job.payload),
+        intentos=job.intentos,
+        max_intentos=job.max_intentos
+    )
+
+
+@lru_cache(maxsize=None)
+def create_job_queue_session_factory(database_url: Optional[str] = JOB_QUEUE_DATABASE_URL) -> Callable[[], Session]:
+    """Crea la fábrica de sesiones de la cola.
+
+    Sin URL se usa la base de datos de la aplicación, donde la tabla
+    `trabajo_segundo_plano` se crea junto con el resto del esquema. Con una URL
+    propia (p. ej. un archivo SQLite local) la tabla se crea si no existe.
+    """
+    if not database_url:
+        return SessionLocal
+    connect_args = {'check_same_thread': False} if database_url.startswith('sqlite') else {}
+    engine = create_engine(database_url, pool_pre_ping=True, connect_args=connect_args)
+    BackgroundJob.__table__.create(engine, checkfirst=True)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class JobQueue:
+    """Cola persistente de trabajos en segundo plano sobre `trabajo_segundo_plano`.
+
+    Los trabajos se reclaman con una actualización condicional, de modo que dos
+    workers nunca obtienen el mismo, y se reintentan con espera exponencial
+    hasta agotar sus intentos. Un trabajo cuyo worker muere se vuelve a reclamar
+    cuando vence su arriendo.
+
+    Attributes:
+        session_factory (Callable[[], Session]): Fábrica de sesiones de la cola.
+        lease (timedelta): Duración del arriendo de un trabajo reclamado.
+        max_attempts (int): Intentos por defecto de los trabajos nuevos.
+        retry_delay (timedelta): Espera antes del primer reintento.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = None,
+        lease_seconds: int = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_delay_seconds: int = JOB_RETRY_DELAY_SECONDS
+    ):
+        self.session_factory = session_factory or create_job_queue_session_factory()
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.retry_delay = timedelta(seconds=retry_delay_seconds)
+
+    def enqueue(self, job_type: str, payload: dict, reference_id: Optional[int] = None) -> int:
+        """Agrega un trabajo a la cola.
+
+        Args:
+            job_type (str): Tipo de trabajo.
+            payload (dict): Datos serializables en JSON.
+            reference_id (Optional[int]): ID del registro asociado.
+
+        Returns:
+            int: ID del trabajo creado.
+        """
+        now = datetime_utc_time()
+        with self.session_factory() as db:
+            job = BackgroundJob(
+                tipo=job_type,
+                referencia_id=reference_id,
+                payload=json.dumps(payload),
+                estado=JobStatus.PENDING.value,
+                intentos=0,
+                max_intentos=self.max_attempts,
+                disponible_en=now,
+                creado_en=now
+            )
+            db.add(job)
+            db.commit()
+            return job.id
+
+    def _claimable(self, now):
+        return or_(
+            and_(BackgroundJob.estado == JobStatus.PENDING.value, BackgroundJob.disponible_en <= now),
+            and_(
+                BackgroundJob.estado == JobStatus.RUNNING.value,
+                BackgroundJob.expira_en < now,
+                BackgroundJob.intentos < BackgroundJob.max_intentos
+            )
+        )
+
+    def claim(self, job_types: List[str], owner_id: str) -> Optional[ClaimedJob]:
+        """Reclama el trabajo disponible más antiguo de los tipos indicados.
+
+        Args:
+            job_types (List[str]): Tipos que el worker sabe procesar.
+            owner_id (str): Identificador del worker.
+
+        Returns:
+            Optional[ClaimedJob]: El trabajo reclamado, o None si no hay ninguno disponible.
+        """
+        now = datetime_utc_time()
+        with self.session_factory() as db:
+            candidate_ids = db.execute(
+                select(BackgroundJob.id)
+                .where(BackgroundJob.tipo.in_(job_types), self._claimable(now))
+                .order_by(BackgroundJob.disponible_en, BackgroundJob.id)
+                .limit(10)
+            ).scalars().all()
+
+            for job_id in candidate_ids:
+                # Solo un worker logra actualizar la fila mientras sigue siendo reclamable
+                result = db.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id == job_id, self._claimable(now))
+                    .values(
+                        estado=JobStatus.RUNNING.value,
+                        propietario=owner_id,
+                        expira_en=now + self.lease,
+                        iniciado_en=now,
+                        intentos=BackgroundJob.intentos + 1
+                    )
+                )
+                db.commit()
+                if result.rowcount == 1:
+                    return _to_claimed(db.get(BackgroundJob, job_id))
+        return None
+
+    def _update_owned(self, job_id: int, owner_id: str, **values) -> bool:
+        with self.session_factory() as db:
+            result = db.execute(
+                update(BackgroundJob)
+                .where(
+                    BackgroundJob.id == job_id,
+                    BackgroundJob.propietario == owner_id,
+                    BackgroundJob.estado == JobStatus.RUNNING.value
+                )
+                .values(**values)
+            )
+            db.commit()
+            return result.rowcount == 1
+
+    def heartbeat(self, job_id: int, owner_id: str) -> bool:
+        """Renueva el arriendo de un trabajo.
+
+        Returns:
+            bool: False si el worker ya no es el propietario del trabajo.
+        """
+        return self._update_owned(job_id, owner_id, expira_en=datetime_utc_time() + self.lease)
+
+    def complete(self, job_id: int, owner_id: str) -> None:
+        """Marca un trabajo como completado."""
+        self._update_owned(
+            job_id,
+            owner_id,
+            estado=JobStatus.COMPLETED.value,
+            finalizado_en=datetime_utc_time(),
+            ultimo_error=None
+        )
+
+    def fail(self, job: ClaimedJob, owner_id: str, error: str) -> bool:
+        """Registra el error de un intento y programa el reintento si quedan intentos.
+
+        Returns:
+            bool: True si el trabajo agotó sus intentos y quedó como fallido.
+        """
+        now = datetime_utc_time()
+        if job.intentos >= job.max_intentos:
+            self._update_owned(job.id, owner_id, estado=JobStatus.FAILED.value, finalizado_en=now, ultimo_error=error)
+            return True
+        self._update_owned(
+            job.id,
+            owner_id,
+            estado=JobStatus.PENDING.value,
+            disponible_en=now + self.retry_delay * (2 ** (job.intentos - 1)),
+            propietario=None,
+            expira_en=None,
+            ultimo_error=error
+        )
+        return False
+
+    def reap_expired(self, job_types: List[str]) -> List[ClaimedJob]:
+        """Marca como fallidos los trabajos cuyo último intento venció sin terminar.
+
+        Returns:
+            List[ClaimedJob]: Trabajos marcados como fallidos, para limpiar sus registros asociados.
+        """
+        now = datetime_utc_time()
+        reaped = []
+        with self.session_factory() as db:
+            expired = db.query(BackgroundJob).filter(
+                BackgroundJob.tipo.in_(job_types),
+                BackgroundJob.estado == JobStatus.RUNNING.value,
+                BackgroundJob.expira_en < now,
+                BackgroundJob.intentos >= BackgroundJob.max_intentos
+            ).all()
+            for job in expired:
+                result = db.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id == job.id, BackgroundJob.estado == JobStatus.RUNNING.value, BackgroundJob.expira_en < now)
+                    .values(
+                        estado=JobStatus.FAILED.value,
+                        finalizado_en=now,
+                        ultimo_error="El arriendo del último intento venció sin que el trabajo terminara"
+                    )
+                )
+                db.commit()
+                if result.rowcount == 1:
+                    reaped.append(_to_claimed(job))
+        return reaped
+
+    def get_metrics(self) -> Dict[str, dict]:
+        """Resume el estado de la cola por tipo de trabajo.
+
+        Returns:
+            Dict[str, dict]: Por tipo, el número de trabajos en cada estado, los
+            reintentos realizados y la antigüedad en segundos del trabajo pendiente más antiguo.
+        """
+        now = datetime_utc_time()
+        metrics: Dict[str, dict] = {}
+        with self.session_factory() as db:
+            rows = db.query(
+                BackgroundJob.tipo,
+                BackgroundJob.estado,
+                func.count(BackgroundJob.id),
+                func.coalesce(func.sum(case((BackgroundJob.intentos > 1, BackgroundJob.intentos - 1), else_=0)), 0),
+                func.min(BackgroundJob.creado_en)
+            ).group_by(BackgroundJob.tipo, BackgroundJob.estado).all()
+
+        for tipo, estado, count, retries, oldest in rows:
+            entry = metrics.setdefault(tipo, {
+                **{status.value: 0 for status in JobStatus},
+                'reintentos': 0,
+                'antiguedad_pendiente_segundos': None
+            })
+            entry[estado] = count
+            entry['reintentos'] += retries
+            if estado == JobStatus.PENDING.value and oldest is not None:
+                entry['antiguedad_pendiente_segundos'] = max(round((now - ensure_utc(oldest)).total_seconds(), 1), 0.0)
+        return metrics
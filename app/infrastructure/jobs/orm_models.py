@@ -0,0 +1,60 @@
+import enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from app.infrastructure.db.connection import Base
+
+class JobStatus(str, enum.Enum):
+    """Estado de un trabajo en segundo plano.
+
+    PENDING: En espera de un worker (o de su próximo reintento).
+    RUNNING: Reclamado por un worker con un arriendo vigente.
+    COMPLETED: Terminado.
+    FAILED: Agotó sus intentos.
+    """
+    PENDING = "pendiente"
+    RUNNING = "en_proceso"
+    COMPLETED = "completado"
+    FAILED = "fallido"
+
+class BackgroundJob(Base):
+    """Modelo para la cola persistente de trabajos en segundo plano.
+
+    Un worker reclama un trabajo marcándolo en proceso con un arriendo; mientras
+    lo procesa renueva el arriendo, y si muere sin terminarlo, otro worker puede
+    reclamarlo cuando el arriendo vence. La tabla no tiene llaves foráneas para
+    poder ubicarse en una base de datos distinta (p. ej. SQLite en desarrollo).
+
+    Attributes:
+        id (int): ID único del trabajo.
+        tipo (str): Tipo de trabajo; determina qué manejador lo procesa.
+        referencia_id (int): ID del registro asociado (p. ej. el monitoreo).
+        payload (str): Datos del trabajo en JSON.
+        estado (str): Estado del trabajo (`JobStatus`).
+        intentos (int): Veces que un worker lo ha reclamado.
+        max_intentos (int): Intentos permitidos antes de marcarlo como fallido.
+        disponible_en (datetime): Momento desde el que se puede reclamar.
+        propietario (str): Worker que lo tiene reclamado (host:pid).
+        expira_en (datetime): Vencimiento del arriendo del propietario.
+        ultimo_error (str): Mensaje del último error.
+        creado_en (datetime): Fecha de creación.
+        iniciado_en (datetime): Inicio del último intento.
+        finalizado_en (datetime): Fecha en que se completó o falló definitivamente.
+    """
+    __tablename__ = "trabajo_segundo_plano"
+    __table_args__ = (
+        Index('ix_trabajo_segundo_plano_estado_disponible', 'estado', 'disponible_en'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    tipo = Column(String(100), nullable=False)
+    referencia_id = Column(Integer)
+    payload = Column(Text, nullable=False)
+    estado = Column(String(20), nullable=False, default=JobStatus.PENDING.value)
+    intentos = Column(Integer, nullable=False, default=0)
+    max_intentos = Column(Integer, nullable=False)
+    disponible_en = Column(DateTime(timezone=True), nullable=False)
+    propietario = Column(String(255))
+    expira_en = Column(DateTime(timezone=True))
+    ultimo_error = Column(Text)
+    creado_en = Column(DateTime(timezone=True), nullable=False)
+    iniciado_en = Column(DateTime(timezone=True))
+    finalizado_en = Column(DateTime(timezone=True))
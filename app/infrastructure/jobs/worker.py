@@ -0,0 +1,182 @@
+"""
+Worker de la cola de trabajos en segundo plano.
+
+Procesa los análisis de imágenes fuera de los procesos de la API: reclama
+trabajos de `trabajo_segundo_plano`, renueva su arriendo mientras los procesa y
+los reintenta si fallan.
+
+Ejemplo:
+    ```bash
+    python -m app.infrastructure.jobs.worker --concurrency 2
+    ```
+"""
+
+import argparse
+import asyncio
+from abc import ABC, abstractmethod
+import json
+import logging
+import os
+import signal
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.infrastructure.jobs.file_store import JOB_FILES_DIR
+from app.infrastructure.jobs.job_queue import ClaimedJob, JobQueue
+from app.infrastructure.scheduler.job_lock import default_owner_id
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+# Trabajos que un worker procesa a la vez
+JOB_WORKER_CONCURRENCY = int(os.getenv('JOB_WORKER_CONCURRENCY', 1))
+# Espera entre consultas a la cola cuando no hay trabajos
+JOB_WORKER_POLL_SECONDS = float(os.getenv('JOB_WORKER_POLL_SECONDS', 2))
+
+
+class JobHandler(ABC):
+    """Procesa los trabajos de un tipo.
+
+    Attributes:
+        job_type (str): Tipo de trabajo que procesa; lo define cada subclase.
+    """
+
+    job_type: str
+
+    @abstractmethod
+    async def run(self, job: ClaimedJob) -> None:
+        """Procesa un trabajo; una excepción hace que se reintente."""
+
+    def on_failed(self, job: ClaimedJob) -> None:
+        """Se ejecuta cuando el trabajo agota sus intentos."""
+
+
+class JobWorker:
+    """Reclama y procesa trabajos de la cola.
+
+    Attributes:
+        queue (JobQueue): Cola de trabajos.
+        handlers (Dict[str, JobHandler]): Manejadores por tipo de trabajo.
+        owner_id (str): Identificador de este worker.
+        concurrency (int): Trabajos procesados a la vez.
+        poll_seconds (float): Espera entre consultas cuando la cola está vacía.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: List[JobHandler],
+        owner_id: Optional[str] = None,
+        concurrency: int = JOB_WORKER_CONCURRENCY,
+        poll_seconds: float = JOB_WORKER_POLL_SECONDS
+    ):
+        self.queue = queue
+        self.handlers: Dict[str, JobHandler] = {handler.job_type: handler for handler in handlers}
+        self.owner_id = owner_id or default_owner_id()
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+
+    @property
+    def job_types(self) -> List[str]:
+        return list(self.handlers)
+
+    async def _keep_lease(self, job: ClaimedJob) -> None:
+        interval = max(self.queue.lease.total_seconds() / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            if not self.queue.heartbeat(job.id, self.owner_id):
+                logger.warning(f"El trabajo {job.id} ya no pertenece a este worker")
+                return
+
+    async def process(self, job: ClaimedJob) -> None:
+        """Procesa un trabajo reclamado y registra el resultado en la cola."""
+        handler = self.handlers[job.tipo]
+        lease = asyncio.create_task(self._keep_lease(job))
+        try:
+            await handler.run(job)
+        except Exception as e:
+            logger.error(f"Error en el trabajo {job.id} ({job.tipo}), intento {job.intentos}/{job.max_intentos}: {str(e)}")
+            if self.queue.fail(job, self.owner_id, str(e)):
+                handler.on_failed(job)
+        else:
+            self.queue.complete(job.id, self.owner_id)
+        finally:
+            lease.cancel()
+
+    def _reap_expired(self) -> None:
+        for job in self.queue.reap_expired(self.job_types):
+            logger.error(f"El trabajo {job.id} ({job.tipo}) agotó sus intentos sin terminar")
+            self.handlers[job.tipo].on_failed(job)
+
+    async def run_once(self) -> bool:
+        """Reclama y procesa un trabajo.
+
+        Returns:
+            bool: True si había un trabajo disponible.
+        """
+        self._reap_expired()
+        job = self.queue.claim(self.job_types, self.owner_id)
+        if job is None:
+            return False
+        await self.process(job)
+        return True
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Procesa trabajos hasta que se active `stop`; los trabajos en curso se terminan."""
+        async def loop() -> None:
+            while not stop.is_set():
+                try:
+                    processed = await self.run_once()
+                except Exception as e:
+                    logger.error(f"Error consultando la cola de trabajos: {str(e)}")
+                    processed = False
+                if not processed:
+                    try:
+                        await asyncio.wait_for(stop.wait(), timeout=self.poll_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+
+        logger.info(f"Worker {self.owner_id} procesando {', '.join(self.job_types)}")
+        await asyncio.gather(*(loop() for _ in range(self.concurrency)))
+
+
+def default_handlers() -> List[JobHandler]:
+    """Manejadores de los análisis de imágenes."""
+    from app.fall_armyworm.application.detect_fall_armyworm_background_use_case import FallArmywormDetectionJobHandler
+    from app.soil_analysis.application.soil_analysis_background_use_case import SoilAnalysisJobHandler
+    return [FallArmywormDetectionJobHandler(), SoilAnalysisJobHandler()]
+
+
+async def _serve(concurrency: int, poll_seconds: float) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    from app.infrastructure.image_inference.http_client import close_shared_http_client
+    worker = JobWorker(JobQueue(), default_handlers(), concurrency=concurrency, poll_seconds=poll_seconds)
+    try:
+        await worker.run(stop)
+    finally:
+        await close_shared_http_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Worker de la cola de trabajos de AgroInsight.')
+    parser.add_argument('--concurrency', type=int, default=JOB_WORKER_CONCURRENCY)
+    parser.add_argument('--poll-seconds', type=float, default=JOB_WORKER_POLL_SECONDS)
+    parser.add_argument('--metrics', action='store_true', help='Muestra las métricas de la cola y termina')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.metrics:
+        print(json.dumps(JobQueue().get_metrics(), indent=2))
+        return
+    if not JOB_FILES_DIR:
+        parser.error('JOB_FILES_DIR debe apuntar al volumen de archivos compartido con la API')
+    asyncio.run(_serve(args.concurrency, args.poll_seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, UniqueConstraint
+from app.infrastructure.db.connection import Base
+
+class PredictionCacheEntry(Base):
+    """Modelo para reutilizar predicciones de imágenes ya analizadas.
+
+    Cada fila guarda, por tipo de análisis y versión del modelo, el resultado de
+    una imagen identificada por el SHA-256 de su contenido normalizado y la
+    imagen ya subida al almacenamiento. Una imagen que se vuelve a subir no se
+    envía de nuevo al servicio de predicción ni a Cloudinary.
+
+    Attributes:
+        id (int): ID único de la entrada.
+        tipo_analisis (str): Tipo de análisis (p. ej. `deteccion_gusano_cogollero`).
+        hash_imagen (str): SHA-256 en hexadecimal del contenido de la imagen.
+        version_modelo (str): Versión del modelo que produjo la predicción.
+        clase_predicha (str): Clase predicha.
+        confianza (float): Confianza de la predicción.
+        probabilidades (str): Probabilidades por clase en JSON.
+        imagen_url (str): URL de la imagen almacenada.
+        imagen_public_id (str): ID público de la imagen almacenada.
+        creado_en (datetime): Fecha de creación.
+    """
+    __tablename__ = "cache_prediccion"
+    __table_args__ = (
+        UniqueConstraint('tipo_analisis', 'hash_imagen', 'version_modelo', name='uq_cache_prediccion_tipo_hash_version'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    tipo_analisis = Column(String(100), nullable=False)
+    hash_imagen = Column(String(64), nullable=False)
+    version_modelo = Column(String(50), nullable=False)
+    clase_predicha = Column(String(50), nullable=False)
+    confianza = Column(Float, nullable=False)
+    probabilidades = Column(Text, nullable=False)
+    imagen_url = Column(String(255), nullable=False)
+    imagen_public_id = Column(String(255), nullable=False)
+    creado_en = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+from typing import Dict, Iterable, List
+
+from dotenv import load_dotenv
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.infrastructure.common.datetime_utils import datetime_utc_time
+from app.infrastructure.prediction_cache.orm_models import PredictionCacheEntry
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+# Desactiva la reutilización de predicciones de imágenes repetidas
+PREDICTION_CACHE_ENABLED = os.getenv('PREDICTION_CACHE_ENABLED', 'true').lower() == 'true'
+
+
+class PredictionCacheRepository:
+    """Repositorio de la caché de predicciones por contenido de imagen.
+
+    Attributes:
+        db (Session): Sesión de base de datos.
+        enabled (bool): Si es False no se consultan ni guardan entradas.
+    """
+
+    def __init__(self, db: Session, enabled: bool = PREDICTION_CACHE_ENABLED):
+        self.db = db
+        self.enabled = enabled
+
+    def get_entries(self, analysis_type: str, model_version: str, hashes: Iterable[str]) -> Dict[str, PredictionCacheEntry]:
+        """Obtiene las entradas de la caché de un conjunto de imágenes.
+
+        Args:
+            analysis_type (str): Tipo de análisis.
+            model_version (str): Versión del modelo; las entradas de otras versiones se ignoran.
+            hashes (Iterable[str]): SHA-256 de las imágenes.
+
+        Returns:
+            Dict[str, PredictionCacheEntry]: Entradas encontradas por hash.
+        """
+        hashes = {content_hash for content_hash in hashes if content_hash}
+        if not self.enabled or not hashes:
+            return {}
+        entries = self.db.query(PredictionCacheEntry).filter(
+            PredictionCacheEntry.tipo_analisis == analysis_type,
+            PredictionCacheEntry.version_modelo == model_version,
+            PredictionCacheEntry.hash_imagen.in_(hashes)
+        ).all()
+        return {entry.hash_imagen: entry for entry in entries}
+
+    def add_entries(self, analysis_type: str, model_version: str, entries: List[dict]) -> None:
+        """Guarda nuevas entradas en la caché y confirma la transacción.
+
+        Las imágenes que ya tienen entrada (p. ej. guardada por otro worker) se
+        omiten; un error de la caché se registra sin afectar al análisis.
+
+        Args:
+            analysis_type (str): Tipo de análisis.
+            model_version (str): Versión del modelo.
+            entries (List[dict]): Por imagen, `hash_imagen`, `clase_predicha`, `confianza`,
+                `probabilidades` (dict), `imagen_url` e `imagen_public_id`.
+        """
+        if not self.enabled:
+            return
+        by_hash = {entry['hash_imagen']: entry for entry in entries if entry.get('hash_imagen')}
+        existing = self.get_entries(analysis_type, model_version, by_hash)
+        now = datetime_utc_time()
+        new_entries = [
+            PredictionCacheEntry(
+                tipo_analisis=analysis_type,
+                version_modelo=model_version,
+                hash_imagen=content_hash,
+                clase_predicha=entry['clase_predicha'],
+                confianza=entry['confianza'],
+                probabilidades=json.dumps(entry['probabilidades']),
+                imagen_url=entry['imagen_url'],
+                imagen_public_id=entry['imagen_public_id'],
+                creado_en=now
+            )
+            for content_hash, entry in by_hash.items() if content_hash not in existing
+        ]
+        if not new_entries:
+            return
+        try:
+            self.db.add_all(new_entries)
+            self.db.commit()
+        except IntegrityError:
+            # Otro worker guardó alguna de las imágenes al mismo tiempo
+            self.db.rollback()
+            logger.info("Entradas de la caché de predicciones ya guardadas por otro proceso")
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error guardando la caché de predicciones: {str(e)}")
@@ -0,0 +1,36 @@
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from app.measurement.infrastructure.exchange_rate_store import ExchangeRateStore, exchange_rate_store
+import os
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+EXCHANGE_RATE_REFRESH_MINUTES = int(os.getenv('EXCHANGE_RATE_REFRESH_MINUTES', 30))
+
+class ExchangeRateScheduler:
+    def __init__(self, rate_store: ExchangeRateStore = exchange_rate_store):
+        self.scheduler = AsyncIOScheduler()
+        self.rate_store = rate_store
+
+    async def refresh_exchange_rates(self):
+        """Actualiza las tasas de cambio compartidas por el proceso."""
+        await self.rate_store.refresh()
+
+    async def start(self):
+        """Carga las tasas persistidas y las del proveedor, e inicia el refresco periódico."""
+        await self.rate_store.initialize()
+
+        self.scheduler.add_job(
+            self.refresh_exchange_rates,
+            IntervalTrigger(minutes=EXCHANGE_RATE_REFRESH_MINUTES),
+            id='exchange_rate_refresh',
+            name='Refresh exchange rates',
+            replace_existing=True
+        )
+
+        self.scheduler.start()
+
+    def shutdown(self):
+        """Detiene el programador sin esperar a las tareas en curso."""
+        self.scheduler.shutdown(wait=False)
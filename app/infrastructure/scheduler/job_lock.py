@@ -0,0 +1,187 @@
+from abc import ABC, abstractmethod
+import fcntl
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict
+
+from dotenv import load_dotenv
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.infrastructure.common.datetime_utils import datetime_utc_time
+from app.infrastructure.db.connection import SessionLocal
+from app.infrastructure.scheduler.orm_models import ScheduledJobRun
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_LOCK_BACKEND = os.getenv('SCHEDULER_LOCK_BACKEND', 'database')
+SCHEDULER_LOCK_DIR = os.getenv('SCHEDULER_LOCK_DIR', '/tmp/agroinsight-locks')
+SCHEDULER_LEASE_MINUTES = int(os.getenv('SCHEDULER_LEASE_MINUTES', 50))
+
+
+def default_owner_id() -> str:
+    """Identifica al proceso actual como propietario de un bloqueo."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobLock(ABC):
+    """Garantiza que una ejecución programada la realice un solo proceso.
+
+    Con varios workers de uvicorn o gunicorn cada uno inicia su propio
+    programador; antes de ejecutar una tarea, cada worker intenta reclamar el
+    período (p. ej. la hora) y solo el que lo obtiene la ejecuta.
+    """
+
+    @abstractmethod
+    def acquire(self, job_name: str, period: datetime) -> bool:
+        """Intenta reclamar la ejecución de una tarea para un período.
+
+        Args:
+            job_name (str): Identificador de la tarea.
+            period (datetime): Período programado.
+
+        Returns:
+            bool: True si este proceso debe ejecutar la tarea.
+        """
+
+    @abstractmethod
+    def release(self, job_name: str, period: datetime, completed: bool = True) -> None:
+        """Libera la ejecución reclamada.
+
+        Args:
+            job_name (str): Identificador de la tarea.
+            period (datetime): Período programado.
+            completed (bool): Si es False, otro proceso puede reintentar el período.
+        """
+
+
+class DatabaseJobLock(JobLock):
+    """Bloqueo por arriendo sobre la tabla `ejecucion_tarea_programada`.
+
+    Funciona con cualquier base de datos soportada y entre máquinas distintas.
+    Si el propietario muere sin liberar la ejecución, otro proceso puede tomarla
+    cuando vence el arriendo.
+
+    Attributes:
+        session_factory (Callable[[], Session]): Fábrica de sesiones.
+        owner_id (str): Identificador de este proceso.
+        lease (timedelta): Duración del arriendo.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        owner_id: str = None,
+        lease_minutes: int = SCHEDULER_LEASE_MINUTES
+    ):
+        self.session_factory = session_factory
+        self.owner_id = owner_id or default_owner_id()
+        self.lease = timedelta(minutes=lease_minutes)
+
+    def acquire(self, job_name: str, period: datetime) -> bool:
+        now = datetime_utc_time()
+        db = self.session_factory()
+        try:
+            db.add(ScheduledJobRun(
+                tarea=job_name,
+                periodo=period,
+                propietario=self.owner_id,
+                expira_en=now + self.lease,
+                finalizada=False
+            ))
+            try:
+                db.commit()
+                return True
+            except IntegrityError:
+                db.rollback()
+
+            # Otro proceso reclamó el período; se toma solo si su arriendo venció sin terminar
+            result = db.execute(
+                update(ScheduledJobRun)
+                .where(
+                    ScheduledJobRun.tarea == job_name,
+                    ScheduledJobRun.periodo == period,
+                    ScheduledJobRun.finalizada.is_(False),
+                    ScheduledJobRun.expira_en < now
+                )
+                .values(propietario=self.owner_id, expira_en=now + self.lease)
+            )
+            db.commit()
+            return result.rowcount == 1
+        finally:
+            db.close()
+
+    def release(self, job_name: str, period: datetime, completed: bool = True) -> None:
+        db = self.session_factory()
+        try:
+            values = {'finalizada': True} if completed else {'expira_en': datetime_utc_time()}
+            db.execute(
+                update(ScheduledJobRun)
+                .where(
+                    ScheduledJobRun.tarea == job_name,
+                    ScheduledJobRun.periodo == period,
+                    ScheduledJobRun.propietario == self.owner_id
+                )
+                .values(**values)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+class FileJobLock(JobLock):
+    """Bloqueo con `flock` sobre archivos locales.
+
+    Sirve cuando todos los workers corren en la misma máquina y en pruebas. El
+    archivo de cada tarea guarda el último período completado para no repetirlo.
+
+    Attributes:
+        directory (Path): Directorio de los archivos de bloqueo.
+    """
+
+    def __init__(self, directory: str = SCHEDULER_LOCK_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._handles: Dict[str, int] = {}
+
+    def acquire(self, job_name: str, period: datetime) -> bool:
+        fd = os.open(self.directory / f"{job_name}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        last_completed = os.pread(fd, 64, 0).decode().strip()
+        if last_completed == period.isoformat():
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+            return False
+
+        self._handles[job_name] = fd
+        return True
+
+    def release(self, job_name: str, period: datetime, completed: bool = True) -> None:
+        fd = self._handles.pop(job_name, None)
+        if fd is None:
+            return
+        try:
+            if completed:
+                os.ftruncate(fd, 0)
+                os.pwrite(fd, period.isoformat().encode(), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def create_job_lock(session_factory: Callable[[], Session] = SessionLocal) -> JobLock:
+    """Crea el bloqueo configurado en `SCHEDULER_LOCK_BACKEND` (database o file)."""
+    if SCHEDULER_LOCK_BACKEND == 'file':
+        return FileJobLock()
+    return DatabaseJobLock(session_factory)
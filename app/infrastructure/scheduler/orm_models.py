@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, UniqueConstraint
+from app.infrastructure.db.connection import Base
+
+class ScheduledJobRun(Base):
+    """Modelo para coordinar las ejecuciones de tareas programadas entre procesos.
+
+    Cada fila reclama una ejecución (tarea y período) para un único proceso. La
+    restricción única garantiza que solo un proceso la obtenga; si ese proceso
+    muere antes de terminar, otro puede tomarla cuando vence el arriendo.
+
+    Attributes:
+        id (int): ID único de la ejecución.
+        tarea (str): Identificador de la tarea programada.
+        periodo (datetime): Período programado (p. ej. la hora en UTC).
+        propietario (str): Proceso que tiene la ejecución (host:pid).
+        expira_en (datetime): Vencimiento del arriendo del propietario.
+        finalizada (bool): Indica si la ejecución terminó.
+    """
+    __tablename__ = "ejecucion_tarea_programada"
+    __table_args__ = (
+        UniqueConstraint('tarea', 'periodo', name='uq_ejecucion_tarea_programada_tarea_periodo'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    tarea = Column(String(100), nullable=False)
+    periodo = Column(DateTime(timezone=True), nullable=False)
+    propietario = Column(String(255), nullable=False)
+    expira_en = Column(DateTime(timezone=True), nullable=False)
+    finalizada = Column(Boolean, nullable=False, default=False)
@@ -2,48 +2,403 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from sqlalchemy.orm import Session
 from app.weather.application.record_weather_use_case import RecordWeatherUseCase
+from app.weather.application.services.weather_measurement_service import WeatherMeasurementService
+from app.weather.domain.schemas import WeatherCollectionPolicy, WeatherLogCreate
+from app.weather.infrastructure.sql_repository import WeatherRepository
+from app.weather.infrastructure.openweathermap_client import OpenWeatherMapClient, history_request_count
+from app.weather.infrastructure.recent_weather_cache import RecentWeatherCache, recent_weather_cache
 from app.infrastructure.db.connection import SessionLocal
-from app.plot.infrastructure.sql_repository import PlotRepository
+from app.infrastructure.scheduler.job_lock import JobLock, create_job_lock
+from app.infrastructure.utils.rate_limiter import AsyncRateLimiter
+from app.infrastructure.common.datetime_utils import current_utc_hour, datetime_utc_time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 import asyncio
+import logging
+import os
+import time
 from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+WEATHER_MAX_CONCURRENCY = int(os.getenv('WEATHER_MAX_CONCURRENCY', 10))
+WEATHER_API_CALLS_PER_MINUTE = int(os.getenv('WEATHER_API_CALLS_PER_MINUTE', 60))
+# Decimales de la cuadrícula de coordenadas: 2 decimales equivalen a celdas de ~1.1 km
+WEATHER_GRID_PRECISION = int(os.getenv('WEATHER_GRID_PRECISION', 2))
+
+# Lotes recolectados en las fincas sin configuración propia (ver WeatherCollectionPolicy)
+WEATHER_COLLECTION_POLICY = WeatherCollectionPolicy(os.getenv('WEATHER_COLLECTION_POLICY', WeatherCollectionPolicy.ACTIVE.value))
+WEATHER_RECENT_ACTIVITY_DAYS = int(os.getenv('WEATHER_RECENT_ACTIVITY_DAYS', 30))
+# Retraso máximo con el que aún se ejecuta una recolección que no pudo iniciar a tiempo
+WEATHER_MISFIRE_GRACE_SECONDS = int(os.getenv('WEATHER_MISFIRE_GRACE_SECONDS', 900))
+# Horas hacia atrás que se recuperan de la API histórica tras una caída
+WEATHER_BACKFILL_MAX_HOURS = int(os.getenv('WEATHER_BACKFILL_MAX_HOURS', 168))
+
+WEATHER_RECORDING_JOB = 'weather_recording'
+WEATHER_BACKFILL_JOB = 'weather_backfill'
+
+@dataclass
+class WeatherCollectionMetrics:
+    """Métricas de una ejecución de la recolección de clima.
+
+    Attributes:
+        started_at (datetime): Inicio de la ejecución.
+        finished_at (Optional[datetime]): Fin de la ejecución.
+        total_plots (int): Número de lotes a procesar.
+        api_calls (int): Consultas a la API (una por celda, o por celda y semana al recuperar horas).
+        succeeded (int): Lotes registrados correctamente.
+        failed (int): Lotes con error.
+        latencies (List[float]): Duración en segundos de cada consulta exitosa.
+        failures (List[Tuple[int, str]]): ID del lote y mensaje de cada error.
+    """
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    total_plots: int = 0
+    api_calls: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    latencies: List[float] = field(default_factory=list)
+    failures: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def duration_seconds(self) -> float:
+        end = self.finished_at or datetime_utc_time()
+        return (end - self.started_at).total_seconds()
+
+    @property
+    def average_latency_seconds(self) -> float:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.succeeded}/{self.total_plots} lotes registrados con {self.api_calls} consultas a la API, "
+            f"{self.failed} con error, {self.duration_seconds:.1f} s en total, "
+            f"{self.average_latency_seconds:.2f} s promedio por consulta"
+        )
 
 class WeatherScheduler:
-    def __init__(self):
+    """Programador de la recolección horaria de datos meteorológicos.
+
+    Solo se recolecta el clima de los lotes que lo necesitan según la política de
+    su finca (por defecto, los que tienen un cultivo activo o actividad reciente).
+    Los lotes se agrupan en celdas de una cuadrícula de coordenadas y se hace una
+    sola consulta por celda, cuya lectura se registra para todos los lotes de la
+    celda. Las celdas se procesan de forma concurrente (limitada por un semáforo)
+    sobre un único cliente HTTP keep-alive, respetando un máximo de llamadas por
+    minuto a la API. Un error en una celda se registra en las métricas sin detener
+    la ejecución. Las lecturas de toda la ejecución se guardan al final con una
+    inserción masiva en una sola transacción.
+
+    Cada worker de la aplicación inicia su propio programador; antes de cada
+    ejecución se reclama la hora en curso con un `JobLock`, de modo que solo un
+    worker la realiza. Los lotes que ya tienen registro en esa hora se omiten,
+    por lo que repetir una ejecución no consulta la API ni duplica lecturas.
+
+    Las horas que no se registraron (p. ej. con el servicio detenido) se detectan
+    por lote al iniciar y antes de cada ejecución, y se recuperan de la API
+    histórica con una consulta por celda y semana.
+
+    Attributes:
+        max_concurrency (int): Máximo de consultas en curso a la vez.
+        calls_per_minute (int): Máximo de llamadas por minuto a la API de clima.
+        grid_precision (int): Decimales a los que se redondean las coordenadas de los lotes.
+        job_lock (JobLock): Bloqueo que garantiza un único worker por ejecución.
+        default_policy (WeatherCollectionPolicy): Política de las fincas sin configuración.
+        activity_days (int): Días de actividad de las fincas sin configuración.
+        backfill_max_hours (int): Máximo de horas pasadas que se recuperan.
+        recent_cache (RecentWeatherCache): Caché de lecturas recientes que se actualiza tras cada recolección.
+        last_run_metrics (Optional[WeatherCollectionMetrics]): Métricas de la última ejecución.
+        last_backfill_metrics (Optional[WeatherCollectionMetrics]): Métricas de la última recuperación.
+    """
+
+    def __init__(
+        self,
+        weather_client: Optional[OpenWeatherMapClient] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        max_concurrency: int = WEATHER_MAX_CONCURRENCY,
+        calls_per_minute: int = WEATHER_API_CALLS_PER_MINUTE,
+        grid_precision: int = WEATHER_GRID_PRECISION,
+        job_lock: Optional[JobLock] = None,
+        default_policy: WeatherCollectionPolicy = WEATHER_COLLECTION_POLICY,
+        activity_days: int = WEATHER_RECENT_ACTIVITY_DAYS,
+        backfill_max_hours: int = WEATHER_BACKFILL_MAX_HOURS,
+        recent_cache: RecentWeatherCache = recent_weather_cache
+    ):
         self.scheduler = AsyncIOScheduler()
-        
-    async def record_weather_for_all_plots(self):
-        """Registra el clima para todos los lotes activos."""
-        @asynccontextmanager
-        async def get_db():
-            db = SessionLocal()
-            try:
-                yield db
-            finally:
-                db.close()
-        
-        async with get_db() as db:
-            # Obtener todos los lotes activos
-            plot_repository = PlotRepository(db)
-            plots = plot_repository.list_plots()
-            
-            # Registrar el clima para cada lote
-            weather_use_case = RecordWeatherUseCase(db)
-            for plot in plots:
-                await weather_use_case.record_weather_data(
-                    lote_id=plot.id,
-                    lat=plot.latitud,
-                    lon=plot.longitud
+        self.weather_client = weather_client
+        self.session_factory = session_factory
+        self.max_concurrency = max_concurrency
+        self.calls_per_minute = calls_per_minute
+        self.grid_precision = grid_precision
+        self.job_lock = job_lock or create_job_lock(session_factory)
+        self.default_policy = default_policy
+        self.activity_days = activity_days
+        self.backfill_max_hours = backfill_max_hours
+        self.recent_cache = recent_cache
+        self.last_run_metrics: Optional[WeatherCollectionMetrics] = None
+        self.last_backfill_metrics: Optional[WeatherCollectionMetrics] = None
+
+    def _get_weather_client(self) -> OpenWeatherMapClient:
+        # El cliente se crea una vez y se reutiliza en todas las ejecuciones
+        if self.weather_client is None:
+            self.weather_client = OpenWeatherMapClient(max_connections=self.max_concurrency)
+        return self.weather_client
+
+    @asynccontextmanager
+    async def _get_db(self):
+        db = self.session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def group_plots_by_cell(self, plots: list) -> Dict[Tuple[float, float], list]:
+        """Agrupa los lotes por celda de la cuadrícula de coordenadas.
+
+        Args:
+            plots (list): Lotes con latitud y longitud.
+
+        Returns:
+            Dict[Tuple[float, float], list]: Lotes por coordenadas redondeadas de la celda.
+        """
+        cells: Dict[Tuple[float, float], list] = {}
+        for plot in plots:
+            cell = (
+                round(float(plot.latitud), self.grid_precision),
+                round(float(plot.longitud), self.grid_precision)
+            )
+            cells.setdefault(cell, []).append(plot)
+        return cells
+
+    def _list_plots_to_collect(self, weather_repository: WeatherRepository, slot: datetime) -> list:
+        return weather_repository.list_plots_to_collect(slot.date(), self.default_policy, self.activity_days)
+
+    async def record_weather_for_all_plots(self) -> Optional[WeatherCollectionMetrics]:
+        """Registra el clima de la hora actual para los lotes que lo necesitan.
+
+        Returns:
+            Optional[WeatherCollectionMetrics]: Métricas de la ejecución, o None si
+            otro worker ya tiene o completó la ejecución de esta hora.
+        """
+        slot = current_utc_hour()
+        if not self.job_lock.acquire(WEATHER_RECORDING_JOB, slot):
+            logger.info(f"La recolección de clima de {slot.isoformat()} la realiza otro worker")
+            return None
+
+        completed = False
+        try:
+            metrics = await self._record_weather_for_slot(slot)
+            completed = True
+            return metrics
+        finally:
+            self.job_lock.release(WEATHER_RECORDING_JOB, slot, completed=completed)
+
+    async def _record_weather_for_slot(self, slot: datetime) -> WeatherCollectionMetrics:
+        """Registra el clima de una hora para los lotes que aún no tienen registro."""
+        metrics = WeatherCollectionMetrics(started_at=datetime_utc_time())
+
+        async with self._get_db() as db:
+            weather_repository = WeatherRepository(db)
+            recorded_plot_ids = weather_repository.get_plot_ids_with_reading(slot.date(), slot.time())
+            plots = [
+                plot for plot in self._list_plots_to_collect(weather_repository, slot)
+                if plot.id not in recorded_plot_ids
+            ]
+            weather_use_case = RecordWeatherUseCase(db, weather_client=self._get_weather_client())
+
+            await self._collect_and_save(
+                weather_repository,
+                plots,
+                metrics,
+                lambda lote_ids, lat, lon: weather_use_case.collect_weather_for_plots(lote_ids, lat, lon, recorded_at=slot)
+            )
+
+        metrics.finished_at = datetime_utc_time()
+        self.last_run_metrics = metrics
+        logger.info(f"Recolección de clima finalizada: {metrics.summary()}")
+        return metrics
+
+    async def backfill_missed_hours(self) -> Optional[WeatherCollectionMetrics]:
+        """Recupera de la API histórica las horas sin registros de cada lote.
+
+        Cada lote se recupera desde su propio registro más reciente hasta la hora
+        anterior a la actual, hasta `backfill_max_hours` horas atrás, de modo que un
+        lote al día no oculta las horas que faltan en los demás. Los lotes sin
+        registros previos (p. ej. recién creados) no se recuperan. Por celda se
+        consulta una vez el rango del lote más atrasado.
+
+        Returns:
+            Optional[WeatherCollectionMetrics]: Métricas de la recuperación, o None si
+            no faltan horas o si otro worker la realiza.
+        """
+        slot = current_utc_hour()
+        end = slot - timedelta(hours=1)
+        oldest_start = slot - timedelta(hours=self.backfill_max_hours)
+        async with self._get_db() as db:
+            weather_repository = WeatherRepository(db)
+            plots = self._list_plots_to_collect(weather_repository, slot)
+            last_recorded = weather_repository.get_last_recorded_slots([plot.id for plot in plots])
+        starts = {
+            lote_id: max(recorded_at + timedelta(hours=1), oldest_start)
+            for lote_id, recorded_at in last_recorded.items()
+            if recorded_at < end
+        }
+        if not starts:
+            return None
+
+        if not self.job_lock.acquire(WEATHER_BACKFILL_JOB, slot):
+            return None
+
+        completed = False
+        try:
+            metrics = WeatherCollectionMetrics(started_at=datetime_utc_time())
+            logger.info(f"Recuperando el clima de {len(starts)} lotes desde {min(starts.values()).isoformat()} a {end.isoformat()}")
+
+            async with self._get_db() as db:
+                weather_repository = WeatherRepository(db)
+                weather_use_case = RecordWeatherUseCase(db, weather_client=self._get_weather_client())
+
+                async def collect(lote_ids, lat, lon):
+                    cell_start = min(starts[lote_id] for lote_id in lote_ids)
+                    weather_logs = await weather_use_case.collect_history_for_plots(lote_ids, lat, lon, cell_start, end)
+                    # Cada lote solo recibe las horas posteriores a su propio último registro
+                    return [
+                        weather_log for weather_log in weather_logs
+                        if datetime.combine(weather_log.fecha, weather_log.hora, tzinfo=timezone.utc) >= starts[weather_log.lote_id]
+                    ]
+
+                await self._collect_and_save(
+                    weather_repository,
+                    [plot for plot in plots if plot.id in starts],
+                    metrics,
+                    collect,
+                    requests_per_cell=lambda lote_ids: history_request_count(
+                        min(starts[lote_id] for lote_id in lote_ids), end
+                    )
                 )
 
+            metrics.finished_at = datetime_utc_time()
+            self.last_backfill_metrics = metrics
+            logger.info(f"Recuperación de clima finalizada: {metrics.summary()}")
+            completed = True
+            return metrics
+        finally:
+            self.job_lock.release(WEATHER_BACKFILL_JOB, slot, completed=completed)
+
+    async def _collect_and_save(
+        self,
+        weather_repository: WeatherRepository,
+        plots: list,
+        metrics: WeatherCollectionMetrics,
+        collect: Callable[[List[int], float, float], Awaitable[List[WeatherLogCreate]]],
+        requests_per_cell: Callable[[List[int]], int] = lambda lote_ids: 1
+    ) -> None:
+        """Obtiene los registros de cada celda de forma concurrente y los guarda juntos.
+
+        Args:
+            weather_repository (WeatherRepository): Repositorio con la sesión de la ejecución.
+            plots (list): Lotes a registrar.
+            metrics (WeatherCollectionMetrics): Métricas que se actualizan.
+            collect (Callable): Obtiene los registros de los lotes de una celda a partir
+                de sus IDs y las coordenadas de la celda.
+            requests_per_cell (Callable): Consultas a la API que hace `collect` para los
+                lotes de una celda.
+        """
+        metrics.total_plots = len(plots)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        rate_limiter = AsyncRateLimiter(self.calls_per_minute, 60)
+
+        async def collect_cell(cell, cell_plots) -> List[WeatherLogCreate]:
+            lat, lon = cell
+            async with semaphore:
+                requests = requests_per_cell([plot.id for plot in cell_plots])
+                for _ in range(requests):
+                    await rate_limiter.acquire()
+                metrics.api_calls += requests
+                started = time.perf_counter()
+                try:
+                    weather_logs = await collect([plot.id for plot in cell_plots], lat, lon)
+                except Exception as e:
+                    # El error de una celda no detiene la recolección de las demás
+                    metrics.failed += len(cell_plots)
+                    metrics.failures.extend((plot.id, str(e)) for plot in cell_plots)
+                    logger.error(f"Error al obtener el clima de la celda {cell}: {str(e)}")
+                    return []
+                metrics.latencies.append(time.perf_counter() - started)
+                return weather_logs
+
+        cells = self.group_plots_by_cell(plots)
+        results = await asyncio.gather(*(collect_cell(cell, cell_plots) for cell, cell_plots in cells.items()))
+
+        # Guardar todas las lecturas de la ejecución en una sola transacción
+        weather_logs = [weather_log for cell_logs in results for weather_log in cell_logs]
+        try:
+            insert_failures = weather_repository.bulk_create_weather_logs(weather_logs)
+        except Exception as e:
+            insert_failures = [(weather_log, str(e)) for weather_log in weather_logs]
+            logger.error(f"Error al guardar los registros meteorológicos: {str(e)}")
+
+        metrics.succeeded += len(weather_logs) - len(insert_failures)
+        metrics.failed += len(insert_failures)
+        metrics.failures.extend((weather_log.lote_id, error) for weather_log, error in insert_failures)
+
+        # Agregar las lecturas nuevas a la caché de datos recientes
+        try:
+            self.recent_cache.sync(weather_repository.db)
+        except Exception as e:
+            logger.error(f"No se pudo actualizar la caché de clima reciente: {str(e)}")
+
+    async def run_hourly_collection(self):
+        """Recupera las horas pendientes, si las hay, y registra la hora actual."""
+        await self.backfill_missed_hours()
+        await self.record_weather_for_all_plots()
+
     def start(self):
         """Inicia el programador con las tareas configuradas."""
-        # Programar la tarea para ejecutarse cada hora en el minuto 0
+        # Resolver y validar las unidades meteorológicas al iniciar; se recargan por si
+        # el catálogo cambió desde que otro componente del proceso las cargó
+        db = self.session_factory()
+        try:
+            WeatherMeasurementService.reload_unit_ids(db)
+        except Exception as e:
+            logger.error(f"No se pudieron cargar las unidades meteorológicas: {str(e)}")
+        try:
+            # Cargar en memoria las lecturas recientes de todos los lotes
+            self.recent_cache.warm(db)
+        except Exception as e:
+            logger.error(f"No se pudo cargar la caché de clima reciente: {str(e)}")
+        finally:
+            db.close()
+
+        # Programar la tarea para ejecutarse cada hora en el minuto 0. Si una
+        # ejecución se retrasa (p. ej. por un bloqueo del proceso) se ejecuta una
+        # sola vez dentro del margen, en lugar de acumular las ejecuciones perdidas.
         self.scheduler.add_job(
-            self.record_weather_for_all_plots,
+            self.run_hourly_collection,
             CronTrigger(minute=0),  # Ejecutar al inicio de cada hora
-            id='weather_recording',
+            id=WEATHER_RECORDING_JOB,
             name='Record weather data for all plots',
+            misfire_grace_time=WEATHER_MISFIRE_GRACE_SECONDS,
+            coalesce=True,
             replace_existing=True
         )
-        
-        self.scheduler.start()
\ No newline at end of file
+
+        # Recuperar al iniciar las horas perdidas mientras el servicio estuvo detenido
+        self.scheduler.add_job(
+            self.backfill_missed_hours,
+            id=WEATHER_BACKFILL_JOB,
+            name='Backfill missed weather hours',
+            replace_existing=True
+        )
+
+        self.scheduler.start()
+
+    async def shutdown(self):
+        """Detiene el programador y cierra el cliente HTTP compartido."""
+        self.scheduler.shutdown(wait=False)
+        if self.weather_client is not None:
+            await self.weather_client.aclose()
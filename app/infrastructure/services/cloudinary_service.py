@@ -1,11 +1,24 @@
 from cloudinary import config, uploader
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import UploadFile
+from functools import partial
+from typing import BinaryIO, List, Optional, Tuple, Union
+import asyncio
 import os
 
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
+# Hilos dedicados a las subidas; limitan las subidas simultáneas de todo el proceso
+CLOUDINARY_UPLOAD_WORKERS = int(os.getenv("CLOUDINARY_UPLOAD_WORKERS", 8))
+# Subidas simultáneas de un mismo lote de imágenes
+CLOUDINARY_UPLOAD_CONCURRENCY = int(os.getenv("CLOUDINARY_UPLOAD_CONCURRENCY", 5))
+
+# El SDK de Cloudinary es síncrono: cada subida se ejecuta en este grupo de hilos
+# para no bloquear el bucle de eventos que comparten las peticiones de la API
+_upload_executor = ThreadPoolExecutor(max_workers=CLOUDINARY_UPLOAD_WORKERS, thread_name_prefix="cloudinary-upload")
+
 class CloudinaryService:
     def __init__(self):
         config(
@@ -15,55 +28,89 @@ class CloudinaryService:
             secure=True
         )
 
+    async def _upload(self, content: Union[bytes, str, BinaryIO], folder: str) -> dict:
+        """
+        Sube contenido a Cloudinary en el grupo de hilos de subidas
+
+        El contenido puede ser bytes, la ruta de un archivo o un archivo abierto;
+        con una ruta o un archivo la imagen se lee desde disco al subirla.
+        """
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            _upload_executor,
+            partial(
+                uploader.upload,
+                content,
+                folder=folder,
+                resource_type="image",
+                format="jpg",
+                quality="auto:good"
+            )
+        )
+        return {
+            "url": result["secure_url"],
+            "public_id": result["public_id"]
+        }
+
     async def upload_image(self, file: UploadFile, folder: str) -> dict:
         """
         Sube una imagen a Cloudinary
-        
+
         Args:
             file: Archivo de imagen
             folder: Carpeta donde se guardará la imagen
-            
+
         Returns:
             dict: Información de la imagen subida
         """
         try:
             # Leer el contenido del archivo
             contents = await file.read()
-            
+
             # Subir imagen a Cloudinary
-            result = uploader.upload(
-                contents,
-                folder=folder,
-                resource_type="image",
-                format="jpg",
-                quality="auto:good"
-            )
-            
-            return {
-                "url": result["secure_url"],
-                "public_id": result["public_id"]
-            }
-            
+            return await self._upload(contents, folder)
+
         except Exception as e:
             raise Exception(f"Error subiendo imagen a Cloudinary: {str(e)}")
 
-    async def upload_bytes(self, content: bytes, filename: str, folder: str) -> dict:
+    async def upload_bytes(self, content: Union[bytes, str, BinaryIO], filename: str, folder: str) -> dict:
         """
         Sube contenido de bytes a Cloudinary
         """
         try:
-            result = uploader.upload(
-                content,
-                folder=folder,
-                resource_type="image",
-                format="jpg",
-                quality="auto:good"
-            )
-            
-            return {
-                "url": result["secure_url"],
-                "public_id": result["public_id"]
-            }
-            
+            return await self._upload(content, folder)
+
         except Exception as e:
-            raise Exception(f"Error subiendo imagen a Cloudinary: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error subiendo imagen a Cloudinary: {str(e)}")
+
+    async def upload_many(
+        self,
+        files: List[Tuple[Union[bytes, str, BinaryIO], str]],
+        folder: str,
+        concurrency: Optional[int] = None
+    ) -> List[Union[dict, Exception]]:
+        """
+        Sube varias imágenes a la vez, con un máximo de subidas simultáneas
+
+        Una subida fallida no cancela las demás: su posición en el resultado
+        contiene la excepción, de modo que quien sube puede descartar solo esa imagen.
+
+        Args:
+            files: Contenido (bytes, ruta o archivo abierto) y nombre de cada imagen
+            folder: Carpeta donde se guardarán las imágenes
+            concurrency: Máximo de subidas simultáneas; por defecto CLOUDINARY_UPLOAD_CONCURRENCY
+
+        Returns:
+            List[Union[dict, Exception]]: Información de cada imagen subida, o el error
+            de su subida, en el mismo orden
+        """
+        semaphore = asyncio.Semaphore(concurrency or CLOUDINARY_UPLOAD_CONCURRENCY)
+
+        async def upload(content: Union[bytes, str, BinaryIO], filename: str) -> dict:
+            async with semaphore:
+                return await self.upload_bytes(content, filename, folder)
+
+        return await asyncio.gather(
+            *(upload(content, filename) for content, filename in files),
+            return_exceptions=True
+        )
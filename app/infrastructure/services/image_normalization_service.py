@@ -0,0 +1,160 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import List, Optional, Union
+import asyncio
+import hashlib
+import io
+import logging
+import math
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+# Desactiva la normalización y envía las imágenes tal como se subieron
+IMAGE_NORMALIZATION_ENABLED = os.getenv("IMAGE_NORMALIZATION_ENABLED", "true").lower() == "true"
+# Lado mayor, en píxeles, de la imagen enviada al servicio de predicción
+IMAGE_MODEL_MAX_SIDE = int(os.getenv("IMAGE_MODEL_MAX_SIDE", 640))
+# Lado mayor, en píxeles, de la imagen guardada en Cloudinary
+IMAGE_STORAGE_MAX_SIDE = int(os.getenv("IMAGE_STORAGE_MAX_SIDE", 1920))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", 85))
+# Procesos dedicados a decodificar y recodificar imágenes
+IMAGE_NORMALIZATION_WORKERS = int(os.getenv("IMAGE_NORMALIZATION_WORKERS", os.cpu_count() or 1))
+
+# Decodificar y recodificar imágenes usa la CPU: se hace en otros procesos para no
+# detener el bucle de eventos ni competir por el GIL. Los procesos se inician con
+# "spawn" porque el proceso principal ya tiene hilos en ejecución.
+_normalization_executor = ProcessPoolExecutor(
+    max_workers=IMAGE_NORMALIZATION_WORKERS,
+    mp_context=multiprocessing.get_context("spawn")
+)
+
+
+@dataclass
+class NormalizedImage:
+    """Versiones de una imagen para el modelo y para el almacenamiento.
+
+    Attributes:
+        model_content (bytes): JPEG reducido a la resolución del modelo.
+        storage_content (bytes): JPEG reducido a la resolución de almacenamiento.
+        content_hash (str): SHA-256 en hexadecimal de `storage_content`.
+    """
+    model_content: bytes
+    storage_content: bytes
+    content_hash: str
+
+
+def content_sha256(source: Union[bytes, str]) -> str:
+    """SHA-256 en hexadecimal del contenido de una imagen o de un archivo, leído por partes."""
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+    with open(source, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def _encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    output = io.BytesIO()
+    # Sin el parámetro exif, Pillow no copia los metadatos de la imagen original
+    image.save(output, format="JPEG", quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def normalize_image(
+    source: Union[bytes, str],
+    model_max_side: int = IMAGE_MODEL_MAX_SIDE,
+    storage_max_side: int = IMAGE_STORAGE_MAX_SIDE,
+    quality: int = IMAGE_JPEG_QUALITY
+) -> Optional[NormalizedImage]:
+    """Reduce una imagen y la recodifica como JPEG sin metadatos.
+
+    La orientación EXIF se aplica antes de descartar los metadatos, de modo que
+    las fotos de teléfono conservan su orientación.
+
+    Args:
+        source (Union[bytes, str]): Contenido de la imagen o ruta del archivo.
+        model_max_side (int): Lado mayor de la versión para el modelo.
+        storage_max_side (int): Lado mayor de la versión para el almacenamiento.
+        quality (int): Calidad JPEG.
+
+    Returns:
+        Optional[NormalizedImage]: Las dos versiones, o None si el contenido no es una imagen válida.
+    """
+    try:
+        with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as original:
+            # En JPEG decodifica directamente a una escala reducida, no menor que la de almacenamiento
+            scale = min(storage_max_side / max(original.size), 1)
+            original.draft("RGB", (math.ceil(original.width * scale), math.ceil(original.height * scale)))
+            image = ImageOps.exif_transpose(original).convert("RGB")
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
+
+    image.thumbnail((storage_max_side, storage_max_side), Image.Resampling.LANCZOS)
+    storage_content = _encode_jpeg(image, quality)
+    image.thumbnail((model_max_side, model_max_side), Image.Resampling.LANCZOS)
+    return NormalizedImage(
+        model_content=_encode_jpeg(image, quality),
+        storage_content=storage_content,
+        content_hash=content_sha256(storage_content)
+    )
+
+
+class ImageNormalizationService:
+    """Normaliza imágenes en el grupo de procesos de normalización.
+
+    Attributes:
+        enabled (bool): Si es False las imágenes no se modifican.
+        model_max_side (int): Lado mayor de la versión para el modelo.
+        storage_max_side (int): Lado mayor de la versión para el almacenamiento.
+        quality (int): Calidad JPEG.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = IMAGE_NORMALIZATION_ENABLED,
+        model_max_side: int = IMAGE_MODEL_MAX_SIDE,
+        storage_max_side: int = IMAGE_STORAGE_MAX_SIDE,
+        quality: int = IMAGE_JPEG_QUALITY
+    ):
+        self.enabled = enabled
+        self.model_max_side = model_max_side
+        self.storage_max_side = storage_max_side
+        self.quality = quality
+
+    async def normalize_many(self, sources: List[Union[bytes, str]]) -> List[Optional[NormalizedImage]]:
+        """
+        Normaliza varias imágenes a la vez
+
+        Args:
+            sources: Contenido o ruta de cada imagen; con una ruta la imagen se lee en el proceso que la normaliza
+
+        Returns:
+            List[Optional[NormalizedImage]]: Resultado de cada imagen, en el mismo orden; None si no se
+            normalizó y debe usarse la original
+        """
+        if not self.enabled:
+            return [None] * len(sources)
+
+        loop = asyncio.get_running_loop()
+        normalize = partial(
+            normalize_image,
+            model_max_side=self.model_max_side,
+            storage_max_side=self.storage_max_side,
+            quality=self.quality
+        )
+        results = await asyncio.gather(
+            *(loop.run_in_executor(_normalization_executor, normalize, source) for source in sources),
+            return_exceptions=True
+        )
+        normalized = []
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning(f"No se pudo normalizar una imagen; se usa la original: {str(result)}")
+                result = None
+            normalized.append(result)
+        return normalized
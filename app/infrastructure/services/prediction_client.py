@@ -0,0 +1,305 @@
+from collections import deque
+from contextlib import ExitStack, asynccontextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+import httpx
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+# Tamaño inicial, mínimo y máximo de los lotes enviados al servicio de predicción
+PREDICTION_BATCH_SIZE = int(os.getenv('PREDICTION_BATCH_SIZE', 15))
+PREDICTION_MIN_BATCH_SIZE = int(os.getenv('PREDICTION_MIN_BATCH_SIZE', 1))
+PREDICTION_MAX_BATCH_SIZE = int(os.getenv('PREDICTION_MAX_BATCH_SIZE', 30))
+# Peticiones simultáneas iniciales y máximas al servicio de predicción, por proceso
+PREDICTION_CONCURRENCY = int(os.getenv('PREDICTION_CONCURRENCY', 1))
+PREDICTION_MAX_CONCURRENCY = int(os.getenv('PREDICTION_MAX_CONCURRENCY', 4))
+# Peticiones simultáneas máximas a todos los servicios de predicción del proceso, sumando todos los tipos de análisis
+PREDICTION_GLOBAL_MAX_CONCURRENCY = int(os.getenv('PREDICTION_GLOBAL_MAX_CONCURRENCY', 6))
+# Latencia por petición por encima de la cual se reducen los lotes
+PREDICTION_TARGET_LATENCY_SECONDS = float(os.getenv('PREDICTION_TARGET_LATENCY_SECONDS', 20))
+# Fallos seguidos que abren el circuito y pausa antes de volver a probar el servicio
+PREDICTION_CIRCUIT_FAILURES = int(os.getenv('PREDICTION_CIRCUIT_FAILURES', 5))
+PREDICTION_CIRCUIT_COOLDOWN_SECONDS = float(os.getenv('PREDICTION_CIRCUIT_COOLDOWN_SECONDS', 30))
+# Intentos por imagen antes de descartarla
+PREDICTION_MAX_ATTEMPTS = int(os.getenv('PREDICTION_MAX_ATTEMPTS', 3))
+
+# Respuestas que indican que el servicio está saturado o caído y que se pueden reintentar
+_RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class AdaptiveBatchController:
+    """Ajusta el tamaño de lote y la concurrencia según la respuesta del servicio (AIMD).
+
+    Cada respuesta a tiempo aumenta el lote en una imagen y la concurrencia en
+    una fracción (aumento aditivo); una respuesta lenta reduce el lote a la
+    mitad y un error de saturación (429, 5xx, tiempo agotado) reduce a la mitad
+    el lote y la concurrencia (disminución multiplicativa).
+
+    Tras `failure_threshold` errores seguidos se abre el circuito: no se envían
+    peticiones durante `cooldown_seconds` (o lo que indique `Retry-After`) y
+    luego una única petición de prueba decide si se cierra o vuelve a abrirse.
+
+    Attributes:
+        batch_size (int): Tamaño de lote actual.
+        concurrency (int): Peticiones simultáneas permitidas actualmente.
+        state (str): Estado del circuito: `closed`, `open` o `half_open`.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = PREDICTION_BATCH_SIZE,
+        min_batch_size: int = PREDICTION_MIN_BATCH_SIZE,
+        max_batch_size: int = PREDICTION_MAX_BATCH_SIZE,
+        concurrency: int = PREDICTION_CONCURRENCY,
+        max_concurrency: int = PREDICTION_MAX_CONCURRENCY,
+        target_latency_seconds: float = PREDICTION_TARGET_LATENCY_SECONDS,
+        failure_threshold: int = PREDICTION_CIRCUIT_FAILURES,
+        cooldown_seconds: float = PREDICTION_CIRCUIT_COOLDOWN_SECONDS
+    ):
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max(max_batch_size, min_batch_size)
+        self.max_concurrency = max(max_concurrency, 1)
+        self.target_latency_seconds = target_latency_seconds
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._batch_size = float(min(max(batch_size, self.min_batch_size), self.max_batch_size))
+        self._concurrency = float(min(max(concurrency, 1), self.max_concurrency))
+        self._in_flight = 0
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop = None
+
+    @property
+    def batch_size(self) -> int:
+        return int(self._batch_size)
+
+    @property
+    def concurrency(self) -> int:
+        return int(self._concurrency)
+
+    @property
+    def state(self) -> str:
+        if self._consecutive_failures < self.failure_threshold:
+            return 'closed'
+        return 'open' if time.monotonic() < self._open_until else 'half_open'
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Las primitivas de asyncio pertenecen a un bucle de eventos; se recrean si cambia
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self._in_flight = 0
+            self._probing = False
+        return self._condition
+
+    def _can_send(self) -> bool:
+        state = self.state
+        if state == 'open':
+            return False
+        if state == 'half_open':
+            return not self._probing and self._in_flight == 0
+        return self._in_flight < self.concurrency
+
+    @asynccontextmanager
+    async def slot(self):
+        """Espera un turno para enviar una petición al servicio."""
+        condition = self._get_condition()
+        async with condition:
+            while not self._can_send():
+                wait = self._open_until - time.monotonic() if self.state == 'open' else None
+                try:
+                    await asyncio.wait_for(condition.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+            if self.state == 'half_open':
+                self._probing = True
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            async with condition:
+                self._in_flight -= 1
+                self._probing = False
+                condition.notify_all()
+
+    def record_success(self, latency_seconds: float) -> None:
+        """Registra una respuesta correcta del servicio y su latencia."""
+        self._consecutive_failures = 0
+        if latency_seconds > self.target_latency_seconds:
+            self._batch_size = max(self.min_batch_size, self._batch_size / 2)
+            return
+        self._batch_size = min(self.max_batch_size, self._batch_size + 1)
+        self._concurrency = min(self.max_concurrency, self._concurrency + 1 / self._concurrency)
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        """Registra un error de saturación del servicio."""
+        self._batch_size = max(self.min_batch_size, self._batch_size / 2)
+        self._concurrency = max(1.0, self._concurrency / 2)
+        self._consecutive_failures += 1
+        if retry_after or self._consecutive_failures >= self.failure_threshold:
+            # Con Retry-After el servicio indica cuándo volver a intentar: se abre el circuito hasta entonces
+            self._consecutive_failures = max(self._consecutive_failures, self.failure_threshold)
+            self._open_until = time.monotonic() + (retry_after or self.cooldown_seconds)
+            logger.warning(f"Circuito del servicio de predicción abierto por {retry_after or self.cooldown_seconds:.0f} s")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado actual del controlador, para registros y métricas."""
+        return {'batch_size': self.batch_size, 'concurrency': self.concurrency, 'state': self.state}
+
+
+_controllers: Dict[str, AdaptiveBatchController] = {}
+_global_slots: Optional[asyncio.Semaphore] = None
+_global_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_prediction_controller(service_url: str) -> AdaptiveBatchController:
+    """Controlador compartido por todos los análisis del proceso que usan un mismo servicio."""
+    if service_url not in _controllers:
+        _controllers[service_url] = AdaptiveBatchController()
+    return _controllers[service_url]
+
+
+def global_prediction_slots() -> asyncio.Semaphore:
+    """Límite de peticiones simultáneas compartido por todos los servicios de predicción del proceso."""
+    global _global_slots, _global_slots_loop
+    loop = asyncio.get_running_loop()
+    if _global_slots is None or _global_slots_loop is not loop:
+        _global_slots = asyncio.Semaphore(PREDICTION_GLOBAL_MAX_CONCURRENCY)
+        _global_slots_loop = loop
+    return _global_slots
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers['retry-after'])
+    except (KeyError, ValueError):
+        return None
+
+
+class AdaptivePredictionClient:
+    """Envía imágenes al servicio de predicción en lotes de tamaño adaptativo.
+
+    Las imágenes de una petición fallida, ya sea por saturación del servicio,
+    porque el servicio rechazó el lote o por un error al leer las imágenes o la
+    respuesta, se reintentan una por una, hasta `max_attempts` veces, en lugar de
+    perder el lote completo. Además del límite adaptativo de cada servicio, las peticiones
+    respetan el límite global del proceso (`PREDICTION_GLOBAL_MAX_CONCURRENCY`).
+
+    Attributes:
+        controller (Optional[AdaptiveBatchController]): Controlador del tamaño de lote y la
+            concurrencia; por defecto el compartido del servicio.
+        max_attempts (int): Intentos por imagen.
+    """
+
+    def __init__(
+        self,
+        controller: Optional[AdaptiveBatchController] = None,
+        max_attempts: int = PREDICTION_MAX_ATTEMPTS
+    ):
+        self.controller = controller
+        self.max_attempts = max_attempts
+
+    def controller_for(self, url: str) -> AdaptiveBatchController:
+        """Controlador usado para las peticiones a `url`."""
+        return self.controller or get_prediction_controller(url)
+
+    async def predict(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        files: List[Any],
+        parse_results: Callable[[dict], List[Any]]
+    ) -> List[Tuple[Any, Any]]:
+        """
+        Obtiene las predicciones de un conjunto de imágenes
+
+        Args:
+            client: Cliente HTTP compartido
+            url: URL del endpoint de predicción
+            files: Imágenes con `filename`, `content_type` y `open_for_model()`
+            parse_results: Convierte la respuesta del servicio en la lista de resultados, en el orden de las imágenes
+
+        Returns:
+            List[Tuple[Any, Any]]: Cada imagen predicha con éxito y su resultado
+        """
+        controller = self.controller_for(url)
+        pending: Deque[Tuple[Any, int]] = deque((file, 0) for file in files)
+        predictions: List[Tuple[Any, Any]] = []
+        tasks = set()
+
+        def next_batch() -> List[Tuple[Any, int]]:
+            # Las imágenes que ya fallaron se reintentan solas
+            if pending[0][1] > 0:
+                return [pending.popleft()]
+            batch = []
+            while pending and pending[0][1] == 0 and len(batch) < controller.batch_size:
+                batch.append(pending.popleft())
+            return batch
+
+        def retry(batch: List[Tuple[Any, int]], reason: str) -> None:
+            for file, attempts in batch:
+                if attempts + 1 < self.max_attempts:
+                    pending.append((file, attempts + 1))
+                else:
+                    logger.error(f"Imagen {file.filename} descartada tras {attempts + 1} intentos: {reason}")
+
+        async def post(batch: List[Tuple[Any, int]]) -> None:
+            async with controller.slot(), global_prediction_slots():
+                started = time.monotonic()
+                try:
+                    with ExitStack() as stack:
+                        files_to_upload = [
+                            ("files", (file.filename, stack.enter_context(file.open_for_model()), file.content_type))
+                            for file, _ in batch
+                        ]
+                        response = await client.post(url, files=files_to_upload)
+                except httpx.HTTPError as e:
+                    controller.record_failure()
+                    retry(batch, f"{type(e).__name__}: {str(e)}")
+                    return
+
+            if response.status_code in _RETRYABLE_STATUS_CODES:
+                controller.record_failure(_retry_after_seconds(response))
+                retry(batch, f"status code {response.status_code}")
+                return
+            if response.status_code not in [200, 207]:
+                if len(batch) > 1:
+                    # Una sola imagen puede hacer que se rechace el lote: las imágenes se reintentan solas
+                    logger.warning(f"Lote de {len(batch)} imágenes rechazado por el servicio: status code {response.status_code}")
+                    retry(batch, f"status code {response.status_code}")
+                else:
+                    logger.error(f"Imagen {batch[0][0].filename} rechazada por el servicio: status code {response.status_code}")
+                return
+
+            results = parse_results(response.json())
+            controller.record_success(time.monotonic() - started)
+            for (file, _), result in zip(batch, results):
+                if result.status == "success":
+                    predictions.append((file, result))
+
+        async def send(batch: List[Tuple[Any, int]]) -> None:
+            # Cualquier error de un lote (leer una imagen, interpretar la respuesta) se
+            # reintenta; si escapara de la tarea, `asyncio.wait` lo perdería junto con el lote
+            try:
+                await post(batch)
+            except Exception as e:
+                logger.error(f"Error en un lote de {len(batch)} imágenes: {type(e).__name__}: {str(e)}")
+                retry(batch, f"{type(e).__name__}: {str(e)}")
+
+        while pending or tasks:
+            while pending and len(tasks) < max(controller.concurrency, 1):
+                tasks.add(asyncio.create_task(send(next_batch())))
+            _, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+        logger.debug(f"Predicción adaptativa: {controller.snapshot()}")
+        return predictions
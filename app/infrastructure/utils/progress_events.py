@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+import time
+from typing import AsyncIterator, Callable, Optional
+
+from dotenv import load_dotenv
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+load_dotenv(override=True)
+
+# Cada cuánto se revisa el progreso de un análisis para enviarlo a los clientes conectados
+PROGRESS_EVENTS_INTERVAL_SECONDS = float(os.getenv('PROGRESS_EVENTS_INTERVAL_SECONDS', 1))
+# Cada cuánto se envía un comentario para que los proxies no cierren una conexión sin eventos
+PROGRESS_EVENTS_KEEPALIVE_SECONDS = float(os.getenv('PROGRESS_EVENTS_KEEPALIVE_SECONDS', 15))
+# Duración máxima de una conexión; el cliente puede volver a conectarse
+PROGRESS_EVENTS_MAX_SECONDS = float(os.getenv('PROGRESS_EVENTS_MAX_SECONDS', 600))
+
+
+def format_event(event: str, data: dict) -> str:
+    """Serializa un evento en el formato de Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def progress_events(
+    request: Request,
+    read_progress: Callable[[], Optional[dict]],
+    interval_seconds: float = PROGRESS_EVENTS_INTERVAL_SECONDS,
+    keepalive_seconds: float = PROGRESS_EVENTS_KEEPALIVE_SECONDS,
+    max_seconds: float = PROGRESS_EVENTS_MAX_SECONDS
+) -> AsyncIterator[str]:
+    """Genera eventos `progress` cada vez que cambia el progreso de un análisis.
+
+    El procesamiento ocurre en el worker de la cola, por lo que el progreso se
+    lee de la fila del análisis, cuyos contadores se actualizan al guardar cada
+    lote. Solo se envía un evento cuando los contadores o el estado cambian, y
+    un evento `done` cuando el análisis deja de estar en procesamiento.
+
+    Args:
+        request (Request): Petición del cliente, para detenerse si se desconecta.
+        read_progress (Callable[[], Optional[dict]]): Lee el progreso con una sesión
+            propia; debe incluir `status`. Se ejecuta en el grupo de hilos.
+        interval_seconds (float): Pausa entre lecturas.
+        keepalive_seconds (float): Pausa máxima sin enviar nada al cliente.
+        max_seconds (float): Duración máxima de la conexión.
+    """
+    started = time.monotonic()
+    last_progress = None
+    last_sent = started
+    while time.monotonic() - started < max_seconds:
+        if await request.is_disconnected():
+            return
+        progress = await run_in_threadpool(read_progress)
+        if progress is None:
+            return
+        if progress != last_progress:
+            last_progress = progress
+            last_sent = time.monotonic()
+            yield format_event("progress", progress)
+            if progress["status"] != "processing":
+                yield format_event("done", progress)
+                return
+        elif time.monotonic() - last_sent >= keepalive_seconds:
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(interval_seconds)
+
+
+def progress_event_response(request: Request, read_progress: Callable[[], Optional[dict]]) -> StreamingResponse:
+    """Respuesta de Server-Sent Events con el progreso de un análisis."""
+    return StreamingResponse(
+        progress_events(request, read_progress),
+        media_type="text/event-stream",
+        # Evita que los proxies acumulen los eventos antes de enviarlos
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
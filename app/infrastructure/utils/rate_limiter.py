@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """Limita la frecuencia de llamadas a un servicio externo.
+
+    Reparte las llamadas de forma uniforme dentro del período: cada llamada a
+    `acquire` reserva el siguiente turno disponible y espera hasta que llegue.
+
+    Attributes:
+        max_calls (int): Número máximo de llamadas por período.
+        period_seconds (float): Duración del período en segundos.
+    """
+
+    def __init__(self, max_calls: int, period_seconds: float = 60.0):
+        if max_calls <= 0:
+            raise ValueError("max_calls debe ser mayor que cero")
+        self.max_calls = max_calls
+        self.period_seconds = period_seconds
+        self._interval = period_seconds / max_calls
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Espera hasta que la siguiente llamada esté permitida."""
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Marca el final de los elementos de una cola
+_END = object()
+
+
+@dataclass
+class PipelineStage:
+    """Etapa de un pipeline asíncrono.
+
+    Attributes:
+        name (str): Nombre de la etapa, usado en los registros de errores.
+        handler (Callable[[Any], Awaitable[Any]]): Procesa un elemento y devuelve el que
+            pasa a la siguiente etapa; si devuelve None el elemento no continúa.
+        workers (int): Elementos que la etapa procesa a la vez.
+    """
+    name: str
+    handler: Callable[[Any], Awaitable[Any]]
+    workers: int = 1
+
+
+async def run_staged_pipeline(items: Iterable[Any], stages: List[PipelineStage], queue_size: int = 2) -> None:
+    """Procesa elementos a través de etapas que se ejecutan en paralelo.
+
+    Cada etapa toma elementos de una cola acotada y deja su resultado en la cola
+    de la siguiente, de modo que, por ejemplo, un lote se puede predecir mientras
+    el anterior se sube al almacenamiento. Las colas acotadas limitan cuántos
+    elementos esperan entre etapas: si una etapa es lenta, las anteriores se
+    detienen en lugar de acumular elementos en memoria.
+
+    Un error al procesar un elemento se registra y descarta solo ese elemento.
+
+    Args:
+        items (Iterable[Any]): Elementos de entrada de la primera etapa.
+        stages (List[PipelineStage]): Etapas en orden.
+        queue_size (int): Máximo de elementos en espera entre dos etapas.
+    """
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+
+    async def feed() -> None:
+        for item in items:
+            await queues[0].put(item)
+        for _ in range(stages[0].workers):
+            await queues[0].put(_END)
+
+    async def work(index: int, stage: PipelineStage) -> None:
+        output: Optional[asyncio.Queue] = queues[index + 1] if index + 1 < len(stages) else None
+        while True:
+            item = await queues[index].get()
+            if item is _END:
+                return
+            try:
+                result = await stage.handler(item)
+            except Exception as e:
+                logger.error(f"Error en la etapa {stage.name}: {str(e)}")
+                continue
+            if result is not None and output is not None:
+                await output.put(result)
+
+    async def run_stage(index: int, stage: PipelineStage) -> None:
+        await asyncio.gather(*(work(index, stage) for _ in range(stage.workers)))
+        if index + 1 < len(stages):
+            for _ in range(stages[index + 1].workers):
+                await queues[index + 1].put(_END)
+
+    await asyncio.gather(feed(), *(run_stage(index, stage) for index, stage in enumerate(stages)))
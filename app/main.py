@@ -22,6 +22,7 @@ from app.soil_analysis.infrastructure.api import router as soil_analysis_router
 from app.weather.infrastructure.api import router as weather_router
 from app.costs.infrastructure.api import router as costs_router
 from app.reports.infrastructure.api import router as reports_router
+from app.infrastructure.jobs.api import router as jobs_router
 from fastapi.exceptions import RequestValidationError
 from app.infrastructure.common.exceptions_handler import (
     validation_exception_handler, 
@@ -32,6 +33,9 @@ from app.infrastructure.common.exceptions_handler import (
 )
 from app.infrastructure.common.common_exceptions import DomainException, UserStateException
 from app.infrastructure.scheduler.weather_scheduler import WeatherScheduler
+from app.infrastructure.scheduler.exchange_rate_scheduler import ExchangeRateScheduler
+from app.infrastructure.image_inference.http_client import close_shared_http_client
+from app.weather.infrastructure.openweathermap_client import close_shared_openweathermap_client
 from contextlib import asynccontextmanager
 import logging
 from app.infrastructure.middleware.logging_middleware import logging_middleware as log_middleware_func
@@ -47,8 +51,14 @@ async def lifespan(app: FastAPI):
     # Startup
     weather_scheduler = WeatherScheduler()
     weather_scheduler.start()
+    exchange_rate_scheduler = ExchangeRateScheduler()
+    await exchange_rate_scheduler.start()
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    exchange_rate_scheduler.shutdown()
+    await weather_scheduler.shutdown()
+    await close_shared_http_client()
+    await close_shared_openweathermap_client()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -75,6 +85,7 @@ app.include_router(weather_router)
 app.include_router(costs_router)
 app.include_router(reports_router)
 app.include_router(logs_router)
+app.include_router(jobs_router)
 
 @app.get("/")
 def root():
@@ -1,59 +1,45 @@
+from datetime import date
 from decimal import Decimal
-from typing import Dict
-import requests
-import os
+from typing import Dict, Iterable, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from app.measurement.infrastructure.sql_repository import MeasurementRepository
+from app.measurement.infrastructure.exchange_rate_store import ExchangeRateStore, exchange_rate_store
 from app.infrastructure.common.common_exceptions import DomainException
 from fastapi import status
-from dotenv import load_dotenv
-load_dotenv(override=True)
 
 class CurrencyConversionService:
-    """Servicio para manejar conversiones entre diferentes monedas"""
+    """Servicio para manejar conversiones entre diferentes monedas
+
+    Las tasas se leen del almacén compartido por el proceso, que se carga al
+    iniciar la aplicación y se refresca en segundo plano, por lo que las
+    conversiones nunca esperan a la API de tasas de cambio. Si se indica la
+    fecha de la transacción, se usa la tasa histórica de esa fecha.
+    """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, rate_store: ExchangeRateStore = exchange_rate_store):
         self.db = db
         self.repository = MeasurementRepository(db)
-        self.api_key = os.getenv('EXCHANGE_RATE_API_KEY')
-        self.base_url = "https://v6.exchangerate-api.com/v6"
-        self._conversion_rates = {}
-        self._base_currency = None
-        self._fetch_conversion_rates('COP')
+        self.rate_store = rate_store
+        self._factors: Dict[Tuple[str, str, Optional[date]], Decimal] = {}
 
-    def _fetch_conversion_rates(self, base_currency: str = 'COP') -> Dict[str, Decimal]:
+    def _get_rate(self, currency: str, on_date: Optional[date]) -> Decimal:
         """
-        Obtiene las tasas de conversión actualizadas desde la API
+        Obtiene la tasa de una moneda respecto a COP en una fecha
         
         Args:
-            base_currency: Moneda base para las conversiones (COP por defecto)
+            currency: Símbolo de la moneda
+            on_date: Fecha de la transacción (None para la tasa vigente)
             
         Returns:
-            Dict[str, Decimal]: Diccionario con las tasas de conversión
+            Decimal: Tasa de conversión
         """
-        try:
-            url = f"{self.base_url}/{self.api_key}/latest/{base_currency}"
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data.get('result') == 'success':
-                self._conversion_rates = {
-                    currency: Decimal(str(rate))
-                    for currency, rate in data['conversion_rates'].items()
-                }
-                self._base_currency = base_currency
-                return self._conversion_rates
-            else:
-                raise DomainException(
-                    message="Error al obtener tasas de conversión",
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-                )
-        except requests.exceptions.RequestException as e:
+        rate = self.rate_store.get_rate(currency, on_date)
+        if rate is None:
             raise DomainException(
-                message="Error al conectar con el servicio de conversión de monedas",
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+                message=f"No se encontró tasa de conversión para {currency}",
+                status_code=status.HTTP_400_BAD_REQUEST
             )
+        return rate
 
     def get_currency_symbol(self, currency_id: int) -> str:
         """Obtiene el símbolo de la moneda por su ID"""
@@ -65,7 +51,53 @@ class CurrencyConversionService:
             )
         return currency.abreviatura
 
-    def convert_amount(self, amount: Decimal, from_currency: str, to_currency: str) -> Decimal:
+    def get_conversion_factor(self, from_currency: str, to_currency: str, on_date: Optional[date] = None) -> Decimal:
+        """
+        Obtiene el factor por el que se multiplica un monto para convertirlo de una moneda a otra
+        
+        El factor se calcula una sola vez por par de monedas y fecha, y se reutiliza
+        en las conversiones siguientes de este servicio.
+        
+        Args:
+            from_currency: Símbolo de la moneda origen
+            to_currency: Símbolo de la moneda destino
+            on_date: Fecha de la transacción; si se indica se usa la tasa de esa fecha
+            
+        Returns:
+            Decimal: Factor de conversión
+        """
+        key = (from_currency, to_currency, on_date)
+        factor = self._factors.get(key)
+        if factor is not None:
+            return factor
+
+        if from_currency == to_currency:
+            factor = Decimal(1)
+        else:
+            if not self.rate_store.has_rates():
+                raise DomainException(
+                    message="Las tasas de conversión de monedas aún no están disponibles",
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+
+            # Verificar que existan las tasas para ambas monedas
+            from_rate = self._get_rate(from_currency, on_date)
+            to_rate = self._get_rate(to_currency, on_date)
+
+            if from_currency == 'COP':
+                # Conversión directa de COP a otra moneda usando la tasa
+                factor = to_rate
+            elif to_currency == 'COP':
+                # Conversión de otra moneda a COP
+                factor = Decimal(1) / from_rate
+            else:
+                # Conversión entre dos monedas diferentes a COP, pasando por COP
+                factor = to_rate / from_rate
+
+        self._factors[key] = factor
+        return factor
+
+    def convert_amount(self, amount: Decimal, from_currency: str, to_currency: str, on_date: Optional[date] = None) -> Decimal:
         """
         Convierte un monto de una moneda a otra usando COP como base
         
@@ -73,33 +105,35 @@ class CurrencyConversionService:
             amount: Cantidad a convertir
             from_currency: Símbolo de la moneda origen
             to_currency: Símbolo de la moneda destino
+            on_date: Fecha de la transacción; si se indica se usa la tasa de esa fecha
             
         Returns:
             Decimal: Monto convertido
         """
         if from_currency == to_currency:
             return amount
+        return amount * self.get_conversion_factor(from_currency, to_currency, on_date)
 
-        # Si no tenemos tasas o necesitamos actualizarlas
-        if not self._conversion_rates:
-            self._fetch_conversion_rates('COP')
+    def convert_many(
+        self,
+        amounts: Iterable[Optional[Decimal]],
+        from_currency: str,
+        to_currency: str,
+        on_date: Optional[date] = None
+    ) -> List[Optional[Decimal]]:
+        """
+        Convierte una secuencia de montos con un único factor de conversión
         
-        # Verificar que existan las tasas para ambas monedas
-        for currency in [from_currency, to_currency]:
-            if currency != 'COP' and currency not in self._conversion_rates:
-                raise DomainException(
-                    message=f"No se encontró tasa de conversión para {currency}",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
-
-        if from_currency == 'COP':
-            # Conversión directa de COP a otra moneda usando la tasa
-            return amount * self._conversion_rates[to_currency]
-        elif to_currency == 'COP':
-            # Conversión de otra moneda a COP
-            return amount / self._conversion_rates[from_currency]
-        else:
-            # Conversión entre dos monedas diferentes a COP
-            # Primero convertimos a COP y luego a la moneda destino
-            amount_in_cop = amount / self._conversion_rates[from_currency]
-            return amount_in_cop * self._conversion_rates[to_currency] 
\ No newline at end of file
+        Args:
+            amounts: Montos a convertir; los valores None se conservan
+            from_currency: Símbolo de la moneda origen
+            to_currency: Símbolo de la moneda destino
+            on_date: Fecha de la transacción; si se indica se usa la tasa de esa fecha
+            
+        Returns:
+            List[Optional[Decimal]]: Montos convertidos en el mismo orden
+        """
+        if from_currency == to_currency:
+            return list(amounts)
+        factor = self.get_conversion_factor(from_currency, to_currency, on_date)
+        return [amount * factor if amount is not None else None for amount in amounts]
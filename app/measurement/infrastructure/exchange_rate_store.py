@@ -0,0 +1,318 @@
+import asyncio
+import logging
+import os
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.infrastructure.common.datetime_utils import datetime_utc_time
+from app.infrastructure.db.connection import SessionLocal
+from app.measurement.infrastructure.sql_repository import MeasurementRepository
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_RATE_API_URL = os.getenv('EXCHANGE_RATE_API_URL', 'https://v6.exchangerate-api.com/v6')
+EXCHANGE_RATE_MAX_AGE_MINUTES = int(os.getenv('EXCHANGE_RATE_MAX_AGE_MINUTES', 60))
+EXCHANGE_RATE_TIMEOUT_SECONDS = float(os.getenv('EXCHANGE_RATE_TIMEOUT_SECONDS', 10))
+
+
+@dataclass(frozen=True)
+class ExchangeRateSnapshot:
+    """Tasas de conversión vigentes respecto a una moneda base.
+
+    Attributes:
+        base_currency (str): Símbolo de la moneda base (COP).
+        rates (Mapping[str, Decimal]): Unidades de cada moneda por una unidad de la base.
+        fetched_at (Optional[datetime]): Momento en que se obtuvieron las tasas.
+    """
+    base_currency: str
+    rates: Mapping[str, Decimal] = field(default_factory=lambda: MappingProxyType({}))
+    fetched_at: Optional[datetime] = None
+
+
+class ExchangeRateHistory:
+    """Histórico de tasas de cambio indexado por fecha.
+
+    Para cada moneda se guarda un arreglo ordenado con los ordinales de las fechas
+    y una lista paralela con las tasas, de modo que la tasa vigente en una fecha
+    se obtiene con una búsqueda binaria sin consultar la base de datos.
+    """
+
+    def __init__(self):
+        self._dates: Dict[str, array] = {}
+        self._rates: Dict[str, List[Decimal]] = {}
+        self._latest: Optional[Tuple[date, Mapping[str, Decimal]]] = None
+
+    def __bool__(self) -> bool:
+        return self._latest is not None
+
+    def add(self, fecha: date, rates: Mapping[str, Decimal]) -> None:
+        """Agrega o reemplaza las tasas de un día.
+
+        Args:
+            fecha (date): Fecha de las tasas.
+            rates (Mapping[str, Decimal]): Tasas por símbolo de moneda.
+        """
+        ordinal = fecha.toordinal()
+        for currency, rate in rates.items():
+            dates = self._dates.setdefault(currency, array('l'))
+            values = self._rates.setdefault(currency, [])
+            position = bisect_right(dates, ordinal)
+            if position and dates[position - 1] == ordinal:
+                values[position - 1] = Decimal(str(rate))
+            else:
+                dates.insert(position, ordinal)
+                values.insert(position, Decimal(str(rate)))
+
+        if self._latest is None or fecha >= self._latest[0]:
+            self._latest = (fecha, MappingProxyType({c: Decimal(str(r)) for c, r in rates.items()}))
+
+    def get_rate(self, currency: str, on_date: date) -> Optional[Decimal]:
+        """Obtiene la tasa vigente de una moneda en una fecha.
+
+        Se usa la tasa más reciente registrada en o antes de la fecha; si la fecha es
+        anterior a todo el histórico se usa la tasa más antigua disponible.
+
+        Args:
+            currency (str): Símbolo de la moneda.
+            on_date (date): Fecha de la transacción.
+
+        Returns:
+            Optional[Decimal]: La tasa, o None si la moneda no tiene histórico.
+        """
+        dates = self._dates.get(currency)
+        if not dates:
+            return None
+        position = bisect_right(dates, on_date.toordinal())
+        return self._rates[currency][max(position - 1, 0)]
+
+    def latest(self) -> Optional[Tuple[date, Mapping[str, Decimal]]]:
+        """Devuelve la fecha y las tasas del día más reciente del histórico."""
+        return self._latest
+
+
+class ExchangeRateStore:
+    """Almacén de tasas de cambio compartido por todo el proceso.
+
+    Las tasas se cargan al iniciar la aplicación y se refrescan periódicamente con
+    el cliente asíncrono de httpx. Las lecturas nunca esperan a la red: si las
+    tasas están vencidas se devuelven igualmente y se programa un refresco en
+    segundo plano (stale-while-revalidate).
+
+    Cada refresco exitoso se persiste en la tabla `tasa_cambio` y se agrega a un
+    histórico en memoria, que permite convertir montos con la tasa de la fecha de
+    la transacción y servir las últimas tasas persistidas si el proveedor no
+    responde al iniciar.
+
+    Attributes:
+        api_key (Optional[str]): Clave de la API de exchangerate-api.
+        base_url (str): URL base del proveedor de tasas.
+        base_currency (str): Moneda base para las tasas.
+        max_age (timedelta): Antigüedad a partir de la cual las tasas se consideran vencidas.
+        session_factory (Optional[Callable[[], Session]]): Fábrica de sesiones para persistir
+            las tasas; sin ella el histórico solo vive en memoria.
+        history (ExchangeRateHistory): Histórico de tasas indexado por fecha.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = EXCHANGE_RATE_API_URL,
+        base_currency: str = 'COP',
+        max_age_minutes: int = EXCHANGE_RATE_MAX_AGE_MINUTES,
+        session_factory: Optional[Callable[[], Session]] = None
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.base_currency = base_currency
+        self.max_age = timedelta(minutes=max_age_minutes)
+        self.session_factory = session_factory
+        self.history = ExchangeRateHistory()
+        self._snapshot = ExchangeRateSnapshot(base_currency=base_currency)
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot(self) -> ExchangeRateSnapshot:
+        """Devuelve las tasas actuales sin comprobar su antigüedad."""
+        return self._snapshot
+
+    def is_stale(self) -> bool:
+        """Indica si las tasas nunca se cargaron o superan la antigüedad máxima."""
+        fetched_at = self._snapshot.fetched_at
+        return fetched_at is None or datetime_utc_time() - fetched_at > self.max_age
+
+    def load(self, rates: Mapping[str, Decimal], fetched_at: Optional[datetime] = None) -> ExchangeRateSnapshot:
+        """Reemplaza atómicamente las tasas vigentes.
+
+        Args:
+            rates (Mapping[str, Decimal]): Tasas respecto a la moneda base.
+            fetched_at (Optional[datetime]): Momento de obtención; por defecto, ahora.
+
+        Returns:
+            ExchangeRateSnapshot: Las nuevas tasas vigentes.
+        """
+        self._snapshot = ExchangeRateSnapshot(
+            base_currency=self.base_currency,
+            rates=MappingProxyType({currency: Decimal(str(rate)) for currency, rate in rates.items()}),
+            fetched_at=fetched_at or datetime_utc_time()
+        )
+        return self._snapshot
+
+    def get_snapshot(self) -> ExchangeRateSnapshot:
+        """Devuelve las tasas vigentes y, si están vencidas, programa un refresco.
+
+        Nunca bloquea: el refresco se agenda en el bucle de eventos en ejecución y
+        las tasas anteriores se siguen sirviendo mientras tanto.
+
+        Returns:
+            ExchangeRateSnapshot: Las tasas disponibles en este momento (pueden estar vacías).
+        """
+        if self.is_stale():
+            self.schedule_refresh()
+        return self._snapshot
+
+    def has_rates(self) -> bool:
+        """Indica si hay tasas vigentes o históricas disponibles."""
+        return bool(self._snapshot.rates) or bool(self.history)
+
+    def get_rate(self, currency: str, on_date: Optional[date] = None) -> Optional[Decimal]:
+        """Obtiene la tasa de una moneda respecto a la moneda base.
+
+        Para fechas posteriores a las tasas vigentes (o sin fecha) se usan las tasas
+        vigentes; para fechas anteriores, el histórico, y si la moneda no tiene
+        histórico, la tasa vigente.
+
+        Args:
+            currency (str): Símbolo de la moneda.
+            on_date (Optional[date]): Fecha de la transacción.
+
+        Returns:
+            Optional[Decimal]: La tasa, o None si no hay tasa para la moneda.
+        """
+        if currency == self.base_currency:
+            return Decimal(1)
+
+        snapshot = self.get_snapshot()
+        current_rate = snapshot.rates.get(currency)
+        if current_rate is not None and (on_date is None or on_date >= snapshot.fetched_at.date()):
+            return current_rate
+
+        historical_rate = self.history.get_rate(currency, on_date or datetime_utc_time().date())
+        # Sin histórico para la moneda se usa la tasa vigente
+        return historical_rate if historical_rate is not None else current_rate
+
+    def load_persisted(self) -> int:
+        """Carga el histórico de tasas desde la base de datos.
+
+        Si aún no hay tasas vigentes, se usan las del día persistido más reciente,
+        marcadas con esa fecha para que se consideren vencidas y se refresquen.
+
+        Returns:
+            int: Número de tasas cargadas.
+        """
+        if self.session_factory is None:
+            return 0
+
+        db = self.session_factory()
+        try:
+            rows = MeasurementRepository(db).get_exchange_rates(self.base_currency)
+        finally:
+            db.close()
+
+        by_date: Dict[date, Dict[str, Decimal]] = {}
+        for row in rows:
+            by_date.setdefault(row.fecha, {})[row.moneda] = row.tasa
+        for fecha, rates in by_date.items():
+            self.history.add(fecha, rates)
+
+        latest = self.history.latest()
+        if latest and not self._snapshot.rates:
+            fecha, rates = latest
+            self.load(rates, fetched_at=datetime.combine(fecha, time.min, tzinfo=timezone.utc))
+            logger.info(f"Usando tasas de cambio persistidas del {fecha.isoformat()}")
+        return len(rows)
+
+    async def initialize(self) -> bool:
+        """Carga el histórico persistido y luego intenta refrescar desde el proveedor.
+
+        Returns:
+            bool: True si el proveedor respondió con tasas nuevas.
+        """
+        try:
+            await asyncio.to_thread(self.load_persisted)
+        except Exception as e:
+            logger.error(f"Error al cargar tasas de cambio persistidas: {str(e)}")
+        return await self.refresh()
+
+    def _persist(self, fecha: date, rates: Mapping[str, Decimal]) -> None:
+        db = self.session_factory()
+        try:
+            MeasurementRepository(db).save_exchange_rates(fecha, self.base_currency, rates)
+        finally:
+            db.close()
+
+    def schedule_refresh(self) -> None:
+        """Programa un refresco en segundo plano si no hay uno en curso."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Sin bucle de eventos (por ejemplo, en scripts); el programador refrescará
+            return
+        self._refresh_task = loop.create_task(self.refresh())
+
+    async def refresh(self) -> bool:
+        """Obtiene las tasas del proveedor y reemplaza las vigentes.
+
+        Si el proveedor falla se conservan las tasas anteriores. Las tasas nuevas
+        se agregan al histórico y se persisten para la fecha del refresco.
+
+        Returns:
+            bool: True si las tasas se actualizaron.
+        """
+        if not self.api_key:
+            logger.warning("No se configuró EXCHANGE_RATE_API_KEY; no se actualizan las tasas de cambio")
+            return False
+
+        url = f"{self.base_url}/{self.api_key}/latest/{self.base_currency}"
+        try:
+            async with httpx.AsyncClient(timeout=EXCHANGE_RATE_TIMEOUT_SECONDS) as client:
+                response = await client.get(url)
+                response.raise_for_status()
+                data = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"Error al obtener tasas de cambio: {str(e)}")
+            return False
+
+        if data.get('result') != 'success':
+            logger.error(f"El proveedor de tasas de cambio respondió con error: {data.get('error-type')}")
+            return False
+
+        snapshot = self.load(data['conversion_rates'])
+        fecha = snapshot.fetched_at.date()
+        self.history.add(fecha, snapshot.rates)
+        logger.info(f"Tasas de cambio actualizadas ({len(snapshot.rates)} monedas)")
+
+        if self.session_factory is not None:
+            try:
+                await asyncio.to_thread(self._persist, fecha, snapshot.rates)
+            except Exception as e:
+                logger.error(f"Error al persistir tasas de cambio: {str(e)}")
+        return True
+
+
+exchange_rate_store = ExchangeRateStore(
+    api_key=os.getenv('EXCHANGE_RATE_API_KEY'),
+    session_factory=SessionLocal
+)
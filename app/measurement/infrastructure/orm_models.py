@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, Numeric, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.infrastructure.db.connection import Base
 
@@ -40,4 +40,28 @@ class UnitOfMeasure(Base):
     abreviatura = Column(String(10), unique=True, nullable=False)
     categoria_id = Column(Integer, ForeignKey('categoria_unidad_medida.id'), nullable=False)
 
-    categoria = relationship("UnitCategory", back_populates="unidades")
\ No newline at end of file
+    categoria = relationship("UnitCategory", back_populates="unidades")
+
+class ExchangeRate(Base):
+    """Modelo para las tasas de cambio históricas.
+
+    Este modelo guarda, por día, la tasa de cada moneda respecto a la moneda base,
+    tal como la entregó el proveedor de tasas de cambio.
+
+    Attributes:
+        id (int): ID único del registro.
+        fecha (date): Fecha a la que corresponde la tasa.
+        moneda_base (str): Símbolo de la moneda base (COP).
+        moneda (str): Símbolo de la moneda cotizada.
+        tasa (Decimal): Unidades de la moneda cotizada por una unidad de la moneda base.
+    """
+    __tablename__ = "tasa_cambio"
+    __table_args__ = (
+        UniqueConstraint('fecha', 'moneda_base', 'moneda', name='uq_tasa_cambio_fecha_moneda'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    fecha = Column(Date, nullable=False, index=True)
+    moneda_base = Column(String(10), nullable=False)
+    moneda = Column(String(10), nullable=False)
+    tasa = Column(Numeric(24, 12), nullable=False)
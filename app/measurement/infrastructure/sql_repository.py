@@ -1,6 +1,8 @@
-from typing import List, Optional
+from datetime import date
+from decimal import Decimal
+from typing import List, Mapping, Optional
 from sqlalchemy.orm import Session, joinedload
-from app.measurement.infrastructure.orm_models import UnitOfMeasure, UnitCategory
+from app.measurement.infrastructure.orm_models import UnitOfMeasure, UnitCategory, ExchangeRate
 from app.measurement.domain.schemas import UnitOfMeasureResponse
 
 class MeasurementRepository:
@@ -59,6 +61,19 @@ class MeasurementRepository:
             unit_name (str): Nombre de la unidad de medida.
         """
         return self.db.query(UnitOfMeasure).filter(UnitOfMeasure.nombre == unit_name).first()
+
+    def get_units_of_measure_by_names(self, unit_names: List[str]) -> List[UnitOfMeasure]:
+        """Obtiene varias unidades de medida por su nombre, con sus categorías, en una sola consulta.
+
+        Args:
+            unit_names (List[str]): Nombres de las unidades de medida.
+
+        Returns:
+            List[UnitOfMeasure]: Unidades encontradas (las inexistentes se omiten).
+        """
+        return self.db.query(UnitOfMeasure).options(
+            joinedload(UnitOfMeasure.categoria)
+        ).filter(UnitOfMeasure.nombre.in_(unit_names)).all()
     
     def get_unit_category_by_id(self, unit_category_id: int) -> Optional[UnitCategory]:
         """Obtiene una categoría de unidad de medida por su ID.
@@ -98,3 +113,39 @@ class MeasurementRepository:
             Optional[UnitOfMeasure]: La unidad de medida si se encuentra, None en caso contrario.
         """
         return self.db.query(UnitOfMeasure).filter(UnitOfMeasure.abreviatura == symbol).first()
+
+    def save_exchange_rates(self, fecha: date, moneda_base: str, rates: Mapping[str, Decimal]) -> None:
+        """Guarda las tasas de cambio de un día, reemplazando las existentes.
+
+        Args:
+            fecha (date): Fecha a la que corresponden las tasas.
+            moneda_base (str): Símbolo de la moneda base.
+            rates (Mapping[str, Decimal]): Tasas por símbolo de moneda.
+        """
+        try:
+            self.db.query(ExchangeRate).filter(
+                ExchangeRate.fecha == fecha,
+                ExchangeRate.moneda_base == moneda_base
+            ).delete(synchronize_session=False)
+            self.db.add_all([
+                ExchangeRate(fecha=fecha, moneda_base=moneda_base, moneda=currency, tasa=rate)
+                for currency, rate in rates.items()
+            ])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def get_exchange_rates(self, moneda_base: str) -> List[ExchangeRate]:
+        """Obtiene el histórico de tasas de cambio de una moneda base.
+
+        Args:
+            moneda_base (str): Símbolo de la moneda base.
+
+        Returns:
+            List[ExchangeRate]: Tasas ordenadas por fecha ascendente.
+        """
+        return self.db.query(ExchangeRate)\
+            .filter(ExchangeRate.moneda_base == moneda_base)\
+            .order_by(ExchangeRate.fecha.asc())\
+            .all()
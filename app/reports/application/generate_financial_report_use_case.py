@@ -1,7 +1,7 @@
 # app/reports/application/generate_financial_report_use_case.py
 from datetime import date
 from decimal import Decimal
-from typing import Optional, List
+from typing import Dict, Optional, List
 from sqlalchemy.orm import Session
 from app.costs.infrastructure.sql_repository import CostsRepository
 from app.farm.infrastructure.sql_repository import FarmRepository
@@ -87,16 +87,18 @@ class GenerateFinancialReportUseCase:
                     status_code=status.HTTP_404_NOT_FOUND
                 )
 
-        # Function to convert amounts, with default from_currency
-        def convert_amount(amount: Decimal, from_currency: str = default_currency.abreviatura) -> Decimal:
-            if not amount:
-                return Decimal(0)
-            return self.currency_service.convert_amount(
-                amount,
-                from_currency,
-                target_currency.abreviatura
+        # Convierte un conjunto de montos con un solo factor, a la tasa de la fecha indicada
+        def convert_amounts(amounts: List[Optional[Decimal]], on_date: Optional[date] = None) -> List[Decimal]:
+            return self.currency_service.convert_many(
+                [amount or Decimal(0) for amount in amounts],
+                default_currency.abreviatura,
+                target_currency.abreviatura,
+                on_date
             )
 
+        # Los totales del período se convierten con la tasa del cierre del período
+        period_rate_date = min(end_date, date.today())
+
         plots = self.repository.get_farm_plots(farm_id)
         if plot_id:
             plots = [p for p in plots if p.id == plot_id]
@@ -125,14 +127,33 @@ class GenerateFinancialReportUseCase:
                 filtered = [c for c in filtered if (c.ganancia_neta or 0) > 0 == only_profitable]
             return filtered
 
+        # Cargar primero las tareas de todos los lotes y cultivos para convertir sus montos en conjunto
+        plot_tasks_by_plot = {}
+        crops_by_plot = {}
+        crop_tasks_by_crop = {}
+        for plot in plots:
+            plot_tasks_by_plot[plot.id] = self.repository.get_plot_level_tasks_in_period(plot.id, start_date, end_date)
+            crops = self.repository.get_plot_crops_in_period(plot.id, start_date, end_date)
+            if crop_id:
+                crops = [c for c in crops if c.id == crop_id]
+            crops_by_plot[plot.id] = crops
+            for crop in crops:
+                crop_tasks_by_crop[crop.id] = self.repository.get_crop_level_tasks_in_period(crop.id, start_date, end_date)
+
+        converted_amounts = self._convert_task_amounts(
+            [task for tasks in plot_tasks_by_plot.values() for task in tasks]
+            + [task for tasks in crop_tasks_by_crop.values() for task in tasks],
+            convert_amounts
+        )
+
         for plot in plots:
             # Obtener tareas a nivel de LOTE
-            plot_tasks = self.repository.get_plot_level_tasks_in_period(plot.id, start_date, end_date)
+            plot_tasks = plot_tasks_by_plot[plot.id]
             plot_task_costs = []
             total_plot_task_cost = Decimal(0)
 
             for task in plot_tasks:
-                task_cost = self._create_task_cost(task, "LOTE", convert_amount, target_currency)
+                task_cost = self._create_task_cost(task, "LOTE", converted_amounts[task.id], target_currency)
                 plot_task_costs.append(task_cost)
 
             # Filtrar tareas del lote según los criterios
@@ -140,9 +161,7 @@ class GenerateFinancialReportUseCase:
             total_plot_task_cost = sum(task.costo_total for task in plot_task_costs)
 
             # Obtener y procesar cultivos
-            crops = self.repository.get_plot_crops_in_period(plot.id, start_date, end_date)
-            if crop_id:
-                crops = [c for c in crops if c.id == crop_id]
+            crops = crops_by_plot[plot.id]
 
             crop_financials = []
             total_plot_crop_cost = Decimal(0)
@@ -151,18 +170,18 @@ class GenerateFinancialReportUseCase:
             for crop in crops:
 
                 # Get crop tasks and their costs
-                crop_tasks = self.repository.get_crop_level_tasks_in_period(crop.id, start_date, end_date)
+                crop_tasks = crop_tasks_by_crop[crop.id]
                 crop_task_costs = []
 
                 for task in crop_tasks:
-                    task_cost = self._create_task_cost(task, "CULTIVO", convert_amount, target_currency)
+                    task_cost = self._create_task_cost(task, "CULTIVO", converted_amounts[task.id], target_currency)
                     crop_task_costs.append(task_cost)
 
                 # Filtrar tareas del cultivo según los criterios
                 crop_task_costs = filter_task_costs(crop_task_costs)
 
                 # Update crop financials without using costo_produccion
-                crop_financials.append(self._create_crop_financials(crop, crop_task_costs, convert_amount, target_currency))
+                crop_financials.append(self._create_crop_financials(crop, crop_task_costs, convert_amounts, target_currency))
 
             # Filtrar cultivos según criterios
             crop_financials = filter_crops(crop_financials)
@@ -200,22 +219,17 @@ class GenerateFinancialReportUseCase:
             end_date
         )
         
-        top_machinery = []
-        for m_id, nombre, tipo_nombre, horas_uso, costo in top_machinery_data:
-            # Convertir el costo a la moneda objetivo
-            costo_convertido = self.currency_service.convert_amount(
-                costo,
-                default_currency.abreviatura,
-                target_currency.abreviatura
-            )
-            
-            top_machinery.append(TopMachineryUsage(
+        top_machinery_costs = convert_amounts([row[4] for row in top_machinery_data], period_rate_date)
+        top_machinery = [
+            TopMachineryUsage(
                 maquinaria_id=m_id,
                 nombre=nombre,
                 tipo_maquinaria_nombre=tipo_nombre,
                 total_horas_uso=horas_uso,
                 costo_total=costo_convertido
-            ))
+            )
+            for (m_id, nombre, tipo_nombre, horas_uso, _), costo_convertido in zip(top_machinery_data, top_machinery_costs)
+        ]
 
         # Obtener el top de insumos
         top_inputs_data = self.repository.get_top_input_usage(
@@ -224,23 +238,18 @@ class GenerateFinancialReportUseCase:
             end_date
         )
 
-        top_inputs = []
-        for i_id, nombre, cat_nombre, um_simbolo, cantidad, costo in top_inputs_data:
-            # Convertir el costo a la moneda objetivo
-            costo_convertido = self.currency_service.convert_amount(
-                costo,
-                default_currency.abreviatura,
-                target_currency.abreviatura
-            )
-            
-            top_inputs.append(TopInputUsage(
+        top_inputs_costs = convert_amounts([row[5] for row in top_inputs_data], period_rate_date)
+        top_inputs = [
+            TopInputUsage(
                 insumo_id=i_id,
                 nombre=nombre,
                 categoria_nombre=cat_nombre,
                 unidad_medida_simbolo=um_simbolo,
                 cantidad_total=cantidad,
                 costo_total=costo_convertido
-            ))
+            )
+            for (i_id, nombre, cat_nombre, um_simbolo, cantidad, _), costo_convertido in zip(top_inputs_data, top_inputs_costs)
+        ]
 
         return FarmFinancialReport(
             finca_id=farm.id,
@@ -365,15 +374,49 @@ class GenerateFinancialReportUseCase:
         # Si no hay agrupación o no se reconoce el tipo
         return tasks
 
-    def _create_task_cost(self, task, nivel: str, convert_amount_func, target_currency) -> TaskCost:
+    def _convert_task_amounts(self, tasks, convert_amounts_func) -> Dict[int, List[Decimal]]:
+        """
+        Convierte los montos de un conjunto de tareas con una conversión por fecha de tasa
+
+        Los costos de cada tarea se convierten con la tasa de su fecha, por lo que
+        las tareas se agrupan por fecha y cada grupo se convierte en una sola pasada.
+
+        Returns:
+            Dict[int, List[Decimal]]: Por ID de tarea, los costos de mano de obra, insumos
+            y maquinaria, el costo por hora de mano de obra, los costos unitarios de los
+            insumos y los costos por hora de las maquinarias, convertidos
+        """
+        amounts_by_date: Dict[Optional[date], List[tuple]] = {}
+        for task in tasks:
+            task_date = task.fecha_finalizacion or task.fecha_inicio_estimada
+            labor_hour_cost = task.costo_mano_obra.costo_hora if task.costo_mano_obra else None
+            amounts = (
+                [
+                    self.costs_repository.get_labor_cost(task.id),
+                    self.costs_repository.get_task_inputs_cost(task.id),
+                    self.costs_repository.get_task_machinery_cost(task.id),
+                    labor_hour_cost
+                ]
+                + [ti.insumo.costo_unitario for ti in task.insumos]
+                + [tm.maquinaria.costo_hora for tm in task.maquinarias]
+            )
+            amounts_by_date.setdefault(task_date, []).append((task.id, amounts))
+
+        converted_amounts = {}
+        for task_date, task_amounts in amounts_by_date.items():
+            converted = convert_amounts_func([amount for _, amounts in task_amounts for amount in amounts], task_date)
+            offset = 0
+            for task_id, amounts in task_amounts:
+                converted_amounts[task_id] = converted[offset:offset + len(amounts)]
+                offset += len(amounts)
+        return converted_amounts
+
+    def _create_task_cost(self, task, nivel: str, converted: List[Decimal], target_currency) -> TaskCost:
         """Helper method to create TaskCost with converted currency values"""
-        # Get costs
-        input_cost = self.costs_repository.get_task_inputs_cost(task.id)
-        machinery_cost = self.costs_repository.get_task_machinery_cost(task.id)
-        labor_cost = self.costs_repository.get_labor_cost(task.id)        
-        labor_cost = convert_amount_func(labor_cost)
-        input_cost = convert_amount_func(input_cost)
-        machinery_cost = convert_amount_func(machinery_cost)
+        # Montos ya convertidos por _convert_task_amounts, con la tasa de la fecha de la tarea
+        labor_cost, input_cost, machinery_cost, labor_hour_cost = converted[:4]
+        input_unit_costs = converted[4:4 + len(task.insumos)]
+        machinery_hour_costs = converted[4 + len(task.insumos):]
         task_total = labor_cost + input_cost + machinery_cost
 
         return TaskCost(
@@ -388,7 +431,7 @@ class GenerateFinancialReportUseCase:
             mano_obra=LaborCostSchema(
                 cantidad_trabajadores=task.costo_mano_obra.cantidad_trabajadores,
                 horas_trabajadas=task.costo_mano_obra.horas_trabajadas,
-                costo_hora=convert_amount_func(task.costo_mano_obra.costo_hora),
+                costo_hora=labor_hour_cost,
                 moneda_id=target_currency.id,
                 moneda_simbolo=target_currency.abreviatura,
                 observaciones=task.costo_mano_obra.observaciones
@@ -403,14 +446,14 @@ class GenerateFinancialReportUseCase:
                     descripcion=ti.insumo.descripcion,
                     unidad_medida_id=ti.insumo.unidad_medida_id,
                     unidad_medida_nombre=ti.insumo.unidad_medida.nombre,
-                    costo_unitario=convert_amount_func(ti.insumo.costo_unitario),
+                    costo_unitario=input_unit_cost,
                     moneda_id=target_currency.id,
                     moneda_simbolo=target_currency.abreviatura,
                     stock_actual=ti.insumo.stock_actual,
                     cantidad_utilizada=ti.cantidad_utilizada,
                     fecha_aplicacion=ti.fecha_aplicacion,
                     observaciones=ti.observaciones
-                ) for ti in task.insumos
+                ) for ti, input_unit_cost in zip(task.insumos, input_unit_costs)
             ],
             costo_insumos=input_cost,
             maquinarias=[
@@ -422,25 +465,28 @@ class GenerateFinancialReportUseCase:
                     descripcion=tm.maquinaria.descripcion,
                     modelo=tm.maquinaria.modelo,
                     numero_serie=tm.maquinaria.numero_serie,
-                    costo_hora=convert_amount_func(tm.maquinaria.costo_hora),
+                    costo_hora=machinery_hour_cost,
                     moneda_id=target_currency.id,
                     moneda_simbolo=target_currency.abreviatura,
                     horas_uso=tm.horas_uso,
                     fecha_uso=tm.fecha_uso,
                     observaciones=tm.observaciones
-                ) for tm in task.maquinarias
+                ) for tm, machinery_hour_cost in zip(task.maquinarias, machinery_hour_costs)
             ],
             costo_maquinaria=machinery_cost,
             costo_total=task_total,
             observaciones=task.descripcion
         )
 
-    def _create_crop_financials(self, crop, crop_task_costs, convert_amount_func, target_currency) -> CropFinancials:
+    def _create_crop_financials(self, crop, crop_task_costs, convert_amounts_func, target_currency) -> CropFinancials:
         """Helper method to create CropFinancials with converted currency values"""
-        # Convert crop income
+        # Convert crop income at the rate of the sale date
+        sale_date = crop.fecha_venta or crop.fecha_cosecha
+        precio_venta_convertido = None
+        if crop.precio_venta_unitario:
+            precio_venta_convertido = convert_amounts_func([crop.precio_venta_unitario], sale_date)[0]
         crop_income = Decimal(0)
-        if crop.cantidad_vendida and crop.precio_venta_unitario:
-            precio_venta_convertido = convert_amount_func(crop.precio_venta_unitario)
+        if crop.cantidad_vendida and precio_venta_convertido:
             crop_income = Decimal(crop.cantidad_vendida) * precio_venta_convertido
 
         total_crop_task_cost = sum(task.costo_total for task in crop_task_costs)
@@ -456,7 +502,7 @@ class GenerateFinancialReportUseCase:
             cantidad_vendida=crop.cantidad_vendida,
             cantidad_vendida_unidad_id=crop.cantidad_vendida_unidad_id,
             cantidad_vendida_unidad_simbolo=crop.cantidad_vendida_unidad.abreviatura if crop.cantidad_vendida_unidad else None,
-            precio_venta_unitario=convert_amount_func(crop.precio_venta_unitario) if crop.precio_venta_unitario else None,
+            precio_venta_unitario=precio_venta_convertido,
             moneda_id=target_currency.id,
             moneda_simbolo=target_currency.abreviatura,
             ingreso_total=crop_income,
@@ -1,5 +1,6 @@
 from fastapi import status
 from sqlalchemy.orm import Session
+from app.soil_analysis.infrastructure.orm_models import SoilAnalysisStatusEnum
 from app.soil_analysis.infrastructure.sql_repository import SoilAnalysisRepository
 from app.infrastructure.common.common_exceptions import DomainException
 import os
@@ -21,10 +22,21 @@ class GetAnalysisStatusUseCase:
                 status_code=status.HTTP_404_NOT_FOUND
             )
             
-        classifications = self.soil_analysis_repository.get_classifications_by_analysis_id(analysis.id)
+        cached_images = analysis.imagenes_desde_cache or 0
+        total_processed = analysis.imagenes_procesadas or 0
+        total_failed = analysis.imagenes_fallidas or 0
+
+        # Los análisis terminados antes de existir los contadores los tienen en 0: se cuentan sus clasificaciones
+        if analysis.estado != SoilAnalysisStatusEnum.processing and total_processed == total_failed == cached_images == 0:
+            total_processed = self.soil_analysis_repository.count_classifications_by_analysis_id(analysis.id)
+            total_failed = max(analysis.cantidad_imagenes - total_processed, 0)
 
         return {
             "status": analysis.estado.value,
-            "total_processed": len(classifications),
+            "total_processed": total_processed,
+            "total_failed": total_failed,
+            "total_images": analysis.cantidad_imagenes,
+            "cached_images": cached_images,
+            "cache_hit_rate": round(cached_images / analysis.cantidad_imagenes, 4) if analysis.cantidad_imagenes else 0.0,
             "analysis_id": analysis.id
         }
\ No newline at end of file
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.cultural_practices.application.services.task_service import TaskService
 from app.soil_analysis.domain.schemas import ClassificationResult, SoilAnalysisResult
 from app.soil_analysis.infrastructure.sql_repository import SoilAnalysisRepository
+from app.soil_analysis.infrastructure.soil_type_cache import soil_type_cache
 from app.farm.application.services.farm_service import FarmService
 from app.plot.infrastructure.sql_repository import PlotRepository
 from app.user.domain.schemas import UserInDB
@@ -56,7 +57,7 @@ class GetAnalysisUseCase:
                 ClassificationResult(
                     id=classification.id,
                     imagen_url=classification.imagen_url,
-                    resultado_analisis=self.soil_analysis_repository.get_soil_type_by_id(classification.resultado_analisis_id).nombre,
+                    resultado_analisis=soil_type_cache.get_name(self.db, classification.resultado_analisis_id),
                     confianza_clasificacion=classification.confianza_clasificacion,
                     prob_alluvial_soil=classification.prob_alluvial_soil,
                     prob_black_soil=classification.prob_black_soil,
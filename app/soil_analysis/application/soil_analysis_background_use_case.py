@@ -1,187 +1,143 @@
 from sqlalchemy.orm import Session
 from app.soil_analysis.domain.schemas import PredictionServiceResponse
-from app.soil_analysis.infrastructure.orm_models import SoilAnalysisStatusEnum
+from app.soil_analysis.infrastructure.orm_models import SoilAnalysis, SoilAnalysisStatusEnum
 from app.cultural_practices.infrastructure.sql_repository import CulturalPracticesRepository
 from app.cultural_practices.application.services.task_service import TaskService
 from app.plot.infrastructure.sql_repository import PlotRepository
 from app.farm.application.services.farm_service import FarmService
 from app.infrastructure.common.common_exceptions import DomainException
-from fastapi import BackgroundTasks, status
+from fastapi import status, UploadFile
 from app.infrastructure.common.datetime_utils import datetime_utc_time
 from app.infrastructure.services.cloudinary_service import CloudinaryService
+from app.infrastructure.image_inference.pipeline import (
+    ImageAnalysisType,
+    ImageInferenceJobHandler,
+    ImageInferencePipeline
+)
 from dotenv import load_dotenv
 import os
-import httpx
 import logging
 from app.soil_analysis.infrastructure.sql_repository import SoilAnalysisRepository
+from app.soil_analysis.infrastructure.soil_type_cache import soil_type_cache
 from app.soil_analysis.domain.schemas import (
     FileContent,
+    SoilClassificationResponse,
     SoilAnalysisCreate,
     SoilClassificationCreate
 )
-from typing import List, Dict
-import math
-import asyncio
+from typing import Callable, List, Optional, Tuple
 from app.infrastructure.db.connection import SessionLocal
+from app.infrastructure.jobs.file_store import JobFileStore
+from app.infrastructure.jobs.job_queue import JobQueue
 
 load_dotenv(override=True)
 
 logger = logging.getLogger(__name__)
 SOIL_ANALYSIS_SERVICE_URL = os.getenv('SOIL_ANALYSIS_SERVICE_URL', 'http://localhost:8080')
-
-class SoilAnalysisBackgroundUseCase:
+# Tipo de los trabajos de la cola persistente para este análisis
+SOIL_ANALYSIS_JOB_TYPE = 'analisis_suelo'
+# Versión del modelo de clasificación; al cambiarla no se reutilizan predicciones anteriores
+SOIL_MODEL_VERSION = os.getenv('SOIL_MODEL_VERSION', '1')
+
+class SoilAnalysisType(ImageAnalysisType):
+    """Clasificación de suelo en el pipeline de inferencia de imágenes"""
+
+    job_type = SOIL_ANALYSIS_JOB_TYPE
+    record_id_key = "analysis_id"
+    storage_folder = "soil_analysis"
+    model_version = SOIL_MODEL_VERSION
+    status_enum = SoilAnalysisStatusEnum
+    file_content_class = FileContent
+    response_class = SoilClassificationResponse
+    service_response_class = PredictionServiceResponse
+
+    def prediction_url(self) -> str:
+        return f"{SOIL_ANALYSIS_SERVICE_URL}/soil-analysis/predict"
+
+    def get_record(self, db: Session, analysis_id: int) -> Optional[SoilAnalysis]:
+        return SoilAnalysisRepository(db).get_analysis_by_id(analysis_id)
+
+    def write_results(
+        self,
+        db: Session,
+        analysis_id: int,
+        results: List[Tuple[FileContent, SoilClassificationResponse, dict]]
+    ) -> int:
+        classifications = []
+        for file, result, stored in results:
+            # El catálogo de tipos de suelo se resuelve en memoria, sin una consulta por imagen
+            soil_type_id = soil_type_cache.get_id(db, result.predicted_class)
+            if soil_type_id is None:
+                logger.error(f"Tipo de suelo desconocido para {file.filename}: {result.predicted_class}")
+                continue
+
+            classifications.append(SoilClassificationCreate(
+                analisis_suelo_id=analysis_id,
+                imagen_url=stored["url"],
+                imagen_public_id=stored["public_id"],
+                resultado_analisis_id=soil_type_id,
+                confianza_clasificacion=result.confidence,
+                prob_laterite_soil=result.probabilities.laterite_soil,
+                prob_peat_soil=result.probabilities.peat_soil,
+                prob_yellow_soil=result.probabilities.yellow_soil,
+                prob_cinder_soil=result.probabilities.cinder_soil,
+                prob_clay_soil=result.probabilities.clay_soil,
+                prob_black_soil=result.probabilities.black_soil,
+                prob_alluvial_soil=result.probabilities.alluvial_soil
+            ))
+        SoilAnalysisRepository(db).bulk_create_classifications(classifications)
+        return len(classifications)
+
+    def add_batch_progress(self, db: Session, analysis_id: int, processed: int, failed: int, cached: int) -> None:
+        SoilAnalysisRepository(db).add_batch_progress(analysis_id, processed, failed, cached)
+
+    def delete_results(self, db: Session, analysis_id: int) -> None:
+        SoilAnalysisRepository(db).delete_classifications_by_analysis_id(analysis_id)
+
+    def save_changes(self, db: Session) -> None:
+        SoilAnalysisRepository(db).save_changes()
+
+
+soil_analysis_type = SoilAnalysisType()
+
+class SoilAnalysisBackgroundUseCase(ImageInferencePipeline):
     """Caso de uso para procesar análisis de suelo en segundo plano"""
 
-    def __init__(self, db: Session):
-        self.db = db
+    def __init__(
+        self,
+        db: Session,
+        session_factory: Callable[[], Session] = SessionLocal,
+        job_queue: Optional[JobQueue] = None,
+        file_store: Optional[JobFileStore] = None
+    ):
+        super().__init__(soil_analysis_type, db, session_factory=session_factory)
+        self.job_queue = job_queue or JobQueue()
+        self.file_store = file_store or JobFileStore()
         self.cultural_practices_repository = CulturalPracticesRepository(db)
         self.farm_service = FarmService(db)
         self.plot_repository = PlotRepository(db)
-        self.cloudinary_service = CloudinaryService()
         self.task_service = TaskService(db)
-        self._environment = os.getenv('RAILWAY_ENVIRONMENT_NAME', 'development')
         self.soil_analysis_repository = SoilAnalysisRepository(db)
-        
-    async def _process_image_batch(
-        self,
-        batch_files: List[FileContent],
-        task_id: int,
-        analysis_id: int,
-        batch_num: int,
-        total_batches: int
-    ):
-        """
-        Procesa un lote de imágenes y crea las detecciones correspondientes
-        """
-        try:
-            # Preparar archivos para el servicio de predicción
-            files_to_upload = [
-                ("files", (file.filename, file.content, file.content_type))
-                for file in batch_files
-            ]
-
-            # Obtener predicciones para el lote actual
-            async with httpx.AsyncClient(
-                timeout=httpx.Timeout(60.0),
-                verify=False,
-                follow_redirects=True,
-                transport=httpx.AsyncHTTPTransport(retries=3)
-            ) as client:
-                response = await client.post(
-                    f"{SOIL_ANALYSIS_SERVICE_URL}/soil-analysis/predict",
-                    files=files_to_upload
-                )
-
-            if response.status_code not in [200, 207]:
-                logger.error(f"Error en lote {batch_num + 1}: Status code {response.status_code}")
-                return
 
-            detection_results = PredictionServiceResponse(**response.json())
-
-            # Procesar cada detección del lote
-            for index, result in enumerate(detection_results.results):
-                if result.status == "success":
-                    image_folder = f"{self._environment}/soil_analysis/task_{task_id}"
-                    
-                    # Subir imagen a Cloudinary
-                    cloudinary_result = await self.cloudinary_service.upload_bytes(
-                        batch_files[index].content,
-                        batch_files[index].filename,
-                        image_folder
-                    )
-                    
-                    predicted_class = self.soil_analysis_repository.get_soil_type_by_name(result.predicted_class)
-                    
-                    # Crear detección individual
-                    self.soil_analysis_repository.create_classification(
-                        SoilClassificationCreate(
-                            analisis_suelo_id=analysis_id,
-                            imagen_url=cloudinary_result["url"],
-                            imagen_public_id=cloudinary_result["public_id"],
-                            resultado_analisis_id=predicted_class.id,
-                            confianza_clasificacion=result.confidence,
-                            prob_laterite_soil=result.probabilities.laterite_soil,
-                            prob_peat_soil=result.probabilities.peat_soil,
-                            prob_yellow_soil=result.probabilities.yellow_soil,
-                            prob_cinder_soil=result.probabilities.cinder_soil,
-                            prob_clay_soil=result.probabilities.clay_soil,
-                            prob_black_soil=result.probabilities.black_soil,
-                            prob_alluvial_soil=result.probabilities.alluvial_soil
-                        )
-                    )
-
-            # Guardar cambios después de cada lote
-            self.soil_analysis_repository.save_changes()
-            
-        except Exception as e:
-            logger.error(f"Error procesando lote {batch_num + 1}/{total_batches}: {str(e)}")
-            
-    async def _process_batches(
+    def enqueue_images(
         self,
-        files_content: List[FileContent],
-        task_id: int,
-        analysis_id: int
-    ):
-        """
-        Procesa todos los lotes de imágenes
-        """
-        try:
-            batch_size = 15
-            total_batches = math.ceil(len(files_content) / batch_size)
-
-            for batch_num in range(total_batches):
-                start_idx = batch_num * batch_size
-                end_idx = min((batch_num + 1) * batch_size, len(files_content))
-                batch_files = files_content[start_idx:end_idx]
-
-                await self._process_image_batch(
-                    batch_files,
-                    task_id,
-                    analysis_id,
-                    batch_num,
-                    total_batches
-                )
-
-                await asyncio.sleep(1)
-
-            # Actualizar estado del monitoreo al finalizar todos los lotes
-            with SessionLocal() as db:
-                soil_analysis_repository = SoilAnalysisRepository(db)
-                analysis = soil_analysis_repository.get_analysis_by_id(analysis_id)
-                if analysis:
-                    total_classifications = len(soil_analysis_repository.get_classifications_by_analysis_id(analysis_id))
-                    if total_classifications == 0:
-                        analysis.estado = SoilAnalysisStatusEnum.failed
-                    elif total_classifications < analysis.cantidad_imagenes:
-                        analysis.estado = SoilAnalysisStatusEnum.partial
-                    else:
-                        analysis.estado = SoilAnalysisStatusEnum.completed
-                    soil_analysis_repository.save_changes()
-                    
-        except Exception as e:
-            logger.error(f"Error procesando lotes: {str(e)}")
-            # Actualizar estado a fallido en caso de error
-            with SessionLocal() as db:
-                soil_analysis_repository = SoilAnalysisRepository(db)
-                analysis = soil_analysis_repository.get_analysis_by_id(analysis_id)
-                if analysis:
-                    analysis.estado = SoilAnalysisStatusEnum.failed
-                    soil_analysis_repository.save_changes()
-    
-    async def process_images_in_background(
-        self,
-        files_content: List[FileContent],
+        files: List[UploadFile],
         task_id: int,
         observations: str,
-        user_id: int,
-        background_tasks: BackgroundTasks
+        user_id: int
     ):
         """
-        Procesa imágenes en lotes de 15 en segundo plano
+        Crea el análisis de suelo y encola el procesamiento de las imágenes para un worker
+
+        Las imágenes se copian al almacén de archivos de trabajos y el
+        procesamiento lo realiza `python -m app.infrastructure.jobs.worker`.
         """
+        # Sin el volumen compartido con los workers no se crea el registro
+        self.file_store.ensure_configured()
+
         try:
             # Crear una nueva sesión de base de datos
-            db = SessionLocal()
+            db = self.session_factory()
             try:
                 # Inicializar los repositorios y servicios con la nueva sesión
                 self.db = db
@@ -215,28 +171,30 @@ class SoilAnalysisBackgroundUseCase:
                         fecha_analisis=current_datetime.date(),
                         observaciones=observations,
                         estado=SoilAnalysisStatusEnum.processing,
-                        cantidad_imagenes=len(files_content)
+                        cantidad_imagenes=len(files)
                     )
                 )
 
-                # Guardar cambios después de cada lote
+                # Importante: Hacer commit de la transacción antes de encolar el procesamiento
                 self.soil_analysis_repository.save_changes()
                 
                 analysis_id = analysis.id
-                
-                # Agregar el procesamiento de lotes como tarea en segundo plano
-                background_tasks.add_task(
-                    self._process_batches,
-                    files_content,
-                    task_id,
-                    analysis_id  # Usar el ID del monitoreo creado
+
+                # Guardar las imágenes y encolar el procesamiento
+                stored_files = self.file_store.save([
+                    (file.filename, file.content_type, file.file) for file in files
+                ])
+                self.job_queue.enqueue(
+                    SOIL_ANALYSIS_JOB_TYPE,
+                    {"task_id": task_id, "analysis_id": analysis_id, "files": stored_files},
+                    reference_id=analysis_id
                 )
                 
                 return {
                     "analysis_id": analysis_id,
                     "status": "processing",
-                    "message": f"Procesando {len(files_content)} imágenes en segundo plano",
-                    "total_images": len(files_content)
+                    "message": f"Procesando {len(files)} imágenes en segundo plano",
+                    "total_images": len(files)
                 }
 
             finally:
@@ -245,11 +203,34 @@ class SoilAnalysisBackgroundUseCase:
         except Exception as e:
             logger.error(f"Error en proceso background: {str(e)}")
             try:
-                with SessionLocal() as db:
+                with self.session_factory() as db:
                     soil_analysis_repository = SoilAnalysisRepository(db)
                     analysis = soil_analysis_repository.get_analysis_by_task_id(task_id)
                     if analysis:
                         analysis.estado = SoilAnalysisStatusEnum.failed
                         soil_analysis_repository.save_changes()
             except Exception as e:
-                logger.error(f"Error actualizando estado a failed: {str(e)}")
\ No newline at end of file
+                logger.error(f"Error actualizando estado a failed: {str(e)}")
+            raise
+
+
+class SoilAnalysisJobHandler(ImageInferenceJobHandler):
+    """Procesa en un worker los análisis encolados por `SoilAnalysisBackgroundUseCase`"""
+
+    job_type = SOIL_ANALYSIS_JOB_TYPE
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        file_store: Optional[JobFileStore] = None,
+        cloudinary_service: Optional[CloudinaryService] = None
+    ):
+        super().__init__(
+            soil_analysis_type,
+            session_factory=session_factory,
+            file_store=file_store,
+            cloudinary_service=cloudinary_service
+        )
+
+    def create_pipeline(self, db: Session) -> SoilAnalysisBackgroundUseCase:
+        return SoilAnalysisBackgroundUseCase(db, session_factory=self.session_factory)
@@ -10,21 +10,18 @@ from app.infrastructure.common.common_exceptions import DomainException
 from fastapi import status, UploadFile
 from app.infrastructure.common.datetime_utils import datetime_utc_time
 from app.infrastructure.services.cloudinary_service import CloudinaryService
+from app.infrastructure.image_inference.http_client import get_shared_http_client
+from app.infrastructure.services.prediction_client import global_prediction_slots
 from dotenv import load_dotenv
 import os
 import httpx
 import logging
 from app.soil_analysis.infrastructure.sql_repository import SoilAnalysisRepository
+from app.soil_analysis.application.soil_analysis_background_use_case import soil_analysis_type
 from app.soil_analysis.domain.schemas import (
     SoilAnalysisResponse,
-    FileContent,
-    SoilAnalysisCreate,
-    SoilClassificationCreate
+    SoilAnalysisCreate
 )
-from typing import List, Dict
-import math
-import asyncio
-from app.infrastructure.db.connection import SessionLocal
 
 load_dotenv(override=True)
 
@@ -119,38 +116,36 @@ class SoilAnalysisUseCase:
         service_url = f"{SOIL_ANALYSIS_SERVICE_URL}/soil-analysis/predict"
         logger.info(f"Making request to: {service_url}")
         
-        async with httpx.AsyncClient(
-            timeout=httpx.Timeout(60.0),
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
-            verify=False,
-            follow_redirects=True,
-            transport=httpx.AsyncHTTPTransport(retries=3)
-        ) as client:
-            try:
-                files_to_upload = [
-                    ("files", (file.filename, await file.read(), file.content_type))
-                    for file in files
-                ]
-                
-                logger.info("Sending files to prediction service...")
+        # Se reutiliza el grupo de conexiones compartido con el procesamiento en segundo plano
+        client = get_shared_http_client()
+        try:
+            # Los archivos subidos ya están en archivos temporales; se envían por partes sin leerlos completos
+            files_to_upload = [
+                ("files", (file.filename, file.file, file.content_type))
+                for file in files
+            ]
+            
+            logger.info("Sending files to prediction service...")
+            # Cuenta para el límite de peticiones simultáneas de todos los análisis
+            async with global_prediction_slots():
                 response = await client.post(
                     service_url,
                     files=files_to_upload
                 )
-                logger.info(f"Response status code: {response.status_code}")
-                
-            except httpx.ConnectError as e:
-                logger.error(f"Connection error: {str(e)}")
-                raise DomainException(
-                    message=f"No se pudo conectar al servicio de análisis: {str(e)}",
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-                )
-            except httpx.TimeoutException as e:
-                logger.error(f"Timeout error: {str(e)}")
-                raise DomainException(
-                    message="El servicio de análisis tardó demasiado en responder",
-                    status_code=status.HTTP_504_GATEWAY_TIMEOUT
-                )
+            logger.info(f"Response status code: {response.status_code}")
+            
+        except httpx.ConnectError as e:
+            logger.error(f"Connection error: {str(e)}")
+            raise DomainException(
+                message=f"No se pudo conectar al servicio de análisis: {str(e)}",
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except httpx.TimeoutException as e:
+            logger.error(f"Timeout error: {str(e)}")
+            raise DomainException(
+                message="El servicio de análisis tardó demasiado en responder",
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT
+            )
 
         if response.status_code not in [200, 207]:
             raise DomainException(
@@ -189,41 +184,32 @@ class SoilAnalysisUseCase:
             )
         )
 
-        # Procesar cada detección individual
-        for index, result in enumerate(analysis_results.results):
-            if result.status == "success":
-                # Generar ruta incluyendo el entorno
-                image_folder = f"{self._environment}/soil_analysis/task_{task_id}"
-                
-                # Subir imagen a Cloudinary
-                cloudinary_result = await self.cloudinary_service.upload_image(
-                    files[index],
-                    image_folder
-                )
-                
-                predicted_class = self.soil_analysis_repository.get_soil_type_by_name(result.predicted_class)
-
-                self.soil_analysis_repository.create_classification(
-                    SoilClassificationCreate(
-                        analisis_suelo_id=analysis.id,
-                        imagen_url=cloudinary_result["url"],
-                        imagen_public_id=cloudinary_result["public_id"],
-                        resultado_analisis_id=predicted_class.id,
-                        confianza_clasificacion=result.confidence,
-                        prob_laterite_soil=result.probabilities.laterite_soil,
-                        prob_peat_soil=result.probabilities.peat_soil,
-                        prob_yellow_soil=result.probabilities.yellow_soil,
-                        prob_cinder_soil=result.probabilities.cinder_soil,
-                        prob_clay_soil=result.probabilities.clay_soil,
-                        prob_black_soil=result.probabilities.black_soil,
-                        prob_alluvial_soil=result.probabilities.alluvial_soil
-                    )
-                )
+        # Generar ruta incluyendo el entorno
+        image_folder = f"{self._environment}/soil_analysis/task_{task_id}"
+
+        # Subir a Cloudinary, varias a la vez, las imágenes clasificadas con éxito
+        successful = [
+            (index, result) for index, result in enumerate(analysis_results.results)
+            if result.status == "success"
+        ]
+        cloudinary_results = await self.cloudinary_service.upload_many(
+            [(files[index].file, files[index].filename) for index, _ in successful],
+            image_folder
+        )
+
+        # Guardar las clasificaciones con una sola inserción, igual que en el procesamiento en segundo plano
+        total_classifications = soil_analysis_type.write_results(self.db, analysis.id, [
+            (files[index], result, cloudinary_result)
+            for (index, result), cloudinary_result in zip(successful, cloudinary_results)
+            # Las imágenes que no se pudieron subir se cuentan como fallidas
+            if not isinstance(cloudinary_result, Exception)
+        ])
 
         self.soil_analysis_repository.save_changes()
         
         try:
-            total_classifications = len(self.soil_analysis_repository.get_classifications_by_analysis_id(analysis.id))
+            analysis.imagenes_procesadas = total_classifications
+            analysis.imagenes_fallidas = analysis.cantidad_imagenes - total_classifications
             if total_classifications == 0:
                 analysis.estado = SoilAnalysisStatusEnum.failed
             elif total_classifications < analysis.cantidad_imagenes:
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from typing import List
 import httpx
@@ -7,12 +8,13 @@ from sqlalchemy.orm import Session
 from app.soil_analysis.application.get_analysis_status_use_case import GetAnalysisStatusUseCase
 from app.soil_analysis.application.get_analysis_use_case import GetAnalysisUseCase
 from app.soil_analysis.application.soil_analysis_background_use_case import SoilAnalysisBackgroundUseCase
-from app.soil_analysis.domain.schemas import FileContent, SoilAnalysisResult
+from app.soil_analysis.domain.schemas import SoilAnalysisResult
 from app.infrastructure.db.connection import getDb, SessionLocal
 from app.infrastructure.security.jwt_middleware import get_current_user
 from app.user.domain.schemas import UserInDB
 from app.soil_analysis.application.soil_analysis_use_case import SoilAnalysisUseCase
 from app.infrastructure.common.common_exceptions import DomainException
+from app.infrastructure.utils.progress_events import progress_event_response
 import os
 from dotenv import load_dotenv
 from app.logs.application.decorators.log_decorator import log_activity
@@ -45,7 +47,6 @@ router = APIRouter(prefix="/soil-analysis", tags=["soil analysis"])
 )
 async def predict_images(
     request: Request,
-    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
     task_id: int = Form(...),
     observations: str = Form(None),
@@ -62,17 +63,6 @@ async def predict_images(
     """
 
     try:
-        # Leer el contenido de los archivos antes de que termine la solicitud
-        files_content = []
-        for file in files:
-            content = await file.read()
-            files_content.append(FileContent(
-                filename=file.filename,
-                content=content,
-                content_type=file.content_type
-            ))
-            await file.seek(0)  # Reset the pointer to the beginning
-
         # Obtener user_id en lugar de current_user completo
         user_id = current_user.id
 
@@ -87,14 +77,16 @@ async def predict_images(
             )
             return result
         else:
-            # Procesar en segundo plano
+            # Encolar el procesamiento en segundo plano
             soil_analysis_background_use_case = SoilAnalysisBackgroundUseCase(None)
-            return await soil_analysis_background_use_case.process_images_in_background(
-                files_content=files_content,
+
+            # Las imágenes se guardan y las procesa el worker de la cola de trabajos
+            return await run_in_threadpool(
+                soil_analysis_background_use_case.enqueue_images,
+                files=files,
                 task_id=task_id,
                 observations=observations,
-                user_id=user_id,
-                background_tasks=background_tasks
+                user_id=user_id
             )
             
     except DomainException as e:
@@ -164,6 +156,35 @@ async def get_processing_status(
             detail=f"Error consultando estado: {str(e)}"
         ) from e
         
+@router.get("/analysis/{analysis_id}/events")
+@log_activity(
+    action_type=LogActionType.VIEW,
+    table_name="analisis_suelo",
+    description=lambda *args, **kwargs: f"Suscripción al progreso del análisis suelo con ID: {kwargs.get('analysis_id')}",
+    get_record_id=lambda *args, **kwargs: kwargs.get('analysis_id')
+)
+async def stream_processing_status(
+    request: Request,
+    analysis_id: int,
+    db: Session = Depends(getDb),
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """
+    Envía el progreso del procesamiento de imágenes como Server-Sent Events a medida que se guardan los lotes
+    """
+    # Valida que el análisis exista antes de abrir el stream
+    GetAnalysisStatusUseCase(db).get_analysis_status(analysis_id)
+
+    def read_progress():
+        # La sesión de la petición se cierra antes de que termine el stream
+        with SessionLocal() as session:
+            try:
+                return GetAnalysisStatusUseCase(session).get_analysis_status(analysis_id)
+            except DomainException:
+                return None
+
+    return progress_event_response(request, read_progress)
+
 @router.get("/analysis/{analysis_id}", response_model=SoilAnalysisResult)
 @log_activity(
     action_type=LogActionType.VIEW,
@@ -26,6 +26,11 @@ class SoilAnalysis(Base):
     )
     cantidad_imagenes = Column(Integer, nullable=False, default=0)
     observaciones = Column(Text)
+    # Imágenes cuya clasificación se reutilizó de la caché de predicciones
+    imagenes_desde_cache = Column(Integer, nullable=False, default=0)
+    # Progreso del procesamiento, actualizado al guardar cada lote
+    imagenes_procesadas = Column(Integer, nullable=False, default=0)
+    imagenes_fallidas = Column(Integer, nullable=False, default=0)
 
 class SoilClassification(Base):
     """Modelo para clasificaciones individuales de tipo de suelo"""
@@ -0,0 +1,67 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.soil_analysis.infrastructure.sql_repository import SoilAnalysisRepository
+
+load_dotenv(override=True)
+
+# Segundos durante los que un nombre o ID desconocido no vuelve a recargar el catálogo
+SOIL_TYPE_CACHE_MISS_SECONDS = float(os.getenv('SOIL_TYPE_CACHE_MISS_SECONDS', 300))
+
+
+class SoilTypeCache:
+    """Caché en memoria del catálogo de tipos de suelo.
+
+    El catálogo tiene pocas filas y casi no cambia, por lo que se carga completo
+    con una sola consulta la primera vez que se usa. Si se pide un nombre o ID
+    que no está, se vuelve a cargar una vez por si el tipo se agregó después; el
+    fallo se recuerda durante `miss_seconds`, de modo que una clase desconocida
+    repetida no recarga el catálogo en cada imagen.
+    """
+
+    def __init__(
+        self,
+        miss_seconds: float = SOIL_TYPE_CACHE_MISS_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.miss_seconds = miss_seconds
+        self._clock = clock
+        self._ids_by_name: Dict[str, int] = {}
+        self._names_by_id: Dict[int, str] = {}
+        self._misses: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session) -> None:
+        soil_types = SoilAnalysisRepository(db).get_soil_types()
+        self._ids_by_name = {soil_type.nombre: soil_type.id for soil_type in soil_types}
+        self._names_by_id = {soil_type.id: soil_type.nombre for soil_type in soil_types}
+
+    def _lookup(self, db: Session, mapping: Callable[[], Dict[Any, Any]], key: Any, miss_key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in mapping():
+                return mapping()[key]
+            missed_at = self._misses.get(miss_key)
+            if missed_at is not None and self._clock() - missed_at < self.miss_seconds:
+                return None
+            self._load(db)
+            if key in mapping():
+                self._misses.pop(miss_key, None)
+                return mapping()[key]
+            self._misses[miss_key] = self._clock()
+            return None
+
+    def get_id(self, db: Session, name: str) -> Optional[int]:
+        """ID del tipo de suelo con ese nombre, o None si no existe."""
+        return self._lookup(db, lambda: self._ids_by_name, name, ('name', name))
+
+    def get_name(self, db: Session, soil_type_id: int) -> Optional[str]:
+        """Nombre del tipo de suelo con ese ID, o None si no existe."""
+        return self._lookup(db, lambda: self._names_by_id, soil_type_id, ('id', soil_type_id))
+
+
+soil_type_cache = SoilTypeCache()
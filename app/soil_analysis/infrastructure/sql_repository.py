@@ -1,4 +1,5 @@
 from typing import List
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.soil_analysis.domain.schemas import SoilAnalysisCreate, SoilClassificationCreate
 from app.soil_analysis.infrastructure.orm_models import SoilAnalysis, SoilClassification, SoilType
@@ -20,6 +21,11 @@ class SoilAnalysisRepository:
         self.db.add(classification)
         return classification
 
+    def bulk_create_classifications(self, classifications: List[SoilClassificationCreate]) -> None:
+        """Crea varias clasificaciones con una sola sentencia INSERT de varias filas."""
+        if classifications:
+            self.db.execute(insert(SoilClassification), [classification.model_dump() for classification in classifications])
+
     def save_changes(self):
         try:
             self.db.commit()
@@ -44,12 +50,37 @@ class SoilAnalysisRepository:
         return self.db.query(SoilClassification)\
             .filter(SoilClassification.analisis_suelo_id == analysis_id)\
             .all()
+
+    def count_classifications_by_analysis_id(self, analysis_id: int) -> int:
+        return self.db.query(SoilClassification)\
+            .filter(SoilClassification.analisis_suelo_id == analysis_id)\
+            .count()
+
+    def add_batch_progress(self, analysis_id: int, processed: int, failed: int = 0, cached: int = 0) -> None:
+        self.db.query(SoilAnalysis)\
+            .filter(SoilAnalysis.id == analysis_id)\
+            .update(
+                {
+                    SoilAnalysis.imagenes_procesadas: SoilAnalysis.imagenes_procesadas + processed,
+                    SoilAnalysis.imagenes_fallidas: SoilAnalysis.imagenes_fallidas + failed,
+                    SoilAnalysis.imagenes_desde_cache: SoilAnalysis.imagenes_desde_cache + cached
+                },
+                synchronize_session=False
+            )
+
+    def delete_classifications_by_analysis_id(self, analysis_id: int) -> int:
+        return self.db.query(SoilClassification)\
+            .filter(SoilClassification.analisis_suelo_id == analysis_id)\
+            .delete(synchronize_session=False)
             
     def get_soil_type_by_name(self, predicted_class: str) -> SoilType:
         return self.db.query(SoilType)\
             .filter(SoilType.nombre == predicted_class)\
             .first()
             
+    def get_soil_types(self) -> List[SoilType]:
+        return self.db.query(SoilType).all()
+
     def get_soil_type_by_id(self, soil_type_id: int) -> SoilType:
         return self.db.query(SoilType)\
             .filter(SoilType.id == soil_type_id)\
@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+import logging
+import zlib
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy.orm import Session
+from app.infrastructure.common.common_exceptions import DomainException
+from fastapi import status
+from app.measurement.infrastructure.sql_repository import MeasurementRepository
+from app.weather.application.services.weather_measurement_service import WeatherMeasurementService
+from app.weather.domain.schemas import WeatherExportFormat
+from app.weather.infrastructure.sql_repository import WeatherRepository
+
+logger = logging.getLogger(__name__)
+
+# Bytes acumulados antes de entregar un bloque de la exportación
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Columnas exportadas; las de unidad se traducen del ID a la abreviatura de la unidad
+EXPORT_COLUMNS = [
+    'lote_id', 'fecha', 'hora',
+    'temperatura', 'temperatura_sensacion', 'temperatura_unidad_id',
+    'presion_atmosferica', 'presion_unidad_id',
+    'humedad_relativa', 'humedad_unidad_id',
+    'precipitacion', 'precipitacion_unidad_id',
+    'indice_uv',
+    'nubosidad', 'nubosidad_unidad_id',
+    'velocidad_viento', 'velocidad_viento_unidad_id',
+    'direccion_viento', 'direccion_viento_unidad_id',
+    'rafaga_viento', 'rafaga_viento_unidad_id',
+    'visibilidad', 'visibilidad_unidad_id',
+    'punto_rocio', 'punto_rocio_unidad_id',
+    'descripcion_clima', 'codigo_clima',
+]
+EXPORT_HEADERS = [
+    column.replace('_unidad_id', '_unidad') for column in EXPORT_COLUMNS
+]
+UNIT_COLUMN_INDEXES = [
+    index for index, column in enumerate(EXPORT_COLUMNS) if column.endswith('_unidad_id')
+]
+
+class ExportWeatherLogsUseCase:
+    """Caso de uso para exportar el histórico meteorológico de uno o varios lotes.
+
+    La exportación se genera por bloques mientras se recorre un cursor del lado
+    del servidor, por lo que la memoria usada no depende del número de registros.
+    Las unidades se traducen con las abreviaturas ya cargadas por
+    `WeatherMeasurementService` en lugar de cargar la relación de cada fila.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = WeatherRepository(db)
+        self.measurement_repository = MeasurementRepository(db)
+
+    def export_weather_logs(
+        self,
+        lote_ids: List[int],
+        start_date: date,
+        end_date: date,
+        export_format: WeatherExportFormat = WeatherExportFormat.CSV,
+        compress: bool = False
+    ) -> Iterator[bytes]:
+        """
+        Valida la solicitud y devuelve el generador con el contenido de la exportación.
+
+        La validación se hace al llamar al método, antes de empezar a enviar la
+        respuesta, para que los errores se devuelvan con su código HTTP.
+
+        Args:
+            lote_ids (List[int]): IDs de los lotes
+            start_date (date): Fecha de inicio
+            end_date (date): Fecha de fin
+            export_format (WeatherExportFormat): Formato de la exportación
+            compress (bool): Si es True, el contenido se comprime con gzip
+
+        Returns:
+            Iterator[bytes]: Bloques de la exportación
+        """
+        if not lote_ids:
+            raise DomainException(
+                message="Debe indicar al menos un lote",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if start_date > end_date:
+            raise DomainException(
+                message="La fecha de inicio debe ser anterior o igual a la fecha de fin",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        unit_abbreviations = dict(WeatherMeasurementService.get_unit_ids(self.db).abbreviations)
+        chunks = self._generate(sorted(set(lote_ids)), start_date, end_date, export_format, unit_abbreviations)
+        return self._gzip(chunks) if compress else chunks
+
+    def _generate(
+        self,
+        lote_ids: List[int],
+        start_date: date,
+        end_date: date,
+        export_format: WeatherExportFormat,
+        unit_abbreviations: Dict[int, str]
+    ) -> Iterator[bytes]:
+        """Genera el contenido de la exportación en bloques de unos `EXPORT_CHUNK_SIZE` bytes."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if export_format == WeatherExportFormat.CSV else None
+        if writer is not None:
+            writer.writerow(EXPORT_HEADERS)
+
+        rows = self.repository.stream_weather_log_rows(lote_ids, start_date, end_date, EXPORT_COLUMNS)
+        try:
+            for row in rows:
+                values = list(row)
+                for index in UNIT_COLUMN_INDEXES:
+                    values[index] = self._unit_abbreviation(values[index], unit_abbreviations)
+
+                if writer is not None:
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(EXPORT_HEADERS, values)), default=str, ensure_ascii=False))
+                    buffer.write('\n')
+
+                if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                    yield buffer.getvalue().encode('utf-8')
+                    buffer.seek(0)
+                    buffer.truncate()
+        except Exception as e:
+            # La respuesta ya empezó a enviarse; solo se puede registrar el error y cortarla
+            logger.error(f"Error al exportar los registros meteorológicos: {str(e)}")
+            raise
+
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    def _unit_abbreviation(self, unit_id: Optional[int], unit_abbreviations: Dict[int, str]) -> Optional[str]:
+        """Traduce el ID de una unidad a su abreviatura, consultando solo las que no están cargadas."""
+        if unit_id is None:
+            return None
+        if unit_id not in unit_abbreviations:
+            unit = self.measurement_repository.get_unit_of_measure_by_id(unit_id)
+            unit_abbreviations[unit_id] = unit.abreviatura if unit else str(unit_id)
+        return unit_abbreviations[unit_id]
+
+    @staticmethod
+    def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """Comprime los bloques en formato gzip a medida que se generan."""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
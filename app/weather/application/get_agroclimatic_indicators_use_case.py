@@ -0,0 +1,149 @@
+from datetime import date, timedelta
+from typing import List
+from sqlalchemy.orm import Session
+from app.infrastructure.common.common_exceptions import DomainException
+from app.infrastructure.common.datetime_utils import get_current_date
+from app.farm.application.services.farm_service import FarmService
+from app.farm.infrastructure.sql_repository import FarmRepository
+from app.user.domain.schemas import UserInDB
+from app.weather.application.services.agroclimatic_indicator_service import (
+    CropIndicatorCache,
+    CropPeriod,
+    compute_crop_indicators,
+    crop_indicator_cache,
+    readings_to_arrays
+)
+from app.weather.domain.schemas import (
+    CropAgroclimaticIndicators,
+    CropAgroclimaticIndicatorsResponse,
+    FarmAgroclimaticIndicatorsResponse
+)
+from app.weather.infrastructure.sql_repository import WeatherRepository
+from fastapi import status
+
+class GetAgroclimaticIndicatorsUseCase:
+    """Caso de uso para obtener los indicadores agroclimáticos de cultivos.
+
+    Los indicadores se calculan desde la siembra hasta el día anterior (o hasta la
+    cosecha), de modo que no cambian durante el día y se guardan en caché por
+    cultivo y día. Los cultivos que no están en caché se calculan juntos con una
+    sola consulta de lecturas.
+
+    Attributes:
+        db (Session): Sesión de base de datos SQLAlchemy.
+        weather_repository (WeatherRepository): Repositorio de registros meteorológicos.
+        farm_repository (FarmRepository): Repositorio de fincas.
+        farm_service (FarmService): Servicio para lógica de negocio de fincas.
+        cache (CropIndicatorCache): Caché de indicadores por cultivo y día.
+    """
+
+    def __init__(self, db: Session, cache: CropIndicatorCache = crop_indicator_cache):
+        self.db = db
+        self.weather_repository = WeatherRepository(db)
+        self.farm_repository = FarmRepository(db)
+        self.farm_service = FarmService(db)
+        self.cache = cache
+
+    def get_crop_indicators(self, crop_id: int, current_user: UserInDB) -> CropAgroclimaticIndicatorsResponse:
+        """Obtiene los indicadores agroclimáticos de un cultivo.
+
+        Args:
+            crop_id (int): ID del cultivo.
+            current_user (UserInDB): Usuario que consulta.
+
+        Returns:
+            CropAgroclimaticIndicatorsResponse: Indicadores del cultivo.
+
+        Raises:
+            DomainException: Si ocurre algún error de validación:
+                - 404: El cultivo no existe.
+                - 403: El usuario no pertenece a la finca del cultivo.
+        """
+        crops = self.weather_repository.get_crops_with_location(crop_id=crop_id)
+        if not crops:
+            raise DomainException(
+                message="El cultivo no existe.",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        self._check_farm_access(current_user, crops[0].finca_id)
+
+        return CropAgroclimaticIndicatorsResponse(
+            success=True,
+            message="Indicadores agroclimáticos obtenidos exitosamente",
+            data=self._get_indicators(crops)[0]
+        )
+
+    def get_farm_indicators(self, finca_id: int, current_user: UserInDB) -> FarmAgroclimaticIndicatorsResponse:
+        """Obtiene los indicadores agroclimáticos de los cultivos activos de una finca.
+
+        Args:
+            finca_id (int): ID de la finca.
+            current_user (UserInDB): Usuario que consulta.
+
+        Returns:
+            FarmAgroclimaticIndicatorsResponse: Indicadores de cada cultivo activo.
+
+        Raises:
+            DomainException: Si ocurre algún error de validación:
+                - 404: La finca no existe.
+                - 403: El usuario no pertenece a la finca.
+        """
+        farm = self.farm_repository.get_farm_by_id(finca_id)
+        if not farm:
+            raise DomainException(
+                message="La finca no existe.",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        self._check_farm_access(current_user, farm.id)
+
+        crops = self.weather_repository.get_crops_with_location(finca_id=finca_id)
+        return FarmAgroclimaticIndicatorsResponse(
+            success=True,
+            message="Indicadores agroclimáticos obtenidos exitosamente",
+            finca_id=finca_id,
+            data=self._get_indicators(crops)
+        )
+
+    def _check_farm_access(self, current_user: UserInDB, finca_id: int) -> None:
+        if not (
+            self.farm_service.user_is_farm_admin(current_user.id, finca_id)
+            or self.farm_service.user_is_farm_worker(current_user.id, finca_id)
+        ):
+            raise DomainException(
+                message="No tienes permisos para ver los indicadores de esta finca.",
+                status_code=status.HTTP_403_FORBIDDEN
+            )
+
+    def _get_indicators(self, crops: list) -> List[CropAgroclimaticIndicators]:
+        today = get_current_date()
+        indicators = {crop.id: self.cache.get(crop.id, today) for crop in crops}
+
+        missing = [
+            self._to_period(crop, today - timedelta(days=1))
+            for crop in crops if indicators[crop.id] is None
+        ]
+        if missing:
+            for values in self._compute(missing):
+                self.cache.set(values['cultivo_id'], today, values)
+                indicators[values['cultivo_id']] = values
+
+        return [CropAgroclimaticIndicators(**indicators[crop.id]) for crop in crops]
+
+    @staticmethod
+    def _to_period(crop, last_complete_day: date) -> CropPeriod:
+        end = min(crop.fecha_cosecha, last_complete_day) if crop.fecha_cosecha else last_complete_day
+        return CropPeriod(
+            cultivo_id=crop.id,
+            lote_id=crop.lote_id,
+            latitud=float(crop.latitud),
+            fecha_inicio=crop.fecha_siembra,
+            fecha_fin=end
+        )
+
+    def _compute(self, periods: List[CropPeriod]) -> List[dict]:
+        rows = self.weather_repository.stream_temperature_precipitation(
+            sorted({period.lote_id for period in periods}),
+            min(period.fecha_inicio for period in periods),
+            max(period.fecha_fin for period in periods)
+        )
+        return compute_crop_indicators(*readings_to_arrays(rows), periods)
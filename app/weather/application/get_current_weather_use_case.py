@@ -1,34 +1,51 @@
 import httpx
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.infrastructure.common.common_exceptions import DomainException
+from app.infrastructure.common.datetime_utils import datetime_utc_time
 from fastapi import status
 from app.weather.domain.schemas import WeatherAPIResponse
+from app.weather.infrastructure.current_weather_cache import CurrentWeatherCache, current_weather_cache
+from app.weather.infrastructure.openweathermap_client import OPENWEATHERMAP_BASE_URL, get_shared_openweathermap_client
+from app.weather.infrastructure.orm_models import WeatherLog
+from app.weather.infrastructure.sql_repository import WeatherRepository
 import os
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
+# Antigüedad máxima de un registro del lote para servirlo en lugar de consultar la API
+WEATHER_LOG_MAX_AGE_MINUTES = int(os.getenv('WEATHER_LOG_MAX_AGE_MINUTES', 60))
+
 class GetCurrentWeatherUseCase:
     """Caso de uso para obtener datos meteorológicos actuales.
     
     Este caso de uso realiza una llamada a la API de OpenWeatherMap
     para obtener los datos meteorológicos actuales para unas coordenadas específicas.
+    Las respuestas se guardan en una caché compartida indexada por coordenadas
+    redondeadas, y si se indica un lote con un registro reciente se responde con
+    ese registro sin llamar a la API.
     
     Attributes:
         db (Session): Sesión de base de datos SQLAlchemy.
         api_key (str): Clave de API para OpenWeatherMap.
         base_url (str): URL base de la API de OpenWeatherMap.
+        cache (CurrentWeatherCache): Caché de respuestas de la API.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, cache: CurrentWeatherCache = current_weather_cache):
         """Inicializa el caso de uso con las dependencias necesarias.
 
         Args:
             db (Session): Sesión de base de datos SQLAlchemy.
+            cache (CurrentWeatherCache): Caché de respuestas de la API.
         """
         self.db = db
+        self.repository = WeatherRepository(db)
+        self.cache = cache
         self.api_key = os.getenv("OPENWEATHERMAP_API_KEY")
-        self.base_url = "https://api.openweathermap.org/data/3.0/onecall"
+        self.base_url = OPENWEATHERMAP_BASE_URL
         
         if not self.api_key:
             raise DomainException(
@@ -36,12 +53,13 @@ class GetCurrentWeatherUseCase:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    async def get_current_weather(self, lat: float, lon: float) -> WeatherAPIResponse:
+    async def get_current_weather(self, lat: float, lon: float, lote_id: Optional[int] = None) -> WeatherAPIResponse:
         """Obtiene los datos meteorológicos actuales para las coordenadas especificadas.
         
         Args:
             lat (float): Latitud de la ubicación.
             lon (float): Longitud de la ubicación.
+            lote_id (Optional[int]): Lote de la ubicación; si tiene un registro reciente se usa ese registro.
 
         Returns:
             WeatherAPIResponse: Respuesta formateada de la API.
@@ -49,31 +67,25 @@ class GetCurrentWeatherUseCase:
         Raises:
             DomainException: Si hay un error al conectar con la API o procesar la respuesta.
         """
-        params = {
-            "lat": lat,
-            "lon": lon,
-            "exclude": "minutely,hourly,daily,alerts",
-            "appid": self.api_key,
-            "units": "metric"
-        }
-        
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.base_url, params=params)
-                
-                if response.status_code != 200:
-                    raise DomainException(
-                        message=f"Error al obtener datos meteorológicos: {response.text}",
-                        status_code=status.HTTP_502_BAD_GATEWAY
-                    )
-                
-                data = response.json()
+        if lote_id is not None:
+            latest_log = self._get_recent_weather_log(lote_id)
+            if latest_log is not None:
                 return WeatherAPIResponse(
                     success=True,
-                    message="Datos meteorológicos obtenidos exitosamente",
-                    data=data
+                    message="Datos meteorológicos obtenidos del último registro del lote",
+                    data=self._weather_log_to_api_data(latest_log)
                 )
-                
+
+        try:
+            data = await self.cache.get_or_fetch(lat, lon, self._fetch_weather_data)
+            return WeatherAPIResponse(
+                success=True,
+                message="Datos meteorológicos obtenidos exitosamente",
+                data=data
+            )
+
+        except DomainException as e:
+            raise e
         except httpx.RequestError as e:
             raise DomainException(
                 message=f"Error de conexión con la API de OpenWeatherMap: {str(e)}",
@@ -83,4 +95,50 @@ class GetCurrentWeatherUseCase:
             raise DomainException(
                 message=f"Error al procesar la respuesta de la API: {str(e)}",
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+    async def _fetch_weather_data(self, lat: float, lon: float) -> dict:
+        """Consulta la API de OpenWeatherMap para unas coordenadas."""
+        # Las consultas reutilizan las conexiones del cliente compartido del proceso
+        return await get_shared_openweathermap_client().fetch_current(lat, lon)
+
+    def _get_recent_weather_log(self, lote_id: int) -> Optional[WeatherLog]:
+        """Devuelve el último registro del lote si no supera la antigüedad máxima."""
+        latest_log = self.repository.get_latest_weather_log(lote_id)
+        if latest_log is None:
+            return None
+        # Los registros se guardan con la fecha y hora en UTC
+        recorded_at = datetime.combine(latest_log.fecha, latest_log.hora, tzinfo=timezone.utc)
+        if datetime_utc_time() - recorded_at > timedelta(minutes=WEATHER_LOG_MAX_AGE_MINUTES):
+            return None
+        return latest_log
+
+    @staticmethod
+    def _weather_log_to_api_data(weather_log: WeatherLog) -> dict:
+        """Convierte un registro meteorológico al formato de la respuesta de OpenWeatherMap."""
+        recorded_at = datetime.combine(weather_log.fecha, weather_log.hora, tzinfo=timezone.utc)
+        current = {
+            "dt": int(recorded_at.timestamp()),
+            "temp": weather_log.temperatura,
+            "feels_like": weather_log.temperatura_sensacion,
+            "pressure": weather_log.presion_atmosferica,
+            "humidity": weather_log.humedad_relativa,
+            "dew_point": weather_log.punto_rocio,
+            "uvi": weather_log.indice_uv,
+            "clouds": weather_log.nubosidad,
+            "visibility": weather_log.visibilidad,
+            "wind_speed": weather_log.velocidad_viento,
+            "wind_deg": weather_log.direccion_viento,
+            "wind_gust": weather_log.rafaga_viento,
+            "weather": [{
+                "id": int(weather_log.codigo_clima) if weather_log.codigo_clima and weather_log.codigo_clima.isdigit() else None,
+                "description": weather_log.descripcion_clima
+            }]
+        }
+        if weather_log.precipitacion is not None:
+            current["rain"] = {"1h": weather_log.precipitacion}
+        return {
+            "lote_id": weather_log.lote_id,
+            "source": "registro_meteorologico",
+            "current": current
+        }
@@ -0,0 +1,135 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from app.infrastructure.common.common_exceptions import DomainException
+from fastapi import status
+from app.weather.domain.schemas import WeatherAggregate, WeatherAggregatesListResponse, WeatherGranularity
+from app.weather.infrastructure.recent_weather_cache import RecentWeatherCache, recent_weather_cache
+from app.weather.infrastructure.sql_repository import WeatherRepository
+
+
+class _PeriodAccumulator:
+    """Acumula los valores de un período a partir de lecturas o resúmenes diarios."""
+
+    def __init__(self, start: datetime):
+        self.start = start
+        self.temperatura_min: Optional[float] = None
+        self.temperatura_max: Optional[float] = None
+        self.temperatura_suma = 0.0
+        self.humedad_suma = 0.0
+        self.precipitacion_total = 0.0
+        self.rafaga_max: Optional[float] = None
+        self.num_registros = 0
+
+    def add(self, temperatura_min, temperatura_max, temperatura_suma, humedad_suma, precipitacion, rafaga, num_registros):
+        self.temperatura_min = temperatura_min if self.temperatura_min is None else min(self.temperatura_min, temperatura_min)
+        self.temperatura_max = temperatura_max if self.temperatura_max is None else max(self.temperatura_max, temperatura_max)
+        self.temperatura_suma += temperatura_suma
+        self.humedad_suma += humedad_suma
+        self.precipitacion_total += precipitacion or 0
+        if rafaga is not None:
+            self.rafaga_max = rafaga if self.rafaga_max is None else max(self.rafaga_max, rafaga)
+        self.num_registros += num_registros
+
+    def to_schema(self) -> WeatherAggregate:
+        return WeatherAggregate(
+            periodo_inicio=self.start,
+            temperatura_min=self.temperatura_min,
+            temperatura_max=self.temperatura_max,
+            temperatura_promedio=round(self.temperatura_suma / self.num_registros, 2),
+            precipitacion_total=round(self.precipitacion_total, 2),
+            humedad_promedio=round(self.humedad_suma / self.num_registros, 2),
+            rafaga_max=self.rafaga_max,
+            num_registros=self.num_registros
+        )
+
+
+class GetWeatherAggregatesUseCase:
+    """Caso de uso para obtener datos meteorológicos agregados por período.
+
+    Las granularidades diaria, semanal y mensual se calculan a partir de los
+    resúmenes diarios (una fila por día), por lo que un año de datos se resuelve
+    con unas 365 filas en lugar de 8.760 registros horarios. La granularidad por
+    hora de los últimos días se lee de `RecentWeatherCache` sin consultar la base
+    de datos.
+    """
+
+    def __init__(self, db: Session, cache: RecentWeatherCache = recent_weather_cache):
+        self.db = db
+        self.repository = WeatherRepository(db)
+        self.cache = cache
+
+    async def get_weather_aggregates(
+        self,
+        lote_id: int,
+        start_date: date,
+        end_date: date,
+        granularity: WeatherGranularity = WeatherGranularity.DAY
+    ) -> WeatherAggregatesListResponse:
+        """
+        Obtiene los datos meteorológicos de un lote agregados por período.
+
+        Args:
+            lote_id (int): ID del lote
+            start_date (date): Fecha de inicio
+            end_date (date): Fecha de fin
+            granularity (WeatherGranularity): Tamaño de cada período
+
+        Returns:
+            WeatherAggregatesListResponse: Valores agregados por período
+        """
+        try:
+            if start_date > end_date:
+                raise DomainException(
+                    message="La fecha de inicio debe ser anterior o igual a la fecha de fin",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+
+            periods: Dict[datetime, _PeriodAccumulator] = {}
+
+            if granularity == WeatherGranularity.HOUR:
+                readings = self.cache.get_hourly_readings(self.db, lote_id, start_date, end_date)
+                if readings is None:
+                    readings = self.repository.get_hourly_readings(lote_id, start_date, end_date)
+                for fecha, hora, temperatura, humedad, precipitacion, rafaga in readings:
+                    start = datetime.combine(fecha, time(hour=hora.hour))
+                    period = periods.setdefault(start, _PeriodAccumulator(start))
+                    period.add(temperatura, temperatura, temperatura, humedad, precipitacion, rafaga, 1)
+            else:
+                summaries = self.repository.get_daily_summaries(lote_id, start_date, end_date)
+                for summary in summaries:
+                    start = datetime.combine(self._period_start(summary.fecha, granularity), time.min)
+                    period = periods.setdefault(start, _PeriodAccumulator(start))
+                    period.add(
+                        summary.temperatura_min,
+                        summary.temperatura_max,
+                        summary.temperatura_suma,
+                        summary.humedad_suma,
+                        summary.precipitacion_total,
+                        summary.rafaga_max,
+                        summary.num_registros
+                    )
+
+            return WeatherAggregatesListResponse(
+                success=True,
+                message="Datos meteorológicos agregados obtenidos exitosamente",
+                granularidad=granularity,
+                data=[period.to_schema() for period in periods.values() if period.num_registros]
+            )
+
+        except Exception as e:
+            if isinstance(e, DomainException):
+                raise e
+            raise DomainException(
+                message=f"Error al obtener los datos meteorológicos agregados: {str(e)}",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @staticmethod
+    def _period_start(fecha: date, granularity: WeatherGranularity) -> date:
+        """Calcula el primer día del período al que pertenece una fecha."""
+        if granularity == WeatherGranularity.WEEK:
+            return fecha - timedelta(days=fecha.weekday())
+        if granularity == WeatherGranularity.MONTH:
+            return fecha.replace(day=1)
+        return fecha
@@ -0,0 +1,59 @@
+from datetime import date
+from sqlalchemy.orm import Session
+from app.infrastructure.common.common_exceptions import DomainException
+from fastapi import status
+from app.weather.domain.schemas import WeatherStats, WeatherStatsResponse
+from app.weather.infrastructure.recent_weather_cache import RecentWeatherCache, recent_weather_cache
+from app.weather.infrastructure.sql_repository import WeatherRepository
+
+class GetWeatherStatsUseCase:
+    """Caso de uso para obtener estadísticas meteorológicas de un lote.
+
+    Los rangos dentro de la ventana reciente se calculan en memoria con
+    `RecentWeatherCache`; los que empiezan antes se calculan en la base de datos.
+    """
+
+    def __init__(self, db: Session, cache: RecentWeatherCache = recent_weather_cache):
+        self.db = db
+        self.repository = WeatherRepository(db)
+        self.cache = cache
+
+    async def get_weather_stats(self, lote_id: int, start_date: date, end_date: date) -> WeatherStatsResponse:
+        """
+        Obtiene el mínimo, máximo, promedio y total de las variables meteorológicas de un lote.
+
+        Args:
+            lote_id (int): ID del lote
+            start_date (date): Fecha de inicio
+            end_date (date): Fecha de fin
+
+        Returns:
+            WeatherStatsResponse: Estadísticas del rango
+        """
+        try:
+            if start_date > end_date:
+                raise DomainException(
+                    message="La fecha de inicio debe ser anterior o igual a la fecha de fin",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+
+            stats = self.cache.get_stats(self.db, lote_id, start_date, end_date)
+            if stats is None:
+                stats = self.repository.get_weather_stats(lote_id, start_date, end_date)
+
+            return WeatherStatsResponse(
+                success=True,
+                message="Estadísticas meteorológicas obtenidas exitosamente",
+                data=WeatherStats(**{
+                    key: round(value, 2) if isinstance(value, float) else value
+                    for key, value in stats.items()
+                })
+            )
+
+        except Exception as e:
+            if isinstance(e, DomainException):
+                raise e
+            raise DomainException(
+                message=f"Error al obtener las estadísticas meteorológicas: {str(e)}",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -1,11 +1,16 @@
-import httpx
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.infrastructure.common.common_exceptions import DomainException
 from fastapi import status
-from app.infrastructure.common.datetime_utils import datetime_utc_time
+from app.infrastructure.common.datetime_utils import current_utc_hour
 from app.weather.domain.schemas import WeatherLogCreate
 from app.weather.infrastructure.sql_repository import WeatherRepository
+from app.weather.infrastructure.openweathermap_client import (
+    OpenWeatherMapClient,
+    OPENWEATHERMAP_BASE_URL,
+    get_shared_openweathermap_client
+)
 import os
 from dotenv import load_dotenv
 from app.weather.application.services.weather_measurement_service import WeatherMeasurementService
@@ -13,12 +18,14 @@ from app.weather.application.services.weather_measurement_service import Weather
 load_dotenv(override=True)
 
 class RecordWeatherUseCase:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, weather_client: Optional[OpenWeatherMapClient] = None):
         self.db = db
         self.repository = WeatherRepository(db)
         self.weather_measurement_service = WeatherMeasurementService(db)
         self.api_key = os.getenv("OPENWEATHERMAP_API_KEY")
-        self.base_url = "https://api.openweathermap.org/data/3.0/onecall"
+        self.base_url = OPENWEATHERMAP_BASE_URL
+        # Cliente del programador; si no se indica se usa el cliente compartido del proceso
+        self.weather_client = weather_client
 
         if not self.api_key:
             raise DomainException(
@@ -26,72 +33,147 @@ class RecordWeatherUseCase:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    async def record_weather_data(self, lote_id: int, lat: float, lon: float) -> WeatherLogCreate:
-        """Registra los datos meteorológicos actuales para un lote específico."""
-        try:
-            # Validar unidades de medida
-            self.weather_measurement_service.validate_weather_units()
-            
-            weather_data = await self._fetch_weather_data(lat, lon)
-            current = weather_data['current']
-            
-            # Crear el registro meteorológico con las unidades correspondientes
-            current_time = datetime_utc_time()
-            weather_log = WeatherLogCreate(
-                lote_id=lote_id,
-                fecha=current_time.date(),
-                hora=current_time.time(),
-                temperatura=current['temp'],
-                temperatura_sensacion=current['feels_like'],
-                temperatura_unidad_id=self.weather_measurement_service.TEMPERATURE_CELSIUS_ID,
-                presion_atmosferica=current['pressure'],
-                presion_unidad_id=self.weather_measurement_service.PRESSURE_HPA_ID,
-                humedad_relativa=current['humidity'],
-                humedad_unidad_id=self.weather_measurement_service.HUMIDITY_PERCENT_ID,
-                precipitacion=current.get('rain', {}).get('1h'),
-                precipitacion_unidad_id=self.weather_measurement_service.PRECIPITATION_MMH_ID if current.get('rain', {}).get('1h') is not None else None,
-                indice_uv=current['uvi'],
-                nubosidad=current['clouds'],
-                nubosidad_unidad_id=self.weather_measurement_service.CLOUDINESS_PERCENT_ID,
-                velocidad_viento=current['wind_speed'],
-                velocidad_viento_unidad_id=self.weather_measurement_service.WIND_SPEED_MS_ID,
-                direccion_viento=current['wind_deg'],
-                direccion_viento_unidad_id=self.weather_measurement_service.WIND_DIRECTION_DEGREE_ID,
-                rafaga_viento=current.get('wind_gust'),
-                rafaga_viento_unidad_id=self.weather_measurement_service.WIND_SPEED_MS_ID,
-                visibilidad=current.get('visibility'),
-                visibilidad_unidad_id=self.weather_measurement_service.VISIBILITY_M_ID,
-                punto_rocio=current.get('dew_point'),
-                punto_rocio_unidad_id=self.weather_measurement_service.TEMPERATURE_CELSIUS_ID,
-                descripcion_clima=current['weather'][0]['description'],
-                codigo_clima=str(current['weather'][0]['id'])
-            )
+    async def collect_weather_for_plots(
+        self,
+        lote_ids: List[int],
+        lat: float,
+        lon: float,
+        recorded_at: Optional[datetime] = None
+    ) -> List[WeatherLogCreate]:
+        """Obtiene una lectura meteorológica y construye los registros de varios lotes sin guardarlos.
 
-            return self.repository.create_weather_log(weather_log)
+        Permite a quien llama (p. ej. el programador) acumular los registros de toda
+        una ejecución y guardarlos juntos con `WeatherRepository.bulk_create_weather_logs`.
+        Los registros se fechan al inicio de la hora, de modo que cada lote tiene a
+        lo sumo una lectura por hora (restricción única `lote_id`, `fecha`, `hora`).
 
-        except Exception as e:
-            raise DomainException(
-                message=f"Error al registrar datos meteorológicos: {str(e)}",
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        Args:
+            lote_ids (List[int]): IDs de los lotes que comparten la lectura.
+            lat (float): Latitud de la consulta.
+            lon (float): Longitud de la consulta.
+            recorded_at (Optional[datetime]): Hora del registro; por defecto la hora UTC actual.
+
+        Returns:
+            List[WeatherLogCreate]: Registros por guardar, en el mismo orden que los lotes.
+        """
+        # Validar unidades de medida
+        self.weather_measurement_service.validate_weather_units()
+
+        weather_data = await self._fetch_weather_data(lat, lon)
+        current = weather_data['current']
+
+        # Crear los registros meteorológicos con las unidades correspondientes
+        current_time = recorded_at or current_utc_hour()
+        return [self._build_weather_log(lote_id, current, current_time) for lote_id in lote_ids]
+
+    async def collect_history_for_plots(
+        self,
+        lote_ids: List[int],
+        lat: float,
+        lon: float,
+        start: datetime,
+        end: datetime
+    ) -> List[WeatherLogCreate]:
+        """Obtiene las lecturas horarias de un rango pasado y construye los registros de varios lotes.
+
+        Se usa para recuperar las horas que no se registraron (p. ej. tras una caída
+        del servicio) con una consulta a la API histórica por semana, en lugar de
+        una consulta por hora.
+
+        Args:
+            lote_ids (List[int]): IDs de los lotes que comparten la lectura.
+            lat (float): Latitud de la consulta.
+            lon (float): Longitud de la consulta.
+            start (datetime): Primera hora a recuperar (UTC).
+            end (datetime): Última hora a recuperar (UTC), incluida.
+
+        Returns:
+            List[WeatherLogCreate]: Registros por guardar, a lo sumo uno por lote y hora.
+        """
+        self.weather_measurement_service.validate_weather_units()
+
+        readings = await self._fetch_weather_history(lat, lon, start, end)
+
+        weather_logs = []
+        recorded_hours = set()
+        for reading in readings:
+            recorded_at = datetime.fromtimestamp(reading['dt'], tz=timezone.utc).replace(minute=0, second=0, microsecond=0)
+            if not start <= recorded_at <= end or recorded_at in recorded_hours:
+                continue
+            recorded_hours.add(recorded_at)
+            current = self._history_reading_to_current(reading)
+            weather_logs.extend(self._build_weather_log(lote_id, current, recorded_at) for lote_id in lote_ids)
+        return weather_logs
+
+    @staticmethod
+    def _history_reading_to_current(reading: dict) -> dict:
+        """Convierte una lectura de la API histórica al formato `current` de la API One Call.
+
+        La API histórica no incluye el índice UV ni el punto de rocío, que quedan vacíos.
+        """
+        main = reading.get('main', {})
+        wind = reading.get('wind', {})
+        current = {
+            'temp': main['temp'],
+            'feels_like': main.get('feels_like', main['temp']),
+            'pressure': main['pressure'],
+            'humidity': main['humidity'],
+            'uvi': None,
+            'clouds': reading.get('clouds', {}).get('all', 0),
+            'wind_speed': wind.get('speed', 0),
+            'wind_deg': wind.get('deg', 0),
+            'weather': reading['weather'],
+        }
+        if 'rain' in reading:
+            current['rain'] = reading['rain']
+        if 'gust' in wind:
+            current['wind_gust'] = wind['gust']
+        if 'visibility' in reading:
+            current['visibility'] = reading['visibility']
+        return current
+
+    def _build_weather_log(self, lote_id: int, current: dict, current_time: datetime) -> WeatherLogCreate:
+        """Construye el registro meteorológico de un lote a partir de la lectura actual de la API."""
+        return WeatherLogCreate(
+            lote_id=lote_id,
+            fecha=current_time.date(),
+            hora=current_time.time(),
+            temperatura=current['temp'],
+            temperatura_sensacion=current['feels_like'],
+            temperatura_unidad_id=self.weather_measurement_service.TEMPERATURE_CELSIUS_ID,
+            presion_atmosferica=current['pressure'],
+            presion_unidad_id=self.weather_measurement_service.PRESSURE_HPA_ID,
+            humedad_relativa=current['humidity'],
+            humedad_unidad_id=self.weather_measurement_service.HUMIDITY_PERCENT_ID,
+            precipitacion=current.get('rain', {}).get('1h'),
+            precipitacion_unidad_id=self.weather_measurement_service.PRECIPITATION_MMH_ID if current.get('rain', {}).get('1h') is not None else None,
+            indice_uv=current['uvi'],
+            nubosidad=current['clouds'],
+            nubosidad_unidad_id=self.weather_measurement_service.CLOUDINESS_PERCENT_ID,
+            velocidad_viento=current['wind_speed'],
+            velocidad_viento_unidad_id=self.weather_measurement_service.WIND_SPEED_MS_ID,
+            direccion_viento=current['wind_deg'],
+            direccion_viento_unidad_id=self.weather_measurement_service.WIND_DIRECTION_DEGREE_ID,
+            rafaga_viento=current.get('wind_gust'),
+            rafaga_viento_unidad_id=self.weather_measurement_service.WIND_SPEED_MS_ID,
+            visibilidad=current.get('visibility'),
+            visibilidad_unidad_id=self.weather_measurement_service.VISIBILITY_M_ID,
+            punto_rocio=current.get('dew_point'),
+            punto_rocio_unidad_id=self.weather_measurement_service.TEMPERATURE_CELSIUS_ID,
+            descripcion_clima=current['weather'][0]['description'],
+            codigo_clima=str(current['weather'][0]['id'])
+        )
+
+    async def _fetch_weather_history(self, lat: float, lon: float, start: datetime, end: datetime) -> List[dict]:
+        """Obtiene las lecturas horarias de un rango pasado de la API histórica de OpenWeatherMap."""
+        if self.weather_client is not None:
+            return await self.weather_client.fetch_history(lat, lon, start, end)
+
+        return await get_shared_openweathermap_client().fetch_history(lat, lon, start, end)
 
     async def _fetch_weather_data(self, lat: float, lon: float) -> dict:
         """Obtiene los datos meteorológicos de la API de OpenWeatherMap."""
-        params = {
-            "lat": lat,
-            "lon": lon,
-            "exclude": "minutely,hourly,daily,alerts",
-            "appid": self.api_key,
-            "units": "metric"
-        }
+        if self.weather_client is not None:
+            return await self.weather_client.fetch_current(lat, lon)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(self.base_url, params=params)
-            
-            if response.status_code != 200:
-                raise DomainException(
-                    message=f"Error al obtener datos de la API: {response.text}",
-                    status_code=status.HTTP_502_BAD_GATEWAY
-                )
-            
-            return response.json()
+        return await get_shared_openweathermap_client().fetch_current(lat, lon)
@@ -0,0 +1,201 @@
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Temperaturas base y máxima del maíz para los grados día (método 10/30 °C)
+GDD_BASE_TEMPERATURE_C = 10.0
+GDD_MAX_TEMPERATURE_C = 30.0
+# Temperatura a partir de la cual una hora cuenta como estrés por calor para el maíz
+HEAT_STRESS_TEMPERATURE_C = 35.0
+
+# Multiplicador para combinar lote y día en una sola clave ordenable (los ordinales de fecha son < 10^6)
+_DAY_KEY = 1_000_000
+# Ordinal de 1970-01-01, para convertir ordinales a datetime64
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@dataclass(frozen=True)
+class CropPeriod:
+    """Período de un cultivo sobre el que se calculan los indicadores.
+
+    Attributes:
+        cultivo_id (int): ID del cultivo.
+        lote_id (int): ID del lote del cultivo.
+        latitud (float): Latitud del lote, para la radiación extraterrestre.
+        fecha_inicio (date): Fecha de siembra.
+        fecha_fin (date): Último día incluido.
+    """
+    cultivo_id: int
+    lote_id: int
+    latitud: float
+    fecha_inicio: date
+    fecha_fin: date
+
+
+def extraterrestrial_radiation(latitude_deg: np.ndarray, day_of_year: np.ndarray) -> np.ndarray:
+    """Calcula la radiación extraterrestre diaria (MJ m-2 día-1) según FAO-56 (ecuación 21)."""
+    phi = np.radians(latitude_deg)
+    angle = 2 * np.pi * day_of_year / 365
+    inverse_distance = 1 + 0.033 * np.cos(angle)
+    declination = 0.409 * np.sin(angle - 1.39)
+    sunset_angle = np.arccos(np.clip(-np.tan(phi) * np.tan(declination), -1.0, 1.0))
+    return (24 * 60 / np.pi) * 0.0820 * inverse_distance * (
+        sunset_angle * np.sin(phi) * np.sin(declination)
+        + np.cos(phi) * np.cos(declination) * np.sin(sunset_angle)
+    )
+
+
+def compute_crop_indicators(
+    lote_ids: np.ndarray,
+    day_ordinals: np.ndarray,
+    temperatures: np.ndarray,
+    precipitations: np.ndarray,
+    crops: List[CropPeriod]
+) -> List[dict]:
+    """Calcula los indicadores agroclimáticos de varios cultivos a la vez.
+
+    Las lecturas horarias se agrupan por lote y día (mínima, máxima, precipitación
+    y horas de estrés) y, sobre los valores diarios, se calculan los grados día y
+    la evapotranspiración de referencia de Hargreaves. El total de cada cultivo se
+    obtiene con sumas acumuladas y búsquedas binarias, sin recorrer las lecturas
+    por cultivo.
+
+    Args:
+        lote_ids (np.ndarray): Lote de cada lectura.
+        day_ordinals (np.ndarray): Fecha de cada lectura como ordinal (`date.toordinal`).
+        temperatures (np.ndarray): Temperatura de cada lectura (°C).
+        precipitations (np.ndarray): Precipitación de cada lectura (mm), NaN si no hay dato.
+        crops (List[CropPeriod]): Cultivos y períodos a calcular.
+
+    Returns:
+        List[dict]: Indicadores de cada cultivo, en el mismo orden que `crops`.
+    """
+    keys = lote_ids.astype(np.int64) * _DAY_KEY + day_ordinals.astype(np.int64)
+    order = np.argsort(keys, kind='stable')
+    keys, temperatures, precipitations = keys[order], temperatures[order], precipitations[order]
+
+    if keys.size:
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        daily_keys = keys[starts]
+        daily_min = np.minimum.reduceat(temperatures, starts)
+        daily_max = np.maximum.reduceat(temperatures, starts)
+        daily_precipitation = np.add.reduceat(np.nan_to_num(precipitations), starts)
+        daily_heat_hours = np.add.reduceat((temperatures >= HEAT_STRESS_TEMPERATURE_C).astype(np.int64), starts)
+        daily_readings = np.diff(np.append(starts, keys.size))
+    else:
+        daily_keys = np.zeros(0, dtype=np.int64)
+        daily_min = daily_max = daily_precipitation = np.zeros(0)
+        daily_heat_hours = daily_readings = np.zeros(0, dtype=np.int64)
+
+    # Grados día con temperaturas limitadas al rango 10-30 °C
+    capped_min = np.clip(daily_min, GDD_BASE_TEMPERATURE_C, GDD_MAX_TEMPERATURE_C)
+    capped_max = np.clip(daily_max, GDD_BASE_TEMPERATURE_C, GDD_MAX_TEMPERATURE_C)
+    daily_gdd = (capped_min + capped_max) / 2 - GDD_BASE_TEMPERATURE_C
+
+    # Evapotranspiración de referencia de Hargreaves (mm/día)
+    latitude_by_lote = {crop.lote_id: crop.latitud for crop in crops}
+    known_lotes = np.array(sorted(latitude_by_lote), dtype=np.int64)
+    known_latitudes = np.array([latitude_by_lote[lote_id] for lote_id in known_lotes.tolist()], dtype=np.float64)
+    daily_lotes = daily_keys // _DAY_KEY
+    lote_positions = np.clip(np.searchsorted(known_lotes, daily_lotes), 0, max(known_lotes.size - 1, 0))
+    daily_latitudes = known_latitudes[lote_positions] if known_lotes.size else np.zeros(daily_keys.size)
+    daily_dates = (daily_keys % _DAY_KEY - _EPOCH_ORDINAL).astype('datetime64[D]')
+    day_of_year = (daily_dates - daily_dates.astype('datetime64[Y]')).astype(np.int64) + 1
+    radiation = extraterrestrial_radiation(daily_latitudes, day_of_year)
+    daily_et0 = 0.0023 * 0.408 * radiation * ((daily_min + daily_max) / 2 + 17.8) * np.sqrt(np.maximum(daily_max - daily_min, 0))
+
+    # Totales de cada cultivo como diferencia de sumas acumuladas
+    def cumulative(values: np.ndarray) -> np.ndarray:
+        return np.concatenate(([0], np.cumsum(values)))
+
+    crop_lotes = np.array([crop.lote_id for crop in crops], dtype=np.int64)
+    first_keys = crop_lotes * _DAY_KEY + np.array([crop.fecha_inicio.toordinal() for crop in crops], dtype=np.int64)
+    last_keys = crop_lotes * _DAY_KEY + np.array([crop.fecha_fin.toordinal() for crop in crops], dtype=np.int64)
+    first = np.searchsorted(daily_keys, first_keys, side='left')
+    last = np.maximum(np.searchsorted(daily_keys, last_keys, side='right'), first)
+
+    totals = {
+        name: cumulative(values)[last] - cumulative(values)[first]
+        for name, values in (
+            ('grados_dia_acumulados', daily_gdd),
+            ('precipitacion_acumulada', daily_precipitation),
+            ('evapotranspiracion_acumulada', daily_et0),
+            ('horas_estres_calor', daily_heat_hours),
+            ('num_registros', daily_readings),
+        )
+    }
+    days_with_data = last - first
+
+    return [
+        {
+            'cultivo_id': crop.cultivo_id,
+            'lote_id': crop.lote_id,
+            'fecha_inicio': crop.fecha_inicio,
+            'fecha_fin': crop.fecha_fin,
+            'dias_con_datos': int(days_with_data[index]),
+            'grados_dia_acumulados': round(float(totals['grados_dia_acumulados'][index]), 2),
+            'precipitacion_acumulada': round(float(totals['precipitacion_acumulada'][index]), 2),
+            'evapotranspiracion_acumulada': round(float(totals['evapotranspiracion_acumulada'][index]), 2),
+            'horas_estres_calor': int(totals['horas_estres_calor'][index]),
+            'num_registros': int(totals['num_registros'][index]),
+        }
+        for index, crop in enumerate(crops)
+    ]
+
+
+def readings_to_arrays(rows: Iterable[Tuple[int, date, float, Optional[float]]]) -> Tuple[np.ndarray, ...]:
+    """Convierte filas (lote_id, fecha, temperatura, precipitacion) en arreglos NumPy."""
+    lote_ids, day_ordinals, temperatures, precipitations = [], [], [], []
+    for lote_id, fecha, temperatura, precipitacion in rows:
+        lote_ids.append(lote_id)
+        day_ordinals.append(fecha.toordinal())
+        temperatures.append(temperatura)
+        precipitations.append(np.nan if precipitacion is None else precipitacion)
+    return (
+        np.array(lote_ids, dtype=np.int64),
+        np.array(day_ordinals, dtype=np.int64),
+        np.array(temperatures, dtype=np.float64),
+        np.array(precipitations, dtype=np.float64),
+    )
+
+
+class CropIndicatorCache:
+    """Caché en memoria de los indicadores de cada cultivo para el día en curso.
+
+    Los indicadores se calculan hasta el día anterior, por lo que no cambian
+    durante el día; al cambiar de día se descartan las entradas anteriores.
+
+    Attributes:
+        max_entries (int): Máximo de cultivos guardados.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._day: Optional[date] = None
+        self._entries: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, cultivo_id: int, day: date) -> Optional[dict]:
+        with self._lock:
+            return self._entries.get(cultivo_id) if self._day == day else None
+
+    def set(self, cultivo_id: int, day: date, indicators: dict) -> None:
+        with self._lock:
+            if self._day != day:
+                self._day = day
+                self._entries = {}
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[cultivo_id] = indicators
+
+    def clear(self) -> None:
+        with self._lock:
+            self._day = None
+            self._entries = {}
+
+
+# Caché compartida por el proceso
+crop_indicator_cache = CropIndicatorCache()
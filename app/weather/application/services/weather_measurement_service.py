@@ -1,92 +1,142 @@
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import ClassVar, Mapping, Optional
 from sqlalchemy.orm import Session
 from app.measurement.application.services.measurement_service import MeasurementService
 from app.measurement.infrastructure.sql_repository import MeasurementRepository
 from app.infrastructure.common.common_exceptions import DomainException
 from fastapi import status
 
+
+@dataclass(frozen=True)
+class WeatherUnitIds:
+    """IDs de las unidades de medida usadas en los registros meteorológicos.
+
+    Es inmutable para poder compartirse entre todos los casos de uso del proceso.
+    Incluye la abreviatura de cada unidad para mostrarla sin consultar la base de datos.
+    """
+    temperature_celsius_id: int
+    pressure_hpa_id: int
+    humidity_percent_id: int
+    wind_speed_ms_id: int
+    wind_direction_degree_id: int
+    precipitation_mmh_id: int
+    cloudiness_percent_id: int
+    visibility_m_id: int
+    abbreviations: Mapping[int, str] = field(default_factory=dict, compare=False)
+
+
 class WeatherMeasurementService:
-    """Servicio para gestionar las unidades de medida meteorológicas."""
+    """Servicio para gestionar las unidades de medida meteorológicas.
+
+    Los IDs de las unidades se resuelven y validan una sola vez por proceso (o al
+    recargar el catálogo con `reload_unit_ids`, lo que hace `WeatherScheduler.start`)
+    y se comparten entre instancias, por lo que construir el servicio y registrar
+    lecturas no consulta la base de datos.
+    """
+
+    # Unidad y categoría esperada de cada magnitud meteorológica (None si no se valida)
+    _UNIT_CATEGORIES = {
+        'temperature_celsius_id': (MeasurementService.UNIT_CELSIUS, MeasurementService.UNIT_CATEGORY_TEMPERATURE_NAME),
+        'pressure_hpa_id': (MeasurementService.UNIT_HECTOPASCAL, MeasurementService.UNIT_CATEGORY_PRESSURE_NAME),
+        'humidity_percent_id': (MeasurementService.UNIT_PERCENTAGE, MeasurementService.UNIT_CATEGORY_PERCENTAGE_NAME),
+        'wind_speed_ms_id': (MeasurementService.UNIT_METERS_PER_SECOND, MeasurementService.UNIT_CATEGORY_SPEED_NAME),
+        'wind_direction_degree_id': (MeasurementService.UNIT_DEGREE, MeasurementService.UNIT_CATEGORY_ANGLE_NAME),
+        'precipitation_mmh_id': (MeasurementService.UNIT_MILLIMETERS_PER_HOUR, MeasurementService.UNIT_CATEGORY_PRECIPITATION_RATE_NAME),
+        'cloudiness_percent_id': (MeasurementService.UNIT_PERCENTAGE, MeasurementService.UNIT_CATEGORY_PERCENTAGE_NAME),
+        'visibility_m_id': (MeasurementService.UNIT_METER, None),
+    }
+
+    _unit_ids: ClassVar[Optional[WeatherUnitIds]] = None
+    _lock: ClassVar[threading.Lock] = threading.Lock()
 
     def __init__(self, db: Session):
         self.db = db
         self.measurement_service = MeasurementService(db)
         self.measurement_repository = MeasurementRepository(db)
-        
+
         # Inicializar IDs de unidades
         self._initialize_unit_ids()
 
     def _initialize_unit_ids(self):
         """Inicializa los IDs de las unidades de medida necesarias."""
-        # Temperatura (Celsius)
-        temp_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_CELSIUS)
-        self.TEMPERATURE_CELSIUS_ID = temp_unit.id if temp_unit else None
-
-        # Presión (hPa)
-        pressure_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_HECTOPASCAL)
-        self.PRESSURE_HPA_ID = pressure_unit.id if pressure_unit else None
-
-        # Humedad (%)
-        humidity_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_PERCENTAGE)
-        self.HUMIDITY_PERCENT_ID = humidity_unit.id if humidity_unit else None
-
-        # Velocidad del viento (m/s)
-        wind_speed_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_METERS_PER_SECOND)
-        self.WIND_SPEED_MS_ID = wind_speed_unit.id if wind_speed_unit else None
-
-        # Dirección del viento (grados)
-        wind_dir_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_DEGREE)
-        self.WIND_DIRECTION_DEGREE_ID = wind_dir_unit.id if wind_dir_unit else None
-
-        # Precipitación (mm/h)
-        precip_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_MILLIMETERS_PER_HOUR)
-        self.PRECIPITATION_MMH_ID = precip_unit.id if precip_unit else None
-
-        # Nubosidad (%)
-        cloud_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_PERCENTAGE)
-        self.CLOUDINESS_PERCENT_ID = cloud_unit.id if cloud_unit else None
-
-        # Visibilidad (metros)
-        visibility_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_METER)
-        self.VISIBILITY_M_ID = visibility_unit.id if visibility_unit else None
-
-    def validate_weather_units(self):
-        """Valida que todas las unidades necesarias existan y sean del tipo correcto."""
-        # Temperatura
-        temp_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_CELSIUS)
-        self.measurement_service.validate_unit_category(temp_unit, self.measurement_service.UNIT_CATEGORY_TEMPERATURE_NAME)
-
-        # Presión
-        pressure_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_HECTOPASCAL)
-        self.measurement_service.validate_unit_category(pressure_unit, "Presión")
-
-        # Humedad
-        humidity_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_PERCENTAGE)
-        self.measurement_service.validate_unit_category(humidity_unit, "Porcentaje")
-
-        # Velocidad del viento
-        wind_speed_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_METERS_PER_SECOND)
-        self.measurement_service.validate_unit_category(wind_speed_unit, "Velocidad")
-
-        # Dirección del viento
-        wind_dir_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_DEGREE)
-        self.measurement_service.validate_unit_category(wind_dir_unit, "Ángulo")
-
-        # Precipitación
-        precip_unit = self.measurement_repository.get_unit_of_measure_by_name(self.measurement_service.UNIT_MILLIMETERS_PER_HOUR)
-        self.measurement_service.validate_unit_category(precip_unit, self.measurement_service.UNIT_CATEGORY_PRECIPITATION_RATE_NAME)
-
-        # Validar que todos los IDs se hayan inicializado correctamente
-        if any(id is None for id in [
-            self.TEMPERATURE_CELSIUS_ID,
-            self.PRESSURE_HPA_ID,
-            self.HUMIDITY_PERCENT_ID,
-            self.WIND_SPEED_MS_ID,
-            self.WIND_DIRECTION_DEGREE_ID,
-            self.PRECIPITATION_MMH_ID,
-            self.CLOUDINESS_PERCENT_ID,
-            self.VISIBILITY_M_ID
-        ]):
+        unit_ids = self.get_unit_ids(self.db)
+        self.TEMPERATURE_CELSIUS_ID = unit_ids.temperature_celsius_id
+        self.PRESSURE_HPA_ID = unit_ids.pressure_hpa_id
+        self.HUMIDITY_PERCENT_ID = unit_ids.humidity_percent_id
+        self.WIND_SPEED_MS_ID = unit_ids.wind_speed_ms_id
+        self.WIND_DIRECTION_DEGREE_ID = unit_ids.wind_direction_degree_id
+        self.PRECIPITATION_MMH_ID = unit_ids.precipitation_mmh_id
+        self.CLOUDINESS_PERCENT_ID = unit_ids.cloudiness_percent_id
+        self.VISIBILITY_M_ID = unit_ids.visibility_m_id
+
+    @classmethod
+    def get_unit_ids(cls, db: Session) -> WeatherUnitIds:
+        """Devuelve los IDs de las unidades meteorológicas, cargándolos la primera vez.
+
+        Args:
+            db (Session): Sesión usada solo si los IDs aún no se han cargado.
+
+        Returns:
+            WeatherUnitIds: IDs compartidos por todo el proceso.
+        """
+        unit_ids = cls._unit_ids
+        if unit_ids is None:
+            with cls._lock:
+                if cls._unit_ids is None:
+                    cls._unit_ids = cls._load_unit_ids(db)
+                unit_ids = cls._unit_ids
+        return unit_ids
+
+    @classmethod
+    def reload_unit_ids(cls, db: Session) -> WeatherUnitIds:
+        """Vuelve a cargar los IDs de las unidades tras un cambio en el catálogo.
+
+        Args:
+            db (Session): Sesión de base de datos SQLAlchemy.
+
+        Returns:
+            WeatherUnitIds: Los nuevos IDs compartidos.
+        """
+        unit_ids = cls._load_unit_ids(db)
+        with cls._lock:
+            cls._unit_ids = unit_ids
+        return unit_ids
+
+    @classmethod
+    def _load_unit_ids(cls, db: Session) -> WeatherUnitIds:
+        """Consulta y valida todas las unidades meteorológicas en una sola consulta."""
+        unit_names = {unit_name for unit_name, _ in cls._UNIT_CATEGORIES.values()}
+        units = {
+            unit.nombre: unit
+            for unit in MeasurementRepository(db).get_units_of_measure_by_names(list(unit_names))
+        }
+
+        # Validar que todas las unidades existan
+        if any(unit_name not in units for unit_name in unit_names):
             raise DomainException(
                 message="No se pudieron inicializar todas las unidades de medida necesarias",
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+        # Validar que cada unidad sea del tipo correcto
+        measurement_service = MeasurementService(db)
+        for unit_name, category_name in cls._UNIT_CATEGORIES.values():
+            if category_name is not None:
+                measurement_service.validate_unit_category(units[unit_name], category_name)
+
+        return WeatherUnitIds(
+            **{
+                field_name: units[unit_name].id
+                for field_name, (unit_name, _) in cls._UNIT_CATEGORIES.items()
+            },
+            abbreviations=MappingProxyType({unit.id: unit.abreviatura for unit in units.values()})
+        )
+
+    def validate_weather_units(self):
+        """Valida que todas las unidades necesarias existan y sean del tipo correcto.
+
+        La validación se hace al cargar los IDs, por lo que aquí no se consulta la base de datos.
+        """
+        self.get_unit_ids(self.db)
@@ -0,0 +1,63 @@
+from sqlalchemy.orm import Session
+from app.infrastructure.common.common_exceptions import DomainException
+from app.infrastructure.common.response_models import SuccessResponse
+from app.farm.application.services.farm_service import FarmService
+from app.farm.infrastructure.sql_repository import FarmRepository
+from app.user.domain.schemas import UserInDB
+from app.weather.domain.schemas import WeatherCollectionSettingUpdate
+from app.weather.infrastructure.sql_repository import WeatherRepository
+from fastapi import status
+
+class UpdateWeatherCollectionSettingUseCase:
+    """Caso de uso para configurar la recolección horaria de clima de una finca.
+
+    Attributes:
+        db (Session): Sesión de base de datos SQLAlchemy.
+        weather_repository (WeatherRepository): Repositorio de registros meteorológicos.
+        farm_repository (FarmRepository): Repositorio de fincas.
+        farm_service (FarmService): Servicio para lógica de negocio de fincas.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.weather_repository = WeatherRepository(db)
+        self.farm_repository = FarmRepository(db)
+        self.farm_service = FarmService(db)
+
+    def update_collection_setting(
+        self,
+        finca_id: int,
+        setting: WeatherCollectionSettingUpdate,
+        current_user: UserInDB
+    ) -> SuccessResponse:
+        """Guarda para qué lotes de una finca se recolecta el clima cada hora.
+
+        Args:
+            finca_id (int): ID de la finca.
+            setting (WeatherCollectionSettingUpdate): Nueva configuración.
+            current_user (UserInDB): Usuario que hace el cambio.
+
+        Returns:
+            SuccessResponse: Respuesta exitosa con un mensaje de confirmación.
+
+        Raises:
+            DomainException: Si ocurre algún error de validación:
+                - 404: La finca no existe.
+                - 403: El usuario no es administrador de la finca.
+        """
+        farm = self.farm_repository.get_farm_by_id(finca_id)
+        if not farm:
+            raise DomainException(
+                message="La finca no existe.",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+        if not self.farm_service.user_is_farm_admin(current_user.id, farm.id):
+            raise DomainException(
+                message="No tienes permisos para configurar la recolección de clima de esta finca.",
+                status_code=status.HTTP_403_FORBIDDEN
+            )
+
+        self.weather_repository.save_collection_setting(finca_id, setting.politica, setting.dias_actividad)
+
+        return SuccessResponse(message="Configuración de recolección de clima actualizada exitosamente")
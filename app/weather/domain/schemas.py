@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from enum import Enum
+from pydantic import BaseModel, Field
 from typing import Optional, Any
-from datetime import date, time
+from datetime import date, datetime, time
 
 class WeatherAPIResponse(BaseModel):
     """Modelo de respuesta para la prueba de la API de OpenWeatherMap.
@@ -27,7 +28,7 @@ class WeatherLogCreate(BaseModel):
     humedad_unidad_id: Optional[int]
     precipitacion: Optional[float]
     precipitacion_unidad_id: Optional[int]
-    indice_uv: float
+    indice_uv: Optional[float]
     nubosidad: float
     nubosidad_unidad_id: Optional[int]
     velocidad_viento: float
@@ -59,7 +60,7 @@ class WeatherLogResponse(BaseModel):
     presion_atmosferica: float
     humedad_relativa: float
     precipitacion: Optional[float]
-    indice_uv: float
+    indice_uv: Optional[float]
     nubosidad: float
     velocidad_viento: float
     direccion_viento: int
@@ -75,4 +76,145 @@ class WeatherLogResponse(BaseModel):
 class WeatherLogsListResponse(BaseModel):
     success: bool
     message: str
-    data: list[WeatherLogResponse] 
\ No newline at end of file
+    data: list[WeatherLogResponse] 
+
+
+class WeatherGranularity(str, Enum):
+    """Granularidad de los agregados meteorológicos.
+
+    HOUR: Un valor por hora, calculado a partir de los registros.
+    DAY: Un valor por día, leído de los resúmenes diarios.
+    WEEK: Un valor por semana (de lunes a domingo).
+    MONTH: Un valor por mes.
+    """
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class WeatherAggregate(BaseModel):
+    """Valores agregados de un período.
+
+    Attributes:
+        periodo_inicio (datetime): Inicio del período.
+        temperatura_min (float): Temperatura mínima.
+        temperatura_max (float): Temperatura máxima.
+        temperatura_promedio (float): Temperatura promedio.
+        precipitacion_total (float): Precipitación acumulada.
+        humedad_promedio (float): Humedad relativa promedio.
+        rafaga_max (Optional[float]): Ráfaga de viento máxima.
+        num_registros (int): Número de lecturas del período.
+    """
+    periodo_inicio: datetime
+    temperatura_min: float
+    temperatura_max: float
+    temperatura_promedio: float
+    precipitacion_total: float
+    humedad_promedio: float
+    rafaga_max: Optional[float] = None
+    num_registros: int
+
+class WeatherAggregatesListResponse(BaseModel):
+    success: bool
+    message: str
+    granularidad: WeatherGranularity
+    data: list[WeatherAggregate]
+
+class WeatherStats(BaseModel):
+    """Estadísticas de los registros meteorológicos de un lote en un rango de fechas.
+
+    Attributes:
+        num_registros (int): Número de lecturas del rango.
+        temperatura_min (Optional[float]): Temperatura mínima.
+        temperatura_max (Optional[float]): Temperatura máxima.
+        temperatura_promedio (Optional[float]): Temperatura promedio.
+        humedad_min (Optional[float]): Humedad relativa mínima.
+        humedad_max (Optional[float]): Humedad relativa máxima.
+        humedad_promedio (Optional[float]): Humedad relativa promedio.
+        precipitacion_total (Optional[float]): Precipitación acumulada.
+        viento_promedio (Optional[float]): Velocidad del viento promedio.
+        viento_max (Optional[float]): Velocidad del viento máxima.
+    """
+    num_registros: int
+    temperatura_min: Optional[float] = None
+    temperatura_max: Optional[float] = None
+    temperatura_promedio: Optional[float] = None
+    humedad_min: Optional[float] = None
+    humedad_max: Optional[float] = None
+    humedad_promedio: Optional[float] = None
+    precipitacion_total: Optional[float] = None
+    viento_promedio: Optional[float] = None
+    viento_max: Optional[float] = None
+
+class WeatherStatsResponse(BaseModel):
+    success: bool
+    message: str
+    data: WeatherStats
+
+class WeatherExportFormat(str, Enum):
+    """Formato de la exportación de registros meteorológicos.
+
+    CSV: Valores separados por comas, con una fila de encabezado.
+    NDJSON: Un objeto JSON por línea.
+    """
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class WeatherCollectionPolicy(str, Enum):
+    """Lotes de una finca para los que se recolecta el clima cada hora.
+
+    ACTIVE: Lotes con un cultivo activo o con actividad reciente.
+    ALL: Todos los lotes de la finca.
+    DISABLED: Ningún lote de la finca.
+    """
+    ACTIVE = "activos"
+    ALL = "todos"
+    DISABLED = "desactivado"
+
+class WeatherCollectionSettingUpdate(BaseModel):
+    """Configuración de la recolección de clima de una finca.
+
+    Attributes:
+        politica (WeatherCollectionPolicy): Lotes para los que se recolecta el clima.
+        dias_actividad (Optional[int]): Días durante los que una labor o cosecha mantiene
+            activo un lote; si no se indica se usa el valor por defecto.
+    """
+    politica: WeatherCollectionPolicy
+    dias_actividad: Optional[int] = Field(None, ge=1, le=365)
+
+class CropAgroclimaticIndicators(BaseModel):
+    """Indicadores agroclimáticos acumulados de un cultivo desde su siembra.
+
+    Attributes:
+        cultivo_id (int): ID del cultivo.
+        lote_id (int): ID del lote del cultivo.
+        fecha_inicio (date): Fecha de siembra.
+        fecha_fin (date): Último día incluido (el día anterior a la consulta o la fecha de cosecha).
+        dias_con_datos (int): Días del período con al menos una lectura.
+        grados_dia_acumulados (float): Grados día de crecimiento (base 10 °C, máximo 30 °C).
+        precipitacion_acumulada (float): Precipitación acumulada en mm.
+        evapotranspiracion_acumulada (float): Evapotranspiración de referencia de Hargreaves en mm.
+        horas_estres_calor (int): Lecturas horarias con temperatura de 35 °C o más.
+        num_registros (int): Lecturas horarias usadas.
+    """
+    cultivo_id: int
+    lote_id: int
+    fecha_inicio: date
+    fecha_fin: date
+    dias_con_datos: int
+    grados_dia_acumulados: float
+    precipitacion_acumulada: float
+    evapotranspiracion_acumulada: float
+    horas_estres_calor: int
+    num_registros: int
+
+class CropAgroclimaticIndicatorsResponse(BaseModel):
+    success: bool
+    message: str
+    data: CropAgroclimaticIndicators
+
+class FarmAgroclimaticIndicatorsResponse(BaseModel):
+    success: bool
+    message: str
+    finca_id: int
+    data: list[CropAgroclimaticIndicators]
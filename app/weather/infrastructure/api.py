@@ -1,14 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.infrastructure.common.common_exceptions import DomainException
-from app.infrastructure.db.connection import getDb
+from app.infrastructure.db.connection import getDb, SessionLocal
 from app.infrastructure.security.jwt_middleware import get_current_user
 from app.user.domain.schemas import UserInDB
-from app.weather.domain.schemas import WeatherAPIResponse, WeatherLogsListResponse
+from app.weather.domain.schemas import WeatherAPIResponse, WeatherLogsListResponse, WeatherAggregatesListResponse, WeatherGranularity, WeatherExportFormat, WeatherCollectionSettingUpdate, WeatherStatsResponse, CropAgroclimaticIndicatorsResponse, FarmAgroclimaticIndicatorsResponse
 from app.weather.application.test_open_weather_map_api_use_case import TestOpenWeatherMapAPIUseCase
 from app.weather.application.get_current_weather_use_case import GetCurrentWeatherUseCase
 from app.weather.application.get_weather_logs_use_case import GetWeatherLogsUseCase
+from app.weather.application.get_weather_aggregates_use_case import GetWeatherAggregatesUseCase
+from app.weather.application.export_weather_logs_use_case import ExportWeatherLogsUseCase
+from app.weather.application.get_weather_stats_use_case import GetWeatherStatsUseCase
+from app.weather.application.update_weather_collection_setting_use_case import UpdateWeatherCollectionSettingUseCase
+from app.weather.application.get_agroclimatic_indicators_use_case import GetAgroclimaticIndicatorsUseCase
+from app.infrastructure.common.response_models import SuccessResponse
 from datetime import date
+from typing import List, Optional
 from app.logs.application.decorators.log_decorator import log_activity
 from app.logs.application.services.log_service import LogActionType
 
@@ -58,15 +66,19 @@ async def get_current_weather(
     request: Request,
     lat: float = Query(..., description="Latitud de la ubicación"),
     lon: float = Query(..., description="Longitud de la ubicación"),
+    lote_id: Optional[int] = Query(None, description="ID del lote; si tiene un registro de la última hora se usa ese registro"),
     db: Session = Depends(getDb),
     current_user: UserInDB = Depends(get_current_user)
 ) -> WeatherAPIResponse:
     """
     Obtiene los datos meteorológicos actuales para una ubicación específica.
+
+    Las respuestas de la API se reutilizan durante unos minutos para coordenadas cercanas.
     
     Args:
         lat (float): Latitud de la ubicación.
         lon (float): Longitud de la ubicación.
+        lote_id (Optional[int]): ID del lote de la ubicación (opcional).
         db (Session): Sesión de base de datos.
         current_user (UserInDB): Usuario autenticado actual.
         
@@ -75,12 +87,77 @@ async def get_current_weather(
     """
     use_case = GetCurrentWeatherUseCase(db)
     try:
-        return await use_case.get_current_weather(lat, lon)
+        return await use_case.get_current_weather(lat, lon, lote_id)
     except DomainException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
 
+@router.get("/weather/logs/export", response_class=StreamingResponse)
+@log_activity(
+    action_type=LogActionType.EXPORT,
+    table_name="registro_meteorologico",
+    description=lambda *args, **kwargs: (
+        f"Exportación meteorológica de los lotes {kwargs.get('lote_ids')} entre {kwargs.get('start_date')} y {kwargs.get('end_date')}."
+    ),
+)
+async def export_weather_logs(
+    request: Request,
+    lote_ids: List[int] = Query(..., description="IDs de los lotes; se puede repetir el parámetro"),
+    start_date: date = Query(..., description="Fecha de inicio (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="Fecha de fin (YYYY-MM-DD)"),
+    format: WeatherExportFormat = Query(WeatherExportFormat.CSV, description="Formato: csv o ndjson"),
+    gzip: bool = Query(False, description="Comprimir la exportación con gzip"),
+    db: Session = Depends(getDb),
+    current_user: UserInDB = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Exporta los registros meteorológicos de uno o varios lotes en un rango de fechas.
+
+    El archivo se envía por partes a medida que se lee de la base de datos, por lo
+    que sirve para rangos de varias temporadas sin cargar todos los registros en memoria.
+
+    Args:
+        lote_ids (List[int]): IDs de los lotes
+        start_date (date): Fecha de inicio
+        end_date (date): Fecha de fin
+        format (WeatherExportFormat): Formato de la exportación
+        gzip (bool): Si es True, el archivo se comprime con gzip
+        db (Session): Sesión de base de datos
+        current_user (UserInDB): Usuario autenticado actual
+
+    Returns:
+        StreamingResponse: Archivo CSV o NDJSON con los registros
+    """
+    try:
+        # Valida la solicitud con la sesión de la petición antes de empezar a enviar la respuesta
+        ExportWeatherLogsUseCase(db).export_weather_logs(lote_ids, start_date, end_date, format, compress=gzip)
+    except DomainException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
+
+    def content():
+        # La sesión de la petición se cierra antes de que termine el stream
+        session = SessionLocal()
+        try:
+            yield from ExportWeatherLogsUseCase(session).export_weather_logs(
+                lote_ids, start_date, end_date, format, compress=gzip
+            )
+        finally:
+            session.close()
+
+    filename = f"registros_meteorologicos_{start_date}_{end_date}.{format.value}"
+    media_type = "text/csv" if format == WeatherExportFormat.CSV else "application/x-ndjson"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        content(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/weather/logs/{lote_id}", response_model=WeatherLogsListResponse)
 @log_activity(
     action_type=LogActionType.VIEW,
@@ -118,3 +195,182 @@ async def get_weather_logs(
         raise e
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
+
+@router.get("/weather/aggregates/{lote_id}", response_model=WeatherAggregatesListResponse)
+@log_activity(
+    action_type=LogActionType.VIEW,
+    table_name="resumen_meteorologico_diario",
+    description=lambda *args, **kwargs: (
+        f"Consulta de datos meteorológicos agregados por {getattr(kwargs.get('granularity'), 'value', kwargs.get('granularity'))} "
+        f"del lote {kwargs.get('lote_id')} entre {kwargs.get('start_date')} y {kwargs.get('end_date')}."
+    ),
+    get_record_id=lambda *args, **kwargs: kwargs.get('lote_id')
+)
+async def get_weather_aggregates(
+    request: Request,
+    lote_id: int,
+    start_date: date = Query(..., description="Fecha de inicio (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="Fecha de fin (YYYY-MM-DD)"),
+    granularity: WeatherGranularity = Query(WeatherGranularity.DAY, description="Granularidad: hour, day, week o month"),
+    db: Session = Depends(getDb),
+    current_user: UserInDB = Depends(get_current_user)
+) -> WeatherAggregatesListResponse:
+    """
+    Obtiene los datos meteorológicos de un lote agregados por hora, día, semana o mes.
+
+    Args:
+        lote_id (int): ID del lote
+        start_date (date): Fecha de inicio
+        end_date (date): Fecha de fin
+        granularity (WeatherGranularity): Granularidad de los agregados
+        db (Session): Sesión de base de datos
+        current_user (UserInDB): Usuario autenticado actual
+
+    Returns:
+        WeatherAggregatesListResponse: Valores agregados por período
+    """
+    use_case = GetWeatherAggregatesUseCase(db)
+    try:
+        return await use_case.get_weather_aggregates(lote_id, start_date, end_date, granularity)
+    except DomainException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
+
+@router.get("/weather/stats/{lote_id}", response_model=WeatherStatsResponse)
+@log_activity(
+    action_type=LogActionType.VIEW,
+    table_name="registro_meteorologico",
+    description=lambda *args, **kwargs: (
+        f"Consulta de estadísticas meteorológicas del lote {kwargs.get('lote_id')} entre {kwargs.get('start_date')} y {kwargs.get('end_date')}."
+    ),
+    get_record_id=lambda *args, **kwargs: kwargs.get('lote_id')
+)
+async def get_weather_stats(
+    request: Request,
+    lote_id: int,
+    start_date: date = Query(..., description="Fecha de inicio (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="Fecha de fin (YYYY-MM-DD)"),
+    db: Session = Depends(getDb),
+    current_user: UserInDB = Depends(get_current_user)
+) -> WeatherStatsResponse:
+    """
+    Obtiene el mínimo, máximo, promedio y total de las variables meteorológicas de un lote.
+
+    Args:
+        lote_id (int): ID del lote
+        start_date (date): Fecha de inicio
+        end_date (date): Fecha de fin
+        db (Session): Sesión de base de datos
+        current_user (UserInDB): Usuario autenticado actual
+
+    Returns:
+        WeatherStatsResponse: Estadísticas del rango
+    """
+    use_case = GetWeatherStatsUseCase(db)
+    try:
+        return await use_case.get_weather_stats(lote_id, start_date, end_date)
+    except DomainException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
+
+@router.get("/weather/indicators/crops/{crop_id}", response_model=CropAgroclimaticIndicatorsResponse)
+@log_activity(
+    action_type=LogActionType.VIEW,
+    table_name="cultivo",
+    description=lambda *args, **kwargs: f"Consulta de indicadores agroclimáticos del cultivo {kwargs.get('crop_id')}.",
+    get_record_id=lambda *args, **kwargs: kwargs.get('crop_id')
+)
+async def get_crop_agroclimatic_indicators(
+    request: Request,
+    crop_id: int,
+    db: Session = Depends(getDb),
+    current_user: UserInDB = Depends(get_current_user)
+) -> CropAgroclimaticIndicatorsResponse:
+    """
+    Obtiene los grados día, la precipitación y evapotranspiración acumuladas y las horas
+    de estrés por calor de un cultivo desde su siembra.
+
+    Args:
+        crop_id (int): ID del cultivo
+        db (Session): Sesión de base de datos
+        current_user (UserInDB): Usuario autenticado actual
+
+    Returns:
+        CropAgroclimaticIndicatorsResponse: Indicadores del cultivo
+    """
+    use_case = GetAgroclimaticIndicatorsUseCase(db)
+    try:
+        return use_case.get_crop_indicators(crop_id, current_user)
+    except DomainException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
+
+@router.get("/weather/indicators/farms/{finca_id}", response_model=FarmAgroclimaticIndicatorsResponse)
+@log_activity(
+    action_type=LogActionType.VIEW,
+    table_name="cultivo",
+    description=lambda *args, **kwargs: f"Consulta de indicadores agroclimáticos de los cultivos de la finca {kwargs.get('finca_id')}.",
+    get_record_id=lambda *args, **kwargs: kwargs.get('finca_id')
+)
+async def get_farm_agroclimatic_indicators(
+    request: Request,
+    finca_id: int,
+    db: Session = Depends(getDb),
+    current_user: UserInDB = Depends(get_current_user)
+) -> FarmAgroclimaticIndicatorsResponse:
+    """
+    Obtiene los indicadores agroclimáticos de los cultivos activos de una finca.
+
+    Args:
+        finca_id (int): ID de la finca
+        db (Session): Sesión de base de datos
+        current_user (UserInDB): Usuario autenticado actual
+
+    Returns:
+        FarmAgroclimaticIndicatorsResponse: Indicadores de cada cultivo activo
+    """
+    use_case = GetAgroclimaticIndicatorsUseCase(db)
+    try:
+        return use_case.get_farm_indicators(finca_id, current_user)
+    except DomainException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
+
+@router.put("/weather/collection-settings/{finca_id}", response_model=SuccessResponse)
+@log_activity(
+    action_type=LogActionType.UPDATE,
+    table_name="configuracion_recoleccion_clima",
+    description="Configuración de los lotes de la finca para los que se recolecta el clima cada hora.",
+    get_record_id=lambda *args, **kwargs: kwargs.get('finca_id'),
+    get_new_value=lambda *args, **kwargs: kwargs.get('setting').model_dump(mode='json') if 'setting' in kwargs else None
+)
+async def update_weather_collection_setting(
+    request: Request,
+    finca_id: int,
+    setting: WeatherCollectionSettingUpdate,
+    db: Session = Depends(getDb),
+    current_user: UserInDB = Depends(get_current_user)
+) -> SuccessResponse:
+    """
+    Configura para qué lotes de una finca se recolecta el clima cada hora.
+
+    Args:
+        finca_id (int): ID de la finca
+        setting (WeatherCollectionSettingUpdate): Política y días de actividad
+        db (Session): Sesión de base de datos
+        current_user (UserInDB): Usuario autenticado actual
+
+    Returns:
+        SuccessResponse: Mensaje indicando que la configuración se guardó
+    """
+    use_case = UpdateWeatherCollectionSettingUseCase(db)
+    try:
+        return use_case.update_collection_setting(finca_id, setting, current_user)
+    except DomainException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
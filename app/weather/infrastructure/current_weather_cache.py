@@ -0,0 +1,112 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+WEATHER_CACHE_TTL_SECONDS = float(os.getenv('WEATHER_CACHE_TTL_SECONDS', 600))
+WEATHER_CACHE_PRECISION = int(os.getenv('WEATHER_CACHE_PRECISION', 2))
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv('WEATHER_CACHE_MAX_ENTRIES', 10000))
+
+CacheKey = Tuple[float, float]
+
+
+class CurrentWeatherCache:
+    """Caché en memoria, con expiración, de las consultas de clima actual.
+
+    Las entradas se indexan por las coordenadas redondeadas, de modo que las
+    consultas de usuarios de una misma finca comparten la respuesta. Si varias
+    solicitudes piden la misma celda mientras no está en caché, solo la primera
+    consulta la API y las demás esperan su resultado (single-flight). La consulta
+    no depende de la solicitud que la inició, de modo que cancelar una solicitud
+    no cancela las demás.
+
+    Attributes:
+        ttl_seconds (float): Tiempo de vida de cada entrada.
+        precision (int): Decimales a los que se redondean las coordenadas.
+        max_entries (int): Máximo de entradas; al superarlo se descartan las más antiguas.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = WEATHER_CACHE_TTL_SECONDS,
+        precision: int = WEATHER_CACHE_PRECISION,
+        max_entries: int = WEATHER_CACHE_MAX_ENTRIES
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.precision = precision
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[float, dict]]" = OrderedDict()
+        self._in_flight: Dict[CacheKey, asyncio.Future] = {}
+
+    def key(self, lat: float, lon: float) -> CacheKey:
+        """Calcula la clave de caché de unas coordenadas."""
+        return round(float(lat), self.precision), round(float(lon), self.precision)
+
+    def get(self, lat: float, lon: float):
+        """Devuelve la respuesta en caché de unas coordenadas, o None si no hay o expiró."""
+        key = self.key(lat, lon)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return data
+
+    def set(self, lat: float, lon: float, data: dict) -> None:
+        """Guarda una respuesta en caché para las coordenadas indicadas."""
+        key = self.key(lat, lon)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, lat: float, lon: float, fetch: Callable[[float, float], Awaitable[dict]]) -> dict:
+        """Devuelve la respuesta en caché o la obtiene una sola vez para todas las solicitudes.
+
+        Args:
+            lat (float): Latitud solicitada.
+            lon (float): Longitud solicitada.
+            fetch (Callable[[float, float], Awaitable[dict]]): Función que consulta la API con
+                las coordenadas redondeadas.
+
+        Returns:
+            dict: Respuesta de la API.
+        """
+        cached = self.get(lat, lon)
+        if cached is not None:
+            return cached
+
+        key = self.key(lat, lon)
+        task = self._in_flight.get(key)
+        if task is None:
+            # La consulta se ejecuta en su propia tarea: si se cancela la solicitud que la
+            # inició (p. ej. el cliente se desconecta), las demás siguen esperando su resultado
+            task = asyncio.ensure_future(fetch(*key))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish_fetch(key, lat, lon, done))
+        # shield evita que la cancelación de un solicitante cancele la consulta compartida
+        return await asyncio.shield(task)
+
+    def _finish_fetch(self, key: CacheKey, lat: float, lon: float, task: asyncio.Future) -> None:
+        """Guarda en caché el resultado de una consulta terminada y la retira de las consultas en curso."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if task.cancelled():
+            return
+        # Recuperar la excepción evita el aviso de excepción no recuperada si nadie la espera
+        if task.exception() is None:
+            self.set(lat, lon, task.result())
+
+    def clear(self) -> None:
+        """Elimina todas las entradas de la caché."""
+        self._entries.clear()
+
+
+current_weather_cache = CurrentWeatherCache()
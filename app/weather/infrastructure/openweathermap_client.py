@@ -0,0 +1,164 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import status
+
+from app.infrastructure.common.common_exceptions import DomainException
+
+load_dotenv(override=True)
+
+OPENWEATHERMAP_BASE_URL = os.getenv("OPENWEATHERMAP_BASE_URL", "https://api.openweathermap.org/data/3.0/onecall")
+OPENWEATHERMAP_HISTORY_URL = os.getenv("OPENWEATHERMAP_HISTORY_URL", "https://history.openweathermap.org/data/2.5/history/city")
+# La API histórica devuelve como máximo una semana de lecturas horarias por consulta
+OPENWEATHERMAP_HISTORY_MAX_SPAN = timedelta(days=7)
+OPENWEATHERMAP_TIMEOUT_SECONDS = float(os.getenv("OPENWEATHERMAP_TIMEOUT_SECONDS", 10))
+
+
+def history_request_count(start: datetime, end: datetime) -> int:
+    """Consultas que hace `OpenWeatherMapClient.fetch_history` para cubrir un rango."""
+    if start > end:
+        return 0
+    return (end - start) // (OPENWEATHERMAP_HISTORY_MAX_SPAN + timedelta(seconds=1)) + 1
+
+
+class OpenWeatherMapClient:
+    """Cliente HTTP de larga duración para la API One Call de OpenWeatherMap.
+
+    Mantiene un único `httpx.AsyncClient` con conexiones keep-alive, de modo que
+    las consultas sucesivas reutilizan las conexiones TCP/TLS en lugar de abrir
+    una nueva por cada lote.
+
+    Attributes:
+        api_key (str): Clave de API para OpenWeatherMap.
+        base_url (str): URL de la API One Call.
+        history_url (str): URL de la API histórica por horas.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = OPENWEATHERMAP_BASE_URL,
+        history_url: str = OPENWEATHERMAP_HISTORY_URL,
+        max_connections: int = 20,
+        timeout_seconds: float = OPENWEATHERMAP_TIMEOUT_SECONDS
+    ):
+        self.api_key = api_key or os.getenv("OPENWEATHERMAP_API_KEY")
+        self.base_url = base_url
+        self.history_url = history_url
+        self._client = httpx.AsyncClient(
+            timeout=timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+
+    async def fetch_current(self, lat: float, lon: float) -> dict:
+        """Obtiene las condiciones meteorológicas actuales de unas coordenadas.
+
+        Args:
+            lat (float): Latitud de la ubicación.
+            lon (float): Longitud de la ubicación.
+
+        Returns:
+            dict: Respuesta de la API.
+
+        Raises:
+            DomainException: Si la API responde con un error.
+        """
+        params = {
+            "lat": lat,
+            "lon": lon,
+            "exclude": "minutely,hourly,daily,alerts",
+            "appid": self.api_key,
+            "units": "metric"
+        }
+        return await self._get(self.base_url, params)
+
+    async def fetch_history(self, lat: float, lon: float, start: datetime, end: datetime) -> List[dict]:
+        """Obtiene las lecturas horarias de un rango de tiempo pasado.
+
+        Cada consulta cubre hasta `OPENWEATHERMAP_HISTORY_MAX_SPAN`; los rangos más
+        largos se dividen en varias consultas.
+
+        Args:
+            lat (float): Latitud de la ubicación.
+            lon (float): Longitud de la ubicación.
+            start (datetime): Inicio del rango (con zona horaria).
+            end (datetime): Fin del rango, incluido.
+
+        Returns:
+            List[dict]: Lecturas horarias en el formato de la API histórica (`list`).
+
+        Raises:
+            DomainException: Si la API responde con un error.
+        """
+        readings = []
+        span_start = start
+        while span_start <= end:
+            span_end = min(span_start + OPENWEATHERMAP_HISTORY_MAX_SPAN, end)
+            params = {
+                "lat": lat,
+                "lon": lon,
+                "type": "hour",
+                "start": int(span_start.timestamp()),
+                "end": int(span_end.timestamp()),
+                "appid": self.api_key,
+                "units": "metric"
+            }
+            data = await self._get(self.history_url, params)
+            readings.extend(data.get("list", []))
+            span_start = span_end + timedelta(seconds=1)
+        return readings
+
+    async def _get(self, url: str, params: dict) -> dict:
+        """Hace una consulta GET y devuelve la respuesta JSON."""
+        response = await self._client.get(url, params=params)
+
+        if response.status_code != 200:
+            raise DomainException(
+                message=f"Error al obtener datos de la API: {response.text}",
+                status_code=status.HTTP_502_BAD_GATEWAY
+            )
+
+        return response.json()
+
+    @property
+    def is_closed(self) -> bool:
+        """Indica si el cliente ya se cerró."""
+        return self._client.is_closed
+
+    async def aclose(self) -> None:
+        """Cierra las conexiones abiertas del cliente."""
+        await self._client.aclose()
+
+
+_shared_client: Optional[OpenWeatherMapClient] = None
+_shared_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_shared_openweathermap_client() -> OpenWeatherMapClient:
+    """Cliente compartido por las consultas a OpenWeatherMap de los casos de uso del proceso.
+
+    Un cliente pertenece a un bucle de eventos, por lo que se crea uno nuevo si
+    cambia el bucle.
+    """
+    global _shared_client, _shared_client_loop
+    loop = asyncio.get_running_loop()
+    if _shared_client is None or _shared_client.is_closed or _shared_client_loop is not loop:
+        _shared_client = OpenWeatherMapClient()
+        _shared_client_loop = loop
+    return _shared_client
+
+
+async def close_shared_openweathermap_client() -> None:
+    """Cierra el cliente compartido, al detener el proceso."""
+    global _shared_client, _shared_client_loop
+    if _shared_client is not None and _shared_client_loop is asyncio.get_running_loop():
+        await _shared_client.aclose()
+    _shared_client = None
+    _shared_client_loop = None
@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Date, Time
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Date, Time, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.infrastructure.db.connection import Base
 
 class WeatherLog(Base):
-    """Modelo para registrar datos meteorológicos."""
+    """Modelo para registrar datos meteorológicos.
+
+    Cada lote tiene a lo sumo un registro por fecha y hora; el programador guarda
+    las lecturas al inicio de cada hora, por lo que repetir una ejecución no
+    duplica registros.
+    """
     __tablename__ = "registro_meteorologico"
+    __table_args__ = (
+        UniqueConstraint('lote_id', 'fecha', 'hora', name='uq_registro_meteorologico_lote_fecha_hora'),
+    )
 
     id = Column(Integer, primary_key=True)
     lote_id = Column(Integer, ForeignKey('lote.id'), nullable=False)
@@ -19,7 +27,7 @@ class WeatherLog(Base):
     humedad_unidad_id = Column(Integer, ForeignKey('unidad_medida.id'))
     precipitacion = Column(Float(precision=6))
     precipitacion_unidad_id = Column(Integer, ForeignKey('unidad_medida.id'))
-    indice_uv = Column(Float(precision=3), nullable=False)
+    indice_uv = Column(Float(precision=3))
     nubosidad = Column(Float(precision=5), nullable=False)
     nubosidad_unidad_id = Column(Integer, ForeignKey('unidad_medida.id'))
     velocidad_viento = Column(Float(precision=5), nullable=False)
@@ -46,4 +54,56 @@ class WeatherLog(Base):
     direccion_viento_unidad = relationship("UnitOfMeasure", foreign_keys=[direccion_viento_unidad_id])
     rafaga_viento_unidad = relationship("UnitOfMeasure", foreign_keys=[rafaga_viento_unidad_id])
     visibilidad_unidad = relationship("UnitOfMeasure", foreign_keys=[visibilidad_unidad_id])
-    punto_rocio_unidad = relationship("UnitOfMeasure", foreign_keys=[punto_rocio_unidad_id]) 
\ No newline at end of file
+    punto_rocio_unidad = relationship("UnitOfMeasure", foreign_keys=[punto_rocio_unidad_id]) 
+
+class WeatherDailySummary(Base):
+    """Resumen diario de los registros meteorológicos de un lote.
+
+    Se actualiza de forma incremental al guardar cada lectura. Se guardan sumas y
+    conteos en lugar de promedios para poder agregar nuevas lecturas sin releer
+    las del día.
+
+    Attributes:
+        id (int): ID único del resumen.
+        lote_id (int): ID del lote.
+        fecha (date): Día del resumen.
+        temperatura_min (float): Temperatura mínima del día.
+        temperatura_max (float): Temperatura máxima del día.
+        temperatura_suma (float): Suma de las temperaturas del día.
+        humedad_suma (float): Suma de las humedades relativas del día.
+        precipitacion_total (float): Precipitación acumulada del día.
+        rafaga_max (float): Ráfaga de viento máxima del día.
+        num_registros (int): Número de lecturas del día.
+    """
+    __tablename__ = "resumen_meteorologico_diario"
+    __table_args__ = (
+        UniqueConstraint('lote_id', 'fecha', name='uq_resumen_meteorologico_diario_lote_fecha'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    lote_id = Column(Integer, ForeignKey('lote.id'), nullable=False, index=True)
+    fecha = Column(Date, nullable=False)
+    temperatura_min = Column(Float, nullable=False)
+    temperatura_max = Column(Float, nullable=False)
+    temperatura_suma = Column(Float, nullable=False, default=0)
+    humedad_suma = Column(Float, nullable=False, default=0)
+    precipitacion_total = Column(Float, nullable=False, default=0)
+    rafaga_max = Column(Float)
+    num_registros = Column(Integer, nullable=False, default=0)
+
+class WeatherCollectionSetting(Base):
+    """Configuración por finca de la recolección horaria de clima.
+
+    Las fincas sin configuración usan la política y los días de actividad por
+    defecto del programador.
+
+    Attributes:
+        finca_id (int): ID de la finca.
+        politica (str): Valor de `WeatherCollectionPolicy`.
+        dias_actividad (int): Días durante los que una labor o cosecha mantiene activo un lote.
+    """
+    __tablename__ = "configuracion_recoleccion_clima"
+
+    finca_id = Column(Integer, ForeignKey('finca.id'), primary_key=True)
+    politica = Column(String(20), nullable=False)
+    dias_actividad = Column(Integer)
@@ -0,0 +1,244 @@
+import os
+import threading
+import time as monotonic_time
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.infrastructure.common.datetime_utils import get_current_date
+from app.weather.infrastructure.sql_repository import WeatherRepository
+
+load_dotenv(override=True)
+
+# Días de lecturas recientes que se mantienen en memoria por lote
+WEATHER_RECENT_CACHE_DAYS = int(os.getenv('WEATHER_RECENT_CACHE_DAYS', 30))
+# Segundos tras los que una consulta vuelve a leer de la base de datos los registros nuevos
+WEATHER_RECENT_CACHE_SYNC_SECONDS = float(os.getenv('WEATHER_RECENT_CACHE_SYNC_SECONDS', 60))
+# Horas antes de la lectura más reciente que se vuelven a leer al sincronizar, para
+# incluir las lecturas cuyo ID se confirmó después de otro mayor
+WEATHER_RECENT_CACHE_SYNC_LOOKBACK_HOURS = int(os.getenv('WEATHER_RECENT_CACHE_SYNC_LOOKBACK_HOURS', 3))
+
+# Variables guardadas por lectura, en el orden de las columnas de `WeatherRepository.get_readings_for_cache`
+VARIABLES = ('temperatura', 'humedad_relativa', 'precipitacion', 'velocidad_viento', 'rafaga_viento')
+
+
+def _to_timestamp(fecha: date, hora: time) -> int:
+    return int(datetime.combine(fecha, hora, tzinfo=timezone.utc).timestamp())
+
+
+def _day_start_timestamp(fecha: date) -> int:
+    return _to_timestamp(fecha, time.min)
+
+
+class PlotWeatherBuffer:
+    """Lecturas recientes de un lote en arreglos NumPy de capacidad fija.
+
+    Guarda una marca de tiempo (segundos UTC) y las variables de `VARIABLES` por
+    lectura, con NaN para los valores vacíos. Al llenarse, cada lectura nueva
+    reemplaza a la más antigua, por lo que la memoria usada no crece.
+
+    Attributes:
+        capacity (int): Máximo de lecturas guardadas.
+        covered_from (int): Marca de tiempo desde la que el búfer tiene todas las lecturas del lote.
+        size (int): Lecturas guardadas.
+    """
+
+    def __init__(self, capacity: int, covered_from: int):
+        self.capacity = capacity
+        self.covered_from = covered_from
+        self.size = 0
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.values = np.full((len(VARIABLES), capacity), np.nan, dtype=np.float32)
+
+    def append(self, timestamp: int, values: Tuple[Optional[float], ...]) -> None:
+        """Agrega una lectura; si ya existe una con la misma marca de tiempo la reemplaza."""
+        if timestamp < self.covered_from:
+            return
+
+        existing = np.flatnonzero(self.timestamps[:self.size] == timestamp)
+        if existing.size:
+            index = existing[0]
+        elif self.size < self.capacity:
+            index = self.size
+            self.size += 1
+        else:
+            index = int(np.argmin(self.timestamps))
+            if timestamp <= self.timestamps[index]:
+                # La lectura es anterior a todas las guardadas: el búfer ya no la cubre
+                self.covered_from = max(self.covered_from, timestamp + 1)
+                return
+            # Se descarta la lectura más antigua; el búfer queda completo solo después de ella
+            self.covered_from = int(self.timestamps[index]) + 1
+
+        self.timestamps[index] = timestamp
+        self.values[:, index] = [np.nan if value is None else value for value in values]
+
+    def select(self, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Devuelve, ordenadas por tiempo, las lecturas con marca de tiempo en [start, end)."""
+        timestamps = self.timestamps[:self.size]
+        mask = (timestamps >= start) & (timestamps < end)
+        selected = timestamps[mask]
+        order = np.argsort(selected, kind='stable')
+        return selected[order], self.values[:, :self.size][:, mask][:, order]
+
+
+class RecentWeatherCache:
+    """Caché en memoria de las lecturas meteorológicas recientes de cada lote.
+
+    Las consultas de los últimos días (series horarias y estadísticas) se resuelven
+    con operaciones vectorizadas sobre los búferes de cada lote, sin consultar la
+    base de datos. Los rangos que empiezan antes de lo que cubre la caché devuelven
+    None para que quien consulta use SQL.
+
+    La caché se llena al iniciar con una sola consulta de la ventana reciente y
+    luego vuelve a leer solo las últimas `sync_lookback_hours` horas, además de los
+    registros con ID mayor al último visto: el programador la sincroniza después
+    de cada recolección, y las consultas lo hacen si pasaron más de
+    `sync_seconds`, de modo que los workers que no recolectan también ven los
+    registros nuevos. Releer una ventana de tiempo incluye los registros cuyo ID
+    se confirmó después de otro mayor; las lecturas repetidas se reemplazan.
+
+    Attributes:
+        window_days (int): Días de lecturas que se mantienen por lote.
+        sync_seconds (float): Antigüedad máxima de la última sincronización al consultar.
+        sync_lookback_hours (int): Horas antes de la lectura más reciente que se releen al sincronizar.
+    """
+
+    def __init__(
+        self,
+        window_days: int = WEATHER_RECENT_CACHE_DAYS,
+        sync_seconds: float = WEATHER_RECENT_CACHE_SYNC_SECONDS,
+        sync_lookback_hours: int = WEATHER_RECENT_CACHE_SYNC_LOOKBACK_HOURS,
+        today: Callable[[], date] = get_current_date
+    ):
+        self.window_days = window_days
+        self.sync_seconds = sync_seconds
+        self.sync_lookback_hours = sync_lookback_hours
+        self._today = today
+        self._capacity = (window_days + 1) * 24
+        self._buffers: Dict[int, PlotWeatherBuffer] = {}
+        self._covered_from: Optional[int] = None
+        self._last_id = 0
+        self._newest = 0
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_warm(self) -> bool:
+        return self._covered_from is not None
+
+    def warm(self, db: Session) -> None:
+        """Carga las lecturas de la ventana reciente de todos los lotes."""
+        with self._lock:
+            self._buffers = {}
+            self._last_id = 0
+            self._newest = 0
+            self._covered_from = _day_start_timestamp(self._today() - timedelta(days=self.window_days))
+            self._load(db, self._covered_from)
+
+    def sync(self, db: Session) -> None:
+        """Agrega las lecturas guardadas desde la última sincronización."""
+        if not self.is_warm:
+            self.warm(db)
+            return
+        with self._lock:
+            since = max(self._newest - self.sync_lookback_hours * 3600, self._covered_from)
+            self._load(db, since, after_id=self._last_id)
+
+    def _load(self, db: Session, since: int, after_id: Optional[int] = None) -> None:
+        rows = WeatherRepository(db).get_readings_for_cache(datetime.fromtimestamp(since, tz=timezone.utc), after_id)
+        for row in rows:
+            reading_id, lote_id, fecha, hora = row[:4]
+            buffer = self._buffers.get(lote_id)
+            if buffer is None:
+                buffer = self._buffers[lote_id] = PlotWeatherBuffer(self._capacity, self._covered_from)
+            timestamp = _to_timestamp(fecha, hora)
+            buffer.append(timestamp, tuple(row[4:]))
+            self._last_id = max(self._last_id, reading_id)
+            self._newest = max(self._newest, timestamp)
+        self._synced_at = monotonic_time.monotonic()
+
+    def _ensure_fresh(self, db: Session) -> None:
+        if monotonic_time.monotonic() - self._synced_at >= self.sync_seconds:
+            self.sync(db)
+
+    def _select(self, db: Session, lote_id: int, start_date: date, end_date: date):
+        """Devuelve las lecturas del rango, o None si la caché no lo cubre completo."""
+        self._ensure_fresh(db)
+        start = _day_start_timestamp(start_date)
+        end = _day_start_timestamp(end_date + timedelta(days=1))
+        with self._lock:
+            buffer = self._buffers.get(lote_id)
+            covered_from = buffer.covered_from if buffer is not None else self._covered_from
+            if covered_from is None or start < covered_from:
+                return None
+            if buffer is None:
+                return np.zeros(0, dtype=np.int64), np.zeros((len(VARIABLES), 0), dtype=np.float32)
+            return buffer.select(start, end)
+
+    def get_hourly_readings(self, db: Session, lote_id: int, start_date: date, end_date: date) -> Optional[List[tuple]]:
+        """Obtiene las lecturas de un lote en el formato de `WeatherRepository.get_hourly_readings`.
+
+        Returns:
+            Optional[List[tuple]]: Filas (fecha, hora, temperatura, humedad_relativa,
+            precipitacion, rafaga_viento), o None si el rango no está en caché.
+        """
+        selected = self._select(db, lote_id, start_date, end_date)
+        if selected is None:
+            return None
+        timestamps, values = selected
+
+        def column(name: str) -> list:
+            array = values[VARIABLES.index(name)].astype(np.float64).round(4)
+            return [None if np.isnan(value) else float(value) for value in array]
+
+        rows = []
+        for timestamp, temperatura, humedad, precipitacion, rafaga in zip(
+            timestamps.tolist(),
+            column('temperatura'),
+            column('humedad_relativa'),
+            column('precipitacion'),
+            column('rafaga_viento')
+        ):
+            recorded_at = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+            rows.append((recorded_at.date(), recorded_at.time(), temperatura, humedad, precipitacion, rafaga))
+        return rows
+
+    def get_stats(self, db: Session, lote_id: int, start_date: date, end_date: date) -> Optional[dict]:
+        """Calcula el mínimo, máximo, promedio y total de las variables de un lote en un rango.
+
+        Returns:
+            Optional[dict]: Estadísticas con las claves de `WeatherRepository.get_weather_stats`,
+            o None si el rango no está en caché.
+        """
+        selected = self._select(db, lote_id, start_date, end_date)
+        if selected is None:
+            return None
+        timestamps, values = selected
+        count = int(timestamps.size)
+
+        def reduce(name: str, operation) -> Optional[float]:
+            array = values[VARIABLES.index(name)].astype(np.float64)
+            if count == 0 or np.isnan(array).all():
+                return None
+            return round(float(operation(array)), 4)
+
+        return {
+            'num_registros': count,
+            'temperatura_min': reduce('temperatura', np.nanmin),
+            'temperatura_max': reduce('temperatura', np.nanmax),
+            'temperatura_promedio': reduce('temperatura', np.nanmean),
+            'humedad_min': reduce('humedad_relativa', np.nanmin),
+            'humedad_max': reduce('humedad_relativa', np.nanmax),
+            'humedad_promedio': reduce('humedad_relativa', np.nanmean),
+            'precipitacion_total': reduce('precipitacion', np.nansum),
+            'viento_promedio': reduce('velocidad_viento', np.nanmean),
+            'viento_max': reduce('velocidad_viento', np.nanmax),
+        }
+
+
+# Caché compartida por el proceso
+recent_weather_cache = RecentWeatherCache()
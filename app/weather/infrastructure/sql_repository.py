@@ -1,7 +1,17 @@
+from sqlalchemy import Row, and_, delete, func, insert, or_, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from app.weather.infrastructure.orm_models import WeatherLog
-from app.weather.domain.schemas import WeatherLogCreate
-from datetime import date
+from app.weather.infrastructure.orm_models import WeatherLog, WeatherDailySummary, WeatherCollectionSetting
+from app.weather.domain.schemas import WeatherLogCreate, WeatherCollectionPolicy
+from app.plot.infrastructure.orm_models import Plot
+from app.crop.infrastructure.orm_models import Crop, CropState
+from app.crop.application.services.crop_service import CropService
+from app.cultural_practices.infrastructure.orm_models import CulturalTask
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+BULK_INSERT_CHUNK_SIZE = 500
+STREAM_BATCH_SIZE = 1000
 
 class WeatherRepository:
     """Repositorio para gestionar operaciones de base de datos relacionadas con registros meteorológicos.
@@ -21,14 +31,80 @@ class WeatherRepository:
         """
         self.db = db 
 
-    def create_weather_log(self, weather_data: WeatherLogCreate) -> WeatherLog:
-        """Crea un nuevo registro meteorológico."""
+    def create_weather_log(self, weather_data: WeatherLogCreate, refresh: bool = True) -> WeatherLog:
+        """Crea un nuevo registro meteorológico.
+
+        Args:
+            weather_data (WeatherLogCreate): Datos del registro.
+            refresh (bool): Si es False se omite la recarga del registro tras el commit.
+
+        Returns:
+            WeatherLog: El registro creado.
+        """
         db_weather = WeatherLog(**weather_data.model_dump())
         self.db.add(db_weather)
+        self._apply_to_daily_summaries([weather_data])
         self.db.commit()
-        self.db.refresh(db_weather)
+        if refresh:
+            self.db.refresh(db_weather)
         return db_weather
 
+    def bulk_create_weather_logs(
+        self,
+        weather_logs: List[WeatherLogCreate],
+        chunk_size: int = BULK_INSERT_CHUNK_SIZE
+    ) -> List[Tuple[WeatherLogCreate, str]]:
+        """Crea varios registros meteorológicos en una sola transacción.
+
+        Los registros se insertan en bloques con sentencias INSERT de varias filas.
+        Si un bloque falla, sus registros se reintentan uno a uno para aislar los
+        que tienen errores; el resto se guarda, junto con la actualización de los
+        resúmenes diarios, con un único commit.
+
+        Args:
+            weather_logs (List[WeatherLogCreate]): Registros a crear.
+            chunk_size (int): Máximo de registros por sentencia.
+
+        Returns:
+            List[Tuple[WeatherLogCreate, str]]: Registros que no se pudieron guardar y el error de cada uno.
+        """
+        failures = []
+        inserted = []
+        try:
+            for start in range(0, len(weather_logs), chunk_size):
+                chunk = weather_logs[start:start + chunk_size]
+                try:
+                    with self.db.begin_nested():
+                        self.db.execute(insert(WeatherLog), [log.model_dump() for log in chunk])
+                    inserted.extend(chunk)
+                except SQLAlchemyError:
+                    for log in chunk:
+                        try:
+                            with self.db.begin_nested():
+                                self.db.execute(insert(WeatherLog), [log.model_dump()])
+                            inserted.append(log)
+                        except SQLAlchemyError as e:
+                            failures.append((log, str(e)))
+            self._apply_to_daily_summaries(inserted)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return failures
+
+    def get_plot_ids_with_reading(self, fecha: date, hora: time) -> Set[int]:
+        """Obtiene los IDs de los lotes que ya tienen un registro para una fecha y hora.
+
+        Args:
+            fecha (date): Fecha del registro.
+            hora (time): Hora del registro.
+
+        Returns:
+            Set[int]: IDs de los lotes con registro.
+        """
+        rows = self.db.query(WeatherLog.lote_id).filter(WeatherLog.fecha == fecha, WeatherLog.hora == hora).all()
+        return {lote_id for (lote_id,) in rows}
+
     def get_latest_weather_log(self, lote_id: int) -> WeatherLog:
         """Obtiene el último registro meteorológico para un lote específico."""
         return self.db.query(WeatherLog)\
@@ -50,4 +126,390 @@ class WeatherRepository:
                 WeatherLog.fecha <= end_date
             )\
             .order_by(WeatherLog.fecha.asc(), WeatherLog.hora.asc())\
-            .all()
\ No newline at end of file
+            .all()
+
+    def stream_weather_log_rows(
+        self,
+        lote_ids: List[int],
+        start_date: date,
+        end_date: date,
+        columns: List[str],
+        batch_size: int = STREAM_BATCH_SIZE
+    ) -> Iterator[Row]:
+        """Recorre los registros meteorológicos de varios lotes sin cargarlos todos en memoria.
+
+        Usa un cursor del lado del servidor (`yield_per`), de modo que solo se
+        mantiene en memoria un bloque de filas a la vez. Se seleccionan solo las
+        columnas indicadas, sin construir objetos ORM ni cargar sus relaciones.
+
+        Args:
+            lote_ids (List[int]): IDs de los lotes.
+            start_date (date): Fecha de inicio.
+            end_date (date): Fecha de fin.
+            columns (List[str]): Nombres de las columnas de `registro_meteorologico` a leer.
+            batch_size (int): Filas por bloque leído del cursor.
+
+        Yields:
+            Row: Filas ordenadas por lote, fecha y hora.
+        """
+        stmt = select(*(getattr(WeatherLog, column) for column in columns)).where(
+            WeatherLog.lote_id.in_(lote_ids),
+            WeatherLog.fecha >= start_date,
+            WeatherLog.fecha <= end_date
+        ).order_by(
+            WeatherLog.lote_id.asc(), WeatherLog.fecha.asc(), WeatherLog.hora.asc()
+        ).execution_options(yield_per=batch_size)
+        yield from self.db.execute(stmt)
+
+    def _apply_to_daily_summaries(self, weather_logs: Iterable[WeatherLogCreate]) -> None:
+        """Agrega lecturas nuevas a los resúmenes diarios de sus lotes, sin hacer commit.
+
+        Args:
+            weather_logs (Iterable[WeatherLogCreate]): Lecturas recién guardadas.
+        """
+        by_day: Dict[Tuple[int, date], List[WeatherLogCreate]] = {}
+        for log in weather_logs:
+            by_day.setdefault((log.lote_id, log.fecha), []).append(log)
+        if not by_day:
+            return
+
+        summaries = {
+            (summary.lote_id, summary.fecha): summary
+            for summary in self.db.query(WeatherDailySummary).filter(
+                tuple_(WeatherDailySummary.lote_id, WeatherDailySummary.fecha).in_(list(by_day))
+            )
+        }
+
+        for (lote_id, fecha), logs in by_day.items():
+            summary = summaries.get((lote_id, fecha))
+            if summary is None:
+                summary = WeatherDailySummary(
+                    lote_id=lote_id,
+                    fecha=fecha,
+                    temperatura_min=logs[0].temperatura,
+                    temperatura_max=logs[0].temperatura,
+                    temperatura_suma=0,
+                    humedad_suma=0,
+                    precipitacion_total=0,
+                    num_registros=0
+                )
+                self.db.add(summary)
+            for log in logs:
+                summary.temperatura_min = min(summary.temperatura_min, log.temperatura)
+                summary.temperatura_max = max(summary.temperatura_max, log.temperatura)
+                summary.temperatura_suma += log.temperatura
+                summary.humedad_suma += log.humedad_relativa
+                summary.precipitacion_total += log.precipitacion or 0
+                if log.rafaga_viento is not None:
+                    summary.rafaga_max = log.rafaga_viento if summary.rafaga_max is None else max(summary.rafaga_max, log.rafaga_viento)
+                summary.num_registros += 1
+
+    def rebuild_daily_summaries(self, start_date: date, end_date: date, lote_id: Optional[int] = None) -> None:
+        """Recalcula los resúmenes diarios de un rango de fechas a partir de los registros.
+
+        Sirve para poblar los resúmenes de registros anteriores a su creación o
+        corregirlos tras cambios manuales en los registros.
+
+        Args:
+            start_date (date): Fecha de inicio.
+            end_date (date): Fecha de fin.
+            lote_id (Optional[int]): Lote a recalcular; si no se indica, todos.
+        """
+        summary_filters = [WeatherDailySummary.fecha >= start_date, WeatherDailySummary.fecha <= end_date]
+        log_filters = [WeatherLog.fecha >= start_date, WeatherLog.fecha <= end_date]
+        if lote_id is not None:
+            summary_filters.append(WeatherDailySummary.lote_id == lote_id)
+            log_filters.append(WeatherLog.lote_id == lote_id)
+
+        aggregates = select(
+            WeatherLog.lote_id,
+            WeatherLog.fecha,
+            func.min(WeatherLog.temperatura),
+            func.max(WeatherLog.temperatura),
+            func.sum(WeatherLog.temperatura),
+            func.sum(WeatherLog.humedad_relativa),
+            func.coalesce(func.sum(WeatherLog.precipitacion), 0),
+            func.max(WeatherLog.rafaga_viento),
+            func.count(WeatherLog.id)
+        ).where(*log_filters).group_by(WeatherLog.lote_id, WeatherLog.fecha)
+
+        try:
+            self.db.execute(delete(WeatherDailySummary).where(*summary_filters))
+            self.db.execute(insert(WeatherDailySummary).from_select([
+                'lote_id', 'fecha', 'temperatura_min', 'temperatura_max', 'temperatura_suma',
+                'humedad_suma', 'precipitacion_total', 'rafaga_max', 'num_registros'
+            ], aggregates))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def get_daily_summaries(self, lote_id: int, start_date: date, end_date: date) -> List[WeatherDailySummary]:
+        """Obtiene los resúmenes diarios de un lote en un rango de fechas."""
+        return self.db.query(WeatherDailySummary)\
+            .filter(
+                WeatherDailySummary.lote_id == lote_id,
+                WeatherDailySummary.fecha >= start_date,
+                WeatherDailySummary.fecha <= end_date
+            )\
+            .order_by(WeatherDailySummary.fecha.asc())\
+            .all()
+
+    def get_hourly_readings(self, lote_id: int, start_date: date, end_date: date) -> list:
+        """Obtiene solo las columnas necesarias para agregar los registros de un lote por hora.
+
+        Returns:
+            list: Filas (fecha, hora, temperatura, humedad_relativa, precipitacion, rafaga_viento).
+        """
+        return self.db.query(
+            WeatherLog.fecha,
+            WeatherLog.hora,
+            WeatherLog.temperatura,
+            WeatherLog.humedad_relativa,
+            WeatherLog.precipitacion,
+            WeatherLog.rafaga_viento
+        ).filter(
+            WeatherLog.lote_id == lote_id,
+            WeatherLog.fecha >= start_date,
+            WeatherLog.fecha <= end_date
+        ).order_by(WeatherLog.fecha.asc(), WeatherLog.hora.asc()).all()
+
+    def get_last_recorded_slots(self, lote_ids: List[int]) -> Dict[int, datetime]:
+        """Obtiene la fecha y hora (UTC) del registro meteorológico más reciente de cada lote.
+
+        Args:
+            lote_ids (List[int]): IDs de los lotes.
+
+        Returns:
+            Dict[int, datetime]: Hora del último registro por ID de lote; los lotes
+            sin registros no se incluyen.
+        """
+        if not lote_ids:
+            return {}
+        latest_dates = self.db.query(
+            WeatherLog.lote_id,
+            func.max(WeatherLog.fecha).label('fecha')
+        ).filter(WeatherLog.lote_id.in_(lote_ids)).group_by(WeatherLog.lote_id).subquery()
+        rows = self.db.query(WeatherLog.lote_id, WeatherLog.fecha, func.max(WeatherLog.hora))\
+            .join(
+                latest_dates,
+                (WeatherLog.lote_id == latest_dates.c.lote_id) & (WeatherLog.fecha == latest_dates.c.fecha)
+            )\
+            .group_by(WeatherLog.lote_id, WeatherLog.fecha)\
+            .all()
+        return {
+            lote_id: datetime.combine(fecha, hora, tzinfo=timezone.utc)
+            for lote_id, fecha, hora in rows
+        }
+
+    def get_collection_settings(self) -> Dict[int, WeatherCollectionSetting]:
+        """Obtiene la configuración de recolección de clima de las fincas que la tienen.
+
+        Returns:
+            Dict[int, WeatherCollectionSetting]: Configuración por ID de finca.
+        """
+        return {setting.finca_id: setting for setting in self.db.query(WeatherCollectionSetting).all()}
+
+    def save_collection_setting(
+        self,
+        finca_id: int,
+        politica: WeatherCollectionPolicy,
+        dias_actividad: Optional[int]
+    ) -> WeatherCollectionSetting:
+        """Crea o actualiza la configuración de recolección de clima de una finca.
+
+        Args:
+            finca_id (int): ID de la finca.
+            politica (WeatherCollectionPolicy): Lotes para los que se recolecta el clima.
+            dias_actividad (Optional[int]): Días durante los que la actividad mantiene activo un lote.
+
+        Returns:
+            WeatherCollectionSetting: La configuración guardada.
+        """
+        try:
+            setting = self.db.get(WeatherCollectionSetting, finca_id)
+            if setting is None:
+                setting = WeatherCollectionSetting(finca_id=finca_id)
+                self.db.add(setting)
+            setting.politica = politica.value
+            setting.dias_actividad = dias_actividad
+            self.db.commit()
+            return setting
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def list_plots_to_collect(
+        self,
+        reference_date: date,
+        default_policy: WeatherCollectionPolicy,
+        default_activity_days: int
+    ) -> List[Plot]:
+        """Lista los lotes para los que se debe recolectar el clima.
+
+        Según la política de su finca, se incluyen todos los lotes, ninguno, o solo
+        los que tienen un cultivo activo (ni cosechado ni muerto) o actividad
+        reciente: una labor cultural o una cosecha dentro de los últimos
+        `dias_actividad` días (las labores programadas a futuro también cuentan).
+
+        Args:
+            reference_date (date): Fecha desde la que se cuentan los días de actividad.
+            default_policy (WeatherCollectionPolicy): Política de las fincas sin configuración.
+            default_activity_days (int): Días de actividad de las fincas sin configuración.
+
+        Returns:
+            List[Plot]: Lotes a los que se debe registrar el clima.
+        """
+        settings = self.get_collection_settings()
+
+        def policy_of(finca_id: int) -> WeatherCollectionPolicy:
+            setting = settings.get(finca_id)
+            return WeatherCollectionPolicy(setting.politica) if setting else default_policy
+
+        def activity_days_of(finca_id: int) -> int:
+            setting = settings.get(finca_id)
+            return setting.dias_actividad if setting and setting.dias_actividad else default_activity_days
+
+        disabled_farm_ids = [
+            finca_id for finca_id in settings if policy_of(finca_id) == WeatherCollectionPolicy.DISABLED
+        ]
+        plots = self.db.query(Plot).filter(Plot.finca_id.notin_(disabled_farm_ids)).order_by(Plot.id).all()
+
+        # Lotes con un cultivo activo
+        inactive_states = select(CropState.id).where(CropState.nombre.in_([CropService.COSECHADO, CropService.MUERTO]))
+        active_plot_ids = {
+            lote_id for (lote_id,) in self.db.query(Crop.lote_id).filter(Crop.estado_id.notin_(inactive_states)).distinct()
+        }
+
+        # Última actividad de cada lote, desde el mayor número de días configurado
+        earliest = reference_date - timedelta(days=max(
+            [default_activity_days] + [setting.dias_actividad for setting in settings.values() if setting.dias_actividad]
+        ))
+        last_activity: Dict[int, date] = {}
+        activity_queries = [
+            self.db.query(CulturalTask.lote_id, func.max(CulturalTask.fecha_inicio_estimada))
+                .filter(CulturalTask.fecha_inicio_estimada >= earliest)
+                .group_by(CulturalTask.lote_id),
+            self.db.query(Crop.lote_id, func.max(Crop.fecha_cosecha))
+                .filter(Crop.fecha_cosecha >= earliest)
+                .group_by(Crop.lote_id),
+        ]
+        for query in activity_queries:
+            for lote_id, last_date in query:
+                last_activity[lote_id] = max(last_date, last_activity.get(lote_id, last_date))
+
+        return [
+            plot for plot in plots
+            if policy_of(plot.finca_id) == WeatherCollectionPolicy.ALL
+            or plot.id in active_plot_ids
+            or (
+                plot.id in last_activity
+                and last_activity[plot.id] >= reference_date - timedelta(days=activity_days_of(plot.finca_id))
+            )
+        ]
+
+    def get_readings_for_cache(self, since: datetime, after_id: Optional[int] = None) -> Iterator[Row]:
+        """Recorre las lecturas desde una fecha y hora, para mantener cachés incrementales.
+
+        Los IDs no se confirman necesariamente en orden, por lo que las cachés se
+        sincronizan por una ventana de tiempo; `after_id` agrega además las lecturas
+        nuevas de horas anteriores a la ventana (p. ej. las recuperadas de la API histórica).
+
+        Args:
+            since (datetime): Fecha y hora (UTC) de la primera lectura.
+            after_id (Optional[int]): Si se indica, también las lecturas con ID mayor.
+
+        Yields:
+            Row: Filas (id, lote_id, fecha, hora, temperatura, humedad_relativa,
+            precipitacion, velocidad_viento, rafaga_viento) ordenadas por ID.
+        """
+        condition = or_(
+            WeatherLog.fecha > since.date(),
+            and_(WeatherLog.fecha == since.date(), WeatherLog.hora >= since.time())
+        )
+        if after_id is not None:
+            condition = or_(condition, WeatherLog.id > after_id)
+        stmt = select(
+            WeatherLog.id,
+            WeatherLog.lote_id,
+            WeatherLog.fecha,
+            WeatherLog.hora,
+            WeatherLog.temperatura,
+            WeatherLog.humedad_relativa,
+            WeatherLog.precipitacion,
+            WeatherLog.velocidad_viento,
+            WeatherLog.rafaga_viento
+        ).where(condition)
+        yield from self.db.execute(stmt.order_by(WeatherLog.id).execution_options(yield_per=STREAM_BATCH_SIZE))
+
+    def get_weather_stats(self, lote_id: int, start_date: date, end_date: date) -> dict:
+        """Calcula en la base de datos las estadísticas de los registros de un lote en un rango.
+
+        Returns:
+            dict: Número de registros y mínimo, máximo, promedio o total de cada variable.
+        """
+        row = self.db.query(
+            func.count(WeatherLog.id).label('num_registros'),
+            func.min(WeatherLog.temperatura).label('temperatura_min'),
+            func.max(WeatherLog.temperatura).label('temperatura_max'),
+            func.avg(WeatherLog.temperatura).label('temperatura_promedio'),
+            func.min(WeatherLog.humedad_relativa).label('humedad_min'),
+            func.max(WeatherLog.humedad_relativa).label('humedad_max'),
+            func.avg(WeatherLog.humedad_relativa).label('humedad_promedio'),
+            func.sum(WeatherLog.precipitacion).label('precipitacion_total'),
+            func.avg(WeatherLog.velocidad_viento).label('viento_promedio'),
+            func.max(WeatherLog.velocidad_viento).label('viento_max')
+        ).filter(
+            WeatherLog.lote_id == lote_id,
+            WeatherLog.fecha >= start_date,
+            WeatherLog.fecha <= end_date
+        ).one()
+        return {
+            key: (float(value) if value is not None and key != 'num_registros' else value)
+            for key, value in row._asdict().items()
+        }
+
+    def get_crops_with_location(self, crop_id: Optional[int] = None, finca_id: Optional[int] = None) -> List[Row]:
+        """Obtiene los cultivos con la latitud de su lote, para los indicadores agroclimáticos.
+
+        Args:
+            crop_id (Optional[int]): Si se indica, solo ese cultivo.
+            finca_id (Optional[int]): Si se indica, los cultivos activos (ni cosechados ni
+                muertos) de los lotes de esa finca.
+
+        Returns:
+            List[Row]: Filas (id, lote_id, finca_id, latitud, fecha_siembra, fecha_cosecha)
+            ordenadas por ID.
+        """
+        query = self.db.query(
+            Crop.id,
+            Crop.lote_id,
+            Plot.finca_id,
+            Plot.latitud,
+            Crop.fecha_siembra,
+            Crop.fecha_cosecha
+        ).join(Plot, Plot.id == Crop.lote_id)
+        if crop_id is not None:
+            query = query.filter(Crop.id == crop_id)
+        if finca_id is not None:
+            inactive_states = select(CropState.id).where(CropState.nombre.in_([CropService.COSECHADO, CropService.MUERTO]))
+            query = query.filter(Plot.finca_id == finca_id, Crop.estado_id.notin_(inactive_states))
+        return query.order_by(Crop.id).all()
+
+    def stream_temperature_precipitation(self, lote_ids: List[int], start_date: date, end_date: date) -> Iterator[Row]:
+        """Recorre la temperatura y la precipitación de varios lotes en un rango de fechas.
+
+        Yields:
+            Row: Filas (lote_id, fecha, temperatura, precipitacion) ordenadas por lote y fecha.
+        """
+        stmt = select(
+            WeatherLog.lote_id,
+            WeatherLog.fecha,
+            WeatherLog.temperatura,
+            WeatherLog.precipitacion
+        ).where(
+            WeatherLog.lote_id.in_(lote_ids),
+            WeatherLog.fecha >= start_date,
+            WeatherLog.fecha <= end_date
+        ).order_by(WeatherLog.lote_id, WeatherLog.fecha)
+        yield from self.db.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
@@ -0,0 +1,7 @@
+"""
+Herramientas de generación de datos sintéticos y benchmarks de escalabilidad.
+
+Este paquete no forma parte de la aplicación desplegada; se usa en desarrollo
+para poblar una base de datos local (SQLite o PostgreSQL) con datos de prueba
+y medir el comportamiento de los casos de uso más costosos a distintas escalas.
+"""
@@ -0,0 +1,347 @@
+"""
+Benchmark del procesamiento en segundo plano de imágenes de gusano cogollero.
+
+Levanta en el mismo proceso un servidor HTTP falso que simula el servicio de
+predicción y el almacenamiento de imágenes con latencias configurables, y mide
+el tiempo total de `DetectFallArmywormBackgroundUseCase.process_batches` para
+un conjunto de imágenes. Como referencia se mide también el procesamiento
+secuencial anterior: predecir, subir y guardar cada lote en orden, con una
+pausa entre lotes, y el pipeline sin normalizar las imágenes. Las imágenes son
+fotos JPEG sintéticas del tamaño indicado; el servidor falso registra los bytes
+recibidos para comparar el tráfico de cada modo. Como todas las fotos son
+iguales, la caché de predicciones solo se activa en el último modo, que mide una
+subida de fotos repetidas.
+
+Ejemplo:
+    ```bash
+    python -m benchmarks.image_pipeline --images 300 --output pipeline.json
+    ```
+"""
+
+import os
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+import argparse
+import asyncio
+import json
+import logging
+import io
+import math
+import platform
+import re
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+import numpy as np
+from PIL import Image
+
+from benchmarks.seed import SeedConfig, create_seed_engine, create_seed_session, seed_database
+from app.fall_armyworm.application.detect_fall_armyworm_background_use_case import DetectFallArmywormBackgroundUseCase
+from app.fall_armyworm.domain.schemas import FileContent, MonitoreoFitosanitarioCreate
+from app.fall_armyworm.infrastructure.orm_models import EstadoMonitoreoEnum
+from app.fall_armyworm.infrastructure.sql_repository import FallArmywormRepository
+from app.infrastructure.common.datetime_utils import datetime_utc_time
+from app.infrastructure.services.cloudinary_service import CloudinaryService
+from app.infrastructure.prediction_cache.sql_repository import PredictionCacheRepository
+from app.infrastructure.services.image_normalization_service import ImageNormalizationService
+
+DEFAULT_IMAGES = 300
+# Resolución de las fotos sintéticas, como las de un teléfono
+DEFAULT_MEGAPIXELS = 12
+# Latencias simuladas en segundos
+DEFAULT_PREDICT_BATCH_SECONDS = 0.5
+DEFAULT_PREDICT_IMAGE_SECONDS = 0.05
+DEFAULT_UPLOAD_SECONDS = 0.08
+# Ancho de banda simulado hacia cada servicio, en Mbit/s
+DEFAULT_BANDWIDTH_MBPS = 100.0
+# Pausa entre lotes del procesamiento secuencial anterior
+DEFAULT_SEQUENTIAL_PAUSE_SECONDS = 1.0
+
+_FILENAME_PATTERN = re.compile(rb'name="files"; filename="([^"]+)"')
+
+
+class FakeHTTPServer:
+    """Servidor HTTP/1.1 mínimo sobre asyncio para simular servicios externos.
+
+    Cada ruta recibe el cuerpo de la petición y devuelve un diccionario que se
+    responde como JSON. Las conexiones se mantienen abiertas entre peticiones,
+    como con el cliente compartido de httpx.
+
+    Attributes:
+        routes (Dict[str, Callable[[bytes], Awaitable[dict]]]): Manejadores por ruta.
+        port (int): Puerto asignado al iniciar.
+    """
+
+    def __init__(self, routes: Dict[str, Callable[[bytes], Awaitable[dict]]]):
+        self.routes = routes
+        self.port = 0
+        self._server = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                path = request_line.split()[1].decode()
+                headers = {}
+                while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    name, _, value = line.decode().partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                payload = json.dumps(await self.routes[path](body)).encode()
+                writer.write(
+                    b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                    + f'Content-Length: {len(payload)}\r\n\r\n'.encode()
+                    + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+def fake_routes(
+    predict_batch_seconds: float,
+    predict_image_seconds: float,
+    upload_seconds: float,
+    received: Dict[str, int] = None,
+    bandwidth_mbps: float = None
+) -> dict:
+    """Crea las rutas del servicio de predicción y del almacenamiento simulados.
+
+    Si se indica `received`, se acumulan en él los bytes recibidos por ruta. Con
+    `bandwidth_mbps` cada petición tarda además lo que tardaría en transferirse
+    su cuerpo con ese ancho de banda.
+    """
+    uploads = {'count': 0}
+    received = received if received is not None else {}
+
+    def transfer_seconds(body: bytes) -> float:
+        return len(body) * 8 / (bandwidth_mbps * 1e6) if bandwidth_mbps else 0.0
+
+    async def predict(body: bytes) -> dict:
+        received['predict'] = received.get('predict', 0) + len(body)
+        filenames = [name.decode() for name in _FILENAME_PATTERN.findall(body)]
+        await asyncio.sleep(transfer_seconds(body) + predict_batch_seconds + predict_image_seconds * len(filenames))
+        return {
+            'message': 'ok',
+            'results': [
+                {
+                    'filename': filename,
+                    'status': 'success',
+                    'predicted_class': 'healthy_leaf',
+                    'confidence': 0.9,
+                    'probabilities': {'leaf_with_larva': 0.05, 'healthy_leaf': 0.9, 'damaged_leaf': 0.05}
+                }
+                for filename in filenames
+            ]
+        }
+
+    async def upload(body: bytes) -> dict:
+        received['upload'] = received.get('upload', 0) + len(body)
+        await asyncio.sleep(transfer_seconds(body) + upload_seconds)
+        uploads['count'] += 1
+        public_id = f"benchmark/{uploads['count']}"
+        return {'secure_url': f"https://storage.invalid/{public_id}.jpg", 'public_id': public_id}
+
+    return {'/fall-armyworm/predict': predict, '/upload': upload}
+
+
+class FakeStorageService(CloudinaryService):
+    """Reemplazo de `CloudinaryService` que sube las imágenes al servidor falso."""
+
+    def __init__(self, client: httpx.AsyncClient, url: str):
+        self.client = client
+        self.url = url
+
+    async def upload_bytes(self, content, filename: str, folder: str) -> dict:
+        if isinstance(content, str):
+            with open(content, 'rb') as file:
+                content = file.read()
+        response = await self.client.post(f"{self.url}/upload", content=content)
+        result = response.json()
+        return {"url": result["secure_url"], "public_id": result["public_id"]}
+
+
+def synthetic_photo(megapixels: float) -> bytes:
+    """Crea una foto JPEG con ruido, de tamaño comparable a una foto de teléfono."""
+    height = int(math.sqrt(megapixels * 1_000_000 * 3 / 4))
+    width = height * 4 // 3
+    pixels = np.random.default_rng(0).integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = Image.fromarray(pixels).resize((width, height), Image.Resampling.BILINEAR)
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=92)
+    return output.getvalue()
+
+
+async def _process_sequentially(use_case: DetectFallArmywormBackgroundUseCase, files: List[FileContent], task_id: int, monitoreo_id: int, pause: float) -> None:
+    """Procesa los lotes uno tras otro, como lo hacía el caso de uso antes del pipeline."""
+    batch_size = 15
+    total_batches = math.ceil(len(files) / batch_size)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as client:
+        for batch_num in range(total_batches):
+            batch_files = files[batch_num * batch_size:(batch_num + 1) * batch_size]
+            predictions = await use_case._predict_batch(client, batch_files, batch_num, total_batches)
+            if predictions:
+                use_case._persist_batch(await use_case._upload_batch(predictions, task_id), monitoreo_id)
+            await asyncio.sleep(pause)
+
+
+async def run_benchmark(
+    images: int,
+    megapixels: float,
+    predict_batch_seconds: float,
+    predict_image_seconds: float,
+    upload_seconds: float,
+    sequential_pause: float,
+    bandwidth_mbps: float = None
+) -> List[dict]:
+    """Mide el procesamiento secuencial y el pipeline sobre las mismas imágenes.
+
+    Returns:
+        List[dict]: Una entrada por modo con el tiempo total y las detecciones guardadas.
+    """
+    received: Dict[str, int] = {}
+    server = FakeHTTPServer(fake_routes(
+        predict_batch_seconds, predict_image_seconds, upload_seconds, received, bandwidth_mbps
+    ))
+    await server.start()
+    engine = create_seed_engine()
+    with create_seed_session(engine) as db:
+        seed_database(db, SeedConfig(tasks=1, farms=1, plots_per_farm=1, crops_per_plot=0, weather_days=0))
+
+    def session_factory():
+        return create_seed_session(engine)
+
+    photo = synthetic_photo(megapixels)
+    files = [
+        FileContent(filename=f"image_{i}.jpg", content=photo, content_type="image/jpeg")
+        for i in range(images)
+    ]
+
+    async def measure(
+        mode: str,
+        process: Callable[[DetectFallArmywormBackgroundUseCase, int], Awaitable[None]],
+        normalize: bool = True,
+        cache: bool = False
+    ) -> dict:
+        received.clear()
+        db = session_factory()
+        repository = FallArmywormRepository(db)
+        monitoreo = repository.create_monitoreo(MonitoreoFitosanitarioCreate(
+            tarea_labor_id=1,
+            fecha_monitoreo=datetime_utc_time(),
+            estado=EstadoMonitoreoEnum.processing,
+            cantidad_imagenes=images
+        ))
+        repository.save_changes()
+
+        use_case = DetectFallArmywormBackgroundUseCase(db, session_factory=session_factory)
+        use_case.prediction_url = f"{server.url}/fall-armyworm/predict"
+        use_case.image_normalization_service = ImageNormalizationService(enabled=normalize)
+        # Todas las fotos son iguales: sin desactivar la caché, solo el primer lote se predeciría
+        use_case.prediction_cache_repository = PredictionCacheRepository(db, enabled=cache)
+        async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as storage_client:
+            use_case.cloudinary_service = FakeStorageService(storage_client, server.url)
+            started = time.perf_counter()
+            await process(use_case, monitoreo.id)
+            elapsed = time.perf_counter() - started
+
+        detections = len(repository.get_detections_by_monitoreo_id(monitoreo.id))
+        db.close()
+        return {
+            'mode': mode,
+            'images': images,
+            'seconds': round(elapsed, 3),
+            'images_per_second': round(images / elapsed, 2),
+            'predict_mb': round(received.get('predict', 0) / 1e6, 1),
+            'upload_mb': round(received.get('upload', 0) / 1e6, 1),
+            'detections': detections
+        }
+
+    try:
+        return [
+            await measure('sequential', lambda use_case, monitoreo_id: _process_sequentially(
+                use_case, files, 1, monitoreo_id, sequential_pause
+            )),
+            await measure(
+                'pipeline_without_normalization',
+                lambda use_case, monitoreo_id: use_case.process_batches(files, 1, monitoreo_id),
+                normalize=False
+            ),
+            await measure('pipeline', lambda use_case, monitoreo_id: use_case.process_batches(files, 1, monitoreo_id)),
+            # Con la caché activada, cada foto repetida reutiliza la predicción y la imagen ya almacenada
+            await measure(
+                'pipeline_repeated_images',
+                lambda use_case, monitoreo_id: use_case.process_batches(files, 1, monitoreo_id),
+                cache=True
+            ),
+        ]
+    finally:
+        await server.stop()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del pipeline de imágenes de gusano cogollero.')
+    parser.add_argument('--images', type=int, default=DEFAULT_IMAGES)
+    parser.add_argument('--megapixels', type=float, default=DEFAULT_MEGAPIXELS, help='Resolución de cada foto')
+    parser.add_argument('--predict-batch-seconds', type=float, default=DEFAULT_PREDICT_BATCH_SECONDS)
+    parser.add_argument('--predict-image-seconds', type=float, default=DEFAULT_PREDICT_IMAGE_SECONDS)
+    parser.add_argument('--upload-seconds', type=float, default=DEFAULT_UPLOAD_SECONDS)
+    parser.add_argument('--sequential-pause', type=float, default=DEFAULT_SEQUENTIAL_PAUSE_SECONDS,
+                        help='Pausa entre lotes del procesamiento secuencial')
+    parser.add_argument('--bandwidth-mbps', type=float, default=DEFAULT_BANDWIDTH_MBPS,
+                        help='Ancho de banda simulado hacia cada servicio; 0 para no simularlo')
+    parser.add_argument('--output', default=None, help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args()
+    # El registro de cada petición de httpx no aporta al resultado
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    report = {
+        'python': platform.python_version(),
+        'latencies': {
+            'predict_batch_seconds': args.predict_batch_seconds,
+            'predict_image_seconds': args.predict_image_seconds,
+            'upload_seconds': args.upload_seconds,
+            'sequential_pause_seconds': args.sequential_pause,
+            'bandwidth_mbps': args.bandwidth_mbps
+        },
+        'results': asyncio.run(run_benchmark(
+            args.images,
+            args.megapixels,
+            args.predict_batch_seconds,
+            args.predict_image_seconds,
+            args.upload_seconds,
+            args.sequential_pause,
+            args.bandwidth_mbps
+        ))
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
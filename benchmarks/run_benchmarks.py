@@ -0,0 +1,208 @@
+"""
+Benchmarks de escalabilidad de reportes, rankings y listado de cultivos.
+
+Para cada escala (número total de tareas) se genera una base de datos nueva con
+`benchmarks.seed`, se ejecutan los casos de uso y se registran el tiempo
+(mediana de varias repeticiones) y el número de consultas SQL emitidas. El
+resultado se escribe en JSON para poder compararlo con una ejecución anterior.
+
+Ejemplo:
+    ```bash
+    python -m benchmarks.run_benchmarks --scales 10 100 1000 10000 --output baseline.json
+    python -m benchmarks.run_benchmarks --compare baseline.json
+    ```
+"""
+
+import os
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from benchmarks.seed import SeedConfig, SeedResult, create_seed_engine, create_seed_session, seed_database
+from app.crop.application.list_crops_by_plot_use_case import ListCropsByPlotUseCase
+from app.farm.application.get_farm_ranking_use_case import GetFarmRankingUseCase
+from app.farm.domain.schemas import FarmRankingType
+from app.measurement.infrastructure.exchange_rate_store import exchange_rate_store
+from app.reports.application.generate_financial_report_use_case import GenerateFinancialReportUseCase
+from app.user.domain.schemas import UserInDB
+from app.weather.application.get_weather_aggregates_use_case import GetWeatherAggregatesUseCase
+from app.weather.application.get_weather_logs_use_case import GetWeatherLogsUseCase
+from app.weather.domain.schemas import WeatherGranularity
+
+DEFAULT_SCALES = [10, 100, 1000, 10000]
+DEFAULT_REPETITIONS = 3
+
+# Tasas fijas con COP como base, para no depender del proveedor externo
+OFFLINE_CONVERSION_RATES = {
+    'COP': Decimal('1'),
+    'USD': Decimal('0.00025'),
+    'EUR': Decimal('0.00023')
+}
+
+
+class QueryCounter:
+    """Cuenta las sentencias SQL ejecutadas sobre un motor."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+@contextmanager
+def offline_exchange_rates():
+    """Carga tasas fijas en el almacén compartido durante el benchmark."""
+    exchange_rate_store.load(OFFLINE_CONVERSION_RATES)
+    yield
+
+
+def _benchmark_user(seed_result: SeedResult) -> UserInDB:
+    # Los casos de uso solo consultan el ID del usuario autenticado
+    return UserInDB.model_construct(id=seed_result.admin_user_id)
+
+
+def _use_cases(seed_result: SeedResult, config: SeedConfig, currency: str) -> Dict[str, Callable[[Session], object]]:
+    user = _benchmark_user(seed_result)
+    farm_id = seed_result.farm_ids[0]
+    plot_id = seed_result.plot_ids[0]
+    return {
+        'reports.financial': lambda db: GenerateFinancialReportUseCase(db).generate_report(
+            farm_id=farm_id,
+            start_date=config.start_date,
+            end_date=config.end_date,
+            currency=currency,
+            current_user=user
+        ),
+        'farm.ranking.profit': lambda db: GetFarmRankingUseCase(db).get_farm_ranking(
+            user, FarmRankingType.PROFIT, 10, config.start_date, config.end_date
+        ),
+        'farm.ranking.production': lambda db: GetFarmRankingUseCase(db).get_farm_ranking(
+            user, FarmRankingType.PRODUCTION, 10, config.start_date, config.end_date
+        ),
+        'plots.crops': lambda db: ListCropsByPlotUseCase(db).list_crops(plot_id, 1, 10, user),
+        'weather.logs': lambda db: asyncio.run(GetWeatherLogsUseCase(db).get_weather_logs(
+            plot_id, config.weather_start_date, date.today()
+        )),
+        'weather.aggregates.day': lambda db: asyncio.run(GetWeatherAggregatesUseCase(db).get_weather_aggregates(
+            plot_id, config.weather_start_date, date.today(), WeatherGranularity.DAY
+        )),
+    }
+
+
+def run_scale(tasks: int, repetitions: int, database_url: Optional[str], currency: str) -> List[dict]:
+    """Genera los datos de una escala y mide todos los casos de uso.
+
+    Args:
+        tasks (int): Número total de tareas a generar.
+        repetitions (int): Repeticiones por caso de uso; se reporta la mediana.
+        database_url (Optional[str]): URL de la base de datos de pruebas.
+        currency (str): Moneda solicitada al reporte financiero.
+
+    Returns:
+        List[dict]: Una entrada por caso de uso con tiempos y número de consultas.
+    """
+    config = SeedConfig(tasks=tasks)
+    engine = create_seed_engine(database_url)
+    with create_seed_session(engine) as db:
+        seed_result = seed_database(db, config)
+
+    results = []
+    for name, run in _use_cases(seed_result, config, currency).items():
+        timings = []
+        queries = 0
+        for _ in range(repetitions):
+            # Sesión nueva por repetición para no medir el mapa de identidad en caché
+            with create_seed_session(engine) as db, QueryCounter(engine) as counter:
+                started = time.perf_counter()
+                run(db)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = counter.count
+        results.append({
+            'use_case': name,
+            'tasks': tasks,
+            'median_ms': round(statistics.median(timings), 2),
+            'min_ms': round(min(timings), 2),
+            'queries': queries
+        })
+
+    engine.dispose()
+    return results
+
+
+def compare(current: dict, baseline: dict) -> List[str]:
+    """Construye líneas legibles con la variación respecto a una línea base."""
+    previous = {(r['use_case'], r['tasks']): r for r in baseline.get('results', [])}
+    lines = []
+    for result in current['results']:
+        key = (result['use_case'], result['tasks'])
+        if key not in previous:
+            continue
+        before = previous[key]
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        lines.append(
+            f"{result['use_case']:<26} {result['tasks']:>6} tareas: "
+            f"{before['median_ms']:>10.2f} ms -> {result['median_ms']:>10.2f} ms (x{ratio:.2f}), "
+            f"consultas {before['queries']} -> {result['queries']}"
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks de escalabilidad de AgroInsight.')
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help='Número total de tareas por escala')
+    parser.add_argument('--repetitions', type=int, default=DEFAULT_REPETITIONS)
+    parser.add_argument('--database-url', default=None, help='URL de la base de datos (SQLite en memoria por defecto)')
+    parser.add_argument('--currency', default='USD', help='Moneda del reporte financiero')
+    parser.add_argument('--output', default=None, help='Archivo JSON donde guardar los resultados')
+    parser.add_argument('--compare', default=None, help='Archivo JSON de una ejecución anterior')
+    args = parser.parse_args()
+
+    report = {
+        'python': platform.python_version(),
+        'database': args.database_url or 'sqlite://',
+        'repetitions': args.repetitions,
+        'results': []
+    }
+    with offline_exchange_rates():
+        for tasks in args.scales:
+            report['results'].extend(run_scale(tasks, args.repetitions, args.database_url, args.currency))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print('\n'.join(compare(report, baseline)))
+
+
+if __name__ == '__main__':
+    main()
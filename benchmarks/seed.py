@@ -0,0 +1,459 @@
+"""
+Generador de datos sintéticos para pruebas de escalabilidad.
+
+Este módulo crea catálogos, fincas, lotes, cultivos, tareas culturales con
+costos de mano de obra, insumos y maquinaria, y registros meteorológicos a
+una escala configurable. Los datos se generan de forma determinista a partir
+de una semilla, de modo que dos ejecuciones con la misma configuración producen
+la misma base de datos.
+
+Ejemplo:
+    ```bash
+    python -m benchmarks.seed --tasks 1000 --database-url sqlite:///seed.db
+    ```
+"""
+
+import os
+
+# El módulo de conexión crea el motor al importarse y necesita una URL válida
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+import argparse
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.main  # noqa: F401 - registra todos los modelos ORM en Base.metadata
+from app.infrastructure.db.connection import Base
+from app.measurement.application.services.measurement_service import MeasurementService
+from app.measurement.infrastructure.orm_models import UnitCategory, UnitOfMeasure
+from app.user.application.services.user_service import UserService
+from app.user.infrastructure.orm_models import User, UserState, Role, UserFarmRole
+from app.farm.infrastructure.orm_models import Farm
+from app.plot.infrastructure.orm_models import Plot
+from app.crop.infrastructure.orm_models import Crop, CropState, CornVariety
+from app.cultural_practices.application.services.task_service import TaskService
+from app.cultural_practices.infrastructure.orm_models import (
+    CulturalTask,
+    CulturalTaskState,
+    CulturalTaskType,
+    NivelLaborCultural
+)
+from app.costs.infrastructure.orm_models import (
+    LaborCost,
+    AgriculturalInputCategory,
+    AgriculturalInput,
+    TaskInput,
+    MachineryType,
+    AgriculturalMachinery,
+    TaskMachinery
+)
+from app.weather.infrastructure.orm_models import WeatherLog
+from app.weather.infrastructure.sql_repository import WeatherRepository
+
+# Coordenadas aproximadas del Huila, usadas como centro para ubicar los lotes
+HUILA_LATITUDE = 2.5359
+HUILA_LONGITUDE = -75.5277
+
+# Catálogo mínimo de unidades: (categoría, nombre, abreviatura)
+UNITS = [
+    (MeasurementService.UNIT_CATEGORY_CURRENCY_NAME, MeasurementService.UNIT_COP, MeasurementService.UNIT_SYMBOL_COP),
+    (MeasurementService.UNIT_CATEGORY_CURRENCY_NAME, MeasurementService.UNIT_USD, MeasurementService.UNIT_SYMBOL_USD),
+    (MeasurementService.UNIT_CATEGORY_CURRENCY_NAME, MeasurementService.UNIT_EUR, MeasurementService.UNIT_SYMBOL_EUR),
+    (MeasurementService.UNIT_CATEGORY_MASS_NAME, MeasurementService.UNIT_KILOGRAM, MeasurementService.UNIT_SYMBOL_KILOGRAM),
+    (MeasurementService.UNIT_CATEGORY_AREA_NAME, MeasurementService.UNIT_HECTARE, MeasurementService.UNIT_SYMBOL_HECTARE),
+    (MeasurementService.UNIT_CATEGORY_PLANTING_DENSITY_NAME, MeasurementService.UNIT_PLANTS_PER_HECTARE, MeasurementService.UNIT_SYMBOL_PLANTS_PER_HECTARE),
+    (MeasurementService.UNIT_CATEGORY_VOLUME_NAME, MeasurementService.UNIT_LITER, MeasurementService.UNIT_SYMBOL_LITER),
+    (MeasurementService.UNIT_CATEGORY_TEMPERATURE_NAME, MeasurementService.UNIT_CELSIUS, MeasurementService.UNIT_SYMBOL_CELSIUS),
+    (MeasurementService.UNIT_CATEGORY_PRESSURE_NAME, MeasurementService.UNIT_HECTOPASCAL, MeasurementService.UNIT_SYMBOL_HECTOPASCAL),
+    (MeasurementService.UNIT_CATEGORY_PERCENTAGE_NAME, MeasurementService.UNIT_PERCENTAGE, MeasurementService.UNIT_SYMBOL_PERCENTAGE),
+    (MeasurementService.UNIT_CATEGORY_SPEED_NAME, MeasurementService.UNIT_METERS_PER_SECOND, MeasurementService.UNIT_SYMBOL_METERS_PER_SECOND),
+    (MeasurementService.UNIT_CATEGORY_ANGLE_NAME, MeasurementService.UNIT_DEGREE, MeasurementService.UNIT_SYMBOL_DEGREE),
+    (MeasurementService.UNIT_CATEGORY_PRECIPITATION_RATE_NAME, MeasurementService.UNIT_MILLIMETERS_PER_HOUR, MeasurementService.UNIT_SYMBOL_MILLIMETERS_PER_HOUR),
+    (MeasurementService.UNIT_CATEGORY_LENGTH_NAME, MeasurementService.UNIT_METER, MeasurementService.UNIT_SYMBOL_METER),
+]
+
+PLOT_LEVEL_TASK_TYPES = [TaskService.LABRANZA, TaskService.ARADO, TaskService.ANALISIS_SUELO]
+CROP_LEVEL_TASK_TYPES = [
+    TaskService.SIEMBRA,
+    TaskService.FERTILIZACION,
+    TaskService.RIEGO,
+    TaskService.CONTROL_DE_PLAGAS,
+    TaskService.COSECHA,
+    TaskService.MONITOREO_FITOSANITARIO
+]
+
+SEED_BATCH_SIZE = 1000
+
+
+@dataclass
+class SeedConfig:
+    """Configuración de la escala de los datos generados.
+
+    Attributes:
+        tasks (int): Número total de tareas culturales a crear.
+        farms (int): Número de fincas.
+        plots_per_farm (int): Número de lotes por finca.
+        crops_per_plot (int): Número de cultivos por lote.
+        weather_days (int): Días de registros meteorológicos horarios por lote.
+        year (int): Año en el que se ubican las fechas de tareas y cultivos.
+        seed (int): Semilla del generador pseudoaleatorio.
+    """
+    tasks: int = 100
+    farms: int = 4
+    plots_per_farm: int = 5
+    crops_per_plot: int = 2
+    weather_days: int = 7
+    year: int = 2024
+    seed: int = 42
+
+    @property
+    def start_date(self) -> date:
+        return date(self.year, 1, 1)
+
+    @property
+    def end_date(self) -> date:
+        return date(self.year, 12, 31)
+
+    @property
+    def weather_start_date(self) -> date:
+        return (datetime.now(timezone.utc) - timedelta(days=self.weather_days)).date()
+
+
+@dataclass
+class SeedResult:
+    """Identificadores de los registros generados, útiles para los benchmarks.
+
+    Attributes:
+        admin_user_id (int): ID del usuario administrador de todas las fincas.
+        farm_ids (List[int]): IDs de las fincas creadas.
+        plot_ids (List[int]): IDs de los lotes creados.
+        crop_ids (List[int]): IDs de los cultivos creados.
+        task_count (int): Número de tareas creadas.
+        weather_log_count (int): Número de registros meteorológicos creados.
+    """
+    admin_user_id: int
+    farm_ids: List[int] = field(default_factory=list)
+    plot_ids: List[int] = field(default_factory=list)
+    crop_ids: List[int] = field(default_factory=list)
+    task_count: int = 0
+    weather_log_count: int = 0
+
+
+def create_seed_engine(database_url: Optional[str] = None) -> Engine:
+    """Crea un motor de base de datos con el esquema completo de la aplicación.
+
+    Args:
+        database_url (Optional[str]): URL de conexión. Si no se indica se usa
+            una base SQLite en memoria compartida por todas las sesiones.
+
+    Returns:
+        Engine: Motor de SQLAlchemy con las tablas creadas.
+    """
+    if not database_url or database_url in ('sqlite://', 'sqlite:///:memory:'):
+        engine = create_engine(
+            'sqlite://',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool
+        )
+    else:
+        if database_url.startswith('postgres://'):
+            database_url = database_url.replace('postgres://', 'postgresql+psycopg2://', 1)
+        engine = create_engine(database_url, pool_pre_ping=True)
+
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def create_seed_session(engine: Engine) -> Session:
+    """Crea una sesión con la misma configuración que `SessionLocal`."""
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def _flush_in_batches(db: Session, objects: list) -> None:
+    """Agrega y sincroniza objetos en lotes para acotar el uso de memoria."""
+    for start in range(0, len(objects), SEED_BATCH_SIZE):
+        db.add_all(objects[start:start + SEED_BATCH_SIZE])
+        db.flush()
+
+
+def _seed_catalogs(db: Session) -> dict:
+    """Crea los catálogos que requieren los casos de uso y devuelve sus registros."""
+    categories = {}
+    units = {}
+    for category_name, unit_name, symbol in UNITS:
+        if category_name not in categories:
+            categories[category_name] = UnitCategory(nombre=category_name)
+            db.add(categories[category_name])
+            db.flush()
+        unit = UnitOfMeasure(nombre=unit_name, abreviatura=symbol, categoria_id=categories[category_name].id)
+        db.add(unit)
+        units[unit_name] = unit
+
+    user_state = UserState(nombre=UserService.ACTIVE_STATE_NAME)
+    admin_role = Role(nombre=UserService.ADMIN_ROLE_NAME)
+    worker_role = Role(nombre=UserService.WORKER_ROLE_NAME)
+
+    task_states = [
+        CulturalTaskState(nombre=TaskService.PENDIENTE),
+        CulturalTaskState(nombre=TaskService.EN_PROGRESO),
+        CulturalTaskState(nombre=TaskService.COMPLETADA)
+    ]
+    task_types = [
+        CulturalTaskType(nombre=name, nivel=NivelLaborCultural.LOTE)
+        for name in PLOT_LEVEL_TASK_TYPES
+    ] + [
+        CulturalTaskType(nombre=name, nivel=NivelLaborCultural.CULTIVO)
+        for name in CROP_LEVEL_TASK_TYPES
+    ]
+    crop_states = [CropState(nombre='Sembrado'), CropState(nombre='Cosechado')]
+    varieties = [CornVariety(nombre=f'Variedad {i}') for i in range(1, 4)]
+    input_category = AgriculturalInputCategory(nombre='Fertilizantes')
+    machinery_type = MachineryType(nombre='Tractor', descripcion='Tractor agrícola')
+
+    db.add_all([user_state, admin_role, worker_role, input_category, machinery_type])
+    db.add_all(task_states + task_types + crop_states + varieties)
+    db.flush()
+
+    return {
+        'units': units,
+        'user_state': user_state,
+        'admin_role': admin_role,
+        'task_states': task_states,
+        'plot_task_types': [t for t in task_types if t.nivel == NivelLaborCultural.LOTE],
+        'crop_task_types': [t for t in task_types if t.nivel == NivelLaborCultural.CULTIVO],
+        'crop_states': crop_states,
+        'varieties': varieties,
+        'input_category': input_category,
+        'machinery_type': machinery_type
+    }
+
+
+def _random_date(rng: random.Random, config: SeedConfig) -> date:
+    return config.start_date + timedelta(days=rng.randrange(0, 365))
+
+
+def seed_database(db: Session, config: SeedConfig) -> SeedResult:
+    """Puebla la base de datos con datos sintéticos según la configuración.
+
+    Args:
+        db (Session): Sesión sobre una base de datos con el esquema ya creado.
+        config (SeedConfig): Escala y semilla de los datos a generar.
+
+    Returns:
+        SeedResult: Identificadores de los registros generados.
+    """
+    rng = random.Random(config.seed)
+    catalogs = _seed_catalogs(db)
+    units = catalogs['units']
+    cop = units[MeasurementService.UNIT_COP]
+    hectare = units[MeasurementService.UNIT_HECTARE]
+    kilogram = units[MeasurementService.UNIT_KILOGRAM]
+
+    admin = User(
+        nombre='Admin',
+        apellido='Benchmark',
+        email='admin.benchmark@example.com',
+        password='not-a-real-hash',
+        failed_attempts=0,
+        state_id=catalogs['user_state'].id,
+        acepta_terminos=True
+    )
+    db.add(admin)
+    db.flush()
+    result = SeedResult(admin_user_id=admin.id)
+
+    # Fincas y lotes
+    farms = [
+        Farm(nombre=f'Finca {i + 1}', ubicacion='Huila', area_total=Decimal('100.00'), unidad_area_id=hectare.id)
+        for i in range(config.farms)
+    ]
+    _flush_in_batches(db, farms)
+    result.farm_ids = [farm.id for farm in farms]
+    _flush_in_batches(db, [
+        UserFarmRole(usuario_id=admin.id, finca_id=farm.id, rol_id=catalogs['admin_role'].id)
+        for farm in farms
+    ])
+
+    plots = []
+    for farm in farms:
+        for i in range(config.plots_per_farm):
+            plots.append(Plot(
+                nombre=f'Lote {i + 1}',
+                area=Decimal('5.00'),
+                unidad_area_id=hectare.id,
+                latitud=Decimal(str(round(HUILA_LATITUDE + rng.uniform(-0.5, 0.5), 8))),
+                longitud=Decimal(str(round(HUILA_LONGITUDE + rng.uniform(-0.5, 0.5), 8))),
+                finca_id=farm.id
+            ))
+    _flush_in_batches(db, plots)
+    result.plot_ids = [plot.id for plot in plots]
+
+    # Cultivos
+    crops = []
+    for plot in plots:
+        for _ in range(config.crops_per_plot):
+            harvested = rng.random() < 0.5
+            crops.append(Crop(
+                lote_id=plot.id,
+                variedad_maiz_id=rng.choice(catalogs['varieties']).id,
+                fecha_siembra=_random_date(rng, config),
+                densidad_siembra=rng.randint(50000, 80000),
+                densidad_siembra_unidad_id=units[MeasurementService.UNIT_PLANTS_PER_HECTARE].id,
+                estado_id=catalogs['crop_states'][1 if harvested else 0].id,
+                produccion_total=rng.randint(1000, 9000) if harvested else None,
+                produccion_total_unidad_id=kilogram.id if harvested else None,
+                cantidad_vendida=rng.randint(500, 1000) if harvested else None,
+                cantidad_vendida_unidad_id=kilogram.id if harvested else None,
+                precio_venta_unitario=Decimal(rng.randint(1000, 2500)) if harvested else None,
+                moneda_id=cop.id
+            ))
+    _flush_in_batches(db, crops)
+    result.crop_ids = [crop.id for crop in crops]
+
+    # Insumos y maquinaria disponibles para las tareas
+    inputs = [
+        AgriculturalInput(
+            categoria_id=catalogs['input_category'].id,
+            nombre=f'Insumo {i + 1}',
+            unidad_medida_id=kilogram.id,
+            costo_unitario=Decimal(rng.randint(2000, 20000)),
+            stock_actual=Decimal('1000.00'),
+            moneda_id=cop.id
+        )
+        for i in range(10)
+    ]
+    machinery = [
+        AgriculturalMachinery(
+            tipo_maquinaria_id=catalogs['machinery_type'].id,
+            nombre=f'Maquinaria {i + 1}',
+            costo_hora=Decimal(rng.randint(30000, 120000)),
+            moneda_id=cop.id
+        )
+        for i in range(5)
+    ]
+    _flush_in_batches(db, inputs + machinery)
+
+    # Tareas culturales repartidas entre los lotes
+    tasks = []
+    for i in range(config.tasks):
+        plot = plots[i % len(plots)]
+        is_plot_level = rng.random() < 0.3
+        task_type = rng.choice(catalogs['plot_task_types'] if is_plot_level else catalogs['crop_task_types'])
+        start = _random_date(rng, config)
+        tasks.append(CulturalTask(
+            nombre=f'Tarea {i + 1}',
+            tipo_labor_id=task_type.id,
+            fecha_inicio_estimada=start,
+            fecha_finalizacion=min(start + timedelta(days=rng.randint(0, 5)), config.end_date),
+            estado_id=catalogs['task_states'][2].id,
+            lote_id=plot.id
+        ))
+    _flush_in_batches(db, tasks)
+    result.task_count = len(tasks)
+
+    # Costos asociados a cada tarea
+    costs = []
+    for task in tasks:
+        costs.append(LaborCost(
+            tarea_labor_id=task.id,
+            cantidad_trabajadores=rng.randint(1, 6),
+            horas_trabajadas=Decimal(rng.randint(2, 10)),
+            costo_hora=Decimal(rng.randint(6000, 15000)),
+            moneda_id=cop.id
+        ))
+        for _ in range(rng.randint(0, 2)):
+            costs.append(TaskInput(
+                tarea_labor_id=task.id,
+                insumo_id=rng.choice(inputs).id,
+                cantidad_utilizada=Decimal(rng.randint(1, 50)),
+                fecha_aplicacion=task.fecha_inicio_estimada
+            ))
+        if rng.random() < 0.5:
+            costs.append(TaskMachinery(
+                tarea_labor_id=task.id,
+                maquinaria_id=rng.choice(machinery).id,
+                fecha_uso=task.fecha_inicio_estimada,
+                horas_uso=Decimal(rng.randint(1, 8))
+            ))
+    _flush_in_batches(db, costs)
+
+    # Registros meteorológicos horarios de los últimos días
+    weather_logs = []
+    first_hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(days=config.weather_days)
+    for plot in plots:
+        for hour in range(config.weather_days * 24):
+            timestamp = first_hour + timedelta(hours=hour)
+            weather_logs.append(WeatherLog(
+                lote_id=plot.id,
+                fecha=timestamp.date(),
+                hora=time(timestamp.hour),
+                temperatura=round(rng.uniform(16, 32), 2),
+                temperatura_sensacion=round(rng.uniform(16, 34), 2),
+                temperatura_unidad_id=units[MeasurementService.UNIT_CELSIUS].id,
+                presion_atmosferica=round(rng.uniform(1005, 1020), 1),
+                presion_unidad_id=units[MeasurementService.UNIT_HECTOPASCAL].id,
+                humedad_relativa=round(rng.uniform(40, 95), 1),
+                humedad_unidad_id=units[MeasurementService.UNIT_PERCENTAGE].id,
+                precipitacion=round(rng.uniform(0, 5), 2) if rng.random() < 0.2 else None,
+                precipitacion_unidad_id=units[MeasurementService.UNIT_MILLIMETERS_PER_HOUR].id,
+                indice_uv=round(rng.uniform(0, 11), 1),
+                nubosidad=rng.randint(0, 100),
+                nubosidad_unidad_id=units[MeasurementService.UNIT_PERCENTAGE].id,
+                velocidad_viento=round(rng.uniform(0, 8), 2),
+                velocidad_viento_unidad_id=units[MeasurementService.UNIT_METERS_PER_SECOND].id,
+                direccion_viento=rng.randint(0, 359),
+                direccion_viento_unidad_id=units[MeasurementService.UNIT_DEGREE].id,
+                visibilidad=10000,
+                visibilidad_unidad_id=units[MeasurementService.UNIT_METER].id,
+                descripcion_clima='nubes dispersas',
+                codigo_clima='802'
+            ))
+    _flush_in_batches(db, weather_logs)
+    result.weather_log_count = len(weather_logs)
+
+    db.commit()
+    if weather_logs:
+        # Los registros se insertan directamente; los resúmenes diarios se calculan al final
+        WeatherRepository(db).rebuild_daily_summaries(first_hour.date(), datetime.now(timezone.utc).date())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera datos sintéticos para AgroInsight.')
+    parser.add_argument('--database-url', default=None, help='URL de la base de datos (SQLite en memoria por defecto)')
+    parser.add_argument('--tasks', type=int, default=SeedConfig.tasks)
+    parser.add_argument('--farms', type=int, default=SeedConfig.farms)
+    parser.add_argument('--plots-per-farm', type=int, default=SeedConfig.plots_per_farm)
+    parser.add_argument('--crops-per-plot', type=int, default=SeedConfig.crops_per_plot)
+    parser.add_argument('--weather-days', type=int, default=SeedConfig.weather_days)
+    parser.add_argument('--seed', type=int, default=SeedConfig.seed)
+    args = parser.parse_args()
+
+    config = SeedConfig(
+        tasks=args.tasks,
+        farms=args.farms,
+        plots_per_farm=args.plots_per_farm,
+        crops_per_plot=args.crops_per_plot,
+        weather_days=args.weather_days,
+        seed=args.seed
+    )
+    engine = create_seed_engine(args.database_url)
+    with create_seed_session(engine) as db:
+        result = seed_database(db, config)
+    print(
+        f"Generados {len(result.farm_ids)} fincas, {len(result.plot_ids)} lotes, "
+        f"{len(result.crop_ids)} cultivos, {result.task_count} tareas y "
+        f"{result.weather_log_count} registros meteorológicos."
+    )
+
+
+if __name__ == '__main__':
+    main()
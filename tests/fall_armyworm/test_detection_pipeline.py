@@ -0,0 +1,194 @@
+import asyncio
+import io
+
+import httpx
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from benchmarks.image_pipeline import FakeHTTPServer, FakeStorageService, fake_routes
+from benchmarks.seed import SeedConfig, create_seed_engine, create_seed_session, seed_database
+from app.fall_armyworm.application import detect_fall_armyworm_background_use_case as background_module
+from app.fall_armyworm.application.detect_fall_armyworm_background_use_case import (
+    FALL_ARMYWORM_JOB_TYPE,
+    DetectFallArmywormBackgroundUseCase,
+    FallArmywormDetectionJobHandler
+)
+from app.fall_armyworm.application.get_monitoring_status_use_case import GetMonitoringStatusUseCase
+from app.fall_armyworm.domain.schemas import FileContent, MonitoreoFitosanitarioCreate
+from app.fall_armyworm.infrastructure.orm_models import EstadoMonitoreoEnum
+from app.fall_armyworm.infrastructure.sql_repository import FallArmywormRepository
+from app.infrastructure.common.datetime_utils import datetime_utc_time
+from app.infrastructure.jobs.file_store import JobFileStore
+from app.infrastructure.jobs.job_queue import JobQueue, create_job_queue_session_factory
+from app.infrastructure.jobs.orm_models import JobStatus
+from app.infrastructure.jobs.worker import JobWorker
+from app.infrastructure.utils.staged_pipeline import PipelineStage, run_staged_pipeline
+
+def test_stages_overlap_and_keep_order():
+    """
+    Prueba que un elemento se predice mientras el anterior se sube y que los
+    elementos fallidos se descartan sin detener el pipeline.
+    """
+    events = []
+
+    async def predict(item):
+        events.append(('predict', item))
+        await asyncio.sleep(0.01)
+        if item == 2:
+            raise ValueError("fallo del servicio")
+        return item
+
+    async def upload(item):
+        events.append(('upload_start', item))
+        await asyncio.sleep(0.03)
+        events.append(('upload_end', item))
+        return item
+
+    saved = []
+
+    async def persist(item):
+        saved.append(item)
+
+    asyncio.run(run_staged_pipeline(
+        range(4),
+        [PipelineStage("predicción", predict), PipelineStage("subida", upload), PipelineStage("guardado", persist)]
+    ))
+
+    assert saved == [0, 1, 3]
+    assert events.index(('predict', 1)) < events.index(('upload_end', 0))
+
+def test_background_detection_saves_every_batch():
+    """
+    Prueba el procesamiento completo contra servicios de predicción y almacenamiento simulados.
+    """
+    engine = create_seed_engine()
+    with create_seed_session(engine) as db:
+        seed_database(db, SeedConfig(tasks=1, farms=1, plots_per_farm=1, crops_per_plot=0, weather_days=0))
+
+    async def run():
+        server = FakeHTTPServer(fake_routes(0.01, 0.0, 0.0))
+        await server.start()
+        try:
+            with create_seed_session(engine) as db:
+                repository = FallArmywormRepository(db)
+                monitoreo = repository.create_monitoreo(MonitoreoFitosanitarioCreate(
+                    tarea_labor_id=1,
+                    fecha_monitoreo=datetime_utc_time(),
+                    cantidad_imagenes=40
+                ))
+                repository.save_changes()
+
+                use_case = DetectFallArmywormBackgroundUseCase(db, session_factory=lambda: create_seed_session(engine))
+                use_case.prediction_url = f"{server.url}/fall-armyworm/predict"
+                files = [FileContent(f"image_{i}.jpg", b"jpeg", "image/jpeg") for i in range(40)]
+                async with httpx.AsyncClient() as storage_client:
+                    use_case.cloudinary_service = FakeStorageService(storage_client, server.url)
+                    await use_case.process_batches(files, 1, monitoreo.id)
+                return monitoreo.id
+        finally:
+            await server.stop()
+
+    monitoreo_id = asyncio.run(run())
+
+    with create_seed_session(engine) as db:
+        repository = FallArmywormRepository(db)
+        assert len(repository.get_detections_by_monitoreo_id(monitoreo_id)) == 40
+        assert repository.get_monitoreo_by_id(monitoreo_id).estado == EstadoMonitoreoEnum.completed
+        monitoring_status = GetMonitoringStatusUseCase(db).get_monitoring_status(monitoreo_id)
+    assert monitoring_status["total_processed"] == 40
+    assert monitoring_status["total_failed"] == 0
+    assert monitoring_status["total_images"] == 40
+    engine.dispose()
+
+def test_enqueued_detection_is_processed_by_worker(tmp_path, monkeypatch):
+    """
+    Prueba que la API solo encola las imágenes y que el worker las procesa y borra sus archivos.
+    """
+    engine = create_seed_engine()
+    with create_seed_session(engine) as db:
+        seed_database(db, SeedConfig(tasks=1, farms=1, plots_per_farm=1, crops_per_plot=0, weather_days=0))
+
+    def session_factory():
+        return create_seed_session(engine)
+
+    queue = JobQueue(create_job_queue_session_factory(f"sqlite:///{tmp_path}/jobs.db"), retry_delay_seconds=0)
+    file_store = JobFileStore(str(tmp_path / "files"))
+    files = [
+        UploadFile(io.BytesIO(b"jpeg"), filename=f"image_{i}.jpg", headers=Headers({"content-type": "image/jpeg"}))
+        for i in range(20)
+    ]
+    use_case = DetectFallArmywormBackgroundUseCase(None, session_factory=session_factory, job_queue=queue, file_store=file_store)
+    response = use_case.enqueue_images(files, 1, None, 1)
+    assert response["status"] == "processing" and response["total_images"] == 20
+
+    async def run():
+        server = FakeHTTPServer(fake_routes(0.01, 0.0, 0.0))
+        await server.start()
+        monkeypatch.setattr(background_module, "ARMYWORM_SERVICE_URL", server.url)
+        try:
+            async with httpx.AsyncClient() as storage_client:
+                handler = FallArmywormDetectionJobHandler(
+                    session_factory,
+                    file_store,
+                    cloudinary_service=FakeStorageService(storage_client, server.url)
+                )
+                return await JobWorker(queue, [handler], owner_id="worker").run_once()
+        finally:
+            await server.stop()
+
+    assert asyncio.run(run())
+    with session_factory() as db:
+        repository = FallArmywormRepository(db)
+        assert len(repository.get_detections_by_monitoreo_id(response["monitoring_id"])) == 20
+        assert repository.get_monitoreo_by_id(response["monitoring_id"]).estado == EstadoMonitoreoEnum.completed
+    assert queue.get_metrics()[FALL_ARMYWORM_JOB_TYPE][JobStatus.COMPLETED.value] == 1
+    assert not any((tmp_path / "files").iterdir())
+    engine.dispose()
+
+def test_repeated_images_reuse_cached_predictions():
+    """
+    Prueba que las imágenes ya analizadas no se vuelven a predecir ni a subir y que
+    el monitoreo informa cuántas vinieron de la caché.
+    """
+    engine = create_seed_engine()
+    with create_seed_session(engine) as db:
+        seed_database(db, SeedConfig(tasks=1, farms=1, plots_per_farm=1, crops_per_plot=0, weather_days=0))
+
+    received = {}
+
+    async def analyze(files):
+        server = FakeHTTPServer(fake_routes(0.0, 0.0, 0.0, received))
+        await server.start()
+        try:
+            with create_seed_session(engine) as db:
+                repository = FallArmywormRepository(db)
+                monitoreo = repository.create_monitoreo(MonitoreoFitosanitarioCreate(
+                    tarea_labor_id=1,
+                    fecha_monitoreo=datetime_utc_time(),
+                    cantidad_imagenes=len(files)
+                ))
+                repository.save_changes()
+
+                use_case = DetectFallArmywormBackgroundUseCase(db, session_factory=lambda: create_seed_session(engine))
+                use_case.prediction_url = f"{server.url}/fall-armyworm/predict"
+                async with httpx.AsyncClient() as storage_client:
+                    use_case.cloudinary_service = FakeStorageService(storage_client, server.url)
+                    await use_case.process_batches(files, 1, monitoreo.id)
+                return monitoreo.id
+        finally:
+            await server.stop()
+
+    asyncio.run(analyze([FileContent(f"image_{i}.jpg", f"jpeg {i}".encode(), "image/jpeg") for i in range(10)]))
+    received.clear()
+    monitoreo_id = asyncio.run(analyze(
+        [FileContent(f"retry_{i}.jpg", f"jpeg {i}".encode(), "image/jpeg") for i in range(12)]
+    ))
+
+    # Solo las dos imágenes nuevas se envían al servicio y al almacenamiento
+    assert received['upload'] == len(b"jpeg 10") + len(b"jpeg 11")
+    with create_seed_session(engine) as db:
+        assert len(FallArmywormRepository(db).get_detections_by_monitoreo_id(monitoreo_id)) == 12
+        monitoring_status = GetMonitoringStatusUseCase(db).get_monitoring_status(monitoreo_id)
+    assert monitoring_status["cached_images"] == 10
+    assert monitoring_status["cache_hit_rate"] == round(10 / 12, 4)
+    engine.dispose()
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from app.infrastructure.services import cloudinary_service
+from app.infrastructure.services.cloudinary_service import CloudinaryService
+
+def test_uploads_run_off_the_event_loop(monkeypatch):
+    """
+    Prueba que las subidas de un lote se ejecutan a la vez, limitadas por el semáforo,
+    sin bloquear el bucle de eventos.
+    """
+    active = {'now': 0, 'max': 0}
+
+    def blocking_upload(content, **kwargs):
+        active['now'] += 1
+        active['max'] = max(active['max'], active['now'])
+        time.sleep(0.1)
+        active['now'] -= 1
+        return {'secure_url': f"https://res.invalid/{content.decode()}.jpg", 'public_id': content.decode()}
+
+    monkeypatch.setattr(cloudinary_service.uploader, 'upload', blocking_upload)
+
+    async def run():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        results = await CloudinaryService().upload_many(
+            [(f"img{i}".encode(), f"img{i}.jpg") for i in range(6)], "tests", concurrency=3
+        )
+        elapsed = time.perf_counter() - started
+        beat.cancel()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(run())
+
+    assert [result['public_id'] for result in results] == [f"img{i}" for i in range(6)]
+    assert active['max'] == 3
+    assert elapsed < 0.5
+    # El bucle siguió atendiendo otras tareas durante las subidas
+    assert ticks >= 10
+
+def test_failed_upload_does_not_discard_the_batch(monkeypatch):
+    """
+    Prueba que una subida fallida se devuelve como excepción sin descartar las demás.
+    """
+    def flaky_upload(content, **kwargs):
+        if content == b"img1":
+            raise RuntimeError("upload failed")
+        return {'secure_url': f"https://res.invalid/{content.decode()}.jpg", 'public_id': content.decode()}
+
+    monkeypatch.setattr(cloudinary_service.uploader, 'upload', flaky_upload)
+
+    results = asyncio.run(CloudinaryService().upload_many(
+        [(f"img{i}".encode(), f"img{i}.jpg") for i in range(3)], "tests"
+    ))
+
+    assert results[0]['public_id'] == "img0"
+    assert isinstance(results[1], Exception)
+    assert results[2]['public_id'] == "img2"
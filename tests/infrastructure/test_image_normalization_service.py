@@ -0,0 +1,46 @@
+import asyncio
+import io
+
+from PIL import Image
+
+from app.infrastructure.services.image_normalization_service import ImageNormalizationService, normalize_image
+
+def make_photo(width=4000, height=3000):
+    """Crea una foto JPEG con metadatos EXIF que indican una rotación de 90 grados."""
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientación: rotar 90 grados en sentido horario
+    exif[0x010F] = "Fabricante"
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (40, 120, 40)).save(output, format="JPEG", exif=exif)
+    return output.getvalue()
+
+def test_normalize_image_resizes_and_strips_metadata():
+    """
+    Prueba que la imagen se reduce a las dos resoluciones, conserva su orientación y pierde sus metadatos.
+    """
+    photo = make_photo()
+    normalized = normalize_image(photo, model_max_side=512, storage_max_side=1600, quality=80)
+
+    with Image.open(io.BytesIO(normalized.storage_content)) as storage:
+        assert storage.size == (1200, 1600)
+        assert not storage.getexif()
+    with Image.open(io.BytesIO(normalized.model_content)) as model:
+        assert model.size == (384, 512)
+    assert len(normalized.model_content) < len(normalized.storage_content) < len(photo)
+
+def test_normalize_many_runs_in_process_pool(tmp_path):
+    """
+    Prueba la normalización en el grupo de procesos desde contenido y desde rutas,
+    usando la imagen original cuando el contenido no es una imagen.
+    """
+    path = tmp_path / "foto.jpg"
+    path.write_bytes(make_photo(1000, 800))
+    service = ImageNormalizationService(model_max_side=256, storage_max_side=512)
+
+    results = asyncio.run(service.normalize_many([make_photo(800, 600), str(path), b"no es una imagen"]))
+
+    assert results[2] is None
+    for result in results[:2]:
+        with Image.open(io.BytesIO(result.model_content)) as model:
+            assert max(model.size) == 256
+    assert asyncio.run(ImageNormalizationService(enabled=False).normalize_many([b"x"])) == [None]
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.infrastructure.common.common_exceptions import DomainException
+from app.infrastructure.jobs import file_store
+from app.infrastructure.jobs.file_store import JobFileStore
+from app.infrastructure.jobs.job_queue import JobQueue, create_job_queue_session_factory
+from app.infrastructure.jobs.orm_models import BackgroundJob, JobStatus
+from app.infrastructure.jobs.worker import JobHandler, JobWorker
+
+def make_queue(tmp_path, **kwargs):
+    return JobQueue(create_job_queue_session_factory(f"sqlite:///{tmp_path}/jobs.db"), **kwargs)
+
+def get_job(queue, job_id):
+    with queue.session_factory() as db:
+        return db.get(BackgroundJob, job_id)
+
+def test_claim_is_exclusive_and_reclaimed_when_lease_expires(tmp_path):
+    """
+    Prueba que un trabajo reclamado no lo obtiene otro worker mientras su arriendo
+    está vigente y que sí se puede reclamar cuando vence.
+    """
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue("prueba", {"valor": 1}, reference_id=7)
+
+    job = queue.claim(["prueba"], "worker-a")
+    assert job.id == job_id and job.payload == {"valor": 1} and job.intentos == 1
+    assert queue.claim(["prueba"], "worker-b") is None
+
+    expired = make_queue(tmp_path, lease_seconds=-1)
+    assert expired.heartbeat(job_id, "worker-a")
+    reclaimed = expired.claim(["prueba"], "worker-b")
+    assert reclaimed.id == job_id and reclaimed.intentos == 2
+    # El worker anterior ya no puede renovar ni completar el trabajo
+    assert not queue.heartbeat(job_id, "worker-a")
+    queue.complete(job_id, "worker-a")
+    assert get_job(queue, job_id).estado == JobStatus.RUNNING.value
+
+def test_failed_job_is_retried_until_attempts_run_out(tmp_path):
+    """
+    Prueba que un trabajo fallido vuelve a la cola tras la espera y queda como
+    fallido al agotar sus intentos, y que las métricas lo reflejan.
+    """
+    queue = make_queue(tmp_path, max_attempts=2, retry_delay_seconds=0)
+    job_id = queue.enqueue("prueba", {})
+
+    assert not queue.fail(queue.claim(["prueba"], "worker"), "worker", "error 1")
+    assert queue.fail(queue.claim(["prueba"], "worker"), "worker", "error 2")
+    assert queue.claim(["prueba"], "worker") is None
+
+    job = get_job(queue, job_id)
+    assert job.estado == JobStatus.FAILED.value and job.ultimo_error == "error 2"
+    metrics = queue.get_metrics()["prueba"]
+    assert metrics[JobStatus.FAILED.value] == 1 and metrics["reintentos"] == 1
+
+def test_worker_retries_and_completes_jobs(tmp_path):
+    """
+    Prueba que el worker reintenta un trabajo cuyo manejador falla y lo completa después.
+    """
+    class FlakyHandler(JobHandler):
+        job_type = "prueba"
+
+        def __init__(self):
+            self.attempts = []
+
+        async def run(self, job):
+            self.attempts.append(job.intentos)
+            if job.intentos == 1:
+                raise RuntimeError("servicio no disponible")
+
+    queue = make_queue(tmp_path, retry_delay_seconds=0)
+    job_id = queue.enqueue("prueba", {})
+    queue.enqueue("otro", {})
+    handler = FlakyHandler()
+    worker = JobWorker(queue, [handler], owner_id="worker")
+
+    async def run():
+        return [await worker.run_once() for _ in range(3)]
+
+    assert asyncio.run(run()) == [True, True, False]
+    assert handler.attempts == [1, 2]
+    assert get_job(queue, job_id).estado == JobStatus.COMPLETED.value
+    metrics = queue.get_metrics()
+    assert metrics["prueba"][JobStatus.COMPLETED.value] == 1
+    assert metrics["otro"][JobStatus.PENDING.value] == 1
+
+def test_file_store_requires_a_shared_directory(monkeypatch, tmp_path):
+    """
+    Prueba que sin `JOB_FILES_DIR` no se guardan archivos de trabajos en un directorio local.
+    """
+    monkeypatch.setattr(file_store, 'JOB_FILES_DIR', None)
+    with pytest.raises(DomainException) as error:
+        JobFileStore().save([])
+    assert error.value.status_code == 503
+
+    stored = JobFileStore(str(tmp_path)).save([])
+    assert stored == []
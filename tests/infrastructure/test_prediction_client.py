@@ -0,0 +1,170 @@
+import asyncio
+import io
+from types import SimpleNamespace
+
+import httpx
+
+from app.infrastructure.services.prediction_client import AdaptiveBatchController, AdaptivePredictionClient
+
+class Image:
+    def __init__(self, filename):
+        self.filename = filename
+        self.content_type = "image/jpeg"
+
+    def open_for_model(self):
+        return io.BytesIO(b"jpeg")
+
+def parse_results(body):
+    return [SimpleNamespace(**result) for result in body["results"]]
+
+def test_controller_increases_additively_and_decreases_multiplicatively():
+    """
+    Prueba que el lote crece con respuestas rápidas y se reduce a la mitad con respuestas lentas o errores.
+    """
+    controller = AdaptiveBatchController(batch_size=10, max_batch_size=12, max_concurrency=3, target_latency_seconds=1)
+
+    controller.record_success(0.1)
+    assert controller.batch_size == 11
+    assert controller.concurrency == 2
+    for _ in range(5):
+        controller.record_success(0.1)
+    assert controller.batch_size == 12
+    assert controller.concurrency == 3
+
+    controller.record_success(5)
+    assert controller.batch_size == 6
+
+    controller.record_failure()
+    assert controller.batch_size == 3
+    assert controller.concurrency == 1
+    assert controller.state == "closed"
+
+def test_circuit_opens_after_consecutive_failures_and_closes_after_probe():
+    """
+    Prueba que el circuito se abre tras varios errores, deja pasar una petición de prueba y se cierra si tiene éxito.
+    """
+    controller = AdaptiveBatchController(failure_threshold=2, cooldown_seconds=0.05)
+    controller.record_failure()
+    assert controller.state == "closed"
+    controller.record_failure()
+    assert controller.state == "open"
+
+    async def probe():
+        async with controller.slot():
+            assert controller.state == "half_open"
+            controller.record_success(0.01)
+
+    asyncio.run(probe())
+    assert controller.state == "closed"
+
+def test_failed_images_are_retried_individually():
+    """
+    Prueba que las imágenes de un lote rechazado por saturación se reintentan una por una en lugar de perderse.
+    """
+    requests = []
+
+    async def handler(request):
+        body = await request.aread()
+        filenames = [part.split(b'"')[0].decode() for part in body.split(b'filename="')[1:]]
+        requests.append(filenames)
+        if len(requests) == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"results": [
+            {"filename": filename, "status": "success"} for filename in filenames
+        ]})
+
+    controller = AdaptiveBatchController(batch_size=4, failure_threshold=5)
+    images = [Image(f"image_{i}.jpg") for i in range(4)]
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await AdaptivePredictionClient(controller).predict(client, "http://servicio/predict", images, parse_results)
+
+    predictions = asyncio.run(run())
+
+    assert sorted(image.filename for image, _ in predictions) == [image.filename for image in images]
+    assert len(requests[0]) == 4
+    assert all(len(filenames) == 1 for filenames in requests[1:])
+
+def test_rejected_batches_and_errors_do_not_lose_the_other_images():
+    """
+    Prueba que un lote rechazado por una imagen, una imagen ilegible y una respuesta
+    inválida solo descartan las imágenes que fallan.
+    """
+    requests = []
+
+    class UnreadableImage(Image):
+        def __init__(self, filename):
+            super().__init__(filename)
+            self.reads = 0
+
+        def open_for_model(self):
+            self.reads += 1
+            raise OSError("imagen ilegible")
+
+    async def handler(request):
+        body = await request.aread()
+        filenames = [part.split(b'"')[0].decode() for part in body.split(b'filename="')[1:]]
+        requests.append(filenames)
+        if "corrupta.jpg" in filenames:
+            return httpx.Response(400)
+        if len(requests) == 2:
+            return httpx.Response(200, content=b"no es json")
+        return httpx.Response(200, json={"results": [
+            {"filename": filename, "status": "success"} for filename in filenames
+        ]})
+
+    controller = AdaptiveBatchController(batch_size=4, failure_threshold=5)
+    unreadable = UnreadableImage("ilegible.jpg")
+    images = [Image("image_0.jpg"), Image("corrupta.jpg"), Image("image_2.jpg"), Image("image_3.jpg"), unreadable]
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await AdaptivePredictionClient(controller, max_attempts=3).predict(
+                client, "http://servicio/predict", images, parse_results
+            )
+
+    predictions = asyncio.run(run())
+
+    assert sorted(image.filename for image, _ in predictions) == ["image_0.jpg", "image_2.jpg", "image_3.jpg"]
+    # La imagen rechazada sola no se vuelve a enviar y la ilegible agota sus intentos
+    assert sum(filenames == ["corrupta.jpg"] for filenames in requests) == 1
+    assert unreadable.reads == 3
+
+def test_global_limit_applies_across_prediction_services(monkeypatch):
+    """
+    Prueba que las peticiones a distintos servicios de predicción comparten el límite global de concurrencia.
+    """
+    from app.infrastructure.services import prediction_client
+
+    monkeypatch.setattr(prediction_client, "PREDICTION_GLOBAL_MAX_CONCURRENCY", 2)
+    in_flight = []
+    max_in_flight = []
+
+    async def handler(request):
+        in_flight.append(request.url.host)
+        max_in_flight.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        body = await request.aread()
+        filenames = [part.split(b'"')[0].decode() for part in body.split(b'filename="')[1:]]
+        return httpx.Response(200, json={"results": [
+            {"filename": filename, "status": "success"} for filename in filenames
+        ]})
+
+    def new_client():
+        return AdaptivePredictionClient(AdaptiveBatchController(
+            batch_size=1, max_batch_size=1, concurrency=3, max_concurrency=3
+        ))
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await asyncio.gather(*[
+                new_client().predict(client, url, [Image(f"image_{i}.jpg") for i in range(6)], parse_results)
+                for url in ("http://gusano/predict", "http://suelo/predict")
+            ])
+
+    detections, classifications = asyncio.run(run())
+
+    assert len(detections) == 6 and len(classifications) == 6
+    assert max(max_in_flight) == 2
@@ -0,0 +1,37 @@
+import asyncio
+
+from app.infrastructure.utils.progress_events import progress_events
+
+class Request:
+    async def is_disconnected(self):
+        return False
+
+def test_progress_events_are_sent_on_change_until_done():
+    """
+    Prueba que solo se envía un evento cuando cambia el progreso y que el stream termina con el análisis.
+    """
+    readings = iter([
+        {"status": "processing", "total_processed": 0},
+        {"status": "processing", "total_processed": 0},
+        {"status": "processing", "total_processed": 15},
+        {"status": "completed", "total_processed": 30},
+    ])
+
+    async def collect():
+        return [event async for event in progress_events(Request(), lambda: next(readings), interval_seconds=0)]
+
+    events = asyncio.run(collect())
+
+    assert [event.split("\n")[0] for event in events] == [
+        "event: progress", "event: progress", "event: progress", "event: done"
+    ]
+    assert '"total_processed": 30' in events[-1]
+
+def test_progress_events_stop_when_analysis_is_missing():
+    """
+    Prueba que el stream termina si el análisis deja de existir.
+    """
+    async def collect():
+        return [event async for event in progress_events(Request(), lambda: None, interval_seconds=0)]
+
+    assert asyncio.run(collect()) == []
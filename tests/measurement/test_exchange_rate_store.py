@@ -0,0 +1,195 @@
+import asyncio
+import json
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.infrastructure.common.common_exceptions import DomainException
+from app.infrastructure.common.datetime_utils import datetime_utc_time
+from app.measurement.application.services.currency_conversion_service import CurrencyConversionService
+from app.infrastructure.db.connection import Base
+from app.measurement.infrastructure.exchange_rate_store import ExchangeRateStore
+from app.measurement.infrastructure.orm_models import ExchangeRate
+from app.measurement.infrastructure.sql_repository import MeasurementRepository
+
+class FakeRateHandler(BaseHTTPRequestHandler):
+    """Simula la API de exchangerate-api para pruebas locales."""
+
+    def do_GET(self):
+        self.server.requests += 1
+        if self.server.failing:
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = json.dumps({
+            "result": "success",
+            "base_code": "COP",
+            "conversion_rates": self.server.rates
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def fake_rate_server():
+    """Fixture que levanta un servidor de tasas de cambio local."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeRateHandler)
+    server.rates = {"COP": 1, "USD": 0.00025, "EUR": 0.0002}
+    server.failing = False
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def rate_store(fake_rate_server):
+    """Fixture que crea un almacén apuntando al servidor local."""
+    host, port = fake_rate_server.server_address
+    return ExchangeRateStore(api_key="test-key", base_url=f"http://{host}:{port}/v6")
+
+@pytest.fixture
+def session_factory():
+    """Fixture que crea una base de datos SQLite en memoria."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[ExchangeRate.__table__])
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+def test_refresh_loads_rates_from_provider(rate_store, fake_rate_server):
+    """
+    Prueba que el refresco carga las tasas del proveedor en el almacén.
+    """
+    assert rate_store.is_stale()
+
+    assert asyncio.run(rate_store.refresh()) is True
+
+    assert fake_rate_server.requests == 1
+    assert rate_store.snapshot.rates["USD"] == Decimal("0.00025")
+    assert not rate_store.is_stale()
+
+def test_refresh_keeps_previous_rates_when_provider_fails(rate_store, fake_rate_server):
+    """
+    Prueba que un fallo del proveedor conserva las últimas tasas conocidas.
+    """
+    asyncio.run(rate_store.refresh())
+    fake_rate_server.failing = True
+
+    assert asyncio.run(rate_store.refresh()) is False
+    assert rate_store.snapshot.rates["USD"] == Decimal("0.00025")
+
+def test_stale_rates_are_served_while_refreshing_in_background(rate_store, fake_rate_server):
+    """
+    Prueba que las tasas vencidas se sirven de inmediato y se refrescan en segundo plano.
+    """
+    rate_store.load({"USD": "0.0003"}, fetched_at=datetime_utc_time() - timedelta(days=1))
+
+    async def read_rates():
+        snapshot = rate_store.get_snapshot()
+        # La lectura no espera al proveedor
+        assert fake_rate_server.requests == 0
+        await rate_store._refresh_task
+        return snapshot
+
+    stale_snapshot = asyncio.run(read_rates())
+
+    assert stale_snapshot.rates["USD"] == Decimal("0.0003")
+    assert fake_rate_server.requests == 1
+    assert rate_store.snapshot.rates["USD"] == Decimal("0.00025")
+
+def test_conversion_does_not_call_provider(rate_store, fake_rate_server):
+    """
+    Prueba que la conversión usa las tasas en memoria sin llamar a la red.
+    """
+    asyncio.run(rate_store.refresh())
+    service = CurrencyConversionService(MagicMock(spec=Session), rate_store=rate_store)
+
+    assert service.convert_amount(Decimal("4000"), "COP", "USD") == Decimal("1.00000")
+    assert service.convert_amount(Decimal("1"), "USD", "COP") == Decimal("4000")
+    assert fake_rate_server.requests == 1
+
+def test_conversion_without_rates_fails_fast(rate_store, fake_rate_server):
+    """
+    Prueba que sin tasas cargadas la conversión responde 503 sin bloquear.
+    """
+    service = CurrencyConversionService(MagicMock(spec=Session), rate_store=rate_store)
+
+    assert service.convert_amount(Decimal("10"), "COP", "COP") == Decimal("10")
+    with pytest.raises(DomainException) as exc_info:
+        service.convert_amount(Decimal("10"), "COP", "USD")
+
+    assert exc_info.value.status_code == 503
+    assert fake_rate_server.requests == 0
+
+def test_refresh_persists_rates(fake_rate_server, session_factory):
+    """
+    Prueba que el refresco guarda las tasas del día en la base de datos.
+    """
+    host, port = fake_rate_server.server_address
+    store = ExchangeRateStore(api_key="test-key", base_url=f"http://{host}:{port}/v6", session_factory=session_factory)
+
+    asyncio.run(store.refresh())
+
+    with session_factory() as db:
+        rows = MeasurementRepository(db).get_exchange_rates("COP")
+    assert {row.moneda: row.tasa for row in rows}["USD"] == Decimal("0.00025")
+
+def test_conversion_uses_rate_of_transaction_date(rate_store):
+    """
+    Prueba que la conversión con fecha usa la tasa vigente en esa fecha.
+    """
+    rate_store.history.add(date(2024, 1, 1), {"USD": Decimal("0.00020")})
+    rate_store.history.add(date(2024, 6, 1), {"USD": Decimal("0.00025")})
+    rate_store.load({"USD": "0.00030"})
+    service = CurrencyConversionService(MagicMock(spec=Session), rate_store=rate_store)
+
+    assert service.convert_amount(Decimal("1000"), "COP", "USD", date(2023, 12, 1)) == Decimal("0.20000")
+    assert service.convert_amount(Decimal("1000"), "COP", "USD", date(2024, 3, 15)) == Decimal("0.20000")
+    assert service.convert_amount(Decimal("1000"), "COP", "USD", date(2024, 6, 1)) == Decimal("0.25000")
+    assert service.convert_amount(Decimal("1000"), "COP", "USD") == Decimal("0.30000")
+
+def test_initialize_falls_back_to_persisted_rates(fake_rate_server, session_factory):
+    """
+    Prueba que si el proveedor no responde se usan las últimas tasas persistidas.
+    """
+    with session_factory() as db:
+        repository = MeasurementRepository(db)
+        repository.save_exchange_rates(date(2024, 1, 1), "COP", {"USD": Decimal("0.00020")})
+        repository.save_exchange_rates(date(2024, 2, 1), "COP", {"USD": Decimal("0.00022")})
+    fake_rate_server.failing = True
+    host, port = fake_rate_server.server_address
+    store = ExchangeRateStore(api_key="test-key", base_url=f"http://{host}:{port}/v6", session_factory=session_factory)
+
+    assert asyncio.run(store.initialize()) is False
+
+    service = CurrencyConversionService(MagicMock(spec=Session), rate_store=store)
+    assert service.convert_amount(Decimal("1000"), "COP", "USD") == Decimal("0.22000")
+    assert service.convert_amount(Decimal("1000"), "COP", "USD", date(2024, 1, 15)) == Decimal("0.20000")
+
+def test_convert_many_uses_a_single_factor(rate_store):
+    """
+    Prueba que la conversión por lotes calcula el factor una sola vez y conserva los None.
+    """
+    rate_store.load({"USD": "0.00025", "EUR": "0.0002"})
+    rate_store.get_rate = MagicMock(wraps=rate_store.get_rate)
+    service = CurrencyConversionService(MagicMock(spec=Session), rate_store=rate_store)
+
+    converted = service.convert_many([Decimal("4000"), None, Decimal("8000")], "COP", "USD")
+    service.convert_many([Decimal("1")], "COP", "USD")
+
+    assert converted == [Decimal("1.00000"), None, Decimal("2.00000")]
+    assert rate_store.get_rate.call_count == 2
+    assert service.convert_many([Decimal("1")], "USD", "EUR") == [Decimal("0.8")]
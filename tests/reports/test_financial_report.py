@@ -0,0 +1,35 @@
+from benchmarks.seed import SeedConfig, create_seed_engine, create_seed_session, seed_database
+from app.reports.application.generate_financial_report_use_case import GenerateFinancialReportUseCase
+from app.user.domain.schemas import UserInDB
+
+def test_report_includes_plot_crops_and_filters_by_crop():
+    """
+    Prueba que el reporte de una finca incluye los cultivos de cada lote y que
+    `crop_id` deja solo el cultivo pedido.
+    """
+    config = SeedConfig(tasks=40, farms=1, plots_per_farm=2, crops_per_plot=2, weather_days=0)
+    engine = create_seed_engine()
+    with create_seed_session(engine) as db:
+        seed = seed_database(db, config)
+    user = UserInDB.model_construct(id=seed.admin_user_id)
+
+    def generate(**kwargs):
+        with create_seed_session(engine) as db:
+            return GenerateFinancialReportUseCase(db).generate_report(
+                farm_id=seed.farm_ids[0],
+                start_date=config.start_date,
+                end_date=config.end_date,
+                currency="COP",
+                current_user=user,
+                **kwargs
+            )
+
+    report = generate()
+    assert sorted(plot.lote_id for plot in report.lotes) == sorted(seed.plot_ids)
+    assert sorted(crop.cultivo_id for plot in report.lotes for crop in plot.cultivos) == sorted(seed.crop_ids)
+    assert report.costo_total == sum(plot.costo_total for plot in report.lotes)
+
+    crop_id = seed.crop_ids[0]
+    filtered = generate(crop_id=crop_id)
+    assert [crop.cultivo_id for plot in filtered.lotes for crop in plot.cultivos] == [crop_id]
+    engine.dispose()
@@ -0,0 +1,136 @@
+from datetime import date
+
+from sqlalchemy import event
+
+from benchmarks.seed import SeedConfig, create_seed_engine, create_seed_session, seed_database
+from app.soil_analysis.application.get_analysis_status_use_case import GetAnalysisStatusUseCase
+from app.soil_analysis.application.soil_analysis_background_use_case import SoilAnalysisBackgroundUseCase
+from app.soil_analysis.domain.schemas import FileContent, SoilAnalysisCreate, SoilClassificationCreate, SoilClassificationResponse
+from app.soil_analysis.infrastructure.orm_models import SoilAnalysisStatusEnum, SoilType
+from app.soil_analysis.infrastructure.soil_type_cache import SoilTypeCache
+from app.soil_analysis.application import soil_analysis_background_use_case as background_module
+from app.soil_analysis.infrastructure.sql_repository import SoilAnalysisRepository
+
+PROBABILITIES = {
+    "alluvial_soil": 0.1, "black_soil": 0.1, "cinder_soil": 0.1, "clay_soil": 0.1,
+    "laterite_soil": 0.1, "peat_soil": 0.4, "yellow_soil": 0.1
+}
+
+def classified(index, predicted_class):
+    return (
+        FileContent(f"image_{index}.jpg", b"jpeg", "image/jpeg"),
+        SoilClassificationResponse(
+            filename=f"image_{index}.jpg",
+            status="success",
+            predicted_class=predicted_class,
+            confidence=0.4,
+            probabilities=PROBABILITIES
+        ),
+        {"url": f"https://example.com/{index}.jpg", "public_id": f"image_{index}"},
+        False
+    )
+
+def test_batches_use_soil_type_map_and_bulk_insert(monkeypatch):
+    """
+    Prueba que los tipos de suelo se consultan una sola vez, que cada lote se guarda con
+    una sola inserción y que una clase desconocida se cuenta como imagen fallida.
+    """
+    engine = create_seed_engine()
+    with create_seed_session(engine) as db:
+        seed_database(db, SeedConfig(tasks=1, farms=1, plots_per_farm=1, crops_per_plot=0, weather_days=0))
+        db.add_all([
+            SoilType(id=1, nombre="Peat Soil", color_id=1, textura_id=1),
+            SoilType(id=2, nombre="Clay Soil", color_id=1, textura_id=1)
+        ])
+        repository = SoilAnalysisRepository(db)
+        analysis = repository.create_analysis(SoilAnalysisCreate(
+            tarea_labor_id=1, fecha_analisis=date.today(), cantidad_imagenes=7
+        ))
+        repository.save_changes()
+        analysis_id = analysis.id
+
+    monkeypatch.setattr(background_module, "soil_type_cache", SoilTypeCache())
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    with create_seed_session(engine) as db:
+        use_case = SoilAnalysisBackgroundUseCase(db, session_factory=lambda: create_seed_session(engine))
+        use_case.prediction_cache_repository.enabled = False
+        use_case._persist_batch([classified(i, "Peat Soil") for i in range(3)], analysis_id)
+        use_case._persist_batch([classified(3, "Clay Soil"), classified(4, "Peat Soil"), classified(5, "Unknown")], analysis_id, 1)
+
+    # Una carga inicial y una recarga por la clase desconocida, no una consulta por imagen
+    assert sum("FROM tipo_suelo" in statement for statement in statements) == 2
+    assert sum(statement.startswith("INSERT INTO clasificacion_tipo_suelo") for statement in statements) == 2
+    with create_seed_session(engine) as db:
+        repository = SoilAnalysisRepository(db)
+        assert len(repository.get_classifications_by_analysis_id(analysis_id)) == 5
+        analysis = repository.get_analysis_by_id(analysis_id)
+        assert (analysis.imagenes_procesadas, analysis.imagenes_fallidas) == (5, 2)
+    engine.dispose()
+
+def test_unknown_soil_types_reload_the_catalog_once_per_interval():
+    """
+    Prueba que un tipo de suelo desconocido recarga el catálogo una vez y que el fallo
+    se recuerda hasta que vence su intervalo.
+    """
+    engine = create_seed_engine()
+    with create_seed_session(engine) as db:
+        db.add(SoilType(id=1, nombre="Peat Soil", color_id=1, textura_id=1))
+        db.commit()
+
+    now = [0.0]
+    cache = SoilTypeCache(miss_seconds=60, clock=lambda: now[0])
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    with create_seed_session(engine) as db:
+        assert cache.get_id(db, "Peat Soil") == 1
+        for _ in range(5):
+            assert cache.get_id(db, "Unknown") is None
+        assert cache.get_name(db, 1) == "Peat Soil"
+        assert sum("FROM tipo_suelo" in statement for statement in statements) == 2
+
+        # Un tipo agregado después se encuentra al vencer el intervalo del fallo
+        db.add(SoilType(id=2, nombre="Unknown", color_id=1, textura_id=1))
+        db.commit()
+        assert cache.get_id(db, "Unknown") is None
+        now[0] = 61
+        assert cache.get_id(db, "Unknown") == 2
+        assert sum("FROM tipo_suelo" in statement for statement in statements) == 3
+    engine.dispose()
+
+def test_status_counts_classifications_of_analyses_finished_before_the_counters():
+    """
+    Prueba que un análisis terminado con los contadores en 0 informa sus clasificaciones guardadas.
+    """
+    engine = create_seed_engine()
+    with create_seed_session(engine) as db:
+        seed_database(db, SeedConfig(tasks=1, farms=1, plots_per_farm=1, crops_per_plot=0, weather_days=0))
+        db.add(SoilType(id=1, nombre="Peat Soil", color_id=1, textura_id=1))
+        repository = SoilAnalysisRepository(db)
+        analysis = repository.create_analysis(SoilAnalysisCreate(
+            tarea_labor_id=1, fecha_analisis=date.today(), cantidad_imagenes=3,
+            estado=SoilAnalysisStatusEnum.partial
+        ))
+        repository.bulk_create_classifications([
+            SoilClassificationCreate(
+                analisis_suelo_id=analysis.id,
+                imagen_url=f"https://example.com/{index}.jpg",
+                imagen_public_id=f"image_{index}",
+                resultado_analisis_id=1,
+                confianza_clasificacion=0.4,
+                **{f"prob_{name}": value for name, value in PROBABILITIES.items()}
+            )
+            for index in range(2)
+        ])
+        repository.save_changes()
+
+        status = GetAnalysisStatusUseCase(db).get_analysis_status(analysis.id)
+        assert (status["total_processed"], status["total_failed"]) == (2, 1)
+
+        # Mientras se procesa, los contadores se informan tal como están
+        analysis.estado = SoilAnalysisStatusEnum.processing
+        repository.save_changes()
+        assert GetAnalysisStatusUseCase(db).get_analysis_status(analysis.id)["total_processed"] == 0
+    engine.dispose()
@@ -0,0 +1,20 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.seed import SeedConfig, create_seed_engine, seed_database
+from app.weather.application.services.weather_measurement_service import WeatherMeasurementService
+from app.weather.infrastructure.recent_weather_cache import recent_weather_cache
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    """Fixture que crea una base de datos SQLite con lotes y unidades de medida."""
+    monkeypatch.setenv("OPENWEATHERMAP_API_KEY", "test-key")
+    engine = create_seed_engine()
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        seed_database(db, SeedConfig(tasks=0, farms=2, plots_per_farm=6, crops_per_plot=0, weather_days=0))
+        # Cada prueba usa una base de datos nueva; se recargan los IDs de unidades compartidos
+        WeatherMeasurementService.reload_unit_ids(db)
+        recent_weather_cache.warm(db)
+    yield factory
+    engine.dispose()
@@ -0,0 +1,135 @@
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.seed import SeedConfig, create_seed_engine, seed_database
+from app.crop.application.services.crop_service import CropService
+from app.crop.infrastructure.orm_models import Crop, CropState
+from app.weather.application import get_agroclimatic_indicators_use_case
+from app.weather.application.get_agroclimatic_indicators_use_case import GetAgroclimaticIndicatorsUseCase
+from app.weather.application.services.agroclimatic_indicator_service import (
+    CropIndicatorCache,
+    CropPeriod,
+    compute_crop_indicators,
+    extraterrestrial_radiation
+)
+from app.weather.infrastructure.sql_repository import WeatherRepository
+from tests.weather.test_weather_aggregates import _reading
+
+TODAY = date(2024, 7, 15)
+
+def _naive_indicators(readings, crop: CropPeriod) -> dict:
+    """Calcula los indicadores de un cultivo recorriendo sus lecturas día por día."""
+    days = {}
+    for lote_id, fecha, temperatura, precipitacion in readings:
+        if lote_id == crop.lote_id and crop.fecha_inicio <= fecha <= crop.fecha_fin:
+            days.setdefault(fecha, []).append((temperatura, precipitacion))
+
+    gdd = precipitation = et0 = 0.0
+    heat_hours = 0
+    for fecha, values in days.items():
+        temperatures = [temperatura for temperatura, _ in values]
+        t_min, t_max = min(temperatures), max(temperatures)
+        gdd += (min(max(t_min, 10), 30) + min(max(t_max, 10), 30)) / 2 - 10
+        precipitation += sum(precipitacion or 0.0 for _, precipitacion in values)
+        radiation = float(extraterrestrial_radiation(np.array(crop.latitud), np.array(fecha.timetuple().tm_yday)))
+        et0 += 0.0023 * 0.408 * radiation * ((t_min + t_max) / 2 + 17.8) * (t_max - t_min) ** 0.5
+        heat_hours += sum(1 for temperatura in temperatures if temperatura >= 35)
+    return {
+        'dias_con_datos': len(days),
+        'grados_dia_acumulados': round(gdd, 2),
+        'precipitacion_acumulada': round(precipitation, 2),
+        'evapotranspiracion_acumulada': round(et0, 2),
+        'horas_estres_calor': heat_hours,
+        'num_registros': sum(len(values) for values in days.values()),
+    }
+
+def test_vectorized_indicators_match_naive_computation():
+    """
+    Prueba que el cálculo vectorizado de varios cultivos coincide con el cálculo lectura por lectura.
+    """
+    rng = random.Random(7)
+    readings = [
+        (
+            lote_id,
+            date(2024, 3, 1) + timedelta(days=day),
+            rng.uniform(8, 38),
+            None if rng.random() < 0.3 else rng.uniform(0, 4)
+        )
+        for lote_id in (3, 1, 2)
+        for day in range(40)
+        for _ in range(rng.randint(0, 24))
+    ]
+    rng.shuffle(readings)
+    crops = [
+        CropPeriod(1, 1, 2.5, date(2024, 3, 1), date(2024, 4, 30)),
+        CropPeriod(2, 2, -10.0, date(2024, 3, 10), date(2024, 3, 20)),
+        CropPeriod(3, 3, 45.0, date(2024, 3, 25), date(2024, 3, 24)),
+        CropPeriod(4, 4, 2.5, date(2024, 3, 1), date(2024, 3, 31)),
+    ]
+
+    arrays = (
+        np.array([row[0] for row in readings]),
+        np.array([row[1].toordinal() for row in readings]),
+        np.array([row[2] for row in readings]),
+        np.array([np.nan if row[3] is None else row[3] for row in readings]),
+    )
+    results = compute_crop_indicators(*arrays, crops)
+
+    for crop, result in zip(crops, results):
+        expected = _naive_indicators(readings, crop)
+        assert result['cultivo_id'] == crop.cultivo_id
+        for key, value in expected.items():
+            assert abs(result[key] - value) <= 0.02, (crop.cultivo_id, key)
+
+def test_farm_indicators_are_cached_per_crop_and_day(monkeypatch):
+    """
+    Prueba que los indicadores de una finca excluyen los cultivos cosechados, solo usan
+    días completos y se guardan en caché hasta el cambio de día.
+    """
+    monkeypatch.setattr(get_agroclimatic_indicators_use_case, 'get_current_date', lambda: TODAY)
+    engine = create_seed_engine()
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        seed = seed_database(db, SeedConfig(tasks=0, farms=1, plots_per_farm=2, crops_per_plot=1, weather_days=0))
+        db.commit()
+        harvested = db.query(CropState).filter(CropState.nombre == CropService.COSECHADO).one()
+        sown = db.query(CropState).filter(CropState.nombre != CropService.COSECHADO).first()
+        active_crop, harvested_crop = db.query(Crop).order_by(Crop.id).all()
+        active_crop.estado_id, active_crop.fecha_siembra = sown.id, TODAY - timedelta(days=2)
+        harvested_crop.estado_id = harvested.id
+        db.commit()
+
+        repository = WeatherRepository(db)
+        repository.bulk_create_weather_logs([
+            _reading(active_crop.lote_id, TODAY - timedelta(days=day), hour, 20.0 + hour, precipitacion=1.0)
+            for day in range(4)
+            for hour in (0, 12, 18)
+        ])
+
+        cache = CropIndicatorCache()
+        user = SimpleNamespace(id=seed.admin_user_id)
+        response = GetAgroclimaticIndicatorsUseCase(db, cache).get_farm_indicators(seed.farm_ids[0], user)
+
+        assert [crop.cultivo_id for crop in response.data] == [active_crop.id]
+        indicators = response.data[0]
+        assert (indicators.fecha_inicio, indicators.fecha_fin) == (TODAY - timedelta(days=2), TODAY - timedelta(days=1))
+        assert indicators.dias_con_datos == 2
+        assert indicators.num_registros == 6
+        assert indicators.precipitacion_acumulada == 6.0
+        assert indicators.horas_estres_calor == 2
+        assert indicators.grados_dia_acumulados == 2 * ((20 + 30) / 2 - 10)
+
+        # Una lectura nueva no cambia los indicadores cacheados del día
+        repository.bulk_create_weather_logs([_reading(active_crop.lote_id, TODAY - timedelta(days=1), 6, 20.0, precipitacion=5.0)])
+        cached = GetAgroclimaticIndicatorsUseCase(db, cache).get_crop_indicators(active_crop.id, user)
+        assert cached.data == indicators
+
+        monkeypatch.setattr(get_agroclimatic_indicators_use_case, 'get_current_date', lambda: TODAY + timedelta(days=1))
+        refreshed = GetAgroclimaticIndicatorsUseCase(db, cache).get_crop_indicators(active_crop.id, user)
+        assert refreshed.data.precipitacion_acumulada == 14.0
+        assert refreshed.data.num_registros == 10
+    engine.dispose()
@@ -0,0 +1,108 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from app.infrastructure.common.datetime_utils import datetime_utc_time
+from app.plot.infrastructure.sql_repository import PlotRepository
+from app.weather.application.get_current_weather_use_case import GetCurrentWeatherUseCase
+from app.weather.infrastructure.current_weather_cache import CurrentWeatherCache
+from app.weather.infrastructure.orm_models import WeatherLog
+
+class CountingFetcher:
+    """Simula la consulta a la API y cuenta las llamadas."""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    async def __call__(self, lat, lon):
+        self.calls.append((lat, lon))
+        await asyncio.sleep(0.02)
+        if self.fail:
+            raise RuntimeError("API no disponible")
+        return {"lat": lat, "lon": lon, "current": {"temp": 24.0}}
+
+def test_concurrent_misses_share_a_single_fetch():
+    """
+    Prueba que las solicitudes simultáneas de coordenadas cercanas hacen una sola consulta.
+    """
+    cache = CurrentWeatherCache(ttl_seconds=60, precision=2)
+    fetch = CountingFetcher()
+
+    async def run():
+        return await asyncio.gather(*(
+            cache.get_or_fetch(2.9271 + i * 0.0001, -75.2819, fetch) for i in range(20)
+        ))
+
+    results = asyncio.run(run())
+
+    assert fetch.calls == [(2.93, -75.28)]
+    assert all(result is results[0] for result in results)
+
+def test_expired_entries_and_failures_are_not_served():
+    """
+    Prueba que las entradas vencidas se vuelven a consultar y que los errores no se guardan.
+    """
+    cache = CurrentWeatherCache(ttl_seconds=0, precision=2)
+    fetch = CountingFetcher()
+    asyncio.run(cache.get_or_fetch(2.93, -75.28, fetch))
+    asyncio.run(cache.get_or_fetch(2.93, -75.28, fetch))
+    assert len(fetch.calls) == 2
+
+    cache = CurrentWeatherCache(ttl_seconds=60, precision=2)
+    failing = CountingFetcher(fail=True)
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_fetch(2.93, -75.28, failing))
+    assert cache.get(2.93, -75.28) is None
+
+def test_cancelling_the_first_request_does_not_cancel_the_others():
+    """
+    Prueba que si se cancela la solicitud que inició la consulta, las que la esperan reciben su resultado.
+    """
+    cache = CurrentWeatherCache(ttl_seconds=60, precision=2)
+    fetch = CountingFetcher()
+
+    async def run():
+        owner = asyncio.create_task(cache.get_or_fetch(2.93, -75.28, fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_fetch(2.93, -75.28, fetch))
+        await asyncio.sleep(0)
+        owner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        return await waiter
+
+    assert asyncio.run(run())["current"]["temp"] == 24.0
+    assert len(fetch.calls) == 1
+    assert cache.get(2.93, -75.28) is not None
+
+def _add_weather_log(db, lote_id, recorded_at):
+    db.add(WeatherLog(
+        lote_id=lote_id, fecha=recorded_at.date(), hora=recorded_at.time(),
+        temperatura=22.5, temperatura_sensacion=23.0, presion_atmosferica=1010, humedad_relativa=80,
+        indice_uv=3.0, nubosidad=75, velocidad_viento=1.5, direccion_viento=90,
+        descripcion_clima="nubes", codigo_clima="803"
+    ))
+    db.commit()
+
+def test_recent_plot_log_is_served_without_calling_the_api(session_factory):
+    """
+    Prueba que el registro de la última hora del lote se devuelve sin consultar la API.
+    """
+    fetch = CountingFetcher()
+    with session_factory() as db:
+        plot_ids = [plot.id for plot in PlotRepository(db).list_plots()]
+        _add_weather_log(db, plot_ids[0], datetime_utc_time() - timedelta(minutes=10))
+        _add_weather_log(db, plot_ids[1], datetime_utc_time() - timedelta(hours=3))
+        use_case = GetCurrentWeatherUseCase(db, cache=CurrentWeatherCache())
+        use_case._fetch_weather_data = fetch
+
+        recent = asyncio.run(use_case.get_current_weather(2.93, -75.28, lote_id=plot_ids[0]))
+        assert recent.data["source"] == "registro_meteorologico"
+        assert recent.data["current"]["weather"][0] == {"id": 803, "description": "nubes"}
+        assert fetch.calls == []
+
+        stale = asyncio.run(use_case.get_current_weather(2.93, -75.28, lote_id=plot_ids[1]))
+        assert stale.data["current"] == {"temp": 24.0}
+        assert len(fetch.calls) == 1
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from app.plot.infrastructure.sql_repository import PlotRepository
+from app.weather.application.get_weather_stats_use_case import GetWeatherStatsUseCase
+from app.weather.infrastructure.orm_models import WeatherLog
+from app.weather.infrastructure.recent_weather_cache import PlotWeatherBuffer, RecentWeatherCache
+from app.weather.infrastructure.sql_repository import WeatherRepository
+from tests.weather.test_weather_aggregates import _reading
+
+TODAY = date(2024, 7, 15)
+
+def test_full_buffer_replaces_the_oldest_reading():
+    """
+    Prueba que el búfer lleno descarta la lectura más antigua y devuelve las lecturas en orden.
+    """
+    buffer = PlotWeatherBuffer(capacity=3, covered_from=0)
+    for timestamp in (300, 100, 200, 400):
+        buffer.append(timestamp, (float(timestamp), 80.0, None, 1.0, None))
+
+    timestamps, values = buffer.select(0, 1000)
+
+    assert timestamps.tolist() == [200, 300, 400]
+    assert values[0].tolist() == [200.0, 300.0, 400.0]
+    assert buffer.covered_from == 101
+    # Las lecturas anteriores a la cobertura se ignoran
+    buffer.append(50, (50.0, 80.0, None, 1.0, None))
+    assert buffer.select(0, 1000)[0].tolist() == [200, 300, 400]
+    # Una lectura anterior a todas las guardadas se descarta y deja de estar cubierta
+    buffer.append(150, (150.0, 80.0, None, 1.0, None))
+    assert buffer.covered_from == 151
+
+def test_recent_ranges_are_answered_from_memory(session_factory):
+    """
+    Prueba que la caché coincide con SQL en la ventana reciente y recurre a SQL fuera de ella.
+    """
+    cache = RecentWeatherCache(window_days=7, sync_seconds=0, today=lambda: TODAY)
+    with session_factory() as db:
+        lote_id = PlotRepository(db).list_plots()[0].id
+        repository = WeatherRepository(db)
+        repository.bulk_create_weather_logs([
+            _reading(lote_id, TODAY - timedelta(days=day), hour, 15.0 + hour * 0.5 + day, precipitacion=0.25 * (hour % 3))
+            for day in range(10)
+            for hour in range(24)
+        ])
+        cache.warm(db)
+
+        start, end = TODAY - timedelta(days=6), TODAY
+        cached = cache.get_stats(db, lote_id, start, end)
+        expected = repository.get_weather_stats(lote_id, start, end)
+        assert cached.keys() == expected.keys()
+        for key, value in expected.items():
+            assert cached[key] == pytest.approx(value, abs=1e-3)
+        assert cache.get_hourly_readings(db, lote_id, start, end) == [
+            tuple(row) for row in repository.get_hourly_readings(lote_id, start, end)
+        ]
+        assert cache.get_stats(db, lote_id, TODAY - timedelta(days=9), end) is None
+
+        # Los registros guardados por otro proceso se leen en la siguiente consulta
+        repository.bulk_create_weather_logs([_reading(lote_id, TODAY + timedelta(days=1), 0, 40.0)])
+        assert cache.get_stats(db, lote_id, TODAY, TODAY + timedelta(days=1))['temperatura_max'] == 40.0
+
+        response = asyncio.run(GetWeatherStatsUseCase(db, cache=cache).get_weather_stats(lote_id, start, end))
+        assert response.data.num_registros == 7 * 24
+        assert response.data.temperatura_promedio == round(expected['temperatura_promedio'], 2)
+
+def test_sync_reads_readings_committed_out_of_id_order(session_factory):
+    """
+    Prueba que la sincronización lee una lectura reciente aunque su ID sea menor al último visto.
+    """
+    cache = RecentWeatherCache(window_days=7, sync_seconds=0, today=lambda: TODAY)
+    with session_factory() as db:
+        lote_id = PlotRepository(db).list_plots()[0].id
+        db.add(WeatherLog(id=10_000, **_reading(lote_id, TODAY, 12, 20.0).model_dump()))
+        db.commit()
+        cache.sync(db)
+
+        # Una transacción que reservó un ID menor confirma su lectura después
+        db.add(WeatherLog(id=5_000, **_reading(lote_id, TODAY, 11, 35.0).model_dump()))
+        db.commit()
+        cache.sync(db)
+
+        assert cache.get_stats(db, lote_id, TODAY, TODAY)['temperatura_max'] == 35.0
@@ -0,0 +1,78 @@
+import asyncio
+from datetime import date, time, timedelta
+
+from app.plot.infrastructure.sql_repository import PlotRepository
+from app.weather.application.get_weather_aggregates_use_case import GetWeatherAggregatesUseCase
+from app.weather.domain.schemas import WeatherGranularity, WeatherLogCreate
+from app.weather.infrastructure.orm_models import WeatherDailySummary
+from app.weather.infrastructure.sql_repository import WeatherRepository
+
+def _reading(lote_id, fecha, hour, temperatura, precipitacion=None, rafaga=None):
+    return WeatherLogCreate(
+        lote_id=lote_id, fecha=fecha, hora=time(hour), temperatura=temperatura, temperatura_sensacion=temperatura,
+        temperatura_unidad_id=None, presion_atmosferica=1010, presion_unidad_id=None, humedad_relativa=80,
+        humedad_unidad_id=None, precipitacion=precipitacion, precipitacion_unidad_id=None, indice_uv=2,
+        nubosidad=50, nubosidad_unidad_id=None, velocidad_viento=1, velocidad_viento_unidad_id=None,
+        direccion_viento=90, direccion_viento_unidad_id=None, rafaga_viento=rafaga, rafaga_viento_unidad_id=None,
+        visibilidad=10000, visibilidad_unidad_id=None, punto_rocio=None, punto_rocio_unidad_id=None,
+        descripcion_clima="nubes", codigo_clima="803"
+    )
+
+def _summary_values(db):
+    return [
+        (s.lote_id, s.fecha, s.temperatura_min, s.temperatura_max, s.temperatura_suma,
+         s.precipitacion_total, s.rafaga_max, s.num_registros)
+        for s in db.query(WeatherDailySummary).order_by(WeatherDailySummary.fecha).all()
+    ]
+
+def test_daily_summaries_are_maintained_incrementally(session_factory):
+    """
+    Prueba que los resúmenes diarios incrementales coinciden con los recalculados.
+    """
+    monday = date(2024, 7, 1)
+    with session_factory() as db:
+        lote_id = PlotRepository(db).list_plots()[0].id
+        repository = WeatherRepository(db)
+        repository.bulk_create_weather_logs([
+            _reading(lote_id, monday, 0, 18.0, precipitacion=1.5),
+            _reading(lote_id, monday, 1, 22.0, rafaga=4.0),
+        ])
+        repository.create_weather_log(_reading(lote_id, monday, 2, 26.0, precipitacion=0.5, rafaga=6.0))
+        repository.bulk_create_weather_logs([_reading(lote_id, monday + timedelta(days=1), 0, 20.0)])
+
+        incremental = _summary_values(db)
+        repository.rebuild_daily_summaries(monday, monday + timedelta(days=1))
+
+        assert incremental == _summary_values(db)
+        assert incremental[0][2:] == (18.0, 26.0, 66.0, 2.0, 6.0, 3)
+
+def test_aggregates_by_granularity(session_factory):
+    """
+    Prueba la agregación por hora, semana y mes.
+    """
+    monday = date(2024, 7, 29)
+    with session_factory() as db:
+        lote_id = PlotRepository(db).list_plots()[0].id
+        WeatherRepository(db).bulk_create_weather_logs([
+            _reading(lote_id, monday + timedelta(days=day), hour, 20.0 + day, precipitacion=1.0)
+            for day in range(7)
+            for hour in range(24)
+        ])
+        use_case = GetWeatherAggregatesUseCase(db)
+
+        def aggregate(granularity):
+            response = asyncio.run(use_case.get_weather_aggregates(lote_id, monday, monday + timedelta(days=6), granularity))
+            return response.data
+
+        hourly = aggregate(WeatherGranularity.HOUR)
+        weekly = aggregate(WeatherGranularity.WEEK)
+        monthly = aggregate(WeatherGranularity.MONTH)
+
+    assert len(hourly) == 7 * 24
+    assert len(weekly) == 1
+    assert weekly[0].temperatura_min == 20.0
+    assert weekly[0].temperatura_max == 26.0
+    assert weekly[0].temperatura_promedio == 23.0
+    assert weekly[0].precipitacion_total == 168.0
+    # La semana cruza el cambio de mes (julio y agosto)
+    assert [m.num_registros for m in monthly] == [3 * 24, 4 * 24]
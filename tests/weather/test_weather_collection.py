@@ -0,0 +1,141 @@
+import asyncio
+from datetime import date, timedelta
+
+from app.crop.infrastructure.orm_models import Crop, CropState, CornVariety
+from app.cultural_practices.infrastructure.orm_models import CulturalTask, CulturalTaskState, CulturalTaskType
+from app.infrastructure.common.datetime_utils import current_utc_hour
+from app.infrastructure.scheduler.weather_scheduler import WeatherScheduler
+from app.measurement.infrastructure.orm_models import UnitOfMeasure
+from app.plot.infrastructure.sql_repository import PlotRepository
+from app.weather.domain.schemas import WeatherCollectionPolicy
+from app.weather.infrastructure.orm_models import WeatherLog
+from app.weather.infrastructure.sql_repository import WeatherRepository
+from tests.weather.test_weather_aggregates import _reading
+
+TODAY = date(2024, 7, 15)
+
+def _add_crop(db, lote_id, state_name, fecha_cosecha=None):
+    db.add(Crop(
+        lote_id=lote_id, variedad_maiz_id=db.query(CornVariety).first().id, fecha_siembra=date(2024, 1, 10),
+        densidad_siembra=60000, densidad_siembra_unidad_id=db.query(UnitOfMeasure).first().id,
+        estado_id=db.query(CropState).filter(CropState.nombre == state_name).one().id, fecha_cosecha=fecha_cosecha
+    ))
+
+def _add_task(db, lote_id, fecha_inicio):
+    db.add(CulturalTask(
+        nombre="Riego", tipo_labor_id=db.query(CulturalTaskType).first().id, fecha_inicio_estimada=fecha_inicio,
+        estado_id=db.query(CulturalTaskState).first().id, lote_id=lote_id
+    ))
+
+def test_plots_to_collect_follow_farm_policy(session_factory):
+    """
+    Prueba que solo se recolectan los lotes activos, según la configuración de cada finca.
+    """
+    with session_factory() as db:
+        plots = PlotRepository(db).list_plots()
+        farm_ids = sorted({plot.finca_id for plot in plots})
+        first_farm = [plot.id for plot in plots if plot.finca_id == farm_ids[0]]
+        second_farm = [plot.id for plot in plots if plot.finca_id == farm_ids[1]]
+
+        _add_crop(db, first_farm[0], "Sembrado")
+        _add_crop(db, first_farm[1], "Cosechado", fecha_cosecha=TODAY - timedelta(days=200))
+        _add_task(db, first_farm[2], TODAY - timedelta(days=5))
+        _add_task(db, first_farm[3], TODAY - timedelta(days=90))
+        db.commit()
+
+        repository = WeatherRepository(db)
+
+        def collected():
+            return [plot.id for plot in repository.list_plots_to_collect(TODAY, WeatherCollectionPolicy.ACTIVE, 30)]
+
+        assert collected() == first_farm[0:1] + first_farm[2:3]
+
+        repository.save_collection_setting(farm_ids[1], WeatherCollectionPolicy.ALL, None)
+        assert collected() == first_farm[0:1] + first_farm[2:3] + second_farm
+
+        # Con un día de actividad la labor de hace cinco días ya no mantiene activo el lote
+        repository.save_collection_setting(farm_ids[0], WeatherCollectionPolicy.ACTIVE, 1)
+        repository.save_collection_setting(farm_ids[1], WeatherCollectionPolicy.DISABLED, None)
+        assert collected() == first_farm[0:1]
+
+class FakeHistoryClient:
+    """Simula la API histórica y registra los rangos consultados."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def fetch_history(self, lat, lon, start, end):
+        self.calls.append((lat, lon, start, end))
+        hours = int((end - start).total_seconds() // 3600) + 1
+        return [
+            {
+                "dt": int((start + timedelta(hours=hour)).timestamp()),
+                "main": {"temp": 20.0, "feels_like": 21.0, "pressure": 1011, "humidity": 75},
+                "wind": {"speed": 1.5, "deg": 90},
+                "clouds": {"all": 20},
+                "weather": [{"id": 801, "description": "algo de nubes"}]
+            }
+            for hour in range(hours)
+        ]
+
+def test_missed_hours_are_backfilled_in_bulk(session_factory):
+    """
+    Prueba que las horas perdidas se recuperan con una consulta por celda y no una por hora.
+    """
+    last_recorded = current_utc_hour() - timedelta(hours=6)
+    with session_factory() as db:
+        plot_ids = [plot.id for plot in PlotRepository(db).list_plots()]
+        WeatherRepository(db).bulk_create_weather_logs([
+            _reading(lote_id, last_recorded.date(), last_recorded.hour, 20.0) for lote_id in plot_ids
+        ])
+
+    client = FakeHistoryClient()
+    scheduler = WeatherScheduler(
+        weather_client=client,
+        session_factory=session_factory,
+        calls_per_minute=60000,
+        grid_precision=0,
+        default_policy=WeatherCollectionPolicy.ALL
+    )
+    metrics = asyncio.run(scheduler.backfill_missed_hours())
+
+    assert len(client.calls) == metrics.api_calls < len(plot_ids)
+    assert metrics.succeeded == 5 * len(plot_ids)
+    with session_factory() as db:
+        assert db.query(WeatherLog).count() == 6 * len(plot_ids)
+        last_hour = current_utc_hour() - timedelta(hours=1)
+        assert WeatherRepository(db).get_last_recorded_slots(plot_ids) == {lote_id: last_hour for lote_id in plot_ids}
+    # Sin horas pendientes no se vuelve a consultar la API
+    assert asyncio.run(scheduler.backfill_missed_hours()) is None
+
+def test_backfill_starts_from_each_plot_last_reading(session_factory):
+    """
+    Prueba que un lote al día no oculta las horas que faltan en los demás lotes.
+    """
+    slot = current_utc_hour()
+    stale = slot - timedelta(hours=4)
+    up_to_date = slot - timedelta(hours=1)
+    with session_factory() as db:
+        plot_ids = [plot.id for plot in PlotRepository(db).list_plots()]
+        stale_ids, current_ids = plot_ids[::2], plot_ids[1::2]
+        WeatherRepository(db).bulk_create_weather_logs(
+            [_reading(lote_id, stale.date(), stale.hour, 20.0) for lote_id in stale_ids]
+            + [_reading(lote_id, up_to_date.date(), up_to_date.hour, 20.0) for lote_id in current_ids]
+        )
+
+    client = FakeHistoryClient()
+    scheduler = WeatherScheduler(
+        weather_client=client,
+        session_factory=session_factory,
+        calls_per_minute=60000,
+        grid_precision=0,
+        default_policy=WeatherCollectionPolicy.ALL
+    )
+    metrics = asyncio.run(scheduler.backfill_missed_hours())
+
+    assert metrics.api_calls == len(client.calls)
+    assert metrics.succeeded == 3 * len(stale_ids)
+    with session_factory() as db:
+        last_recorded = WeatherRepository(db).get_last_recorded_slots(plot_ids)
+        assert all(recorded_at == up_to_date for recorded_at in last_recorded.values())
+        assert db.query(WeatherLog).count() == 4 * len(stale_ids) + len(current_ids)
@@ -0,0 +1,80 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date, time
+
+import pytest
+
+from app.infrastructure.common.common_exceptions import DomainException
+from app.plot.infrastructure.sql_repository import PlotRepository
+from app.weather.application import export_weather_logs_use_case
+from app.weather.application.export_weather_logs_use_case import ExportWeatherLogsUseCase
+from app.weather.application.services.weather_measurement_service import WeatherMeasurementService
+from app.weather.domain.schemas import WeatherExportFormat, WeatherLogCreate
+from app.weather.infrastructure.sql_repository import WeatherRepository
+
+def _reading(lote_id, fecha, hour, unit_ids):
+    return WeatherLogCreate(
+        lote_id=lote_id, fecha=fecha, hora=time(hour), temperatura=20.0 + hour, temperatura_sensacion=21.0,
+        temperatura_unidad_id=unit_ids.temperature_celsius_id, presion_atmosferica=1010,
+        presion_unidad_id=unit_ids.pressure_hpa_id, humedad_relativa=80, humedad_unidad_id=unit_ids.humidity_percent_id,
+        precipitacion=None, precipitacion_unidad_id=None, indice_uv=2, nubosidad=50,
+        nubosidad_unidad_id=unit_ids.cloudiness_percent_id, velocidad_viento=1,
+        velocidad_viento_unidad_id=unit_ids.wind_speed_ms_id, direccion_viento=90,
+        direccion_viento_unidad_id=unit_ids.wind_direction_degree_id, rafaga_viento=None, rafaga_viento_unidad_id=None,
+        visibilidad=10000, visibilidad_unidad_id=unit_ids.visibility_m_id, punto_rocio=None, punto_rocio_unidad_id=None,
+        descripcion_clima="nubes", codigo_clima="803"
+    )
+
+@pytest.fixture
+def plot_ids(session_factory):
+    """Fixture que registra 24 lecturas el 1 y el 2 de julio para dos lotes."""
+    with session_factory() as db:
+        unit_ids = WeatherMeasurementService.get_unit_ids(db)
+        plot_ids = [plot.id for plot in PlotRepository(db).list_plots()][:3]
+        WeatherRepository(db).bulk_create_weather_logs([
+            _reading(lote_id, date(2024, 7, day), hour, unit_ids)
+            for lote_id in plot_ids[:2]
+            for day in (1, 2)
+            for hour in range(24)
+        ])
+    return plot_ids
+
+def test_csv_export_is_streamed_in_chunks(session_factory, plot_ids, monkeypatch):
+    """
+    Prueba que la exportación CSV se entrega por bloques, en orden y con las abreviaturas de las unidades.
+    """
+    monkeypatch.setattr(export_weather_logs_use_case, "EXPORT_CHUNK_SIZE", 1024)
+    with session_factory() as db:
+        chunks = list(ExportWeatherLogsUseCase(db).export_weather_logs(
+            plot_ids, date(2024, 7, 2), date(2024, 7, 31), WeatherExportFormat.CSV
+        ))
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert len(chunks) > 1
+    assert len(rows) == 2 * 24
+    assert [int(row["lote_id"]) for row in rows] == sorted(int(row["lote_id"]) for row in rows)
+    assert rows[0]["fecha"] == "2024-07-02"
+    assert rows[0]["hora"] == "00:00:00"
+    assert rows[0]["temperatura_unidad"] == "°C"
+    assert rows[0]["precipitacion_unidad"] == ""
+
+def test_gzip_ndjson_export(session_factory, plot_ids):
+    """
+    Prueba la exportación NDJSON comprimida y la validación de la solicitud.
+    """
+    with session_factory() as db:
+        use_case = ExportWeatherLogsUseCase(db)
+        content = b"".join(use_case.export_weather_logs(
+            [plot_ids[1]], date(2024, 7, 1), date(2024, 7, 1), WeatherExportFormat.NDJSON, compress=True
+        ))
+
+        with pytest.raises(DomainException):
+            use_case.export_weather_logs(plot_ids, date(2024, 7, 2), date(2024, 7, 1))
+
+    records = [json.loads(line) for line in gzip.decompress(content).decode("utf-8").splitlines()]
+    assert len(records) == 24
+    assert {record["lote_id"] for record in records} == {plot_ids[1]}
+    assert records[-1]["hora"] == "23:00:00"
+    assert records[-1]["presion_unidad"] == "hPa"
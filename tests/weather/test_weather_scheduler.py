@@ -0,0 +1,217 @@
+import asyncio
+from dataclasses import FrozenInstanceError
+
+import pytest
+from sqlalchemy import event
+
+from app.infrastructure.common.datetime_utils import current_utc_hour
+from app.infrastructure.scheduler.job_lock import DatabaseJobLock, FileJobLock
+from app.infrastructure.scheduler.orm_models import ScheduledJobRun
+from app.infrastructure.scheduler.weather_scheduler import WEATHER_RECORDING_JOB, WeatherScheduler
+from app.plot.infrastructure.sql_repository import PlotRepository
+from app.weather.application.record_weather_use_case import RecordWeatherUseCase
+from app.weather.application.services.weather_measurement_service import WeatherMeasurementService
+from app.weather.domain.schemas import WeatherCollectionPolicy
+from app.weather.infrastructure.orm_models import WeatherLog
+from app.weather.infrastructure.sql_repository import WeatherRepository
+
+class FakeWeatherClient:
+    """Simula el cliente de OpenWeatherMap y registra la concurrencia alcanzada."""
+
+    def __init__(self, failing_calls=()):
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.failing_calls = set(failing_calls)
+        self.closed = False
+
+    async def fetch_current(self, lat, lon):
+        self.calls += 1
+        call_number = self.calls
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.02)
+            if call_number in self.failing_calls:
+                raise RuntimeError("API no disponible")
+            return {
+                "current": {
+                    "temp": 25.0, "feels_like": 26.0, "pressure": 1012, "humidity": 70,
+                    "uvi": 5.0, "clouds": 40, "wind_speed": 2.5, "wind_deg": 180,
+                    "weather": [{"id": 800, "description": "cielo claro"}]
+                }
+            }
+        finally:
+            self.in_flight -= 1
+
+    async def aclose(self):
+        self.closed = True
+
+def test_collection_is_concurrent_and_isolates_failures(session_factory):
+    """
+    Prueba que los lotes se procesan en paralelo y que un error no detiene la ejecución.
+    """
+    client = FakeWeatherClient(failing_calls={3})
+    scheduler = WeatherScheduler(
+        weather_client=client,
+        session_factory=session_factory,
+        default_policy=WeatherCollectionPolicy.ALL,
+        max_concurrency=4,
+        calls_per_minute=60000,
+        grid_precision=6
+    )
+
+    metrics = asyncio.run(scheduler.record_weather_for_all_plots())
+
+    assert metrics.total_plots == 12
+    assert metrics.succeeded == 11
+    assert metrics.failed == 1
+    assert client.max_in_flight == 4
+    with session_factory() as db:
+        assert db.query(WeatherLog).count() == 11
+    assert scheduler.last_run_metrics is metrics
+
+def test_collection_respects_rate_limit(session_factory):
+    """
+    Prueba que la recolección no supera el máximo de llamadas por minuto.
+    """
+    client = FakeWeatherClient()
+    # 1200 llamadas por minuto equivalen a una llamada cada 50 ms
+    scheduler = WeatherScheduler(
+        weather_client=client,
+        session_factory=session_factory,
+        default_policy=WeatherCollectionPolicy.ALL,
+        max_concurrency=12,
+        calls_per_minute=1200,
+        grid_precision=6
+    )
+
+    metrics = asyncio.run(scheduler.record_weather_for_all_plots())
+
+    assert metrics.succeeded == 12
+    assert metrics.duration_seconds >= 11 * 0.05
+
+def test_nearby_plots_share_a_single_api_call(session_factory):
+    """
+    Prueba que los lotes de una misma celda de la cuadrícula comparten una consulta.
+    """
+    client = FakeWeatherClient()
+    # Con 0 decimales las celdas son de ~111 km y agrupan varios lotes
+    scheduler = WeatherScheduler(
+        weather_client=client,
+        session_factory=session_factory,
+        default_policy=WeatherCollectionPolicy.ALL,
+        calls_per_minute=60000,
+        grid_precision=0
+    )
+
+    metrics = asyncio.run(scheduler.record_weather_for_all_plots())
+
+    assert metrics.succeeded == 12
+    assert client.calls == metrics.api_calls
+    assert metrics.api_calls < 12
+    with session_factory() as db:
+        assert db.query(WeatherLog).count() == 12
+
+def test_bulk_insert_isolates_failing_rows(session_factory):
+    """
+    Prueba que la inserción masiva guarda las filas válidas aunque una falle.
+    """
+    with session_factory() as db:
+        plot_ids = [plot.id for plot in PlotRepository(db).list_plots()][:3]
+        use_case = RecordWeatherUseCase(db, weather_client=FakeWeatherClient())
+        weather_logs = asyncio.run(use_case.collect_weather_for_plots(plot_ids, 2.5, -75.5))
+        # Un registro sin lote viola la restricción NOT NULL
+        weather_logs[1] = weather_logs[1].model_copy(update={"lote_id": None})
+
+        failures = WeatherRepository(db).bulk_create_weather_logs(weather_logs, chunk_size=2)
+
+        assert [log.lote_id for log, _ in failures] == [None]
+        assert db.query(WeatherLog).count() == 2
+
+def test_weather_units_are_resolved_once(session_factory):
+    """
+    Prueba que los IDs de unidades se comparten y no se consultan en cada lectura.
+    """
+    with session_factory() as db:
+        service = WeatherMeasurementService(db)
+        db.close()
+        queries = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: queries.append(args[2]))
+
+        other_service = WeatherMeasurementService(db)
+        other_service.validate_weather_units()
+
+        assert queries == []
+        assert other_service.TEMPERATURE_CELSIUS_ID == service.TEMPERATURE_CELSIUS_ID
+        with pytest.raises(FrozenInstanceError):
+            WeatherMeasurementService.get_unit_ids(db).temperature_celsius_id = 0
+
+def test_only_one_worker_records_each_hour(session_factory, tmp_path):
+    """
+    Prueba que, con varios workers, solo uno realiza la recolección de cada hora.
+    """
+    client = FakeWeatherClient()
+    workers = [
+        WeatherScheduler(
+            weather_client=client,
+            session_factory=session_factory,
+        default_policy=WeatherCollectionPolicy.ALL,
+            calls_per_minute=60000,
+            grid_precision=6,
+            job_lock=FileJobLock(tmp_path)
+        )
+        for _ in range(3)
+    ]
+
+    async def run():
+        return await asyncio.gather(*(worker.record_weather_for_all_plots() for worker in workers))
+
+    results = asyncio.run(run())
+
+    assert len([metrics for metrics in results if metrics is not None]) == 1
+    assert client.calls == 12
+    with session_factory() as db:
+        assert db.query(WeatherLog).count() == 12
+
+def test_database_lock_allows_takeover_of_expired_runs(session_factory):
+    """
+    Prueba que una ejecución se reclama una sola vez y que un arriendo vencido se puede retomar.
+    """
+    slot = current_utc_hour()
+    first = DatabaseJobLock(session_factory, owner_id="worker-1", lease_minutes=0)
+    second = DatabaseJobLock(session_factory, owner_id="worker-2")
+
+    assert first.acquire(WEATHER_RECORDING_JOB, slot)
+    # El primer worker murió sin liberar la ejecución y su arriendo ya venció
+    assert second.acquire(WEATHER_RECORDING_JOB, slot)
+    assert not first.acquire(WEATHER_RECORDING_JOB, slot)
+
+    second.release(WEATHER_RECORDING_JOB, slot)
+    assert not DatabaseJobLock(session_factory, owner_id="worker-3", lease_minutes=0).acquire(WEATHER_RECORDING_JOB, slot)
+
+def test_rerun_of_an_hour_is_idempotent(session_factory):
+    """
+    Prueba que repetir la recolección de una hora no consulta la API ni duplica registros.
+    """
+    client = FakeWeatherClient(failing_calls={1})
+    scheduler = WeatherScheduler(
+        weather_client=client,
+        session_factory=session_factory,
+        default_policy=WeatherCollectionPolicy.ALL,
+        calls_per_minute=60000,
+        grid_precision=6
+    )
+
+    first = asyncio.run(scheduler.record_weather_for_all_plots())
+    with session_factory() as db:
+        db.query(ScheduledJobRun).delete()
+        db.commit()
+    second = asyncio.run(scheduler.record_weather_for_all_plots())
+
+    assert first.succeeded == 11
+    # Solo se reintenta el lote que falló en la primera ejecución
+    assert second.total_plots == 1
+    assert client.calls == 13
+    with session_factory() as db:
+        assert db.query(WeatherLog).count() == 12